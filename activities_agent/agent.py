@@ -1,86 +1,123 @@
-from typing import Optional
+from typing import Optional, List
 import logging
 
-from google.adk.agents import Agent
-from .mock_data import ACTIVITIES_DB, get_activity_cities, get_activity_categories
+from inventory import ActivityRecord, ActivityCitySummary, PAISE_PER_RUPEE, get_backend, inventory_tool, resolve_city
+from cache_utils import cached_search, normalize_city, normalize_filter
+from agent_utils import lazy_agent
+from logging_utils import tool_metrics
+from response_utils import (
+    COMPACT_FORMAT_INSTRUCTION, CompactResponse, activity_item, get_option_details, use_compact
+)
 from config import MODEL_NAME
 
 # Setup logger for activities agent
 logger = logging.getLogger('travel_agent.activities_agent')
 
+def find_activities(city: str,
+                    min_rating: Optional[float] = None,
+                    max_price: Optional[int] = None) -> Optional[List[ActivityRecord]]:
+    """Filters the typed activity records for a city.
+
+    Args:
+        city (str): The city to search for activities.
+        min_rating (float, optional): Minimum activity rating (1-5 stars).
+        max_price (int, optional): Maximum price in rupees. Free activities always match.
+
+    Returns:
+        list: Matching activity records sorted by rating (highest first),
+            or None if the city is not covered.
+    """
+    return get_backend().activities(
+        resolve_city(city),
+        min_rating=min_rating or None,
+        max_price_paise=max_price * PAISE_PER_RUPEE if max_price else None,
+    )
+
+def find_activity_summary(city: str) -> Optional[ActivityCitySummary]:
+    """Returns the precomputed activity aggregates for a city, or None if it is not covered."""
+    return get_backend().activity_summary(resolve_city(city))
+
+def activity_search_response(city: str, activities: Optional[List[ActivityRecord]],
+                             min_rating: Optional[float] = None,
+                             max_price: Optional[int] = None) -> dict:
+    """Builds the search_activities response for a set of activity records.
+
+    Args:
+        city (str): The city as given by the caller.
+        activities (List[ActivityRecord], optional): Records returned by find_activities.
+        min_rating (float, optional): The min_rating filter that was applied.
+        max_price (int, optional): The max_price filter that was applied.
+
+    Returns:
+        dict: Status and list of available activities or error message.
+    """
+    if activities is None:
+        available_cities = get_backend().activity_cities()
+        return {
+            "status": "error",
+            "error_message": f"No activities available in {city.title()}. Available cities: {', '.join([c.title() for c in available_cities])}"
+        }
+
+    return {
+        "status": "success",
+        "city": city.title(),
+        "activities_found": len(activities),
+        "activities": [activity.to_dict() for activity in activities],
+        "filters_applied": {
+            "min_rating": f"{min_rating} stars" if min_rating else "None",
+            "max_price": f"₹{max_price:,}" if max_price else "None"
+        }
+    }
+
+@tool_metrics(label="city", results=("activities",))
+@inventory_tool
+@cached_search("search_activities", scopes=[("activities", "city")], city=normalize_city,
+               min_rating=normalize_filter, max_price=normalize_filter, compact=use_compact, top_k=normalize_filter)
 def search_activities(city: str, 
                      min_rating: Optional[float] = None,
-                     max_price: Optional[int] = None) -> dict:
+                     max_price: Optional[int] = None,
+                     compact: Optional[bool] = None,
+                     top_k: Optional[int] = None) -> dict:
     """Search for activities in a city with optional rating and price filters.
 
     Args:
         city (str): The city to search for activities.
         min_rating (float, optional): Minimum activity rating (1-5 stars).
         max_price (int, optional): Maximum price in rupees.
+        compact (bool, optional): Return only the top activities as rows of key fields, each
+            with an id for get_option_details. Defaults to config.COMPACT_TOOL_RESPONSES.
+        top_k (int, optional): Activities to list in compact mode. Defaults to config.COMPACT_TOP_K.
 
     Returns:
         dict: Status and list of available activities or error message.
     """
-    logger.info(f"Searching activities in {city}, filters: min_rating={min_rating}, max_price={max_price}")
+    logger.info("Searching activities in %s, filters: min_rating=%s, max_price=%s", city, min_rating, max_price)
     
     try:
-        city_key = city.lower()
-        
-        # Check if city exists in activities database
-        if city_key not in ACTIVITIES_DB:
-            available_cities = get_activity_cities()
-            logger.warning(f"No activities available in {city}. Available cities: {available_cities}")
-            return {
-                "status": "error",
-                "error_message": f"No activities available in {city.title()}. Available cities: {', '.join([c.title() for c in available_cities])}"
-            }
-        
-        # Get all activities for the city
-        all_activities = ACTIVITIES_DB[city_key]
-        filtered_activities = []
-        logger.info(f"Found {len(all_activities)} total activities in {city}, applying filters...")
-        
-        # Apply filters only if specified
-        for activity in all_activities:
-            # Rating filter
-            if min_rating and activity["rating"] < min_rating:
-                continue
-                
-            # Price filter
-            if max_price and activity["price"] != "₹free":
-                try:
-                    activity_price = int(activity["price"].replace("₹", "").replace(",", ""))
-                    if activity_price > max_price:
-                        continue
-                except ValueError:
-                    # Skip if price parsing fails
-                    continue
+        activities = find_activities(city, min_rating, max_price)
         
-        filtered_activities.append(activity)
-    
-        # Sort by rating (highest first)
-        filtered_activities.sort(key=lambda x: x["rating"], reverse=True)
+        if activities is None:
+            logger.warning("No activities available in %s. Available cities: %s", city, get_backend().activity_cities())
+        else:
+            logger.info("Activities search completed for %s: %s activities found", city, len(activities))
         
-        logger.info(f"Activities search completed for {city}: {len(filtered_activities)} activities found")
+        response = activity_search_response(city, activities, min_rating, max_price)
+        if not use_compact(compact) or response["status"] != "success":
+            return response
         
-        return {
-            "status": "success",
-            "city": city.title(),
-            "activities_found": len(filtered_activities),
-            "activities": filtered_activities,
-            "filters_applied": {
-                "min_rating": f"{min_rating} stars" if min_rating else "None",
-                "max_price": f"₹{max_price:,}" if max_price else "None"
-            }
-        }
+        compact_response = CompactResponse(top_k)
+        compact_response.add_options("activities", "activity", activities, activity_item)
+        return compact_response.build({"city": response["city"]})
         
     except Exception as e:
-        logger.error(f"Error searching activities in {city}: {str(e)}", exc_info=True)
+        logger.error("Error searching activities in %s: %s", city, e, exc_info=True)
         return {
             "status": "error",
             "error_message": f"Error searching activities: {str(e)}"
         }
 
+@tool_metrics()
+@inventory_tool
 def get_all_activities() -> dict:
     """Get all activities across all cities for overview.
     
@@ -89,10 +126,9 @@ def get_all_activities() -> dict:
     """
     all_cities_activities = {}
     
-    for city, activities in ACTIVITIES_DB.items():
-        # Sort activities by rating
-        sorted_activities = sorted(activities, key=lambda x: x["rating"], reverse=True)
-        all_cities_activities[city.title()] = sorted_activities
+    for city, activities in get_backend().all_activities().items():
+        # The backend returns activities sorted by rating
+        all_cities_activities[city.title()] = [activity.to_dict() for activity in activities]
     
     return {
         "status": "success",
@@ -101,42 +137,42 @@ def get_all_activities() -> dict:
         "activities_by_city": all_cities_activities
     }
 
-def get_activities_by_category(category: str) -> dict:
+@tool_metrics()
+@inventory_tool
+def get_activities_by_category(category: str, min_rating: Optional[float] = None,
+                               top_k: Optional[int] = None) -> dict:
     """Get activities by category across all cities.
     
     Args:
-        category (str): The activity category to search for.
+        category (str): The activity category to search for (any case).
+        min_rating (float, optional): Minimum activity rating (1-5).
+        top_k (int, optional): Most highly rated activities to list per city.
         
     Returns:
         dict: Activities matching the category from all cities.
     """
-    logger.info(f"Searching activities by category: {category}")
+    logger.info("Searching activities by category: %s, filters: min_rating=%s, top_k=%s", category, min_rating, top_k)
     
     try:
         category_activities = {}
-        available_categories = get_activity_categories()
+        backend = get_backend()
         
         # Check if category exists
-        if category not in available_categories:
-            logger.warning(f"Category '{category}' not found. Available: {available_categories}")
+        catalog_category = backend.activity_category(category)
+        if catalog_category is None:
+            available_categories = backend.activity_categories()
+            logger.warning("Category '%s' not found. Available: %s", category, available_categories)
             return {
                 "status": "error",
                 "error_message": f"Category '{category}' not found. Available categories: {', '.join(available_categories)}"
             }
         
-        # Search for activities in the specified category across all cities
-        for city, activities in ACTIVITIES_DB.items():
-            matching_activities = [
-                activity for activity in activities 
-                if activity["category"].lower() == category.lower()
-            ]
-            
-            if matching_activities:
-                # Sort by rating (highest first)
-                matching_activities.sort(key=lambda x: x["rating"], reverse=True)
-                category_activities[city.title()] = matching_activities
+        # The backend answers from its category postings, each city's matches by rating
+        for city, activities in backend.activities_by_category(category, min_rating or None, top_k or None).items():
+            category_activities[city.title()] = [activity.to_dict() for activity in activities]
+        category = catalog_category
         
-        logger.info(f"Category search completed: {len(category_activities)} cities have {category} activities")
+        logger.info("Category search completed: %s cities have %s activities", len(category_activities), category)
         
         return {
             "status": "success",
@@ -147,28 +183,39 @@ def get_activities_by_category(category: str) -> dict:
         }
         
     except Exception as e:
-        logger.error(f"Error searching activities by category {category}: {str(e)}", exc_info=True)
+        logger.error("Error searching activities by category %s: %s", category, e, exc_info=True)
         return {
             "status": "error",
             "error_message": f"Error searching by category: {str(e)}"
         }
 
-activities_agent = Agent(
-    name="activities_booking_agent",
-    model=MODEL_NAME,
-    description=(
-        "Activities booking agent that can search for activities and experiences in tourist cities across India."
-    ),
-    instruction=(
-        "You are a helpful activities booking agent. When users ask about activities in a city, "
-        "always show them the complete list of activities first using search_activities(city) with no filters. "
-        "Each city has 4-5 carefully curated activities with ratings (1-5 stars) and prices. "
-        "Only apply rating or price filters if the user specifically asks for them (e.g., 'show me activities with 4+ stars' or 'under ₹2000'). "
-        "Always display the activity name, category, duration, price, rating, and description clearly. "
-        "Keep your responses simple and focused on the activities available."
-    ),
-    tools=[search_activities, get_all_activities, get_activities_by_category],
-)
+def build_activities_agent(model=None):
+    """Builds the activities booking agent. Imports google.adk on first call.
+
+    Args:
+        model: Model name or ADK BaseLlm instance (e.g. a stub for load tests).
+            Defaults to config.MODEL_NAME.
+    """
+    from google.adk.agents import Agent
+    from llm_cache import agent_callbacks
+
+    return Agent(
+        name="activities_booking_agent",
+        model=model or MODEL_NAME,
+        description=(
+            "Activities booking agent that can search for activities and experiences in tourist cities across India."
+        ),
+        instruction=(
+            "You are a helpful activities booking agent. When users ask about activities in a city, "
+            "always show them the complete list of activities first using search_activities(city) with no filters. "
+            "Each city has 4-5 carefully curated activities with ratings (1-5 stars) and prices. "
+            "Only apply rating or price filters if the user specifically asks for them (e.g., 'show me activities with 4+ stars' or 'under ₹2000'). "
+            "Always display the activity name, category, duration, price, rating, and description clearly. "
+            "Keep your responses simple and focused on the activities available. " + COMPACT_FORMAT_INSTRUCTION
+        ),
+        tools=[search_activities, get_all_activities, get_activities_by_category, get_option_details],
+        **agent_callbacks(),
+    )
 
-# Export as root_agent for Google ADK compatibility
-root_agent = activities_agent
+# activities_agent and root_agent (for Google ADK compatibility) are built on first access
+__getattr__ = lazy_agent(globals(), build_activities_agent, ("activities_agent", "root_agent"))
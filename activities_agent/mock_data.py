@@ -1,5 +1,7 @@
 """Mock activities data for the travel agent application."""
 
+from inventory import build_activity_inventory
+
 # Mock activities database - Fun activities in tourist cities across India
 ACTIVITIES_DB = {
     "delhi": [
@@ -58,14 +60,13 @@ ACTIVITIES_DB = {
     ],
 }
 
+# Parsed, typed view of ACTIVITIES_DB used by the search tools
+ACTIVITY_INVENTORY = build_activity_inventory(ACTIVITIES_DB)
+
 def get_activity_cities():
     """Returns a list of all cities with available activities."""
-    return sorted(list(ACTIVITIES_DB.keys()))
+    return list(ACTIVITY_INVENTORY.cities)
 
 def get_activity_categories():
     """Returns a list of all activity categories."""
-    categories = set()
-    for city_activities in ACTIVITIES_DB.values():
-        for activity in city_activities:
-            categories.add(activity["category"])
-    return sorted(list(categories))
\ No newline at end of file
+    return list(ACTIVITY_INVENTORY.categories)
@@ -0,0 +1,45 @@
+"""
+Agent construction helpers for the travel agent application.
+Builds the ADK agents lazily so importing an agent package (and its tools) stays cheap.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable
+
+logger = logging.getLogger('travel_agent.agents')
+
+def lazy_agent(module_globals: Dict[str, Any], build: Callable[[], Any],
+               names: Iterable[str]) -> Callable[[str], Any]:
+    """
+    Create a module-level __getattr__ (PEP 562) that builds an agent on first access.
+
+    google.adk is imported and the Agent constructed only when one of the
+    names is first read, e.g. by the ADK agent loader looking up root_agent.
+    The agent is then stored in the module globals under every name, so
+    later reads are ordinary attribute lookups.
+
+    Args:
+        module_globals: The agent module's globals().
+        build: Zero-argument function returning the agent.
+        names: Module attributes that refer to the agent.
+
+    Returns:
+        Function to assign to the module's __getattr__.
+    """
+    names = tuple(names)
+    module_name = module_globals["__name__"]
+    lock = threading.Lock()
+
+    def __getattr__(name: str) -> Any:
+        if name not in names:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        with lock:
+            if name not in module_globals:
+                agent = build()
+                for alias in names:
+                    module_globals[alias] = agent
+                logger.debug("Built %s.%s", module_name, names[0])
+        return module_globals[name]
+
+    return __getattr__
@@ -0,0 +1 @@
+"""Offline benchmarks for the travel agent tools. Run modules with ``python -m benchmarks.<name>``."""
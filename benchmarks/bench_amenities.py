@@ -0,0 +1,108 @@
+"""
+Benchmark amenity-filtered hotel search on a synthetic 100k-hotel catalog.
+
+The catalog is loaded into the memory, SQLite and snapshot backends. Each
+backend is first checked to return the same hotels as filtering the amenity
+lists directly. Then per-query latency is measured for one to three
+amenities, with and without price/rating filters. The baseline fetches the
+city's hotels and compares amenity strings per hotel, which is what the
+agent had to do before the index existed. Layouts are CITIES:HOTELS_PER_CITY;
+the default spreads 100k hotels over 100 cities and also puts them all in
+one city, where a query is a single pass over the city's mask column.
+
+    python -m benchmarks.bench_amenities
+    python -m benchmarks.bench_amenities --layouts 1000:100 --queries 500
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import HOTEL_AMENITIES, city_names, generate_hotels_db
+from inventory import (
+    MemoryBackend, SQLiteBackend, SnapshotBackend, amenity_key,
+    build_activity_inventory, build_flight_inventory, build_hotel_inventory, build_snapshot,
+)
+
+def sample_queries(cities, count, rng):
+    """Random (city, max_price_paise, min_rating, amenities) lookups with one to three amenities."""
+    return [
+        (
+            rng.choice(cities),
+            rng.choice([None, rng.randrange(2000, 20000, 500) * 100]),
+            rng.choice([None, 3, 4]),
+            tuple(rng.sample(HOTEL_AMENITIES, rng.randint(1, 3))),
+        )
+        for _ in range(count)
+    ]
+
+def string_filter(backend, city, max_price_paise, min_rating, amenities):
+    """The pre-index approach: fetch the city's hotels and compare amenity names per hotel."""
+    wanted = {amenity_key(amenity) for amenity in amenities}
+    return [
+        hotel for hotel in backend.hotels(city, max_price_paise, min_rating)
+        if wanted <= {amenity_key(amenity) for amenity in hotel.amenities}
+    ]
+
+def names(hotels):
+    return [hotel.name for hotel in hotels]
+
+def time_queries(search, queries) -> float:
+    """Median microseconds per query."""
+    times = []
+    for query in queries:
+        started = time.perf_counter_ns()
+        search(*query)
+        times.append(time.perf_counter_ns() - started)
+    return statistics.median(times) / 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layouts", nargs="+", default=["100:1000", "1:100000"], help="CITIES:HOTELS_PER_CITY")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for layout in args.layouts:
+        num_cities, hotels_per_city = (int(part) for part in layout.split(":"))
+        hotels_db = generate_hotels_db(num_cities, hotels_per_city, seed=args.seed)
+        memory = MemoryBackend(build_flight_inventory({}), build_hotel_inventory(hotels_db),
+                               build_activity_inventory({}))
+        rng = random.Random(args.seed)
+        # A query in a huge city returns thousands of hotels, so run fewer of them
+        count = min(args.queries, max(20, 2_000_000 // hotels_per_city))
+        queries = sample_queries(city_names(num_cities), count, rng)
+        unfiltered = [(city, price, rating, ()) for city, price, rating, _ in queries]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sqlite = SQLiteBackend(os.path.join(tmp, "inventory.db"))
+            sqlite.load({}, hotels_db, {})
+            snapshot_path = os.path.join(tmp, "inventory.snapshot")
+            build_snapshot(snapshot_path, {}, hotels_db, {})
+            snapshot = SnapshotBackend(snapshot_path)
+            backends = {"memory": memory, "sqlite": sqlite, "snapshot": snapshot}
+
+            for query in queries[:200]:
+                expected = names(string_filter(memory, *query))
+                for name, backend in backends.items():
+                    if names(backend.hotels(*query)) != expected:
+                        raise AssertionError(f"{name} disagrees with the string filter for {query}")
+            matches = statistics.fmean(len(memory.hotels(*query)) for query in queries)
+            print(f"{num_cities * hotels_per_city:,} hotels in {num_cities:,} cities ({hotels_per_city:,} per city, "
+                  f"{len(queries)} queries, {matches:.1f} matches per query); all backends agree")
+
+            print(f"  {'backend':<10}{'no amenities us':>16}{'bitset us':>12}{'string filter us':>18}{'speedup':>9}")
+            for name, backend in backends.items():
+                plain = time_queries(backend.hotels, unfiltered)
+                bitset = time_queries(backend.hotels, queries)
+                strings = time_queries(lambda *query: string_filter(backend, *query), queries)
+                print(f"  {name:<10}{plain:>16.1f}{bitset:>12.1f}{strings:>18.1f}{strings / bitset:>8.1f}x")
+
+            sqlite.close()
+            snapshot.close()
+
+if __name__ == "__main__":
+    main()
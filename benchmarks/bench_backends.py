@@ -0,0 +1,145 @@
+"""
+Benchmark inventory backends as the catalog grows.
+
+For each scale the same synthetic catalog is loaded into the in-memory
+backend and into a SQLite file, both backends are checked to return
+identical records for a sample of queries, and then per-query latency is
+measured for route, hotel and activity lookups with and without filters.
+
+    python -m benchmarks.bench_backends
+    python -m benchmarks.bench_backends --scales 10000:1000 1000000:100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import (
+    city_names, generate_activities_db, generate_flights_db, generate_hotels_db,
+)
+from inventory import (
+    MemoryBackend, SQLiteBackend,
+    build_activity_inventory, build_flight_inventory, build_hotel_inventory,
+)
+
+HOTELS_PER_CITY = 20
+ACTIVITIES_PER_CITY = 10
+
+def records(result):
+    """Display dicts for a backend result, for comparing backends."""
+    return None if result is None else [record.to_dict() for record in result]
+
+def sample_queries(flights_db, cities, count, rng):
+    """Random (route, city, max_price_paise, hotel_rating, activity_rating) lookups."""
+    routes = list(flights_db)
+    queries = []
+    for _ in range(count):
+        city = rng.choice(cities)
+        queries.append((
+            rng.choice(routes),
+            city,
+            rng.choice([None, rng.randrange(2000, 20000, 500) * 100]),
+            rng.choice([None, 3, 4, 5]),
+            rng.choice([None, 4.0, 4.5]),
+        ))
+    return queries
+
+def check_parity(memory, other, queries, categories):
+    """Raise AssertionError unless `other` returns exactly what the memory backend does."""
+    for route, city, max_price_paise, hotel_rating, activity_rating in queries:
+        pairs = [
+            (memory.flights(*route), other.flights(*route)),
+            (memory.hotels(city, max_price_paise, hotel_rating), other.hotels(city, max_price_paise, hotel_rating)),
+            (memory.activities(city, activity_rating, max_price_paise), other.activities(city, activity_rating, max_price_paise)),
+        ]
+        for expected, actual in pairs:
+            if records(expected) != records(actual):
+                raise AssertionError(f"Backends disagree for route={route} city={city}")
+        if memory.hotel_summary(city).to_dict() != other.hotel_summary(city).to_dict():
+            raise AssertionError(f"Hotel summaries disagree for {city}")
+        if memory.activity_summary(city).to_dict() != other.activity_summary(city).to_dict():
+            raise AssertionError(f"Activity summaries disagree for {city}")
+    for category in categories[:2]:
+        if other.activity_category(category.upper()) != category:
+            raise AssertionError(f"activity_category disagrees for {category}")
+        for min_rating, top_k in ((None, None), (4.5, None), (None, 1), (4.0, 2)):
+            expected = {c: records(a) for c, a in memory.activities_by_category(category, min_rating, top_k).items()}
+            actual = {c: records(a) for c, a in other.activities_by_category(category.lower(), min_rating, top_k).items()}
+            if list(expected.items()) != list(actual.items()):
+                raise AssertionError(f"Category results disagree for {category} (min_rating={min_rating}, top_k={top_k})")
+    expected = {c: records(a) for c, a in memory.all_activities().items()}
+    if list(expected.items()) != [(c, records(a)) for c, a in other.all_activities().items()]:
+        raise AssertionError("all_activities disagrees")
+    for method in ("flight_cities", "hotel_cities", "activity_cities", "activity_categories"):
+        if getattr(memory, method)() != getattr(other, method)():
+            raise AssertionError(f"{method} disagrees")
+
+def time_lookups(label, backend, queries):
+    """Print per-lookup latency for a backend over the sampled queries."""
+    lookups = {
+        "flights": lambda q: backend.flights(*q[0]),
+        "hotels": lambda q: backend.hotels(q[1]),
+        "hotels+filters": lambda q: backend.hotels(q[1], q[2], q[3]),
+        "activities+filters": lambda q: backend.activities(q[1], q[4], q[2]),
+    }
+    for name, lookup in lookups.items():
+        timings = []
+        for query in queries:
+            t0 = time.perf_counter_ns()
+            # Materialize the display dicts, as the tools do
+            records(lookup(query))
+            timings.append((time.perf_counter_ns() - t0) / 1000)
+        timings.sort()
+        print(f"  {label:<7} {name:<19} mean={statistics.fmean(timings):7.1f}us "
+              f"p50={timings[len(timings) // 2]:7.1f}us p99={timings[int(len(timings) * 0.99)]:7.1f}us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", default=["10000:1000", "100000:10000", "1000000:100000"],
+                        help="FLIGHTS:HOTELS pairs to benchmark")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        num_flights, num_hotels = (int(part) for part in scale.split(":"))
+        num_cities = max(2, num_hotels // HOTELS_PER_CITY)
+        # Enough flight cities that ~3 flights per route still gives num_flights
+        flight_cities = max(num_cities, int((num_flights / 3) ** 0.5 * 2))
+
+        start = time.perf_counter()
+        flights_db = generate_flights_db(flight_cities, num_flights, flights_per_route=3, seed=args.seed)
+        hotels_db = generate_hotels_db(num_cities, HOTELS_PER_CITY, seed=args.seed)
+        activities_db = generate_activities_db(num_cities, ACTIVITIES_PER_CITY, seed=args.seed)
+        generated = time.perf_counter() - start
+
+        start = time.perf_counter()
+        memory = MemoryBackend(build_flight_inventory(flights_db), build_hotel_inventory(hotels_db),
+                               build_activity_inventory(activities_db))
+        memory_build = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "inventory.db")
+            sqlite = SQLiteBackend(path)
+            start = time.perf_counter()
+            sqlite.load(flights_db, hotels_db, activities_db)
+            sqlite_build = time.perf_counter() - start
+
+            total_flights = sum(len(flights) for flights in flights_db.values())
+            print(f"{total_flights:,} flights / {num_hotels:,} hotels / {num_cities * ACTIVITIES_PER_CITY:,} activities "
+                  f"(generated {generated:.1f}s, memory build {memory_build:.1f}s, "
+                  f"sqlite load {sqlite_build:.1f}s, {os.path.getsize(path) / 2**20:.0f} MiB)")
+
+            rng = random.Random(args.seed)
+            queries = sample_queries(flights_db, city_names(num_cities), args.queries, rng)
+            check_parity(memory, sqlite, queries[:500], memory.activity_categories())
+            print("  parity: memory and sqlite agree")
+            time_lookups("memory", memory, queries)
+            time_lookups("sqlite", sqlite, queries)
+            sqlite.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Batch trip planning vs calling create_comprehensive_travel_plan per trip.
+
+A corporate upload is simulated on a synthetic catalog: --trips employees
+flying from --offices cities to --offsites destinations, on a few date
+pairs, with mixed budgets, group sizes and preferences. The serial loop
+plans every trip on its own; plan_trips() runs each distinct flight,
+hotel and activity lookup once, inline, on threads and on processes.
+Every batch plan is checked against the serial plan for the same trip
+first. --supplier-ms makes each lookup sleep like a remote supplier round
+trip, as in bench_plan_fanout.
+
+    python -m benchmarks.bench_batch_planning
+    python -m benchmarks.bench_batch_planning --trips 2000 --supplier-ms 20 --workers 16
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+
+import travel_planner.agent as planner
+from benchmarks.synthetic import city_names, generate_inventory
+from benchmarks.bench_plan_fanout import simulated_latency
+from inventory import MemoryBackend, set_backend
+from travel_planner.batch import plan_trips
+
+PREFERENCES = [None, "adventure", "luxury", "budget", "cultural", "food"]
+
+def generate_trips(num_trips: int, offices: list, offsites: list, seed: int) -> list:
+    rng = random.Random(seed)
+    date_pairs = [("2026-03-02", "2026-03-05"), ("2026-03-09", "2026-03-12"), ("2026-03-16", "2026-03-18")]
+    trips = []
+    for _ in range(num_trips):
+        travel_date, return_date = rng.choice(date_pairs)
+        trips.append({
+            "source": rng.choice(offices), "destination": rng.choice(offsites),
+            "travel_date": travel_date, "return_date": return_date,
+            "budget": rng.choice([None, 40_000, 80_000, 150_000]), "travelers": rng.choice([1, 1, 1, 2, 3]),
+            "preferences": rng.choice(PREFERENCES),
+        })
+    return trips
+
+def comparable(plan: dict) -> str:
+    return json.dumps({key: value for key, value in plan.items() if key != "plan_generated_at"}, sort_keys=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trips", type=int, default=2000)
+    parser.add_argument("--offices", type=int, default=10)
+    parser.add_argument("--offsites", type=int, default=3)
+    parser.add_argument("--cities", type=int, default=200, help="cities in the synthetic catalog")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--supplier-ms", type=float, default=0.0, help="simulated latency per lookup")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    set_backend(MemoryBackend.from_databases(*generate_inventory(args.cities, args.cities * 40, 100, 20)))
+    cities = city_names(args.cities)
+    # Hubs (the lowest-numbered cities) as offsites, so most routes are served directly
+    offsites, offices = cities[:args.offsites], cities[args.offsites:args.offsites + args.offices]
+    trips = generate_trips(args.trips, offices, offsites, args.seed)
+    unique = {key for trip in trips for key in planner.PlanRequest(**trip).sub_queries.values()}
+    print(f"{args.trips} trips from {args.offices} offices to {args.offsites} offsites on {args.cities} cities: "
+          f"{4 * args.trips} lookups, {len(unique)} distinct; supplier latency {args.supplier_ms:g} ms")
+
+    with simulated_latency(args.supplier_ms, args.supplier_ms, args.supplier_ms):
+        started = time.perf_counter()
+        serial = [comparable(planner.create_comprehensive_travel_plan(**trip)) for trip in trips]
+        serial_seconds = time.perf_counter() - started
+        print(f"  {'mode':<22}{'trips/s':>10}{'total s':>9}{'first ms':>10}{'speedup':>9}")
+        print(f"  {'serial loop':<22}{args.trips / serial_seconds:>10,.0f}{serial_seconds:>9.2f}{'':>10}{'1.0x':>9}")
+
+        for label, workers, processes in (("batch, inline", 0, False),
+                                          (f"batch, {args.workers} threads", args.workers, False),
+                                          (f"batch, {args.workers} processes", args.workers, True)):
+            started = time.perf_counter()
+            first = None
+            plans = {}
+            for index, plan in plan_trips(trips, workers=workers, processes=processes):
+                if first is None:
+                    first = time.perf_counter() - started
+                plans[index] = plan
+            seconds = time.perf_counter() - started
+            mismatches = [index for index, expected in enumerate(serial) if comparable(plans[index]) != expected]
+            if len(plans) != len(trips) or mismatches:
+                raise AssertionError(f"{label}: {len(plans)} plans, mismatched trips {mismatches[:5]}")
+            print(f"  {label:<22}{args.trips / seconds:>10,.0f}{seconds:>9.2f}{first * 1000:>10.1f}"
+                  f"{serial_seconds / seconds:>8.1f}x")
+    print(f"  every batch plan matches the serial plan for its trip")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark category lookups on synthetic catalogs of thousands of cities.
+
+Each catalog is loaded into the memory, SQLite and snapshot backends, and
+every backend is first checked to return the same activities as scanning
+every city, with and without min_rating / top_k cutoffs. Then per-lookup
+latency is measured for the whole category, for the top activity per city
+and for activities rated 4.5 or more. The baseline is the scan the memory
+backend did before the category postings existed: every city's activities,
+lower-casing each category.
+
+    python -m benchmarks.bench_categories
+    python -m benchmarks.bench_categories --cities 10000 --activities-per-city 10
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import ACTIVITY_CATEGORIES, generate_activities_db
+from inventory import (
+    MemoryBackend, SQLiteBackend, SnapshotBackend,
+    build_activity_inventory, build_flight_inventory, build_hotel_inventory, build_snapshot,
+)
+
+CUTOFFS = {"all": (None, None), "top 1": (None, 1), "rating 4.5+": (4.5, None)}
+
+def scan(backend, category, min_rating=None, top_k=None):
+    """The pre-index approach: filter every city's activities on the lower-cased category."""
+    category_key = category.lower()
+    by_city = {}
+    for city, activities in backend.all_activities().items():
+        matching = [activity for activity in activities if activity.category.lower() == category_key
+                    and (min_rating is None or activity.rating >= min_rating)][:top_k]
+        if matching:
+            by_city[city] = matching
+    return by_city
+
+def records(by_city):
+    return [(city, [activity.name for activity in activities]) for city, activities in by_city.items()]
+
+def time_lookups(lookup, categories, repeat) -> float:
+    """Median milliseconds per lookup."""
+    times = []
+    for _ in range(repeat):
+        for category in categories:
+            started = time.perf_counter_ns()
+            lookup(category)
+            times.append(time.perf_counter_ns() - started)
+    return statistics.median(times) / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--activities-per-city", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the categories")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Mixed case, as the model sends them
+    categories = [rng.choice([category, category.lower(), category.upper()]) for category in ACTIVITY_CATEGORIES]
+
+    for num_cities in args.cities:
+        activities_db = generate_activities_db(num_cities, args.activities_per_city, seed=args.seed)
+        started = time.perf_counter()
+        memory = MemoryBackend(build_flight_inventory({}), build_hotel_inventory({}),
+                               build_activity_inventory(activities_db))
+        build_ms = (time.perf_counter() - started) * 1000
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sqlite = SQLiteBackend(os.path.join(tmp, "inventory.db"))
+            sqlite.load({}, {}, activities_db)
+            snapshot_path = os.path.join(tmp, "inventory.snapshot")
+            build_snapshot(snapshot_path, {}, {}, activities_db)
+            snapshot = SnapshotBackend(snapshot_path)
+            backends = {"memory": memory, "sqlite": sqlite, "snapshot": snapshot}
+
+            for category in categories:
+                for min_rating, top_k in CUTOFFS.values():
+                    expected = records(scan(memory, category, min_rating, top_k))
+                    for name, backend in backends.items():
+                        if records(backend.activities_by_category(category, min_rating, top_k)) != expected:
+                            raise AssertionError(f"{name} disagrees with the scan for {category} "
+                                                 f"(min_rating={min_rating}, top_k={top_k})")
+            print(f"{num_cities:,} cities, {num_cities * args.activities_per_city:,} activities, "
+                  f"{len(categories)} categories (memory inventory built in {build_ms:.0f} ms); all backends agree")
+
+            print(f"  {'backend':<10}" + "".join(f"{label + ' ms':>16}" for label in CUTOFFS))
+            for name, backend in backends.items():
+                results = [
+                    time_lookups(lambda category: backend.activities_by_category(category, min_rating, top_k),
+                                 categories, args.repeat)
+                    for min_rating, top_k in CUTOFFS.values()
+                ]
+                print(f"  {name:<10}" + "".join(f"{result:>16.3f}" for result in results))
+            results = [time_lookups(lambda category: scan(memory, category, min_rating, top_k), categories,
+                                    args.repeat)
+                       for min_rating, top_k in CUTOFFS.values()]
+            print(f"  {'scan':<10}" + "".join(f"{result:>16.3f}" for result in results))
+
+            sqlite.close()
+            snapshot.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+City name resolution latency by match type, on the sample inventory and on
+large synthetic indexes.
+
+First checks that the sample queries resolve as expected on the active
+backend ("Bengaluru", "New Delhi", "Srinagar", "Gulmarg", "Udaypur", ...).
+It then builds resolvers over 1k to 20k pronounceable synthetic city names,
+each with an alias and two locations, and times exact, alias, prefix, fuzzy
+and unmatched lookups, and reports the share of one-letter typos that find
+their city. For comparison it also times fuzzy lookups that score every
+name's trigrams, which is what they would cost without the inverted index.
+
+Fuzzy and unmatched lookups must cost about the same at every size: the run
+fails (exit 1) if either is more than --max-growth times slower on the
+largest index than on the smallest, or if fewer than --min-found of the
+typos find their city.
+
+    python -m benchmarks.bench_city_resolver
+    python -m benchmarks.bench_city_resolver --sizes 1000 100000 --queries 200
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import sys
+import time
+
+from inventory import CityResolver, get_city_resolver
+from inventory.cities import normalize_city_name, trigrams
+
+SAMPLE_QUERIES = {
+    "Goa": "goa",
+    "Bengaluru": "bangalore",
+    "New Delhi": "delhi",
+    "Bombay": "mumbai",
+    "Srinagar": "kashmir",
+    "Gulmarg": "kashmir",
+    "Koramangala": "bangalore",
+    "Udaypur": "udaipur",
+    "Jaipur, Rajasthan": "jaipur",
+    "Manaly": "manali",
+    "Kera": "kerala",
+    "nowhere": None,
+    "Paris": None,
+}
+
+ONSETS = ("b", "bh", "ch", "d", "dh", "g", "gh", "h", "j", "k", "kh", "l", "m", "n", "p", "ph",
+          "r", "s", "sh", "t", "th", "v", "y", "z")
+VOWELS = ("a", "aa", "e", "i", "ee", "o", "u")
+CODAS = ("", "", "", "n", "r", "l", "m", "sh")
+SUFFIXES = ("", "", "", "", "pur", "abad", "garh", "nagar", "kot", "gaon", "pet", "halli", "wadi", "ganj")
+
+def synthetic_names(count: int, seed: int = 7) -> list:
+    """Distinct pronounceable names: two to four syllables and, often, a common place-name suffix."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        syllables = (rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS) for _ in range(rng.randint(2, 4)))
+        names.add("".join(syllables) + rng.choice(SUFFIXES))
+    return sorted(names)
+
+def misspell(name: str, rng: random.Random) -> str:
+    """Replace one inner character."""
+    position = rng.randrange(1, len(name) - 1)
+    return name[:position] + rng.choice("aeiouy") + name[position + 1:]
+
+def build(count: int):
+    names = synthetic_names(count * 4)
+    cities, aliases, locations = names[:count], names[count:2 * count], names[2 * count:]
+    resolver = CityResolver(
+        cities,
+        {alias: city for alias, city in zip(aliases, cities)},
+        [(location, cities[i // 2]) for i, location in enumerate(locations)],
+    )
+    return resolver, cities, aliases
+
+def time_lookups(resolve, queries) -> float:
+    """Median microseconds per lookup."""
+    times = []
+    for query in queries:
+        started = time.perf_counter_ns()
+        resolve(query)
+        times.append(time.perf_counter_ns() - started)
+    return statistics.median(times) / 1000
+
+def linear_fuzzy(name_trigrams: list, query: str) -> int:
+    """Index of the most similar name, scoring every name's precomputed trigrams."""
+    grams = trigrams(normalize_city_name(query))
+    return max(range(len(name_trigrams)),
+               key=lambda i: 2 * len(grams & name_trigrams[i]) / (len(grams) + len(name_trigrams[i])))
+
+def check_samples() -> None:
+    resolver = get_city_resolver()
+    for query, expected in SAMPLE_QUERIES.items():
+        match = resolver.resolve(query)
+        city = match.city if match else None
+        if city != expected:
+            raise AssertionError(f"{query!r} resolved to {match}, expected {expected}")
+        print(f"  {query:<20} -> {city or '(no match)':<10} {match.match if match else ''}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000], help="synthetic city counts")
+    parser.add_argument("--queries", type=int, default=1000, help="lookups per match type")
+    parser.add_argument("--max-growth", type=float, default=3.0,
+                        help="allowed slowdown of fuzzy and unmatched lookups from the smallest to the largest size")
+    parser.add_argument("--min-found", type=float, default=0.9, help="share of typos that must find their city")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print("Sample inventory:")
+    check_samples()
+
+    print(f"\n{'cities':>8}{'names':>9}{'build ms':>10}  {'exact us':>9}{'alias us':>9}{'prefix us':>10}"
+          f"{'fuzzy us':>9}{'none us':>9}{'found':>7}  {'linear fuzzy us':>16}")
+    failures, timings = [], {}
+    for count in args.sizes:
+        started = time.perf_counter()
+        resolver, cities, aliases = build(count)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        rng = random.Random(count)
+        sample = [rng.choice(cities) for _ in range(args.queries)]
+        typos = [misspell(city, rng) for city in sample]
+        matches = [resolver.resolve(typo) for typo in typos]
+        fuzzy_typos = [typo for typo, match in zip(typos, matches) if getattr(match, "match", None) == "fuzzy"]
+        found = sum(getattr(match, "city", None) == city for match, city in zip(matches, sample)) / len(sample)
+        results = {
+            "exact": time_lookups(resolver.resolve, [city.title() for city in sample]),
+            "alias": time_lookups(resolver.resolve, [rng.choice(aliases) for _ in range(args.queries)]),
+            "prefix": time_lookups(resolver.resolve, [city[:-1] for city in sample]),
+            "fuzzy": time_lookups(resolver.resolve, fuzzy_typos),
+            "none": time_lookups(resolver.resolve, [f"zzq{city}xx" for city in sample]),
+        }
+        name_trigrams = [trigrams(name) for name in synthetic_names(count * 4)]
+        linear = time_lookups(lambda query: linear_fuzzy(name_trigrams, query), fuzzy_typos[:50])
+        print(f"{count:>8}{resolver.size:>9}{build_ms:>10.0f}  {results['exact']:>9.1f}{results['alias']:>9.1f}"
+              f"{results['prefix']:>10.1f}{results['fuzzy']:>9.1f}{results['none']:>9.1f}{found:>7.1%}  {linear:>16.0f}")
+        timings[count] = results
+        if found < args.min_found:
+            failures.append(f"{count} cities: {found:.1%} of typos found their city, expected {args.min_found:.0%}")
+
+    smallest, largest = min(timings), max(timings)
+    for kind in ("fuzzy", "none"):
+        growth = timings[largest][kind] / timings[smallest][kind]
+        if growth > args.max_growth:
+            failures.append(f"{kind} lookups are {growth:.1f}x slower at {largest} cities than at {smallest}, "
+                            f"limit {args.max_growth:g}x")
+    if failures:
+        print("\nCity resolver regressions:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print(f"\nFuzzy and unmatched lookups within {args.max_growth:g}x from {smallest} to {largest} cities.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Measure full vs compact tool responses on the sample inventory.
+
+Calls the planner for every destination pair (with a few preference and
+budget mixes) and each search tool for every route or city, in full and in
+compact mode, and reports the serialized size the model receives: UTF-8
+bytes of the JSON and an approximate token count (words plus punctuation
+marks; no Gemini tokenizer is available offline). Before measuring, every
+option id in the compact responses is checked to resolve through
+get_option_details to the same record as in the full response.
+
+    python -m benchmarks.bench_compact
+    python -m benchmarks.bench_compact --top-k 5
+"""
+
+import argparse
+import json
+import logging
+import re
+import statistics
+import time
+
+from activities_agent.agent import search_activities
+from flight_agent.agent import search_flights
+from hotel_agent.agent import search_hotels
+from inventory import get_backend
+from response_utils import get_option_details
+from travel_planner.agent import create_comprehensive_travel_plan
+
+PLAN_MIXES = ((None, None), ("adventure", 60000), ("luxury", None), ("budget", 30000), ("cultural", 100000))
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+def serialized(response: dict) -> str:
+    return json.dumps(response, ensure_ascii=False)
+
+def approx_tokens(text: str) -> int:
+    return len(_TOKEN.findall(text))
+
+def workloads(travel_date: str, return_date: str) -> dict:
+    """Tool name -> list of zero-argument calls taking compact and top_k."""
+    backend = get_backend()
+    cities = sorted(set(backend.hotel_cities()) & set(backend.activity_cities()) & set(backend.flight_cities()))
+    pairs = [(source, destination) for source in cities for destination in cities if source != destination]
+    return {
+        "create_comprehensive_travel_plan": [
+            lambda compact, top_k, s=s, d=d, p=p, b=b: create_comprehensive_travel_plan(
+                s, d, travel_date, return_date, b, 2, p, compact=compact, top_k=top_k)
+            for s, d in pairs for p, b in PLAN_MIXES
+        ],
+        "search_flights": [
+            lambda compact, top_k, s=s, d=d: search_flights(s, d, travel_date, compact=compact, top_k=top_k)
+            for s, d in pairs
+        ],
+        "search_hotels": [
+            lambda compact, top_k, c=c: search_hotels(c, travel_date, return_date, compact=compact, top_k=top_k)
+            for c in cities
+        ],
+        "search_activities": [
+            lambda compact, top_k, c=c: search_activities(c, compact=compact, top_k=top_k)
+            for c in cities
+        ],
+    }
+
+def _rows(response: dict):
+    for section in response.get("fields", {}):
+        if section != "cost_quality_frontier":
+            yield from response[section]
+
+def check_option_ids(calls: list, top_k: int) -> int:
+    """Resolve every id in the compact responses and compare with the full response; returns ids checked."""
+    checked = 0
+    for call in calls:
+        full = call(False, None)
+        full_text = json.dumps(full, ensure_ascii=False, sort_keys=True)
+        chosen_activities = full.get("optimized_plan", {}).get("activities", ())
+        for row in _rows(call(True, top_k)):
+            details = get_option_details(row[0])
+            if details["status"] != "success":
+                raise AssertionError(f"{row[0]} did not resolve: {details}")
+            record = details["details"]
+            # A plan lists chosen activities outside the preferred category only in optimized_plan
+            if json.dumps(record, ensure_ascii=False, sort_keys=True) not in full_text \
+                    and record.get("name") not in chosen_activities:
+                raise AssertionError(f"{row[0]} resolved to a record not in the full response: {record}")
+            checked += 1
+    return checked
+
+def measure(calls: list, compact: bool, top_k: int) -> dict:
+    sizes, tokens, times = [], [], []
+    for call in calls:
+        started = time.perf_counter_ns()
+        response = call(compact, top_k)
+        times.append(time.perf_counter_ns() - started)
+        text = serialized(response)
+        sizes.append(len(text.encode()))
+        tokens.append(approx_tokens(text))
+    return {"bytes": statistics.fmean(sizes), "tokens": statistics.fmean(tokens),
+            "us": statistics.median(times) / 1000}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=None, help="rows per section (default COMPACT_TOP_K)")
+    parser.add_argument("--travel-date", default="2026-12-15")
+    parser.add_argument("--return-date", default="2026-12-18")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    tools = workloads(args.travel_date, args.return_date)
+    checked = sum(check_option_ids(calls, args.top_k) for calls in tools.values())
+    print(f"{checked} option ids resolve to their full records\n")
+
+    print(f"{'tool':<34}{'calls':>6}  {'full B':>8}{'compact B':>11}{'saved':>7}  "
+          f"{'full tok':>9}{'compact tok':>12}{'saved':>7}  {'full us':>8}{'compact us':>11}")
+    for name, calls in tools.items():
+        measure(calls, True, args.top_k)  # warm the search cache and inventory
+        full = measure(calls, False, args.top_k)
+        compact = measure(calls, True, args.top_k)
+        print(f"{name:<34}{len(calls):>6}  {full['bytes']:>8.0f}{compact['bytes']:>11.0f}"
+              f"{1 - compact['bytes'] / full['bytes']:>7.0%}  {full['tokens']:>9.0f}{compact['tokens']:>12.0f}"
+              f"{1 - compact['tokens'] / full['tokens']:>7.0%}  {full['us']:>8.1f}{compact['us']:>11.1f}")
+
+if __name__ == "__main__":
+    main()
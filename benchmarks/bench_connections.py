@@ -0,0 +1,54 @@
+"""
+Benchmark connecting-flight search on a synthetic route network.
+
+    python -m benchmarks.bench_connections --cities 5000 --flights 200000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.synthetic import city_names, generate_flights_db
+from flight_agent.connections import RouteGraph
+from inventory import build_flight_inventory
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, default=5000)
+    parser.add_argument("--flights", type=int, default=200_000)
+    parser.add_argument("--flights-per-route", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    flights_db = generate_flights_db(args.cities, args.flights, args.flights_per_route, seed=args.seed)
+    inventory = build_flight_inventory(flights_db)
+    graph = RouteGraph(inventory)
+    build_seconds = time.perf_counter() - start
+    total_flights = sum(len(flights) for flights in inventory.routes.values())
+    print(f"Network: {args.cities} cities, {len(inventory.routes):,} routes, {total_flights:,} flights "
+          f"(generated and indexed in {build_seconds:.1f}s)")
+
+    rng = random.Random(args.seed)
+    cities = city_names(args.cities)
+    pairs = [tuple(rng.sample(cities, 2)) for _ in range(args.queries)]
+
+    for sort_by in ("price", "duration"):
+        timings = []
+        found = 0
+        for source, destination in pairs:
+            t0 = time.perf_counter_ns()
+            itineraries = graph.find_connections(source, destination, k=args.k, sort_by=sort_by)
+            timings.append((time.perf_counter_ns() - t0) / 1000)
+            found += bool(itineraries)
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p99 = timings[int(len(timings) * 0.99)]
+        print(f"sort_by={sort_by:<8} queries={len(pairs)} answered={found} "
+              f"mean={statistics.fmean(timings):.0f}us p50={p50:.0f}us p99={p99:.0f}us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Throughput of the inventory delta feed on a synthetic catalog of about a million rows.
+
+The catalog goes live through reload_inventory, which also times a full
+rebuild (parsing, sorting and every derived index). A stream of supplier
+deltas is generated against it: fare changes, new and cancelled flights,
+hotel price and rating changes, new hotels (some in new cities) and
+activity updates. The same deltas are applied to the catalog dicts, as a
+reference. The stream is then applied in batches with apply_deltas while
+the search cache holds results for a few hundred cities and routes.
+
+Afterwards the live inventory is checked against a backend rebuilt from
+the updated dicts: every touched route and city (hotels with and without
+filters, summaries, activities), every category with cutoffs, connecting
+itineraries and resolution of the new cities must match.
+
+    python -m benchmarks.bench_deltas
+    python -m benchmarks.bench_deltas --cities 500 --hotels-per-city 100 --deltas 20000 --backend snapshot
+"""
+
+import argparse
+import bisect
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import ACTIVITY_CATEGORIES, HOTEL_AMENITIES, city_names, generate_inventory
+from activities_agent.agent import search_activities
+from flight_agent.agent import get_route_graph, search_flights
+from flight_agent.connections import RouteGraph
+from hotel_agent.agent import search_hotels
+from cache_utils import get_search_cache_stats
+from inventory import (
+    MemoryBackend, SnapshotBackend, apply_deltas, build_snapshot, get_backend, get_city_resolver, reload_inventory,
+)
+from inventory.deltas import parse_delta
+from inventory.records import parse_clock
+
+def percentile(times, fraction: float) -> float:
+    return sorted(times)[min(len(times) - 1, int(len(times) * fraction))]
+
+def apply_to_databases(databases, delta: dict):
+    """Apply a delta to the catalog dicts the way a full reload of them would see it."""
+    flights_db, hotels_db, activities_db = databases
+    kind, op, key, record = parse_delta(delta)
+    if kind == "flight":
+        flights = flights_db.get(key, [])
+        index = next((i for i, f in enumerate(flights) if f["flight_number"] == record["flight_number"]), None)
+        merged = {**flights[index], **record} if index is not None else record
+        if op == "upsert" and index is not None and flights[index]["departure"] == merged["departure"]:
+            flights[index] = merged
+        else:
+            if index is not None:
+                del flights[index]
+            if op == "upsert":
+                departure = parse_clock(merged["departure"])
+                flights.insert(bisect.bisect_right(flights, departure, key=lambda f: parse_clock(f["departure"])),
+                               merged)
+        if flights:
+            flights_db[key] = flights
+        else:
+            flights_db.pop(key, None)
+        return
+    database = hotels_db if kind == "hotel" else activities_db
+    records = database.setdefault(key, [])
+    index = next((i for i, r in enumerate(records) if r["name"] == record["name"]), None)
+    merged = {**records[index], **record} if index is not None else record
+    if index is not None:
+        del records[index]
+    # An upserted record moves to the end of its city, as DeltaBackend orders ties
+    if op == "upsert":
+        records.append(merged)
+    if not records:
+        del database[key]
+
+def generate_deltas(databases, count: int, rng: random.Random):
+    """A supplier feed against the catalog, applied to the dicts as it is generated."""
+    flights_db, hotels_db, activities_db = databases
+    routes = list(flights_db)
+    cities = list(hotels_db)
+    serial = 0
+    deltas = []
+    for _ in range(count):
+        roll = rng.random()
+        serial += 1
+        if roll < 0.45:
+            route = rng.choice(routes)
+            if not flights_db.get(route):
+                continue
+            flight = rng.choice(flights_db[route])
+            delta = {"op": "upsert", "kind": "flight", "source": route[0], "destination": route[1],
+                     "record": {"flight_number": flight["flight_number"],
+                                "price": f"₹{rng.randrange(2000, 15000, 100):,}"}}
+        elif roll < 0.5:
+            route = rng.choice(routes)
+            departure = rng.randrange(0, 24 * 60, 5)
+            delta = {"op": "upsert", "kind": "flight", "source": route[0], "destination": route[1],
+                     "record": {"flight_number": f"ZZ{serial}", "airline": "Akasa Air",
+                                "departure": f"{departure // 60:02d}:{departure % 60:02d}",
+                                "arrival": f"{(departure + 90) // 60 % 24:02d}:{(departure + 90) % 60:02d}",
+                                "price": f"₹{rng.randrange(2000, 15000, 100):,}"}}
+        elif roll < 0.52:
+            route = rng.choice(routes)
+            if not flights_db.get(route):
+                continue
+            delta = {"op": "delete", "kind": "flight", "source": route[0], "destination": route[1],
+                     "record": {"flight_number": rng.choice(flights_db[route])["flight_number"]}}
+        elif roll < 0.8:
+            city = rng.choice(cities)
+            hotel = rng.choice(hotels_db[city])
+            delta = {"op": "upsert", "kind": "hotel", "city": city,
+                     "record": {"name": hotel["name"], "rating": rng.randint(2, 5),
+                                "price_per_night": f"₹{rng.randrange(800, 30000, 100):,}"}}
+        elif roll < 0.86:
+            # A few new hotels open in cities the catalog does not cover yet
+            city = rng.choice(cities) if rng.random() < 0.95 else f"newcity{rng.randrange(50):02d}"
+            delta = {"op": "upsert", "kind": "hotel", "city": city,
+                     "record": {"name": f"New Hotel {serial}", "rating": rng.randint(2, 5),
+                                "price_per_night": f"₹{rng.randrange(800, 30000, 100):,}",
+                                "amenities": rng.sample(HOTEL_AMENITIES + ["EV Charging"], rng.randint(1, 5)),
+                                "location": f"District {rng.randrange(20)}"}}
+        elif roll < 0.88:
+            city = rng.choice(cities)
+            delta = {"op": "delete", "kind": "hotel", "city": city,
+                     "record": {"name": rng.choice(hotels_db[city])["name"]}}
+        else:
+            city = rng.choice(cities)
+            activity = rng.choice(activities_db[city])
+            delta = {"op": "upsert", "kind": "activity", "city": city,
+                     "record": {"name": activity["name"], "rating": round(rng.uniform(3.5, 5.0), 1),
+                                "category": rng.choice(ACTIVITY_CATEGORIES)}}
+        apply_to_databases(databases, delta)
+        deltas.append(delta)
+    return deltas
+
+def names(records):
+    return [record.to_dict() for record in records] if records is not None else None
+
+def check(live, reference, deltas, rng: random.Random) -> int:
+    """Compare the live inventory with a rebuild; returns the number of lookups compared."""
+    routes = {parse_delta(delta)[2] for delta in deltas if delta["kind"] == "flight"}
+    hotel_cities = {parse_delta(delta)[2] for delta in deltas if delta["kind"] == "hotel"}
+    activity_cities = {parse_delta(delta)[2] for delta in deltas if delta["kind"] == "activity"}
+    routes |= set(rng.sample(list(reference.flight_inventory().routes), 200))
+    hotel_cities |= set(rng.sample(reference.hotel_cities(), 50))
+    compared = 0
+
+    def same(label, got, expected):
+        nonlocal compared
+        compared += 1
+        if got != expected:
+            raise AssertionError(f"{label}: delta-applied inventory disagrees with a rebuild")
+
+    for route in routes:
+        same(f"flights {route}", names(live.flights(*route)), names(reference.flights(*route)))
+    for city in hotel_cities:
+        same(f"hotels {city}", names(live.hotels(city)), names(reference.hotels(city)))
+        filters = (rng.randrange(2000, 20000, 500) * 100, rng.choice([None, 3, 4]),
+                   rng.sample(HOTEL_AMENITIES, rng.randint(1, 2)))
+        same(f"hotels {city} {filters}", names(live.hotels(city, *filters)), names(reference.hotels(city, *filters)))
+        same(f"amenities {city}", live.hotel_amenities(city), reference.hotel_amenities(city))
+        live_summary, expected_summary = live.hotel_summary(city), reference.hotel_summary(city)
+        same(f"hotel summary {city}", live_summary and live_summary.to_dict(),
+             expected_summary and expected_summary.to_dict())
+    for city in activity_cities:
+        same(f"activities {city}", names(live.activities(city)), names(reference.activities(city)))
+        same(f"activity summary {city}", live.activity_summary(city).to_dict(),
+             reference.activity_summary(city).to_dict())
+    for category in ACTIVITY_CATEGORIES:
+        for min_rating, top_k in ((None, None), (4.5, None), (None, 1)):
+            got = live.activities_by_category(category.lower(), min_rating, top_k)
+            expected = reference.activities_by_category(category.lower(), min_rating, top_k)
+            same(f"category {category}", [(city, names(a)) for city, a in got.items()],
+                 [(city, names(a)) for city, a in expected.items()])
+    for getter in ("flight_cities", "hotel_cities", "activity_cities", "activity_categories"):
+        same(getter, getattr(live, getter)(), getattr(reference, getter)())
+
+    graph, rebuilt = get_route_graph(live), RouteGraph(reference.flight_inventory())
+    cities = reference.flight_cities()
+    for _ in range(100):
+        source, destination = rng.sample(cities, 2)
+        same(f"connections {source}->{destination}",
+             [i.to_dict() for i in graph.find_connections(source, destination)],
+             [i.to_dict() for i in rebuilt.find_connections(source, destination)])
+    resolver = get_city_resolver(live)
+    for city in (city for city in reference.hotel_cities() if city.startswith("newcity")):
+        same(f"resolve {city}", resolver.resolve(city).city, city)
+    return compared
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, default=2000)
+    parser.add_argument("--flights", type=int, default=300_000)
+    parser.add_argument("--hotels-per-city", type=int, default=300)
+    parser.add_argument("--activities-per-city", type=int, default=50)
+    parser.add_argument("--backend", choices=("memory", "snapshot"), default="memory")
+    parser.add_argument("--deltas", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--cached", type=int, default=600, help="search results cached before the feed starts")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(args.seed)
+
+    databases = generate_inventory(args.cities, args.flights, args.hotels_per_city, args.activities_per_city,
+                                   seed=args.seed)
+    rows = sum(len(v) for db in databases for v in db.values())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.backend == "snapshot":
+            path = os.path.join(tmp, "inventory.snapshot")
+            build_snapshot(path, *databases)
+            factory = lambda: SnapshotBackend(path)
+        else:
+            factory = lambda: MemoryBackend.from_databases(*databases)
+        started = time.perf_counter()
+        reload_inventory(factory)
+        load_ms = (time.perf_counter() - started) * 1000
+        print(f"{rows:,} rows ({len(databases[0]):,} routes, {args.cities:,} cities) on the {args.backend} backend; "
+              f"full load with indexes: {load_ms:,.0f} ms")
+
+        cities = city_names(args.cities)
+        routes = rng.sample(list(databases[0]), args.cached // 3)
+        for index in range(args.cached // 3):
+            search_hotels(cities[index])
+            search_activities(cities[-index - 1])
+            search_flights(*routes[index])
+        cached = get_search_cache_stats()["entries"]
+
+        deltas = generate_deltas(databases, args.deltas, rng)
+        batch_ms = []
+        started = time.perf_counter()
+        for start in range(0, len(deltas), args.batch_size):
+            batch_started = time.perf_counter()
+            apply_deltas(deltas[start:start + args.batch_size])
+            batch_ms.append((time.perf_counter() - batch_started) * 1000)
+        elapsed = time.perf_counter() - started
+        stats = get_search_cache_stats()
+
+        started = time.perf_counter()
+        reference = MemoryBackend.from_databases(*databases)
+        RouteGraph(reference.flight_inventory())
+        rebuild_ms = (time.perf_counter() - started) * 1000
+
+        print(f"  {len(deltas):,} deltas in batches of {args.batch_size}: {len(deltas) / elapsed:,.0f} deltas/s, "
+              f"batch p50 {statistics.median(batch_ms):.1f} ms, p99 {percentile(batch_ms, 0.99):.1f} ms, "
+              f"max {max(batch_ms):.1f} ms")
+        print(f"  full rebuild of the updated catalog: {rebuild_ms:,.0f} ms "
+              f"({rebuild_ms / statistics.median(batch_ms):,.0f}x a batch)")
+        print(f"  search cache: {cached} entries before the feed, {stats['entries']} after "
+              f"(only those for changed routes and cities dropped)")
+        compared = check(get_backend(), reference, deltas, rng)
+        print(f"  {compared:,} lookups match a rebuild of the updated catalog")
+
+if __name__ == "__main__":
+    main()
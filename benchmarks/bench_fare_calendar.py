@@ -0,0 +1,77 @@
+"""
+Benchmark the fare calendar against pricing a route one day at a time.
+
+For a range of calendar lengths and flights per route, the bulk FareCalendar
+(priced by FareModel) is checked to agree with the cheapest fare from a
+per-day fares_on lookup (the same model priced one day at a time), and both
+are timed. The
+round-trip pairing is checked against a brute-force scan of every stay.
+
+    python -m benchmarks.bench_fare_calendar
+    python -m benchmarks.bench_fare_calendar --days 30 180 --flights 2 10 50
+"""
+
+import argparse
+import datetime
+import statistics
+import time
+
+from benchmarks.synthetic import generate_flights_db
+from flight_agent.fares import FareCalendar, FareModel, fares_on, round_trips
+from inventory import build_flight_inventory
+
+def per_day_fares(flights, start, days, today):
+    """Cheapest fare per day by re-pricing the route once per day."""
+    return [
+        min(flight.price_paise for flight in fares_on(flights, start + datetime.timedelta(days=day), today))
+        for day in range(days)
+    ]
+
+def check_round_trips(outbound, inbound, min_stay, max_stay):
+    """Raise AssertionError unless round_trips matches a scan of every stay length."""
+    for day, back, total in round_trips(outbound, inbound, min_stay, max_stay):
+        window = range(day, day + max_stay - min_stay + 1)
+        expected = min(outbound.fares[day] + inbound.fares[other] for other in window)
+        if total != expected or back not in window:
+            raise AssertionError(f"Round trip for day {day} is {total}, expected {expected}")
+
+def timed(func, runs):
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 90, 180])
+    parser.add_argument("--flights", type=int, nargs="+", default=[2, 10, 50], help="flights per route")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    model = FareModel()
+    today = datetime.date.today()
+    start = today + datetime.timedelta(days=1)
+    for per_route in args.flights:
+        routes = build_flight_inventory(
+            generate_flights_db(2, 2 * per_route, flights_per_route=per_route, seed=args.seed)).routes
+        (source, destination), outbound_flights = next(iter(routes.items()))
+        return_flights = routes[(destination, source)]
+        for days in args.days:
+            calendar = FareCalendar(outbound_flights, start, days, today, model)
+            if list(calendar.fares) != per_day_fares(outbound_flights, start, days, today):
+                raise AssertionError(f"Calendar disagrees with per-day pricing ({per_route} flights, {days} days)")
+            inbound = FareCalendar(return_flights, start + datetime.timedelta(days=2), days + 5, today, model)
+            check_round_trips(calendar, inbound, 2, 7)
+
+            bulk_ms = timed(lambda: FareCalendar(outbound_flights, start, days, today, model), args.runs)
+            loop_ms = timed(lambda: per_day_fares(outbound_flights, start, days, today), args.runs)
+            pair_ms = timed(lambda: round_trips(calendar, inbound, 2, 7), args.runs)
+            print(f"{per_route:>3} flights/route {days:>4} days  calendar={bulk_ms:6.2f}ms  "
+                  f"per-day={loop_ms:7.2f}ms ({loop_ms / bulk_ms:4.1f}x)  round-trip pairing={pair_ms:5.2f}ms")
+    print("\nCalendar matches per-day pricing and brute-force round trips.")
+
+if __name__ == "__main__":
+    main()
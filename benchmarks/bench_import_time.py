@@ -0,0 +1,114 @@
+"""
+Import-time budget check for main.py and each agent package.
+
+Every target is imported in a fresh interpreter under ``-X importtime`` and
+its cumulative import time (median of several runs) is compared with a
+budget. Importing a target must also leave the heavy runtime modules
+(google.adk, google.genai, litellm) unloaded; they are only pulled in when
+an agent is first built. The time to build each root_agent on first access
+is reported for reference.
+
+Exits non-zero when any target is over budget or imports a heavy module,
+so the check can gate CI.
+
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --runs 11 --budget-scale 2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Cumulative import time budgets in milliseconds
+IMPORT_BUDGETS_MS = {
+    "main": 30,
+    "flight_agent": 80,
+    "hotel_agent": 80,
+    "activities_agent": 80,
+    "travel_planner": 100,
+}
+
+# Modules that must not be loaded by importing a target
+HEAVY_MODULES = ("google.adk", "google.genai", "litellm")
+
+# Targets that expose a lazily built root_agent
+AGENT_TARGETS = ("flight_agent", "hotel_agent", "activities_agent", "travel_planner")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORT = """
+import json, sys
+import {target}
+print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))
+"""
+
+_BUILD = """
+import time
+import {target}.agent
+t0 = time.perf_counter()
+{target}.agent.root_agent
+print(time.perf_counter() - t0)
+"""
+
+def _run(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *options, "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+
+def measure_import(target: str) -> tuple:
+    """Import target once in a fresh interpreter.
+
+    Returns:
+        tuple: (cumulative import time in ms, heavy modules that were loaded)
+    """
+    result = _run(_IMPORT.format(target=target, heavy=HEAVY_MODULES), "-X", "importtime")
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"; top level has one leading space
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2] == f" {target}":
+            cumulative_us = int(parts[1])
+    if cumulative_us is None:
+        raise RuntimeError(f"No importtime entry for {target}")
+    return cumulative_us / 1000, json.loads(result.stdout)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7, help="fresh interpreters per target")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="multiply every budget, e.g. on slower CI machines")
+    parser.add_argument("--no-build", action="store_true", help="skip timing root_agent construction")
+    args = parser.parse_args()
+
+    failures = []
+    for target, budget in IMPORT_BUDGETS_MS.items():
+        budget *= args.budget_scale
+        timings, heavy = [], set()
+        for _ in range(args.runs):
+            elapsed_ms, loaded = measure_import(target)
+            timings.append(elapsed_ms)
+            heavy.update(loaded)
+        median = statistics.median(timings)
+        status = "ok"
+        if median > budget:
+            status = "OVER BUDGET"
+            failures.append(f"{target}: {median:.1f}ms > {budget:.0f}ms")
+        if heavy:
+            status = "HEAVY IMPORT"
+            failures.append(f"{target}: imports {', '.join(sorted(heavy))}")
+        line = (f"{target:<18} median={median:6.1f}ms min={min(timings):6.1f}ms "
+                f"budget={budget:5.0f}ms  {status}")
+        if target in AGENT_TARGETS and not args.no_build:
+            build_seconds = float(_run(_BUILD.format(target=target)).stdout)
+            line += f"   (root_agent built on first access in {build_seconds * 1000:.0f}ms)"
+        print(line)
+
+    if failures:
+        print("\nImport-time regressions:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nAll targets within budget.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Check and time the model response cache with the scripted stub model.
+
+Replays the load corpus through the travel planner agent (ScriptedLlm in
+place of Gemini, a throwaway cache file) and checks that:
+
+  - a warm pass makes no model calls and returns the same replies as the cold pass,
+  - reworded prompts (case, spacing, trailing punctuation) hit the same entries,
+  - the session-state bypass sends every turn to the model,
+  - after the hotel inventory changes, cached tool-call decisions are replayed
+    but the tools run again, and only model turns that see changed tool results
+    go back to the model.
+
+Cold and warm request latency is reported for the given stub think time.
+
+    python -m benchmarks.bench_llm_cache --think-ms 300
+"""
+
+import argparse
+import asyncio
+import copy
+import logging
+import os
+import statistics
+import tempfile
+import time
+import warnings
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from stub_llm import DEFAULT_CORPUS, load_scripts
+from hotel_agent.mock_data import HOTELS_DB
+from inventory import MemoryBackend, build_hotel_inventory, get_backend, set_backend
+import llm_cache
+from llm_cache import LLM_CACHE_BYPASS_STATE_KEY, LLMResponseCache, set_llm_cache
+from travel_planner.agent import build_travel_planner_agent
+
+APP_NAME = "llm_cache_bench"
+# Tools whose results include hotel prices
+HOTEL_TOOLS = {"create_comprehensive_travel_plan", "search_hotels", "compare_destinations", "get_option_details"}
+
+def reworded(message: str) -> str:
+    return "  " + message.upper().replace(" ", "  ") + "!!"
+
+class Replayer:
+    def __init__(self, corpus_path: str, think_ms: float):
+        self.model, self.corpus = load_scripts(corpus_path)
+        self.model.think_time_ms = think_ms
+        self.runner = Runner(app_name=APP_NAME, agent=build_travel_planner_agent(model=self.model),
+                             session_service=InMemorySessionService())
+
+    async def ask(self, message: str, bypass: bool = False) -> tuple:
+        """(final reply text, tool names called, seconds) for one user turn in a new session."""
+        session = await self.runner.session_service.create_session(
+            app_name=APP_NAME, user_id="bench", state={LLM_CACHE_BYPASS_STATE_KEY: True} if bypass else None)
+        content = types.Content(role="user", parts=[types.Part(text=message)])
+        reply, tools = "", []
+        started = time.perf_counter()
+        async for event in self.runner.run_async(user_id="bench", session_id=session.id, new_message=content):
+            for part in (event.content.parts if event.content else None) or ():
+                if part.function_response:
+                    tools.append(part.function_response.name)
+                elif part.text:
+                    reply = part.text
+        return reply, tools, time.perf_counter() - started
+
+    async def replay(self, messages, bypass: bool = False) -> tuple:
+        """(replies, tools per request, seconds per request, model calls made)."""
+        calls = self.model.calls
+        results = [await self.ask(message, bypass) for message in messages]
+        return ([reply for reply, _, _ in results], [tools for _, tools, _ in results],
+                [seconds for _, _, seconds in results], self.model.calls - calls)
+
+def _changed_hotels_backend(previous):
+    """The active inventory with every hotel 10% dearer."""
+    hotels_db = copy.deepcopy(HOTELS_DB)
+    for hotels in hotels_db.values():
+        for hotel in hotels:
+            price = int(hotel["price_per_night"].replace("₹", "").replace(",", ""))
+            hotel["price_per_night"] = f"₹{price * 11 // 10:,}"
+    flights = previous.flight_inventory()
+    activities = previous._activities if isinstance(previous, MemoryBackend) else None
+    if activities is None:
+        from activities_agent.mock_data import ACTIVITY_INVENTORY
+        activities = ACTIVITY_INVENTORY
+    return MemoryBackend(flights, build_hotel_inventory(hotels_db), activities)
+
+async def run(args):
+    replayer = Replayer(args.corpus, args.think_ms)
+    messages = [entry["message"] for entry in replayer.corpus]
+
+    cold, cold_tools, cold_seconds, cold_calls = await replayer.replay(messages)
+    warm, warm_tools, warm_seconds, warm_calls = await replayer.replay(messages)
+    print(f"cold: {cold_calls} model calls, mean {statistics.fmean(cold_seconds) * 1000:7.1f}ms/request")
+    print(f"warm: {warm_calls} model calls, mean {statistics.fmean(warm_seconds) * 1000:7.1f}ms/request")
+    if warm_calls or warm != cold or warm_tools != cold_tools:
+        raise AssertionError("Warm pass did not replay the cold pass from the cache")
+
+    _, _, _, reworded_calls = await replayer.replay([reworded(message) for message in messages])
+    print(f"reworded prompts: {reworded_calls} model calls")
+    if reworded_calls:
+        raise AssertionError("Reworded prompts missed the cache")
+
+    _, _, _, bypass_calls = await replayer.replay(messages, bypass=True)
+    print(f"bypass: {bypass_calls} model calls")
+    if bypass_calls != cold_calls:
+        raise AssertionError("Bypass did not send every turn to the model")
+
+    previous = set_backend(_changed_hotels_backend(get_backend()))
+    try:
+        changed, changed_tools, _, changed_calls = await replayer.replay(messages)
+    finally:
+        set_backend(previous)
+    # Every model turn after the first hotel-reading tool result sees changed input
+    expected = 0
+    for entry in replayer.corpus:
+        turns = entry.get("turns", [])
+        first = next((index for index, turn in enumerate(turns)
+                      if HOTEL_TOOLS & {call["name"] for call in turn}), None)
+        expected += 0 if first is None else len(turns) - first
+    print(f"hotel prices changed: {changed_calls} model calls (expected {expected}, the turns after "
+          f"a hotel-reading tool), tools re-run: {changed_tools == cold_tools}")
+    if changed_tools != cold_tools or changed_calls != expected:
+        raise AssertionError("Inventory change was not handled by re-running tools and re-asking the model")
+    print("\nLLM response cache checks passed.")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--think-ms", type=float, default=200.0, help="stub model latency per model turn")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    warnings.filterwarnings("ignore", category=UserWarning, module="google.adk")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(os.path.join(tmp, "llm_cache.db"), 1000, 16 * 1024 * 1024, 3600)
+        previous, previous_enabled = set_llm_cache(cache), llm_cache.LLM_CACHE_ENABLED
+        llm_cache.LLM_CACHE_ENABLED = True
+        try:
+            asyncio.run(run(args))
+            print(cache.stats())
+        finally:
+            llm_cache.LLM_CACHE_ENABLED = previous_enabled
+            cache.close()
+            set_llm_cache(previous)
+
+if __name__ == "__main__":
+    main()
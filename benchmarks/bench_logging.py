@@ -0,0 +1,114 @@
+"""
+Benchmark per-plan logging overhead of the sync and queue logging modes.
+
+Runs create_comprehensive_travel_plan repeatedly with logging disabled (the
+baseline), with synchronous file + stream handlers (LOG_MODE = "sync"), and
+with the queue pipeline with and without per-logger sampling
+(LOG_MODE = "queue"). Overhead is the median plan time minus the baseline,
+i.e. what logging costs the request thread. For the queue modes the time the
+writer needs to drain what was queued is reported separately.
+
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging --plans 500 --stream stdout
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import travel_planner.agent as planner
+from config import LOG_FORMAT, LOG_SAMPLE_EVERY
+from logging_utils import apply_log_sampling, build_log_handlers, skip_unused_record_fields, start_queue_logging
+
+PLAN_ARGS = ("delhi", "goa", "2026-12-10", "2026-12-14", 80000, 2, "luxury adventure")
+
+class _CountingFilter(logging.Filter):
+    def __init__(self):
+        super().__init__()
+        self.records = 0
+
+    def filter(self, record):
+        self.records += 1
+        return True
+
+def _reset_logging():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    apply_log_sampling({name: 1 for name in LOG_SAMPLE_EVERY})
+    skip_unused_record_fields("%(thread)d %(process)d %(processName)s %(taskName)s")
+
+def time_plans(plans: int) -> float:
+    """Median seconds per plan."""
+    planner.create_comprehensive_travel_plan(*PLAN_ARGS)  # warm up
+    timings = []
+    for _ in range(plans):
+        t0 = time.perf_counter()
+        planner.create_comprehensive_travel_plan(*PLAN_ARGS)
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings)
+
+def run_mode(mode: str, plans: int, log_dir: str, stream_target: str) -> tuple:
+    """Returns (median seconds per plan, records written per plan, writer drain seconds)."""
+    _reset_logging()
+    root = logging.getLogger()
+    log_file = os.path.join(log_dir, f"{mode}.log")
+    stream = sys.stdout if stream_target == "stdout" else open(os.path.join(log_dir, f"{mode}.out"), "w")
+    counter = _CountingFilter()
+    writer = None
+
+    if mode == "disabled":
+        root.setLevel(logging.CRITICAL)
+    elif mode == "sync":
+        handlers = build_log_handlers(log_file, stream, LOG_FORMAT, batched=False)
+        handlers[0].addFilter(counter)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(logging.INFO)
+    else:
+        handlers = build_log_handlers(log_file, stream, LOG_FORMAT, batched=True)
+        handlers[0].addFilter(counter)
+        writer = start_queue_logging(handlers, logging.INFO)
+        if mode == "queue+sampling":
+            apply_log_sampling(LOG_SAMPLE_EVERY)
+            skip_unused_record_fields(LOG_FORMAT)
+
+    per_plan = time_plans(plans)
+    drain = 0.0
+    if writer is not None:
+        t0 = time.perf_counter()
+        writer.stop()
+        drain = time.perf_counter() - t0
+    _reset_logging()
+    if stream is not sys.stdout:
+        stream.close()
+    return per_plan, counter.records / (plans + 1), drain
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=300)
+    parser.add_argument("--stream", choices=("file", "stdout"), default="file",
+                        help="where the stream handler writes (stdout includes terminal I/O)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        results = {mode: run_mode(mode, args.plans, log_dir, args.stream)
+                   for mode in ("disabled", "sync", "queue", "queue+sampling")}
+
+    baseline = results["disabled"][0]
+    print(f"\n{args.plans} plans, stream handler -> {args.stream}")
+    for mode, (per_plan, records, drain) in results.items():
+        overhead = (per_plan - baseline) * 1e6
+        line = f"  {mode:<15} {per_plan * 1e6:8.0f}us/plan  logging overhead {overhead:7.0f}us/plan"
+        if mode != "disabled":
+            line += f"  ({records:.0f} records/plan"
+            line += f", writer drained in {drain * 1000:.0f}ms)" if drain else ")"
+        print(line)
+
+if __name__ == "__main__":
+    main()
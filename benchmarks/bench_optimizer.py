@@ -0,0 +1,92 @@
+"""
+Benchmark the whole-trip optimizer with hundreds of options per category.
+
+Synthetic flight, hotel and activity records for one route and city are
+turned into trip options and optimized for a range of budgets.
+tests/test_optimizer.py checks the optimizer against brute-force
+enumeration of every combination.
+
+    python -m benchmarks.bench_optimizer
+    python -m benchmarks.bench_optimizer --options 500 --nights 5 --target-ms 50
+    python -m benchmarks.bench_optimizer --correlated
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from benchmarks.synthetic import generate_activities_db, generate_flights_db, generate_hotels_db
+from inventory import build_activity_inventory, build_flight_inventory, build_hotel_inventory
+from travel_planner.optimizer import (
+    activity_options, flight_options, hotel_options, optimize_trip,
+)
+
+def trip_options(num_options: int, nights: int, travelers: int, seed: int) -> tuple:
+    """(outbound, return, hotel, activity) option lists with num_options candidates each."""
+    flights = build_flight_inventory(
+        generate_flights_db(2, 2 * num_options, flights_per_route=num_options, seed=seed)).routes
+    (source, destination), outbound = next(iter(flights.items()))
+    hotels = build_hotel_inventory(generate_hotels_db(1, num_options, seed=seed))
+    activities = build_activity_inventory(generate_activities_db(1, num_options, seed=seed))
+    city = hotels.cities[0]
+    return (
+        flight_options("outbound", outbound, None, travelers),
+        flight_options("return", flights[(destination, source)], None, travelers),
+        hotel_options(hotels.by_city[city], nights, "luxury"),
+        activity_options(activities.by_city[city], travelers, "Adventure"),
+    )
+
+def correlate_prices(options, rng: random.Random):
+    """Make price track quality, so few options are dominated and frontiers are long."""
+    for option in options:
+        option.cost_paise = option.score * rng.randrange(80, 120) * 100
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--options", type=int, nargs="+", default=[100, 300, 500],
+                        help="candidate options per category")
+    parser.add_argument("--nights", type=int, default=4)
+    parser.add_argument("--travelers", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--target-ms", type=float, default=50.0, help="p99 latency target")
+    parser.add_argument("--correlated", action="store_true",
+                        help="price every option in line with its score (worst case for pruning)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    max_activities = 2 * args.nights
+    failures = []
+    for num_options in args.options:
+        options = trip_options(num_options, args.nights, args.travelers, args.seed)
+        if args.correlated:
+            rng = random.Random(args.seed)
+            for category in options:
+                correlate_prices(category, rng)
+        cheapest = optimize_trip(*options, 0)[1][0]
+        # Budgets from just above the cheapest trip up to unlimited
+        budgets = [cheapest.cost_paise * factor for factor in (1.2, 1.5, 2, 3)] + [None]
+        for budget_paise in budgets:
+            timings = []
+            for _ in range(args.runs):
+                t0 = time.perf_counter()
+                best, frontier = optimize_trip(*options, max_activities,
+                                               budget_paise=None if budget_paise is None else int(budget_paise))
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            label = "unlimited" if budget_paise is None else f"₹{int(budget_paise) // 100:,}"
+            print(f"{num_options:>4} options/category  budget={label:<11} frontier={len(frontier):4d} "
+                  f"best={best.score if best else '-':>4}  "
+                  f"median={statistics.median(timings):6.2f}ms p99={p99:6.2f}ms")
+            if p99 > args.target_ms:
+                failures.append(f"{num_options} options, budget {label}: p99 {p99:.1f}ms")
+
+    if failures:
+        print(f"\nOver the {args.target_ms:.0f}ms target:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print(f"\nAll runs within {args.target_ms:.0f}ms.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark create_comprehensive_travel_plan with simulated supplier latency.
+
+Each sub-search (outbound flights, return flights, hotels, activities) is
+wrapped to sleep for a configurable time before answering, standing in for a
+remote supplier round trip; the search cache is off meanwhile, so every
+plan pays the suppliers' latency. The plan is timed with the sub-searches run one
+after another and then concurrently; concurrent latency should track the
+slowest supplier rather than the sum. A final run makes one supplier slower
+than the deadline to show the plan degrading to a partial result.
+
+The streaming run times stream_travel_plan() to its first section and to the
+complete plan, checks that plan matches create_comprehensive_travel_plan,
+and checks that through the ADK runner (ScriptedLlm in place of the model)
+the section events arrive before the tool's response.
+
+    python -m benchmarks.bench_plan_fanout --flight-ms 120 --hotel-ms 200 --activity-ms 80
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from contextlib import contextmanager
+
+import cache_utils
+import travel_planner.agent as planner
+import travel_planner.fanout as fanout
+from travel_planner.streaming import stream_travel_plan
+
+PLAN_ARGS = {"source": "Delhi", "destination": "Goa", "travel_date": "2026-01-15", "return_date": "2026-01-18",
+             "budget": 60000, "travelers": 2, "preferences": "adventure"}
+
+def _delayed(func, seconds):
+    def wrapper(*args, **kwargs):
+        time.sleep(seconds)
+        return func(*args, **kwargs)
+    return wrapper
+
+@contextmanager
+def simulated_latency(flight_ms: float, hotel_ms: float, activity_ms: float):
+    """Patch the planner's lookups to sleep like remote supplier calls, with the search cache off."""
+    originals = {name: getattr(planner, name) for name in ("find_flights", "find_hotels", "find_activities")}
+    previous_cache = cache_utils.SEARCH_CACHE_ENABLED
+    cache_utils.SEARCH_CACHE_ENABLED = False
+    planner.find_flights = _delayed(originals["find_flights"], flight_ms / 1000)
+    planner.find_hotels = _delayed(originals["find_hotels"], hotel_ms / 1000)
+    planner.find_activities = _delayed(originals["find_activities"], activity_ms / 1000)
+    try:
+        yield
+    finally:
+        cache_utils.SEARCH_CACHE_ENABLED = previous_cache
+        for name, func in originals.items():
+            setattr(planner, name, func)
+
+def time_plans(runs: int, concurrent: bool) -> list:
+    fanout.PLANNER_CONCURRENT_SEARCHES = concurrent
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        plan = planner.create_comprehensive_travel_plan(**PLAN_ARGS)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert plan["status"] == "success", plan
+    return timings
+
+def comparable(plan: dict) -> str:
+    return json.dumps({key: value for key, value in plan.items() if key != "plan_generated_at"}, sort_keys=True)
+
+def time_streamed_plans(runs: int) -> tuple:
+    """(ms to first section, ms to the complete plan) per run, checking each plan against the tool's."""
+    fanout.PLANNER_CONCURRENT_SEARCHES = True
+    expected = comparable(planner.create_comprehensive_travel_plan(**PLAN_ARGS))
+    first, full = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        names = []
+        for section in stream_travel_plan(**PLAN_ARGS):
+            if not names:
+                first.append((time.perf_counter() - start) * 1000)
+            names.append(section.name)
+        full.append((time.perf_counter() - start) * 1000)
+        assert names[-1] == "plan" and comparable(section.content) == expected, "streamed plan differs"
+    return first, full, names
+
+async def runner_event_order() -> list:
+    """Plan through the ADK runner with the streaming tool; returns what arrived, in order."""
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.genai import types
+    from stub_llm import ScriptedLlm
+
+    planner.STREAM_TRAVEL_PLANS = True
+    try:
+        model = ScriptedLlm()
+        model.script("plan my trip", [[{"name": "create_comprehensive_travel_plan", "args": PLAN_ARGS}]])
+        runner = Runner(app_name="bench_plan_fanout", agent=planner.build_travel_planner_agent(model=model),
+                        session_service=InMemorySessionService(), auto_create_session=True)
+    finally:
+        planner.STREAM_TRAVEL_PLANS = False
+    arrived = []
+    message = types.Content(role="user", parts=[types.Part(text="plan my trip")])
+    async for event in runner.run_async(user_id="bench", session_id="stream", new_message=message):
+        section = (event.custom_metadata or {}).get("travel_plan_section")
+        if section:
+            arrived.append(section["section"])
+        arrived.extend(f"response:{response.name}" for response in event.get_function_responses())
+    return arrived
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flight-ms", type=float, default=120)
+    parser.add_argument("--hotel-ms", type=float, default=200)
+    parser.add_argument("--activity-ms", type=float, default=80)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    expected_serial = 2 * args.flight_ms + args.hotel_ms + args.activity_ms
+    expected_parallel = max(args.flight_ms, args.hotel_ms, args.activity_ms)
+    print(f"Simulated suppliers: flights {args.flight_ms:.0f}ms (x2), hotels {args.hotel_ms:.0f}ms, "
+          f"activities {args.activity_ms:.0f}ms")
+
+    with simulated_latency(args.flight_ms, args.hotel_ms, args.activity_ms):
+        for concurrent in (False, True):
+            timings = time_plans(args.runs, concurrent)
+            label = "concurrent" if concurrent else "serial"
+            expected = expected_parallel if concurrent else expected_serial
+            print(f"{label:<10} mean={statistics.fmean(timings):7.1f}ms  max={max(timings):7.1f}ms  "
+                  f"(sum of suppliers {expected_serial:.0f}ms, slowest {expected_parallel:.0f}ms, expected ~{expected:.0f}ms)")
+
+        first, full, names = time_streamed_plans(args.runs)
+        print(f"streamed   first section mean={statistics.fmean(first):7.1f}ms, complete plan "
+              f"mean={statistics.fmean(full):7.1f}ms; sections {', '.join(names)}; final plan matches")
+        arrived = asyncio.run(runner_event_order())
+        assert arrived and arrived[-1] == "response:create_comprehensive_travel_plan", arrived
+        print(f"runner     events in order: {', '.join(arrived)}")
+
+    # One supplier blows its deadline: the plan still returns, on time, with a partial section
+    deadline = fanout.SUB_SEARCH_TIMEOUT_SECONDS
+    fanout.PLANNER_CONCURRENT_SEARCHES = True
+    with simulated_latency(args.flight_ms, deadline * 1000 + 500, args.activity_ms):
+        start = time.perf_counter()
+        plan = planner.create_comprehensive_travel_plan("Delhi", "Goa", "2026-01-15", "2026-01-18", travelers=2)
+        elapsed = (time.perf_counter() - start) * 1000
+    print(f"deadline   hotels slower than the {deadline:.1f}s deadline -> plan in {elapsed:.0f}ms, "
+          f"incomplete sections: {plan.get('incomplete_sections')}, hotels status: {plan['accommodation']['status']}")
+
+if __name__ == "__main__":
+    main()
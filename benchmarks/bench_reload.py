@@ -0,0 +1,157 @@
+"""
+Tool latency and consistency while the inventory is hot-reloaded.
+
+Two synthetic catalogs with different prices are compiled into snapshots.
+Request threads call search_hotels and search_activities in a loop, first
+with no reloads and then while a reload thread swaps between the two
+snapshots every --reload-interval seconds. Every response must match the
+catalog named by its inventory_version (checked on a sample), and at most
+two snapshots may be open at any time. Latency percentiles show whether
+request threads wait on reloads.
+
+    python -m benchmarks.bench_reload
+    python -m benchmarks.bench_reload --cities 500 --hotels-per-city 200 --seconds 10
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.synthetic import city_names, generate_inventory
+from activities_agent.agent import search_activities
+from hotel_agent.agent import search_hotels
+from inventory import MemoryBackend, SnapshotBackend, build_snapshot, reload_inventory
+
+CHECK_EVERY = 25
+
+def percentile(times, fraction: float) -> float:
+    return sorted(times)[min(len(times) - 1, int(len(times) * fraction))]
+
+class OpenSnapshots:
+    """Opens snapshots for reloads and tracks how many are open at once."""
+
+    def __init__(self):
+        self.open = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def factory(self, path: str):
+        tracker = self
+
+        class TrackedSnapshot(SnapshotBackend):
+            def close(self):
+                with tracker._lock:
+                    tracker.open -= 1
+                super().close()
+
+        def create():
+            with self._lock:
+                self.open += 1
+                self.peak = max(self.peak, self.open)
+            return TrackedSnapshot(path)
+
+        return create
+
+def run_requests(cities, threads: int, seconds: float, expected, stop_reloads=None):
+    """Call the tools from several threads; returns (latencies in ms, responses checked, mismatches)."""
+    latencies, checked, mismatches = [], [0], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        local, calls = [], 0
+        while time.perf_counter() < deadline:
+            city = rng.choice(cities)
+            tool, key = rng.choice([(search_hotels, "hotels"), (search_activities, "activities")])
+            started = time.perf_counter_ns()
+            response = tool(city)
+            local.append((time.perf_counter_ns() - started) / 1e6)
+            calls += 1
+            if calls % CHECK_EVERY == 0:
+                backend = expected[response["inventory_version"]]
+                records = backend.hotels(city) if key == "hotels" else backend.activities(city)
+                with lock:
+                    checked[0] += 1
+                    if response[key] != [record.to_dict() for record in records]:
+                        mismatches.append((tool.__name__, city, response["inventory_version"]))
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    if stop_reloads is not None:
+        stop_reloads.set()
+    return latencies, checked[0], mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, default=200)
+    parser.add_argument("--hotels-per-city", type=int, default=100)
+    parser.add_argument("--activities-per-city", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0, help="per phase")
+    parser.add_argument("--reload-interval", type=float, default=0.1)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    catalogs = [generate_inventory(args.cities, args.cities * 4, args.hotels_per_city, args.activities_per_city,
+                                   seed=seed) for seed in (1, 2)]
+    expected = {}
+    for catalog in catalogs:
+        backend = MemoryBackend.from_databases(*catalog)
+        expected[backend.catalog_version] = backend
+    cities = city_names(args.cities)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f"catalog{i}.snapshot") for i in range(2)]
+        for path, catalog in zip(paths, catalogs):
+            build_snapshot(path, *catalog)
+        snapshots = OpenSnapshots()
+        # Loaded like any other reload, so its indexes are built before the first request
+        reload_inventory(snapshots.factory(paths[0]))
+        print(f"{args.cities} cities, {args.hotels_per_city} hotels and {args.activities_per_city} activities per "
+              f"city, {args.threads} request threads, {args.seconds:g}s per phase")
+
+        baseline, checked, mismatches = run_requests(cities, args.threads, args.seconds, expected)
+
+        stop = threading.Event()
+        reload_times = []
+
+        def reload_loop():
+            target = 1
+            while not stop.wait(args.reload_interval):
+                started = time.perf_counter()
+                reload_inventory(snapshots.factory(paths[target]))
+                reload_times.append((time.perf_counter() - started) * 1000)
+                target = 1 - target
+
+        reloader = threading.Thread(target=reload_loop)
+        reloader.start()
+        reloading, reload_checked, reload_mismatches = run_requests(cities, args.threads, args.seconds, expected,
+                                                                    stop_reloads=stop)
+        reloader.join()
+
+        print(f"  {'phase':<14}{'calls':>9}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+        for label, times in (("no reloads", baseline), ("reloading", reloading)):
+            print(f"  {label:<14}{len(times):>9}{statistics.median(times):>9.3f}{percentile(times, 0.99):>9.3f}"
+                  f"{max(times):>9.3f}")
+        print(f"  {len(reload_times)} reloads, median {statistics.median(reload_times):.1f} ms "
+              f"(build, swap and drain); peak open snapshots: {snapshots.peak}")
+        print(f"  {checked + reload_checked} responses checked against their inventory_version, "
+              f"{len(mismatches) + len(reload_mismatches)} mismatches")
+        if mismatches or reload_mismatches:
+            raise AssertionError(f"Responses disagree with their catalog version: {(mismatches + reload_mismatches)[:5]}")
+        if snapshots.peak > 2:
+            raise AssertionError(f"{snapshots.peak} snapshots were open at once")
+
+if __name__ == "__main__":
+    main()
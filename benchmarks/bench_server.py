@@ -0,0 +1,175 @@
+"""
+The agent server under steady load, overload, deadlines and shutdown, offline.
+
+Starts server.create_app() on uvicorn on a local port, with the travel
+planner on ScriptedLlm (replaying the load corpus, --think-ms per model
+turn) and the model response cache on in a throwaway file (--no-llm-cache
+turns it off), and drives it over HTTP:
+
+- steady: --concurrency clients in a closed loop; every request succeeds.
+- overload: a burst of --burst simultaneous requests, far more than
+  --sessions running plus --queue waiting. The excess is rejected with 503
+  at once, and admitted requests finish within about (queue / sessions + 1)
+  turns. The burst is repeated with a queue as long as the burst, where
+  every request waits behind the whole burst instead. /healthz is polled to
+  show the peak queue depth and sessions in flight.
+- deadline: requests asking for a deadline shorter than a turn get 504 at
+  about that deadline.
+- drain: shutdown starts with requests running; they all finish, and new
+  connections are refused.
+
+    python -m benchmarks.bench_server
+    python -m benchmarks.bench_server --sessions 16 --queue 32 --burst 400 --think-ms 100
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import tempfile
+import time
+import warnings
+
+import httpx
+import uvicorn
+
+import llm_cache
+from llm_cache import LLMResponseCache, set_llm_cache
+from server import REQUEST_LATENCY, build_server, create_app
+from stub_llm import DEFAULT_CORPUS, load_scripts
+
+def _percentile_ms(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[max(0, min(len(values) - 1, math.ceil(fraction * len(values)) - 1))] * 1000 if values else 0.0
+
+async def post(client: httpx.AsyncClient, message: str, **fields) -> tuple:
+    """(status, seconds) for one /run request."""
+    started = time.perf_counter()
+    response = await client.post("/run", json={"message": message, **fields})
+    return response.status_code, time.perf_counter() - started
+
+async def run(args):
+    messages = [entry["message"] for entry in load_scripts(args.corpus)[1]]
+    server = build_server(args.corpus, args.think_ms, max_sessions=args.sessions, max_queued=args.queue)
+    config = uvicorn.Config(create_app(server, drain_timeout=30), host="127.0.0.1", port=0, log_config=None,
+                            access_log=False, timeout_graceful_shutdown=30)
+    http_server = uvicorn.Server(config)
+    serving = asyncio.create_task(http_server.serve())
+    while not http_server.started:
+        await asyncio.sleep(0.01)
+    port = http_server.servers[0].sockets[0].getsockname()[1]
+    # Idle connections are capped: httpx checks every one on each request, and the burst would leave hundreds
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=args.concurrency)
+    client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60)
+    print(f"Agent server: {args.sessions} sessions, queue of {args.queue}; stub model {args.think_ms:g} ms per turn")
+
+    async with client:
+        # Steady: a closed loop at the session limit
+        pending = iter(range(args.requests))
+        results = []
+
+        async def worker():
+            for index in pending:
+                results.append(await post(client, messages[index % len(messages)]))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        seconds = time.perf_counter() - started
+        ok = [elapsed for status, elapsed in results if status == 200]
+        print(f"  steady    {len(results)} requests, {args.concurrency} clients: {len(ok)} ok, "
+              f"{len(ok) / seconds:.0f} req/s, p50 {_percentile_ms(ok, 0.5):.0f} ms, p99 {_percentile_ms(ok, 0.99):.0f} ms")
+        if len(ok) != len(results):
+            raise AssertionError(f"steady load: {len(results) - len(ok)} requests failed")
+
+        # Overload: one burst, well past what the server admits, then the same burst with a queue
+        # as long as the burst, to show the latency the bounded queue saves
+        rejected_latency = REQUEST_LATENCY.labels("rejected")
+        for max_queued in (args.queue, args.burst):
+            server.admission.max_queued = max_queued
+            peak = {"in_flight": 0, "queued": 0}
+            burst_done = asyncio.Event()
+
+            async def poll_health():
+                while not burst_done.is_set():
+                    stats = (await client.get("/healthz")).json()
+                    for key in peak:
+                        peak[key] = max(peak[key], stats[key])
+                    await asyncio.sleep(0.005)
+
+            poller = asyncio.create_task(poll_health())
+            results = await asyncio.gather(*(post(client, messages[index % len(messages)])
+                                             for index in range(args.burst)))
+            burst_done.set()
+            await poller
+            ok = [elapsed for status, elapsed in results if status == 200]
+            rejected = [elapsed for status, elapsed in results if status == 503]
+            print(f"  overload  burst of {args.burst}, queue of {max_queued}: {len(ok)} ok, "
+                  f"p50 {_percentile_ms(ok, 0.5):.0f} ms, p99 {_percentile_ms(ok, 0.99):.0f} ms; "
+                  f"{len(rejected)} rejected with 503; peak {peak['in_flight']} in flight, {peak['queued']} queued")
+            if len(ok) + len(rejected) != args.burst or (max_queued < args.burst) != bool(rejected):
+                raise AssertionError(f"overload: unexpected statuses {sorted({s for s, _ in results})}")
+            if peak["in_flight"] > args.sessions or peak["queued"] > max_queued:
+                raise AssertionError(f"overload: limits exceeded, peak {peak}")
+        server.admission.max_queued = args.queue
+        # Client-side times include waiting for this process's loop, which also runs the admitted turns
+        print(f"            rejections take under {rejected_latency.percentile(0.99) / 1000:.0f} us in the server (p99)")
+
+        # Deadline: shorter than one model turn. Messages never sent before, so no turn is an LLM cache hit
+        deadline = args.think_ms / 2000
+        results = await asyncio.gather(*(post(client, f"Deadline check {time.time_ns()} {index}", timeout_seconds=deadline)
+                                         for index in range(10)))
+        statuses = {status for status, _ in results}
+        print(f"  deadline  {deadline * 1000:.0f} ms deadlines: statuses {sorted(statuses)}, "
+              f"max {max(elapsed for _, elapsed in results) * 1000:.0f} ms")
+        if statuses != {504}:
+            raise AssertionError(f"deadline: expected 504s, got {sorted(statuses)}")
+
+        # Drain: shut down with requests running
+        running = [asyncio.create_task(post(client, messages[index % len(messages)]))
+                   for index in range(args.sessions)]
+        while server.admission.in_flight < args.sessions:
+            await asyncio.sleep(0.005)
+        started = time.perf_counter()
+        http_server.should_exit = True
+        results = await asyncio.gather(*running)
+        await serving
+        seconds = time.perf_counter() - started
+        try:
+            await post(client, messages[0])
+            refused = False
+        except httpx.ConnectError:
+            refused = True
+        print(f"  drain     {sum(status == 200 for status, _ in results)}/{len(results)} running requests "
+              f"finished in {seconds * 1000:.0f} ms; new connections refused: {refused}")
+        if any(status != 200 for status, _ in results) or not refused:
+            raise AssertionError("drain: running requests failed or the server still accepted connections")
+    print("Agent server checks passed.")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--sessions", type=int, default=8, help="agent turns running at once")
+    parser.add_argument("--queue", type=int, default=16, help="requests waiting for a turn")
+    parser.add_argument("--think-ms", type=float, default=50.0, help="stub model latency per model turn")
+    parser.add_argument("--requests", type=int, default=200, help="requests in the steady phase")
+    parser.add_argument("--concurrency", type=int, default=8, help="clients in the steady phase")
+    parser.add_argument("--burst", type=int, default=200, help="simultaneous requests in the overload phase")
+    parser.add_argument("--llm-cache", action=argparse.BooleanOptionalAction, default=True,
+                        help="serve repeated model turns from a throwaway response cache")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    warnings.filterwarnings("ignore", category=UserWarning, module="google.adk")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(os.path.join(tmp, "llm_cache.db"), 1000, 16 * 1024 * 1024, 3600)
+        previous, previous_enabled = set_llm_cache(cache), llm_cache.LLM_CACHE_ENABLED
+        llm_cache.LLM_CACHE_ENABLED = args.llm_cache
+        try:
+            asyncio.run(run(args))
+        finally:
+            llm_cache.LLM_CACHE_ENABLED = previous_enabled
+            cache.close()
+            set_llm_cache(previous)
+
+if __name__ == "__main__":
+    main()
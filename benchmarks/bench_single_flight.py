@@ -0,0 +1,139 @@
+"""
+Single-flight search tools under a thundering herd.
+
+The inventory is served by a slow local stand-in backend, whose flight and
+hotel lookups sleep --backend-ms like a supplier round trip and count how
+often they run. A herd of --herd callers then asks for the same flights
+(Delhi -> Goa) and hotels (Goa) at the same moment on an empty search
+cache: as threads calling search_flights / search_hotels, as coroutines
+using call_search_async, and as both at once. Each herd runs with
+SEARCH_SINGLE_FLIGHT_ENABLED off and on; with it on, backend calls should
+drop from about N to 1 per search. (Coroutines without it only run as
+many lookups as the default executor has threads; the cache answers the
+rest.) Every response is checked against the first one.
+
+    python -m benchmarks.bench_single_flight
+    python -m benchmarks.bench_single_flight --herd 500 --backend-ms 200
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import threading
+import time
+
+import cache_utils
+from cache_utils import SINGLE_FLIGHT_CALLS, call_search_async, invalidate_search_cache
+from flight_agent.agent import search_flights
+from hotel_agent.agent import search_hotels
+from inventory import MemoryBackend, load_inventory_data, set_backend
+
+SEARCHES = ((search_flights, ("Delhi", "Goa", "2026-01-15")), (search_hotels, ("Goa", "2026-01-15", "2026-01-18")))
+
+class SlowBackend(MemoryBackend):
+    """Memory backend whose flight and hotel lookups sleep like a remote supplier and are counted."""
+
+    def __init__(self, *args, delay_seconds: float = 0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delay_seconds = delay_seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _round_trip(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay_seconds)
+
+    def flights(self, source, destination):
+        self._round_trip()
+        return super().flights(source, destination)
+
+    def hotels(self, city, max_price_paise=None, min_rating=None, amenities=None):
+        self._round_trip()
+        return super().hotels(city, max_price_paise, min_rating, amenities)
+
+def herd_threads(herd: int) -> list:
+    barrier = threading.Barrier(herd)
+    responses = [None] * herd
+
+    def caller(index: int):
+        tool, args = SEARCHES[index % len(SEARCHES)]
+        barrier.wait()
+        responses[index] = tool(*args)
+
+    threads = [threading.Thread(target=caller, args=(index,)) for index in range(herd)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+def herd_coroutines(herd: int) -> list:
+    async def run():
+        return await asyncio.gather(*(
+            call_search_async(SEARCHES[index % len(SEARCHES)][0], *SEARCHES[index % len(SEARCHES)][1])
+            for index in range(herd)
+        ))
+    return asyncio.run(run())
+
+def herd_mixed(herd: int) -> list:
+    # A whole number of rounds of SEARCHES on threads, so responses stay in SEARCHES order
+    threads = herd // 2 // len(SEARCHES) * len(SEARCHES)
+
+    async def run():
+        threaded = asyncio.to_thread(herd_threads, threads)
+        coroutines = [
+            call_search_async(SEARCHES[index % len(SEARCHES)][0], *SEARCHES[index % len(SEARCHES)][1])
+            for index in range(herd - threads)
+        ]
+        results = await asyncio.gather(threaded, *coroutines)
+        return results[0] + list(results[1:])
+    return asyncio.run(run())
+
+def coalesced_total() -> int:
+    return sum(series.value for values, series in SINGLE_FLIGHT_CALLS.series() if values[1] == "coalesced")
+
+def check(responses: list, herd: int, label: str):
+    """Every flight response matches the first flight response, and likewise for hotels."""
+    for offset in range(len(SEARCHES)):
+        expected = json.dumps(responses[offset], sort_keys=True)
+        same = [json.dumps(response, sort_keys=True) == expected for response in responses[offset::len(SEARCHES)]]
+        if responses[offset].get("status") != "success" or not all(same):
+            raise AssertionError(f"{label}: {same.count(False)} responses differ from the first")
+    if len(responses) != herd:
+        raise AssertionError(f"{label}: {len(responses)} responses for {herd} callers")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--herd", type=int, default=200, help="concurrent callers per herd")
+    parser.add_argument("--backend-ms", type=float, default=100.0, help="stand-in backend latency per lookup")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    backend = SlowBackend.from_databases(*load_inventory_data())
+    set_backend(backend)
+    # The first searches build the backend's lazy indexes; herds should count supplier round trips only
+    for tool, tool_args in SEARCHES:
+        tool(*tool_args)
+    backend.delay_seconds = args.backend_ms / 1000
+    print(f"Herd of {args.herd} callers for the same flights and hotels; backend {args.backend_ms:g} ms per lookup")
+    print(f"  {'callers':<12}{'single-flight':>14}{'backend calls':>15}{'coalesced':>11}{'wall ms':>10}")
+    for label, herd in (("threads", herd_threads), ("coroutines", herd_coroutines), ("mixed", herd_mixed)):
+        for enabled in (False, True):
+            cache_utils.SEARCH_SINGLE_FLIGHT_ENABLED = enabled
+            invalidate_search_cache()
+            backend.calls = 0
+            coalesced = coalesced_total()
+            started = time.perf_counter()
+            responses = herd(args.herd)
+            elapsed = (time.perf_counter() - started) * 1000
+            check(responses, args.herd, label)
+            print(f"  {label:<12}{'on' if enabled else 'off':>14}{backend.calls:>15}"
+                  f"{coalesced_total() - coalesced:>11}{elapsed:>10.0f}")
+            if enabled and backend.calls != len(SEARCHES):
+                raise AssertionError(f"{label}: {backend.calls} backend calls, expected {len(SEARCHES)}")
+    print("  every caller got the same response; one backend call per search with single-flight on")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark cold start and query latency of memory-mapped inventory snapshots.
+
+For each scale a synthetic catalog is compiled into a snapshot, checked to
+answer sampled queries exactly like the in-memory backend, and then:
+
+- cold start: a fresh interpreter maps the snapshot and answers one hotel
+  query; its time and peak RSS are compared with building the in-memory
+  inventories from the same dicts;
+- steady state: per-lookup latency of both backends.
+
+    python -m benchmarks.bench_snapshot
+    python -m benchmarks.bench_snapshot --scales 10000:1000 1000000:100000
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_backends import (
+    ACTIVITIES_PER_CITY, HOTELS_PER_CITY, check_parity, sample_queries, time_lookups,
+)
+from benchmarks.synthetic import (
+    city_names, generate_activities_db, generate_flights_db, generate_hotels_db,
+)
+from inventory import (
+    MemoryBackend, SnapshotBackend, build_snapshot,
+    build_activity_inventory, build_flight_inventory, build_hotel_inventory,
+)
+
+# Runs in a fresh interpreter: map the snapshot and answer one query
+# (peak RSS comes from /proc: ru_maxrss would include the forking parent's)
+_PEAK_RSS = """
+def peak_rss_kib():
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+"""
+_COLD_START = _PEAK_RSS + """
+import json, sys, time
+t0 = time.perf_counter()
+from inventory.snapshot import SnapshotBackend
+backend = SnapshotBackend(sys.argv[1])
+hotels = backend.hotels(sys.argv[2], None, 4)
+elapsed = time.perf_counter() - t0
+print(json.dumps({"seconds": elapsed, "max_rss_kib": peak_rss_kib()}))
+"""
+_BASELINE = _PEAK_RSS + """
+import inventory.snapshot
+print(peak_rss_kib())
+"""
+
+def _cold_start(path: str, city: str) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", _COLD_START, path, city], cwd=root,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", default=["10000:1000", "100000:10000", "1000000:100000"],
+                        help="FLIGHTS:HOTELS pairs to benchmark")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    baseline = _cold_start_baseline()
+    print(f"Interpreter with the snapshot module imported: {baseline / 1024:.0f} MiB peak RSS")
+
+    for scale in args.scales:
+        num_flights, num_hotels = (int(part) for part in scale.split(":"))
+        num_cities = max(2, num_hotels // HOTELS_PER_CITY)
+        flight_cities = max(num_cities, int((num_flights / 3) ** 0.5 * 2))
+        flights_db = generate_flights_db(flight_cities, num_flights, flights_per_route=3, seed=args.seed)
+        hotels_db = generate_hotels_db(num_cities, HOTELS_PER_CITY, seed=args.seed)
+        activities_db = generate_activities_db(num_cities, ACTIVITIES_PER_CITY, seed=args.seed)
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        memory = MemoryBackend(build_flight_inventory(flights_db), build_hotel_inventory(hotels_db),
+                               build_activity_inventory(activities_db))
+        memory_build = time.perf_counter() - start
+        memory_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "inventory.snapshot")
+            start = time.perf_counter()
+            header = build_snapshot(path, flights_db, hotels_db, activities_db)
+            compile_seconds = time.perf_counter() - start
+            counts = header["counts"]
+            print(f"{counts['flights']:,} flights / {counts['hotels']:,} hotels / {counts['activities']:,} activities: "
+                  f"snapshot {os.path.getsize(path) / 2**20:.1f} MiB compiled in {compile_seconds:.1f}s")
+
+            cities = city_names(num_cities)
+            cold = _cold_start(path, cities[len(cities) // 2])
+            print(f"  cold start  memory build {memory_build * 1000:8.1f}ms (+{memory_rss / 1024:.0f} MiB peak RSS)   "
+                  f"snapshot open+query {cold['seconds'] * 1000:6.1f}ms "
+                  f"({(cold['max_rss_kib'] - baseline) / 1024:+.1f} MiB peak RSS)")
+
+            snapshot = SnapshotBackend(path)
+            queries = sample_queries(flights_db, cities, args.queries, random.Random(args.seed))
+            check_parity(memory, snapshot, queries[:500], memory.activity_categories())
+            print("  parity: memory and snapshot agree")
+            time_lookups("memory", memory, queries)
+            time_lookups("snapshot", snapshot, queries)
+            snapshot.close()
+        del memory
+
+def _cold_start_baseline() -> int:
+    """Peak RSS (KiB) of a fresh interpreter that only imports the snapshot module."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return int(subprocess.run([sys.executable, "-c", _BASELINE], cwd=root,
+                              capture_output=True, text=True, check=True).stdout)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+End-to-end load driver for the travel planner agent with a stub model.
+
+Builds travel_planner's root agent with ScriptedLlm in place of the Gemini
+model and replays a JSONL corpus of user requests through the ADK Runner, so
+everything except the model (runner, sessions, tool dispatch, our tools) runs
+as in production. Each request is one new session and one user turn.
+
+Load is either closed-loop (--concurrency N conversations in flight) or
+open-loop (--rate R arrivals per second, Poisson); in open-loop mode latency
+is measured from the scheduled arrival, so a backlog shows up as latency
+rather than being hidden. A runner plugin times every model turn and tool
+call, and the report splits request latency into model (stub think time),
+tool and runner time, with a per-tool breakdown. The model response cache
+is on, in a throwaway file, unless --no-llm-cache is given.
+
+    python -m benchmarks.load_driver --concurrency 8 --requests 400
+    python -m benchmarks.load_driver --rate 50 --requests 1000 --think-ms 300 --output load.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import tempfile
+import time
+import warnings
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from google.adk.plugins import BasePlugin
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+import llm_cache
+from llm_cache import LLMResponseCache, set_llm_cache
+from stub_llm import DEFAULT_CORPUS, load_scripts
+from travel_planner.agent import build_travel_planner_agent
+
+APP_NAME = "travel_planner_load"
+
+def _percentile(sorted_values: List[int], fraction: float) -> int:
+    """Nearest-rank percentile of an ascending list."""
+    return sorted_values[max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))]
+
+def _summary_ms(values_ns: List[int]) -> dict:
+    values = sorted(values_ns)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) / 1e6, 3),
+        "p50_ms": round(_percentile(values, 0.50) / 1e6, 3),
+        "p95_ms": round(_percentile(values, 0.95) / 1e6, 3),
+        "p99_ms": round(_percentile(values, 0.99) / 1e6, 3),
+        "max_ms": round(values[-1] / 1e6, 3),
+    }
+
+class TimingPlugin(BasePlugin):
+    """Runner plugin recording model-turn and tool-call durations per invocation."""
+
+    def __init__(self):
+        super().__init__(name="load_timing")
+        self.model_ns: Dict[str, int] = defaultdict(int)
+        self.tool_ns: Dict[str, int] = defaultdict(int)
+        self.tool_calls: Dict[str, List[int]] = defaultdict(list)
+        self._started: Dict[tuple, int] = {}
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        self._started[("model", callback_context.invocation_id)] = time.perf_counter_ns()
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        started = self._started.pop(("model", callback_context.invocation_id), None)
+        if started is not None:
+            self.model_ns[callback_context.invocation_id] += time.perf_counter_ns() - started
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        self._started[("tool", tool_context.function_call_id)] = time.perf_counter_ns()
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        self._tool_done(tool.name, tool_context)
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error):
+        self._tool_done(tool.name, tool_context)
+
+    def _tool_done(self, name: str, tool_context):
+        started = self._started.pop(("tool", tool_context.function_call_id), None)
+        if started is not None:
+            elapsed = time.perf_counter_ns() - started
+            self.tool_ns[tool_context.invocation_id] += elapsed
+            self.tool_calls[name].append(elapsed)
+
+class LoadDriver:
+    """Replays corpus requests through a Runner and collects per-request timings."""
+
+    def __init__(self, corpus_path: str, think_ms: float):
+        model, self.corpus = load_scripts(corpus_path)
+        model.think_time_ms = think_ms
+        self.timing = TimingPlugin()
+        self.runner = Runner(app_name=APP_NAME, agent=build_travel_planner_agent(model=model),
+                             session_service=InMemorySessionService(), plugins=[self.timing])
+        self.requests: List[dict] = []
+
+    async def send(self, entry: dict, index: int, scheduled_ns: Optional[int] = None, record: bool = True):
+        """Run one request in a new session; latency counts from scheduled_ns when given."""
+        user_id = f"user-{index}"
+        session = await self.runner.session_service.create_session(app_name=APP_NAME, user_id=user_id)
+        message = types.Content(role="user", parts=[types.Part(text=entry["message"])])
+        started = time.perf_counter_ns()
+        invocation_id = None
+        error = None
+        try:
+            async for event in self.runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+                invocation_id = invocation_id or event.invocation_id
+                if event.error_code:
+                    error = event.error_code
+        except Exception as e:
+            error = type(e).__name__
+        finished = time.perf_counter_ns()
+        if record:
+            self.requests.append({
+                "id": entry.get("id", str(index)),
+                "latency_ns": finished - (scheduled_ns or started),
+                "service_ns": finished - started,
+                "model_ns": self.timing.model_ns.pop(invocation_id, 0),
+                "tool_ns": self.timing.tool_ns.pop(invocation_id, 0),
+                "error": error,
+            })
+
+    async def closed_loop(self, total: int, concurrency: int, seed: int):
+        pending = iter(self._order(total, seed))
+
+        async def worker():
+            for index in pending:
+                await self.send(self.corpus[index % len(self.corpus)], index)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    async def open_loop(self, total: int, rate: float, seed: int):
+        rng = random.Random(seed)
+        tasks = []
+        next_arrival = time.perf_counter_ns()
+        for index in self._order(total, seed):
+            next_arrival += int(rng.expovariate(rate) * 1e9)
+            delay = (next_arrival - time.perf_counter_ns()) / 1e9
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(
+                self.send(self.corpus[index % len(self.corpus)], index, scheduled_ns=next_arrival)))
+        await asyncio.gather(*tasks)
+
+    def _order(self, total: int, seed: int) -> List[int]:
+        """Request indexes: the corpus repeated to `total`, shuffled with the seed."""
+        order = list(itertools.islice(itertools.cycle(range(len(self.corpus))), total))
+        random.Random(seed).shuffle(order)
+        return order
+
+    def report(self, elapsed_ns: int) -> dict:
+        done = self.requests
+        total_tool = sum(request["tool_ns"] for request in done)
+        total_model = sum(request["model_ns"] for request in done)
+        total_service = sum(request["service_ns"] for request in done)
+        return {
+            "requests": len(done),
+            "errors": sum(1 for request in done if request["error"]),
+            "elapsed_seconds": round(elapsed_ns / 1e9, 3),
+            "throughput_rps": round(len(done) / (elapsed_ns / 1e9), 2),
+            "latency": _summary_ms([request["latency_ns"] for request in done]),
+            "breakdown_ms_per_request": {
+                "model": round(total_model / len(done) / 1e6, 3),
+                "tools": round(total_tool / len(done) / 1e6, 3),
+                "runner": round((total_service - total_model - total_tool) / len(done) / 1e6, 3),
+            },
+            "tools": {name: _summary_ms(timings) for name, timings in sorted(self.timing.tool_calls.items())},
+        }
+
+def print_report(report: dict):
+    latency = report["latency"]
+    print(f"{report['requests']} requests ({report['errors']} errors) in {report['elapsed_seconds']}s: "
+          f"{report['throughput_rps']} req/s")
+    print(f"latency  p50={latency['p50_ms']:.1f}ms  p95={latency['p95_ms']:.1f}ms  "
+          f"p99={latency['p99_ms']:.1f}ms  max={latency['max_ms']:.1f}ms")
+    breakdown = report["breakdown_ms_per_request"]
+    service = sum(breakdown.values()) or 1
+    print("per request: " + "  ".join(
+        f"{part} {ms:.2f}ms ({ms / service:.0%})" for part, ms in breakdown.items()))
+    print("tools:")
+    for name, summary in report["tools"].items():
+        print(f"  {name:<34} calls={summary['count']:<6} mean={summary['mean_ms']:8.2f}ms  "
+              f"p95={summary['p95_ms']:8.2f}ms  p99={summary['p99_ms']:8.2f}ms")
+
+async def run(args) -> dict:
+    driver = LoadDriver(args.corpus, args.think_ms)
+    # Warm up: tool declarations, inventory backend and route graph are built on first use
+    for index, entry in enumerate(driver.corpus):
+        await driver.send(entry, -1 - index, record=False)
+    driver.timing.tool_calls.clear()
+
+    started = time.perf_counter_ns()
+    if args.rate:
+        await driver.open_loop(args.requests, args.rate, args.seed)
+    else:
+        await driver.closed_loop(args.requests, args.concurrency, args.seed)
+    return driver.report(time.perf_counter_ns() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL requests with scripted tool calls")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8, help="closed loop: conversations in flight")
+    parser.add_argument("--rate", type=float, help="open loop: arrivals per second (overrides --concurrency)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="stub model latency per model turn")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--llm-cache", action=argparse.BooleanOptionalAction, default=True,
+                        help="serve repeated model turns from a throwaway response cache")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    warnings.filterwarnings("ignore", category=UserWarning, module="google.adk")
+
+    mode = f"open loop at {args.rate}/s" if args.rate else f"closed loop, concurrency {args.concurrency}"
+    print(f"Replaying {args.corpus} ({mode}, think time {args.think_ms:g}ms per model turn, "
+          f"response cache {'on' if args.llm_cache else 'off'})")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(os.path.join(tmp, "llm_cache.db"), 1000, 16 * 1024 * 1024, 3600)
+        previous, previous_enabled = set_llm_cache(cache), llm_cache.LLM_CACHE_ENABLED
+        llm_cache.LLM_CACHE_ENABLED = args.llm_cache
+        try:
+            report = asyncio.run(run(args))
+        finally:
+            llm_cache.LLM_CACHE_ENABLED = previous_enabled
+            cache.close()
+            set_llm_cache(previous)
+    report["config"] = {key: getattr(args, key) for key in ("corpus", "requests", "concurrency", "rate",
+                                                            "think_ms", "seed", "llm_cache")}
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+            handle.write("\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Benchmark suite for the search tools and end-to-end plan generation.
+
+Generates a seeded synthetic inventory at the chosen scale, serves it through
+the in-memory backend and times each tool over a fixed, seeded set of
+queries: ops/sec, mean and p50/p95/p99 latency, and the peak memory one call
+allocates (traced in a separate pass so tracing does not skew the timings).
+Everything runs offline; no model is called. The search cache is bypassed
+unless --cache is given, so the tools themselves are measured.
+
+Results can be written as JSON and compared with an earlier run of the same
+scale and seed; the exit status is 1 when any benchmark's latency (or peak
+allocation) grew by more than --threshold.
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --scale large --output before.json
+    python -m benchmarks.suite --scale large --baseline before.json --threshold 0.1
+    python -m benchmarks.suite --compare before.json after.json
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import math
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cache_utils
+from activities_agent.agent import get_activities_by_category, search_activities
+from benchmarks.synthetic import ACTIVITY_CATEGORIES, city_names, generate_inventory
+from flight_agent.agent import search_connecting_flights, search_fare_calendar, search_flights
+from hotel_agent.agent import search_hotels
+from inventory import (
+    MemoryBackend, build_activity_inventory, build_flight_inventory, build_hotel_inventory, get_backend, set_backend,
+)
+from travel_planner.agent import create_comprehensive_travel_plan
+
+RESULTS_FORMAT = 1
+
+# name -> (cities, flights, hotels per city, activities per city)
+SCALES = {
+    "tiny": (10, 200, 8, 8),
+    "small": (100, 5_000, 20, 10),
+    "medium": (1_000, 100_000, 20, 10),
+    "large": (5_000, 1_000_000, 20, 10),
+    "xlarge": (5_000, 3_000_000, 20, 10),
+}
+
+# Fewer timed calls for the tools that do a graph search or build a whole plan
+SLOW_BENCHMARKS = {"search_connecting_flights": 10, "get_activities_by_category": 10}
+
+PREFERENCES = [None, "adventure", "luxury", "budget", "cultural", "food"]
+
+def _percentile(sorted_values: Sequence[int], fraction: float) -> int:
+    """Nearest-rank percentile of an ascending sequence."""
+    return sorted_values[max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))]
+
+def build_workloads(flights_db: dict, cities: List[str], count: int, seed: int) -> Dict[str, Tuple[Callable, list]]:
+    """Seeded (tool call, argument tuples) per benchmark."""
+    rng = random.Random(seed)
+    routes = list(flights_db)
+    round_trip_routes = [route for route in routes if (route[1], route[0]) in flights_db] or routes
+    today = datetime.date.today()
+
+    def day(offset: int) -> str:
+        return (today + datetime.timedelta(days=offset)).isoformat()
+
+    def price(low: int, high: int) -> Optional[int]:
+        return rng.choice([None, rng.randrange(low, high, 500)])
+
+    def plan_args():
+        source, destination = rng.choice(round_trip_routes)
+        start = rng.randrange(7, 90)
+        return (source, destination, day(start), day(start + rng.randint(2, 6)),
+                rng.choice([None, rng.randrange(20_000, 200_000, 5_000)]), rng.randint(1, 4),
+                rng.choice(PREFERENCES))
+
+    return {
+        "search_flights": (search_flights, [
+            rng.choice(routes) + (day(rng.randrange(1, 120)),) for _ in range(count)]),
+        "search_connecting_flights": (search_connecting_flights, [
+            tuple(rng.sample(cities, 2)) + (rng.choice(["price", "duration"]),) for _ in range(count)]),
+        "search_fare_calendar": (search_fare_calendar, [
+            rng.choice(routes) + (day(1), day(30), rng.random() < 0.5) for _ in range(count)]),
+        "search_hotels": (search_hotels, [
+            (rng.choice(cities), day(30), day(33), price(2_000, 30_000), rng.choice([None, 3, 4, 5]))
+            for _ in range(count)]),
+        "search_activities": (search_activities, [
+            (rng.choice(cities), rng.choice([None, 4.0, 4.5]), price(500, 5_000)) for _ in range(count)]),
+        "get_activities_by_category": (get_activities_by_category, [
+            (rng.choice(ACTIVITY_CATEGORIES),) for _ in range(count)]),
+        "create_comprehensive_travel_plan": (create_comprehensive_travel_plan, [
+            plan_args() for _ in range(count)]),
+    }
+
+def run_benchmark(tool: Callable, queries: list, warmup: int, memory_samples: int) -> dict:
+    """Time one tool over its queries; returns the result entry for the JSON report."""
+    for args in queries[:warmup]:
+        tool(*args)
+
+    timings = []
+    perf_counter_ns = time.perf_counter_ns
+    started = perf_counter_ns()
+    for args in queries:
+        t0 = perf_counter_ns()
+        result = tool(*args)
+        timings.append(perf_counter_ns() - t0)
+        if not isinstance(result, dict) or "status" not in result:
+            raise AssertionError(f"{tool.__name__}{args} returned {result!r}")
+    elapsed = perf_counter_ns() - started
+    timings.sort()
+
+    peak = 0
+    tracemalloc.start()
+    for args in queries[:memory_samples]:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        tool(*args)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    return {
+        "ops": len(timings),
+        "ops_per_sec": round(len(timings) / (elapsed / 1e9), 1),
+        "mean_us": round(sum(timings) / len(timings) / 1000, 2),
+        "p50_us": round(_percentile(timings, 0.50) / 1000, 2),
+        "p95_us": round(_percentile(timings, 0.95) / 1000, 2),
+        "p99_us": round(_percentile(timings, 0.99) / 1000, 2),
+        "peak_alloc_bytes": peak,
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(scale: str, ops: int, seed: int, only: Sequence[str], use_cache: bool) -> dict:
+    """Generate the inventory, run the benchmarks and return the JSON report."""
+    num_cities, num_flights, hotels_per_city, activities_per_city = SCALES[scale]
+    started = time.perf_counter()
+    flights_db, hotels_db, activities_db = generate_inventory(
+        num_cities, num_flights, hotels_per_city, activities_per_city, seed=seed)
+    generated = time.perf_counter() - started
+
+    started = time.perf_counter()
+    backend = MemoryBackend(build_flight_inventory(flights_db), build_hotel_inventory(hotels_db),
+                            build_activity_inventory(activities_db))
+    built = time.perf_counter() - started
+    inventory = {
+        "cities": num_cities,
+        "routes": len(flights_db),
+        "flights": sum(len(flights) for flights in flights_db.values()),
+        "hotels": num_cities * hotels_per_city,
+        "activities": num_cities * activities_per_city,
+        "generate_seconds": round(generated, 2),
+        "build_seconds": round(built, 2),
+    }
+    workloads = build_workloads(flights_db, city_names(num_cities), ops, seed)
+    del flights_db, hotels_db, activities_db
+
+    previous_backend = get_backend()
+    previous_cache = cache_utils.SEARCH_CACHE_ENABLED
+    set_backend(backend)
+    cache_utils.SEARCH_CACHE_ENABLED = use_cache
+    logging.disable(logging.CRITICAL)
+    benchmarks = {}
+    try:
+        for name, (tool, queries) in workloads.items():
+            if only and name not in only:
+                continue
+            queries = queries[:SLOW_BENCHMARKS.get(name, len(queries))] if scale in ("large", "xlarge") else queries
+            benchmarks[name] = run_benchmark(tool, queries, warmup=min(20, len(queries)), memory_samples=10)
+            print(f"  {name:<34} {benchmarks[name]['ops_per_sec']:>10,.0f} ops/s  "
+                  f"p50={benchmarks[name]['p50_us']:9.1f}us  p99={benchmarks[name]['p99_us']:9.1f}us", flush=True)
+    finally:
+        logging.disable(logging.NOTSET)
+        cache_utils.SEARCH_CACHE_ENABLED = previous_cache
+        set_backend(previous_backend)
+
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inventory["max_rss_bytes"] = max_rss if sys.platform == "darwin" else max_rss * 1024
+    return {
+        "format": RESULTS_FORMAT,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "seed": seed,
+        "ops": ops,
+        "search_cache": use_cache,
+        "inventory": inventory,
+        "benchmarks": benchmarks,
+    }
+
+def compare_results(baseline: dict, current: dict, threshold: float, metric: str) -> List[str]:
+    """
+    Print each benchmark's change against a baseline run.
+
+    Args:
+        baseline: Earlier report from run_suite.
+        current: Report to check.
+        threshold: Allowed relative growth, e.g. 0.1 for 10%.
+        metric: Latency field to compare, e.g. "p50_us".
+
+    Returns:
+        list: Names of benchmarks whose latency or peak allocation regressed.
+    """
+    for field in ("scale", "seed", "ops", "search_cache"):
+        if baseline.get(field) != current.get(field):
+            raise ValueError(f"Runs are not comparable: {field} {baseline.get(field)!r} != {current.get(field)!r}")
+
+    regressions = []
+    print(f"\nvs baseline {baseline.get('git_commit') or '?'} ({baseline['created']}), "
+          f"{metric} and peak allocation, threshold {threshold:.0%}")
+    for name, result in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None:
+            print(f"  {name:<34} new")
+            continue
+        latency_change = result[metric] / before[metric] - 1 if before[metric] else 0.0
+        memory_change = (result["peak_alloc_bytes"] / before["peak_alloc_bytes"] - 1
+                         if before["peak_alloc_bytes"] else 0.0)
+        regressed = latency_change > threshold or memory_change > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<34} {before[metric]:9.1f}us -> {result[metric]:9.1f}us ({latency_change:+7.1%})  "
+              f"alloc {memory_change:+7.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as handle:
+        report = json.load(handle)
+    if report.get("format") != RESULTS_FORMAT:
+        raise ValueError(f"{path} is not a benchmark suite report (format {report.get('format')!r})")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="small",
+                        help="inventory size: " + ", ".join(
+                            f"{name}={cities:,} cities/{flights:,} flights"
+                            for name, (cities, flights, _, _) in SCALES.items()))
+    parser.add_argument("--ops", type=int, default=500, help="timed calls per benchmark")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="+", default=[], help="benchmark names to run")
+    parser.add_argument("--cache", action="store_true", help="serve repeated searches from the search cache")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two saved runs without running the suite")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative regression")
+    parser.add_argument("--metric", choices=("p50_us", "p95_us", "p99_us", "mean_us"), default="p50_us")
+    args = parser.parse_args()
+
+    if args.compare:
+        baseline, current = (_load(path) for path in args.compare)
+    else:
+        cities, flights, _, _ = SCALES[args.scale]
+        print(f"Scale {args.scale}: {cities:,} cities, ~{flights:,} flights, seed {args.seed}")
+        current = run_suite(args.scale, args.ops, args.seed, args.only, args.cache)
+        print(f"  peak RSS {current['inventory']['max_rss_bytes'] / 2**20:,.0f} MiB "
+              f"(inventory generated in {current['inventory']['generate_seconds']}s, "
+              f"built in {current['inventory']['build_seconds']}s)")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as handle:
+                json.dump(current, handle, indent=2)
+                handle.write("\n")
+        baseline = _load(args.baseline) if args.baseline else None
+
+    if baseline is not None:
+        regressions = compare_results(baseline, current, args.threshold, args.metric)
+        if regressions:
+            print(f"\nRegressed: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+if __name__ == "__main__":
+    main()
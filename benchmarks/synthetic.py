@@ -0,0 +1,121 @@
+"""
+Deterministic synthetic inventories shaped like the mock databases.
+
+Everything is driven by a seeded ``random.Random`` so two runs with the same
+arguments produce identical data.
+"""
+
+import random
+from typing import Dict, List, Tuple
+
+AIRLINES = ["Air India", "IndiGo", "SpiceJet", "Vistara", "Akasa Air"]
+AIRLINE_CODES = {"Air India": "AI", "IndiGo": "6E", "SpiceJet": "SG", "Vistara": "UK", "Akasa Air": "QP"}
+
+def city_names(num_cities: int) -> List[str]:
+    """Lower-cased synthetic city keys: city0000, city0001, ..."""
+    width = max(4, len(str(num_cities - 1)))
+    return [f"city{i:0{width}d}" for i in range(num_cities)]
+
+def _clock(minutes: int) -> str:
+    minutes %= 24 * 60
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def generate_flights_db(num_cities: int, num_flights: int, flights_per_route: int = 2,
+                        seed: int = 42) -> Dict[Tuple[str, str], List[dict]]:
+    """Generate a FLIGHTS_DB-shaped dict.
+
+    Route endpoints are drawn with a heavy-tailed weight so a few hub cities
+    carry most of the traffic, like a real domestic network.
+
+    Args:
+        num_cities: Number of distinct cities.
+        num_flights: Approximate total number of flights.
+        flights_per_route: Flights scheduled on each route.
+        seed: Random seed.
+
+    Returns:
+        dict: (source, destination) -> list of flight dicts with display strings.
+    """
+    rng = random.Random(seed)
+    cities = city_names(num_cities)
+    weights = [1.0 / (rank + 1) ** 0.6 for rank in range(num_cities)]
+    num_routes = max(1, num_flights // flights_per_route)
+    max_routes = num_cities * (num_cities - 1)
+
+    flights_db: Dict[Tuple[str, str], List[dict]] = {}
+    serial = 0
+    while len(flights_db) < min(num_routes, max_routes):
+        batch = min(num_routes - len(flights_db), 10_000)
+        sources = rng.choices(cities, weights=weights, k=batch)
+        destinations = rng.choices(cities, weights=weights, k=batch)
+        for source, destination in zip(sources, destinations):
+            if source == destination or (source, destination) in flights_db:
+                continue
+            block = rng.randrange(55, 240, 5)
+            base_fare = 2000 + block * rng.randrange(30, 70)
+            flights = []
+            for _ in range(flights_per_route):
+                airline = rng.choice(AIRLINES)
+                departure = rng.randrange(0, 24 * 60, 5)
+                serial += 1
+                flights.append({
+                    "flight_number": f"{AIRLINE_CODES[airline]}{serial}",
+                    "departure": _clock(departure),
+                    "arrival": _clock(departure + block),
+                    "price": f"₹{base_fare + rng.randrange(-1500, 1500, 100):,}",
+                    "airline": airline,
+                })
+            flights_db[(source, destination)] = flights
+    return flights_db
+
+HOTEL_AMENITIES = ["WiFi", "Pool", "Spa", "Restaurant", "Gym", "Bar", "Beach Access",
+                   "Mountain View", "Lake View", "Heritage", "Room Service", "Business Center"]
+ACTIVITY_CATEGORIES = ["Adventure", "Culinary", "Cultural", "Entertainment", "Heritage",
+                       "Leisure", "Nature", "Shopping", "Spiritual", "Wellness"]
+
+def generate_hotels_db(num_cities: int, hotels_per_city: int, seed: int = 42) -> Dict[str, List[dict]]:
+    """Generate a HOTELS_DB-shaped dict with the same number of hotels in every city."""
+    rng = random.Random(seed)
+    hotels_db: Dict[str, List[dict]] = {}
+    for city in city_names(num_cities):
+        hotels = []
+        for i in range(hotels_per_city):
+            rating = rng.randint(2, 5)
+            hotels.append({
+                "name": f"{city.title()} Hotel {i}",
+                "rating": rating,
+                "price_per_night": f"₹{rng.randrange(800, 6000 * rating, 100):,}",
+                "amenities": rng.sample(HOTEL_AMENITIES, rng.randint(2, 6)),
+                "location": f"District {rng.randrange(20)}",
+            })
+        hotels_db[city] = hotels
+    return hotels_db
+
+def generate_activities_db(num_cities: int, activities_per_city: int, seed: int = 42) -> Dict[str, List[dict]]:
+    """Generate an ACTIVITIES_DB-shaped dict with the same number of activities in every city."""
+    rng = random.Random(seed)
+    activities_db: Dict[str, List[dict]] = {}
+    for city in city_names(num_cities):
+        activities = []
+        for i in range(activities_per_city):
+            price = rng.choice([0, rng.randrange(200, 5000, 100)])
+            hours = rng.choice([1, 1.5, 2, 2.5, 3, 4, 6])
+            activities.append({
+                "name": f"{city.title()} Activity {i}",
+                "category": rng.choice(ACTIVITY_CATEGORIES),
+                "duration": "1 hour" if hours == 1 else f"{hours:g} hours",
+                "price": "₹free" if price == 0 else f"₹{price:,}",
+                "rating": round(rng.uniform(3.5, 5.0), 1),
+                "description": f"Things to do in {city.title()}",
+            })
+        activities_db[city] = activities
+    return activities_db
+
+def generate_inventory(num_cities: int, num_flights: int, hotels_per_city: int, activities_per_city: int,
+                       flights_per_route: int = 3, seed: int = 42) -> Tuple[dict, dict, dict]:
+    """Generate matching (FLIGHTS_DB, HOTELS_DB, ACTIVITIES_DB)-shaped dicts over the same cities."""
+    return (
+        generate_flights_db(num_cities, num_flights, flights_per_route, seed),
+        generate_hotels_db(num_cities, hotels_per_city, seed),
+        generate_activities_db(num_cities, activities_per_city, seed),
+    )
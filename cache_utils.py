@@ -0,0 +1,468 @@
+"""
+Caching utilities for the travel agent application.
+Provides a shared TTL + LRU result cache for the search tools, and a
+single-flight layer that lets concurrent identical searches share one call.
+"""
+
+import asyncio
+import datetime
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Sequence, Set, Tuple
+
+from config import (
+    SEARCH_CACHE_ENABLED,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_MAX_BYTES,
+    SEARCH_CACHE_TTL_SECONDS,
+    SEARCH_SINGLE_FLIGHT_ENABLED,
+)
+from logging_utils import METRICS
+
+logger = logging.getLogger('travel_agent.cache')
+
+class _CacheEntry:
+    __slots__ = ("payload", "expires_at", "size", "tags", "shared")
+
+    def __init__(self, payload: Any, expires_at: float, size: int, tags: Tuple[Hashable, ...], shared: bool = False):
+        self.payload = payload
+        self.expires_at = expires_at
+        self.size = size
+        self.tags = tags
+        # payload is the value itself (see put_shared), not JSON text
+        self.shared = shared
+
+class TTLLRUCache:
+    """
+    Thread-safe cache with per-entry expiry and LRU eviction.
+
+    Values are stored as JSON text, which keeps them immutable and gives an
+    exact size for the byte budget; every hit decodes a fresh copy, so
+    callers may mutate what they get back. Values that are immutable already
+    (e.g. lists of typed inventory records) can be stored as they are with
+    put_shared(), and every hit then returns the same object. Entries can be
+    tagged with what they were computed from, so invalidate_tags() drops
+    exactly the entries a change affects without scanning the rest.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        # Tag -> keys of the entries carrying it
+        self._tagged: Dict[Hashable, Set[Hashable]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, namespace: str, counter: str, amount: int = 1):
+        counters = self._counters.setdefault(
+            namespace, {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0})
+        counters[counter] += amount
+
+    def _drop(self, key: Hashable) -> _CacheEntry:
+        entry = self._entries.pop(key)
+        self._unindex(key, entry)
+        return entry
+
+    def _unindex(self, key: Hashable, entry: _CacheEntry):
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tagged[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tagged[tag]
+
+    def get(self, namespace: str, key: Hashable) -> Tuple[bool, Any]:
+        """Return (hit, value) for a key in a namespace."""
+        full_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is None:
+                self._count(namespace, "misses")
+                return False, None
+            if entry.expires_at <= time.monotonic():
+                self._drop(full_key)
+                self._count(namespace, "expirations")
+                self._count(namespace, "misses")
+                return False, None
+            self._entries.move_to_end(full_key)
+            self._count(namespace, "hits")
+            payload = entry.payload
+            if entry.shared:
+                return True, payload
+        return True, json.loads(payload)
+
+    def put(self, namespace: str, key: Hashable, value: Any, ttl: float):
+        """Store a JSON-serializable value for ttl seconds, evicting LRU entries as needed."""
+        self.put_payload(namespace, key, json.dumps(value, ensure_ascii=False), ttl)
+
+    def put_payload(self, namespace: str, key: Hashable, payload: str, ttl: float, tags: Iterable[Hashable] = ()):
+        """Store a value already encoded as JSON text, tagged for invalidate_tags()."""
+        self._put(namespace, key, payload, len(payload), ttl, tags, False)
+
+    def put_shared(self, namespace: str, key: Hashable, value: Any, size: int, ttl: float,
+                   tags: Iterable[Hashable] = ()):
+        """Store an immutable value as is, counted as size bytes; hits return this very object."""
+        self._put(namespace, key, value, size, ttl, tags, True)
+
+    def _put(self, namespace: str, key: Hashable, payload: Any, size: int, ttl: float, tags: Iterable[Hashable],
+             shared: bool):
+        if size > self.max_bytes:
+            return
+        full_key = (namespace, key)
+        tags = tuple(tags)
+        with self._lock:
+            if full_key in self._entries:
+                self._drop(full_key)
+            self._entries[full_key] = _CacheEntry(payload, time.monotonic() + ttl, size, tags, shared)
+            self._bytes += size
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(full_key)
+            self._evict_over_budget()
+
+    def _evict_over_budget(self):
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            full_key, entry = self._entries.popitem(last=False)
+            self._unindex(full_key, entry)
+            self._count(full_key[0], "evictions")
+
+    def invalidate(self, namespace: Optional[str] = None,
+                   predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drop entries, optionally limited to one namespace and/or keys matching a predicate."""
+        with self._lock:
+            doomed = [
+                full_key for full_key in self._entries
+                if (namespace is None or full_key[0] == namespace)
+                and (predicate is None or predicate(full_key[1]))
+            ]
+            for full_key in doomed:
+                self._drop(full_key)
+                self._count(full_key[0], "invalidations")
+        return len(doomed)
+
+    def invalidate_tags(self, tags: Iterable[Hashable]) -> int:
+        """Drop every entry carrying any of the tags; costs time in proportion to those entries."""
+        dropped = 0
+        with self._lock:
+            for tag in tags:
+                for full_key in list(self._tagged.get(tag, ())):
+                    self._drop(full_key)
+                    self._count(full_key[0], "invalidations")
+                    dropped += 1
+        return dropped
+
+    def stats(self) -> dict:
+        """Counters per namespace plus current size."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "tools": {namespace: dict(counters) for namespace, counters in self._counters.items()},
+            }
+
+class SingleFlight:
+    """
+    Lets concurrent calls with the same key share one execution.
+
+    The first caller for a key (the leader) runs the call; callers that
+    arrive while it is running wait for it and get the same result, or the
+    same exception, when it finishes. Once it finishes the key is free
+    again, so later calls run afresh (a cache in front keeps those cheap).
+    Threads wait with do() and coroutines with do_async(). A key names one
+    kind of call, so every caller for it must expect the same kind of value.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: Hashable) -> Tuple[bool, Future]:
+        """(leader, future) for a call on key."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                return False, future
+            future = self._flights[key] = Future()
+            # Running futures can't be cancelled, so a waiter giving up (e.g. a
+            # cancelled coroutine, via wrap_future) can't cancel the others' call
+            future.set_running_or_notify_cancel()
+            return True, future
+
+    def _finish(self, key: Hashable, future: Future, func: Callable[[], Any]) -> Any:
+        try:
+            value = func()
+        except BaseException as e:
+            with self._lock:
+                del self._flights[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._flights[key]
+        future.set_result(value)
+        return value
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[bool, Any]:
+        """
+        Run func, or wait for the call already running for key.
+
+        Returns:
+            tuple: (shared, value): shared is True when another caller ran the
+                call. value is the very object the call returned, so callers
+                that mutate results must copy shared values.
+        """
+        leader, future = self._join(key)
+        if not leader:
+            return True, future.result()
+        return False, self._finish(key, future, func)
+
+    async def do_async(self, key: Hashable, func: Callable[[], Any]) -> Tuple[bool, Any]:
+        """Like do(), for coroutines: the leader runs func on a worker thread and waiters don't hold one."""
+        leader, future = self._join(key)
+        if not leader:
+            return True, await asyncio.wrap_future(future)
+        return False, await asyncio.to_thread(self._finish, key, future, func)
+
+    def in_flight(self) -> int:
+        """Calls running now."""
+        return len(self._flights)
+
+# Shared cache in front of the search tools
+SEARCH_CACHE = TTLLRUCache(SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_MAX_BYTES)
+# In-flight search tool calls, keyed like SEARCH_CACHE
+SEARCH_FLIGHTS = SingleFlight()
+
+CACHE_LOOKUPS = METRICS.counter(
+    "travel_agent_cache_lookups_total", "Search cache lookups by tool and result (hit or miss).",
+    ("tool", "result"))
+METRICS.gauge("travel_agent_cache_entries", "Entries in the search cache.").set_function(
+    lambda: len(SEARCH_CACHE._entries))
+METRICS.gauge("travel_agent_cache_bytes", "Bytes of JSON held by the search cache.").set_function(
+    lambda: SEARCH_CACHE._bytes)
+SINGLE_FLIGHT_CALLS = METRICS.counter(
+    "travel_agent_single_flight_calls_total",
+    "Search tool executions by tool and result (run, or coalesced into an identical call in flight).",
+    ("tool", "result"))
+METRICS.gauge("travel_agent_single_flight_in_flight", "Search tool executions running now.").set_function(
+    SEARCH_FLIGHTS.in_flight)
+
+# ---------------------------------------------------------------------------
+# Argument normalizers
+# ---------------------------------------------------------------------------
+
+def normalize_city(city: Any) -> Any:
+    """Resolve a city name to its inventory key so "Goa", "goa" and "Panaji" share a cache entry."""
+    if not isinstance(city, str):
+        return city
+    from inventory import resolve_city  # imported here: inventory.store imports this module
+    return resolve_city(city)
+
+def normalize_date(date: Any) -> Any:
+    """Rewrite a YYYY-MM-DD date in canonical zero-padded form; leave anything else alone."""
+    if not isinstance(date, str):
+        return date
+    try:
+        return datetime.datetime.strptime(date.strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return date
+
+def normalize_amenities(amenities: Any) -> Any:
+    """Read an amenity filter as a set, so ["Spa", "pool"] and "Pool, spa" share a cache entry."""
+    from inventory import parse_amenities  # imported here: inventory.store imports this module
+    return parse_amenities(amenities) or None
+
+def normalize_filter(value: Any) -> Any:
+    """Treat falsy filters (0, None) the same, as the tools do."""
+    return value if value else None
+
+def cached_search(tool_name: str, scopes: Sequence[Tuple[str, ...]] = (("catalog",),),
+                  immutable_state: Optional[Callable[[Any], Any]] = None,
+                  **normalizers: Callable[[Any], Any]) -> Callable:
+    """
+    Decorator that serves a search tool from SEARCH_CACHE.
+
+    Arguments are bound to the tool's signature, defaults applied and each
+    named argument passed through its normalizer. The tool is then called with
+    the normalized arguments, so a cached and a fresh response are identical.
+    Only successful responses are cached; the TTL comes from
+    SEARCH_CACHE_TTL_SECONDS[tool_name]. A lookup given immutable_state
+    returns immutable values rather than a response: anything but None is
+    cached as is, and hits and waiters share the very object.
+
+    Keys include the version of each part of the catalog the response is
+    computed from (see InventoryBackend.scope_version), so an inventory delta
+    only misses the entries for what it changed, and a call still running on
+    a replaced catalog never serves or stores entries for the new one.
+    Entries are tagged with those parts for invalidate_search_scopes().
+
+    On a miss, concurrent calls with the same key share one execution
+    (SEARCH_FLIGHTS, unless SEARCH_SINGLE_FLIGHT_ENABLED is False). Waiters
+    get their own copy of the leader's response, or its exception.
+
+    Args:
+        tool_name: Cache namespace and TTL key.
+        scopes: The parts of the catalog a response depends on, as a kind
+            followed by the names of the parameters that select it, e.g.
+            ("hotels", "city"). Defaults to the whole catalog.
+        immutable_state: For a lookup returning immutable values (e.g. typed
+            records): a value's JSON-serializable form, whose encoded length
+            is the size counted against SEARCH_CACHE's budget.
+        **normalizers: Parameter name -> normalizer function.
+
+    Returns:
+        Decorator for the tool function.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        ttl = SEARCH_CACHE_TTL_SECONDS[tool_name]
+        hits = CACHE_LOOKUPS.labels(tool_name, "hit")
+        misses = CACHE_LOOKUPS.labels(tool_name, "miss")
+
+        runs = SINGLE_FLIGHT_CALLS.labels(tool_name, "run")
+        coalesced = SINGLE_FLIGHT_CALLS.labels(tool_name, "coalesced")
+
+        def normalized(args: tuple, kwargs: dict) -> Tuple[tuple, Dict[str, Any], Tuple[tuple, ...]]:
+            """(cache key, normalized arguments, catalog scopes) for a call."""
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {
+                name: normalizers[name](value) if name in normalizers else value
+                for name, value in bound.arguments.items()
+            }
+            call_scopes = tuple((kind,) + tuple(arguments[name] for name in names) for kind, *names in scopes)
+            from inventory import get_backend  # imported here: inventory.store imports this module
+            backend = get_backend()
+            # Defaulted dates resolve to "today", so entries never outlive the day
+            key = ((datetime.date.today().isoformat(), tuple(map(backend.scope_version, call_scopes)))
+                   + tuple(arguments.values()))
+            return key, arguments, call_scopes
+
+        def run(key: tuple, arguments: Dict[str, Any], call_scopes: Tuple[tuple, ...]) -> Tuple[Any, Optional[str]]:
+            """Call the tool: (response, response as JSON for the cache and any waiters, None for a shared value)."""
+            runs.inc()
+            result = func(**arguments)
+            if immutable_state is not None:
+                if result is not None and SEARCH_CACHE_ENABLED:
+                    from inventory import get_backend  # imported here: inventory.store imports this module
+                    size = len(json.dumps(immutable_state(result), ensure_ascii=False))
+                    SEARCH_CACHE.put_shared(tool_name, key, result, size, ttl,
+                                            map(get_backend().cache_scope, call_scopes))
+                return result, None
+            payload = json.dumps(result, ensure_ascii=False)
+            if isinstance(result, dict) and result.get("status") == "success":
+                from inventory import get_backend  # imported here: inventory.store imports this module
+                backend = get_backend()
+                SEARCH_CACHE.put_payload(tool_name, key, payload, ttl, map(backend.cache_scope, call_scopes))
+            return result, payload
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            if not SEARCH_CACHE_ENABLED and not SEARCH_SINGLE_FLIGHT_ENABLED:
+                return func(*args, **kwargs)
+
+            key, arguments, call_scopes = normalized(args, kwargs)
+            if SEARCH_CACHE_ENABLED:
+                hit, value = SEARCH_CACHE.get(tool_name, key)
+                if hit:
+                    hits.inc()
+                    logger.debug("Cache hit: %s%s", tool_name, key)
+                    return value
+                misses.inc()
+
+            if not SEARCH_SINGLE_FLIGHT_ENABLED:
+                return run(key, arguments, call_scopes)[0]
+            shared, (result, payload) = SEARCH_FLIGHTS.do((tool_name, key),
+                                                          functools.partial(run, key, arguments, call_scopes))
+            if shared:
+                coalesced.inc()
+                logger.debug("Coalesced: %s%s", tool_name, key)
+                return result if immutable_state is not None else json.loads(payload)
+            return result
+
+        wrapper.cache_name = tool_name
+        wrapper.flight_key = lambda *args, **kwargs: (tool_name, normalized(args, kwargs)[0])
+        return wrapper
+
+    return decorator
+
+async def call_search_async(tool: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Call a search tool from a coroutine, without blocking the event loop.
+
+    The tool runs on a worker thread, with all of its decorators. Coroutines
+    calling it with the same arguments at the same time share one thread,
+    which in turn shares the call with any threads running it, so a mixed
+    herd still makes one execution. Waiting coroutines don't hold a thread.
+
+    Args:
+        tool: A tool decorated with cached_search, e.g. search_flights.
+        *args, **kwargs: The tool's arguments.
+
+    Returns:
+        The tool's response.
+    """
+    if not SEARCH_SINGLE_FLIGHT_ENABLED:
+        return await asyncio.to_thread(tool, *args, **kwargs)
+
+    def call() -> Tuple[Any, str]:
+        result = tool(*args, **kwargs)
+        return result, json.dumps(result, ensure_ascii=False)
+
+    # Keyed apart from the tool's own flights, whose values are the undecorated
+    # responses: coroutines share one thread, which shares the threads' call
+    shared, (result, payload) = await SEARCH_FLIGHTS.do_async(("async",) + tool.flight_key(*args, **kwargs), call)
+    if shared:
+        SINGLE_FLIGHT_CALLS.labels(tool.cache_name, "coalesced").inc()
+        return json.loads(payload)
+    return result
+
+def invalidate_search_cache(tool_name: Optional[str] = None,
+                            predicate: Optional[Callable[[tuple], bool]] = None) -> int:
+    """
+    Drop cached search results, e.g. after the inventory changes.
+
+    Args:
+        tool_name: Only invalidate this tool's entries (all tools when None).
+        predicate: Only invalidate keys for which this returns True. Keys are
+            (day, scope_versions, *normalized_arguments) tuples, arguments in
+            the tool's parameter order; scope_versions holds the catalog
+            version of each of the tool's scopes (see cached_search).
+
+    Returns:
+        int: Number of entries dropped.
+    """
+    dropped = SEARCH_CACHE.invalidate(tool_name, predicate)
+    logger.info("Search cache invalidated: tool=%s, entries dropped=%s", tool_name or 'all', dropped)
+    return dropped
+
+def invalidate_search_scopes(scopes: Iterable[Tuple[str, ...]]) -> int:
+    """
+    Drop the cached search results computed from any of the given parts of the catalog.
+
+    Used when a catalog changes in place (see inventory.deltas). The entries
+    are found through their tags, so the cost is in proportion to the entries
+    dropped, not the cache. They could no longer be served anyway: their keys
+    hold the scopes' old versions.
+
+    Args:
+        scopes: Scopes as resolved by InventoryBackend.cache_scope, e.g.
+            ("route", "delhi", "goa") or ("hotels", "goa").
+
+    Returns:
+        int: Number of entries dropped.
+    """
+    dropped = SEARCH_CACHE.invalidate_tags(scopes)
+    logger.debug("Search cache invalidated by scope: entries dropped=%s", dropped)
+    return dropped
+
+def get_search_cache_stats() -> dict:
+    """Hit/miss/eviction counters and size of the search cache, for monitoring."""
+    return SEARCH_CACHE.stats()
@@ -6,4 +6,136 @@ MODEL_NAME = "gemini-2.5-flash-lite"
 # Logging configuration
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s"
-LOG_FILE = "travel_agent.log"
\ No newline at end of file
+LOG_FILE = "travel_agent.log"
+# "queue": request threads only enqueue records; a background writer formats,
+# batches and flushes them. "sync": handlers write on the calling thread.
+LOG_MODE = "queue"
+LOG_QUEUE_MAX_RECORDS = 10_000  # records beyond this are dropped rather than blocking
+LOG_QUEUE_BATCH_SIZE = 256
+LOG_QUEUE_FLUSH_INTERVAL_SECONDS = 0.05
+# Keep one block in N for these loggers (a plan's per-option listing lines)
+LOG_SAMPLE_EVERY = {"travel_agent.travel_planner.options": 10}
+
+# In-process metrics (see logging_utils.py), exported in the Prometheus text format
+METRICS_ENABLED = True
+METRICS_MAX_LABEL_SETS = 500  # per metric; further label sets share an "other" series
+METRICS_HTTP_HOST = "127.0.0.1"
+METRICS_HTTP_PORT = None  # e.g. 9464 to serve /metrics
+METRICS_DUMP_PATH = None  # e.g. "travel_agent.prom" to rewrite a textfile periodically
+METRICS_DUMP_INTERVAL_SECONDS = 15
+
+# Flight connection search configuration
+MIN_CONNECTION_MINUTES = 60
+MAX_LAYOVER_MINUTES = 12 * 60
+MAX_CONNECTION_RESULTS = 5
+
+# Fare calendar (see flight_agent/fares.py)
+FARE_CALENDAR_DEFAULT_DAYS = 30
+FARE_CALENDAR_MAX_DAYS = 180
+FARE_CALENDAR_MAX_STAY_NIGHTS = 30
+# Per-day fares of the fare calendar: "model" estimates them from the catalog fare by day of
+# week, booking lead time and a daily variation; "catalog" quotes the catalog fare every day.
+# Flight searches and travel plans always quote catalog fares
+FARE_SOURCE = "model"
+
+# City name resolution (see inventory/cities.py)
+CITY_PREFIX_MIN_CHARS = 3
+CITY_FUZZY_MIN_SIMILARITY = 0.5  # trigram Dice similarity
+CITY_FUZZY_LOCATION_MIN_SIMILARITY = 0.75  # for names taken from hotel locations
+CITY_FUZZY_MAX_POSTINGS = 1000  # trigram posting entries counted per fuzzy lookup
+CITY_FUZZY_MAX_CANDIDATES = 32  # names scored per fuzzy lookup
+
+# Travel planner sub-search fan-out
+PLANNER_CONCURRENT_SEARCHES = True
+PLANNER_MAX_WORKERS = 16
+SUB_SEARCH_TIMEOUT_SECONDS = 5.0
+
+# Batch trip planning (see travel_planner/batch.py)
+BATCH_PLANNER_WORKERS = 8  # 0 runs each batch's sub-queries inline on the calling thread
+BATCH_PLANNER_PROCESSES = False  # run them on a process pool instead of threads
+
+# Register travel_planner.streaming.stream_plan_tool in place of create_comprehensive_travel_plan: same
+# response, but flight, hotel and activity sections are emitted as runner events as their searches finish
+STREAM_TRAVEL_PLANS = False
+
+# Whole-trip optimizer (see travel_planner/optimizer.py)
+PLANNER_ACTIVITIES_PER_DAY = 2
+PLANNER_FRONTIER_POINTS = 10  # cost/quality trade-offs shown in a travel plan
+
+# Set when hotel/activity lookups go to remote supplier backends; per-city
+# scoring in compare_destinations then fans out on the planner thread pool
+REMOTE_INVENTORY = False
+
+# Search result cache (see cache_utils.py)
+SEARCH_CACHE_ENABLED = True
+SEARCH_CACHE_MAX_ENTRIES = 4096
+SEARCH_CACHE_MAX_BYTES = 32 * 1024 * 1024
+SEARCH_CACHE_TTL_SECONDS = {
+    "search_flights": 5 * 60,
+    "search_fare_calendar": 5 * 60,
+    "search_hotels": 15 * 60,
+    "search_activities": 60 * 60,
+    # The travel planner's lookups, as typed records (see travel_planner/agent.py)
+    "plan_route_options": 5 * 60,
+    "plan_hotels": 15 * 60,
+    "plan_activities": 60 * 60,
+}
+# Concurrent identical searches share one execution (see cache_utils.SingleFlight)
+SEARCH_SINGLE_FLIGHT_ENABLED = True
+
+# Compact tool responses (see response_utils.py): top-k rows per section with
+# only the fields the agents' summaries use; full records via get_option_details
+COMPACT_TOOL_RESPONSES = False  # used when a tool's compact argument is not given
+COMPACT_TOP_K = 3
+COMPACT_MAX_AMENITIES = 3
+COMPACT_FIELDS = {
+    "flight": ("id", "airline", "flight_number", "departure", "arrival", "price"),
+    "connection": ("id", "flights", "via", "departure", "arrival", "arrival_day_offset",
+                   "total_duration", "total_price"),
+    "hotel": ("id", "name", "rating", "price_per_night", "amenities"),
+    "activity": ("id", "name", "category", "duration", "price", "rating", "description"),
+}
+
+# Model response cache (see llm_cache.py). LLM_CACHE_PATH = None keeps it in the
+# user's cache directory ($XDG_CACHE_HOME or ~/.cache)/travel_agent/llm_cache.db.
+# Off by default: when on, repeated model turns are replayed from disk
+LLM_CACHE_ENABLED = False
+LLM_CACHE_PATH = None
+LLM_CACHE_TTL_SECONDS = 24 * 60 * 60
+LLM_CACHE_MAX_ENTRIES = 20_000
+LLM_CACHE_MAX_BYTES = 128 * 1024 * 1024
+# Tool result fields that must not split cache keys: they differ on every call, or (the
+# catalog version) change on a reload even for results whose content did not change
+LLM_CACHE_IGNORED_RESULT_FIELDS = ("plan_generated_at", "inventory_version")
+
+# Inventory storage backend: "snapshot" maps INVENTORY_SNAPSHOT_PATH (built with
+# `python -m inventory snapshot`) and falls back to the catalog in memory when it
+# does not exist, "memory" always serves the catalog in process, "sqlite" serves
+# INVENTORY_DB_PATH (populated from the catalog if empty). The catalog is read
+# from INVENTORY_DATA_DIR, or the mock dicts when it has no data files
+INVENTORY_BACKEND = "snapshot"
+INVENTORY_SNAPSHOT_PATH = "inventory.snapshot"
+INVENTORY_DB_PATH = "travel_inventory.db"
+# JSON data files the snapshot and memory backends are built from (mock dicts when absent)
+INVENTORY_DATA_DIR = "inventory_data"
+# Seconds between checks of the snapshot and data files for a new catalog (0 disables hot reload)
+INVENTORY_RELOAD_INTERVAL_SECONDS = 5.0
+# A reload that has waited this long for in-flight calls on the old catalog logs a warning
+INVENTORY_RELOAD_DRAIN_WARNING_SECONDS = 30.0
+# Pause the cyclic garbage collector while a delta batch builds a catalog version, which
+# would otherwise rescan the batch's new indexes many times over
+INVENTORY_GC_TUNING = True
+# Freeze the catalog loaded at startup (gc.freeze), so full collections don't rescan its
+# million records. Off by default: the collect before the freeze stops every thread, so
+# turn it on only where the first load happens before serving. Reloads don't freeze, and
+# a reload unfreezes before retiring the old catalog so it can be collected
+INVENTORY_GC_FREEZE = False
+
+# Agent server (see server.py; `python main.py serve`)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8080
+SERVER_MAX_CONCURRENT_SESSIONS = 32  # agent turns running at once
+SERVER_MAX_QUEUED_REQUESTS = 64  # requests waiting for a turn; more are rejected at once with 503
+SERVER_REQUEST_TIMEOUT_SECONDS = 60.0  # per request, queue wait included; clients may ask for less
+SERVER_DRAIN_TIMEOUT_SECONDS = 30.0  # on shutdown, time admitted requests get to finish
+SERVER_TOOL_THREADS = 16  # synchronous tools run on this pool, off the event loop
@@ -1,73 +1,385 @@
 import datetime
-from typing import Optional
+import weakref
+from typing import Optional, List, Sequence
 import logging
 
-from google.adk.agents import Agent
-from .mock_data import FLIGHTS_DB, get_all_cities
-from config import MODEL_NAME
+from .connections import Itinerary, RouteGraph, SORT_KEYS
+from .fares import FareCalendar, get_fare_source, round_trips
+from inventory import (
+    CatalogChanges, FlightRecord, InventoryBackend, format_price, get_backend, inventory_tool,
+    register_index_builder, register_index_updater, resolve_city
+)
+from cache_utils import cached_search, normalize_city, normalize_date, normalize_filter
+from agent_utils import lazy_agent
+from logging_utils import tool_metrics
+from response_utils import (
+    COMPACT_FORMAT_INSTRUCTION, CompactResponse, connection_item, flight_item, get_option_details, use_compact
+)
+from config import (
+    MODEL_NAME, MAX_CONNECTION_RESULTS,
+    FARE_CALENDAR_DEFAULT_DAYS, FARE_CALENDAR_MAX_DAYS, FARE_CALENDAR_MAX_STAY_NIGHTS,
+)
 
 # Setup logger for flight agent
 logger = logging.getLogger('travel_agent.flight_agent')
 
-def search_flights(source: str, destination: str, date: Optional[str] = None) -> dict:
+# Route graphs for connection search, built once per inventory backend
+_route_graphs: "weakref.WeakKeyDictionary[InventoryBackend, RouteGraph]" = weakref.WeakKeyDictionary()
+
+@register_index_builder
+def get_route_graph(backend: Optional[InventoryBackend] = None) -> RouteGraph:
+    """Returns the route graph of a backend (default: the current one), building it on first use."""
+    backend = backend or get_backend()
+    graph = _route_graphs.get(backend)
+    if graph is None:
+        graph = _route_graphs[backend] = RouteGraph(backend.flight_inventory())
+    return graph
+
+@register_index_updater
+def update_route_graph(previous: InventoryBackend, backend: InventoryBackend, changes: CatalogChanges):
+    """Carry the route graph over to a catalog version produced by inventory deltas, replacing changed routes."""
+    graph = _route_graphs.get(previous)
+    if graph is not None:
+        _route_graphs[backend] = graph.with_routes(changes.routes) if changes.routes else graph
+
+def find_flights(source: str, destination: str) -> Optional[Sequence[FlightRecord]]:
+    """Looks up the typed flight records for a route.
+
+    The records carry catalog fares, the same fares find_connections prices
+    itineraries with; the inventory has no per-date prices.
+
+    Args:
+        source (str): The departure city.
+        destination (str): The arrival city.
+
+    Returns:
+        Sequence[FlightRecord]: Flight records in schedule order, or None if the route is not served.
+    """
+    return get_backend().flights(resolve_city(source), resolve_city(destination))
+
+def find_connections(source: str, destination: str, sort_by: str = "price",
+                     max_results: int = MAX_CONNECTION_RESULTS) -> List[Itinerary]:
+    """Finds the best 1- and 2-stop itineraries between two cities.
+
+    Args:
+        source (str): The departure city.
+        destination (str): The arrival city.
+        sort_by (str, optional): "price" or "duration". Defaults to "price".
+        max_results (int, optional): Maximum number of itineraries to return.
+
+    Returns:
+        list: Itineraries ranked by total price or total elapsed time.
+    """
+    return get_route_graph().find_connections(resolve_city(source), resolve_city(destination),
+                                             k=max_results, sort_by=sort_by)
+
+def flight_search_response(source: str, destination: str, date: Optional[str],
+                           flights: Optional[Sequence[FlightRecord]],
+                           connections: Optional[Sequence[Itinerary]] = None) -> dict:
+    """Builds the search_flights response for a set of flight records.
+
+    Args:
+        source (str): The departure city as given by the caller.
+        destination (str): The arrival city as given by the caller.
+        date (str, optional): The travel date in YYYY-MM-DD format. Defaults to today.
+        flights (Sequence[FlightRecord], optional): Records returned by find_flights.
+        connections (Sequence[Itinerary], optional): Connecting itineraries to offer
+            when there is no direct route.
+
+    Returns:
+        dict: status and list of available flights or error message.
+    """
+    if flights is None and not connections:
+        return {
+            "status": "error",
+            "error_message": f"No flights available from {source} to {destination}."
+        }
+
+    travel_date = date if date else datetime.datetime.now().strftime("%Y-%m-%d")
+
+    result = {
+        "status": "success",
+        "flights": [flight.to_dict() for flight in flights or ()],
+        "route": f"{source.title()} to {destination.title()}",
+        "date": travel_date
+    }
+    if flights is None:
+        result["connecting_flights"] = [itinerary.to_dict() for itinerary in connections]
+        result["note"] = f"No direct flights from {source} to {destination}; showing connecting itineraries."
+    return result
+
+@tool_metrics(label="destination", results=("flights", "connecting_flights"))
+@inventory_tool
+@cached_search("search_flights", scopes=[("flights", "source", "destination")], source=normalize_city,
+               destination=normalize_city, date=normalize_date, compact=use_compact, top_k=normalize_filter)
+def search_flights(source: str, destination: str, date: Optional[str] = None,
+                   compact: Optional[bool] = None, top_k: Optional[int] = None) -> dict:
     """Searches for available flights between two cities.
 
     Args:
         source (str): The departure city.
         destination (str): The arrival city.
         date (str, optional): The travel date in YYYY-MM-DD format. Defaults to today.
+        compact (bool, optional): Return only the top flights as rows of key fields, each
+            with an id for get_option_details. Defaults to config.COMPACT_TOOL_RESPONSES.
+        top_k (int, optional): Flights to list in compact mode. Defaults to config.COMPACT_TOP_K.
 
     Returns:
         dict: status and list of available flights or error message.
     """
-    logger.info(f"Searching flights: {source} -> {destination} on {date or 'today'}")
+    logger.info("Searching flights: %s -> %s on %s", source, destination, date or 'today')
+    
+    try:
+        travel_date = date or datetime.date.today().isoformat()
+        flights = find_flights(source, destination)
+        connections = None
+        
+        if flights is None:
+            connections = find_connections(source, destination)
+            if connections:
+                logger.info("No direct route %s -> %s, found %s connecting itineraries", source, destination, len(connections))
+            else:
+                logger.warning("No flights available for route: %s -> %s", source, destination)
+        else:
+            logger.info("Found %s flights for route %s -> %s", len(flights), source, destination)
+        
+        response = flight_search_response(source, destination, date, flights, connections)
+        if not use_compact(compact) or response["status"] != "success":
+            return response
+        
+        compact_response = CompactResponse(top_k)
+        if flights is not None:
+            compact_response.add_options("flights", "flight", flights, lambda flight: flight_item(flight, travel_date))
+        else:
+            compact_response.add_options("connecting_flights", "connection", connections, connection_item)
+        return compact_response.build({key: response[key] for key in ("route", "date", "note") if key in response})
+        
+    except Exception as e:
+        logger.error("Error searching flights %s -> %s: %s", source, destination, e, exc_info=True)
+        return {
+            "status": "error",
+            "error_message": f"Error searching flights: {str(e)}"
+        }
+
+@tool_metrics(label="destination", results=("itineraries",))
+@inventory_tool
+def search_connecting_flights(source: str, destination: str, sort_by: str = "price",
+                              max_results: int = MAX_CONNECTION_RESULTS) -> dict:
+    """Searches for connecting itineraries (1 or 2 stops) between two cities.
+
+    Args:
+        source (str): The departure city.
+        destination (str): The arrival city.
+        sort_by (str, optional): Rank by "price" (lowest total fare) or "duration"
+            (shortest total travel time). Defaults to "price".
+        max_results (int, optional): Maximum number of itineraries to return. Defaults to 5.
+
+    Returns:
+        dict: status and list of connecting itineraries or error message.
+    """
+    logger.info("Searching connecting flights: %s -> %s, sort_by=%s", source, destination, sort_by)
     
     try:
-        key = (source.lower(), destination.lower())
+        if sort_by not in SORT_KEYS:
+            return {
+                "status": "error",
+                "error_message": f"Invalid sort_by '{sort_by}'. Use one of: {', '.join(SORT_KEYS)}"
+            }
         
-        if key not in FLIGHTS_DB:
-            logger.warning(f"No flights available for route: {source} -> {destination}")
+        itineraries = find_connections(source, destination, sort_by, max_results)
+        
+        if not itineraries:
+            logger.warning("No connecting itineraries for route: %s -> %s", source, destination)
             return {
                 "status": "error",
-                "error_message": f"No flights available from {source} to {destination}."
+                "error_message": f"No connecting flights available from {source} to {destination}."
             }
         
-        flights = FLIGHTS_DB[key]
-        travel_date = date if date else datetime.datetime.now().strftime("%Y-%m-%d")
+        logger.info("Found %s connecting itineraries for route %s -> %s", len(itineraries), source, destination)
         
-        logger.info(f"Found {len(flights)} flights for route {source} -> {destination}")
+        return {
+            "status": "success",
+            "route": f"{source.title()} to {destination.title()}",
+            "sort_by": sort_by,
+            "itineraries_found": len(itineraries),
+            "itineraries": [itinerary.to_dict() for itinerary in itineraries]
+        }
         
+    except Exception as e:
+        logger.error("Error searching connecting flights %s -> %s: %s", source, destination, e, exc_info=True)
+        return {
+            "status": "error",
+            "error_message": f"Error searching connecting flights: {str(e)}"
+        }
+
+def _parse_day(value: str) -> datetime.date:
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+
+def _cheapest_flight(calendar: FareCalendar, index: int) -> str:
+    flight = calendar.flights[calendar.cheapest[index]]
+    return f"{flight.airline} {flight.flight_number}"
+
+def _fare_entry(calendar: FareCalendar, index: int) -> dict:
+    day = calendar.date(index)
+    return {
+        "date": day.isoformat(),
+        "weekday": day.strftime("%A"),
+        "fare": format_price(calendar.fares[index]),
+        "flight": _cheapest_flight(calendar, index),
+    }
+
+@tool_metrics(label="destination")
+@inventory_tool
+@cached_search("search_fare_calendar",
+               scopes=[("route", "source", "destination"), ("route", "destination", "source")],
+               source=normalize_city, destination=normalize_city, start_date=normalize_date, end_date=normalize_date)
+def search_fare_calendar(source: str, destination: str, start_date: Optional[str] = None,
+                         end_date: Optional[str] = None, round_trip: bool = False,
+                         min_stay_nights: int = 2, max_stay_nights: int = 7) -> dict:
+    """Finds the cheapest direct fare for every day (and week) of a date range in one call.
+
+    Use this for flexible dates, e.g. "what's the cheapest day to fly Delhi to Goa next month",
+    instead of searching flights day by day.
+    The per-day fares come from the configured fare source (config.FARE_SOURCE); the
+    response note says when they are estimates rather than catalog fares.
+
+    Args:
+        source (str): The departure city.
+        destination (str): The arrival city.
+        start_date (str, optional): First travel date in YYYY-MM-DD format. Defaults to today.
+        end_date (str, optional): Last travel date in YYYY-MM-DD format. Defaults to 30 days from start_date.
+        round_trip (bool, optional): Also pair each departure day with the cheapest return
+            within the stay range. Defaults to False.
+        min_stay_nights (int, optional): Minimum nights before the return flight. Defaults to 2.
+        max_stay_nights (int, optional): Maximum nights before the return flight. Defaults to 7.
+
+    Returns:
+        dict: status and per-person cheapest fares per day and per week (and per departure
+        day for round trips), or error message.
+    """
+    logger.info("Searching fare calendar: %s -> %s from %s to %s, round_trip=%s", source, destination, start_date or 'today', end_date or 'default', round_trip)
+
+    try:
+        today = datetime.date.today()
+        try:
+            start = _parse_day(start_date) if start_date else today
+            end = _parse_day(end_date) if end_date else start + datetime.timedelta(days=FARE_CALENDAR_DEFAULT_DAYS - 1)
+        except ValueError:
+            return {
+                "status": "error",
+                "error_message": "Dates must be in YYYY-MM-DD format."
+            }
+        days = (end - start).days + 1
+        if start < today:
+            return {
+                "status": "error",
+                "error_message": f"start_date {start.isoformat()} is in the past."
+            }
+        if days < 1 or days > FARE_CALENDAR_MAX_DAYS:
+            return {
+                "status": "error",
+                "error_message": f"end_date must be on or after start_date and at most {FARE_CALENDAR_MAX_DAYS} days later."
+            }
+        if round_trip and not 0 <= min_stay_nights <= max_stay_nights <= FARE_CALENDAR_MAX_STAY_NIGHTS:
+            return {
+                "status": "error",
+                "error_message": f"Stay must satisfy 0 <= min_stay_nights <= max_stay_nights <= {FARE_CALENDAR_MAX_STAY_NIGHTS}."
+            }
+
+        flights = find_flights(source, destination)
+        return_flights = find_flights(destination, source) if round_trip else None
+        if not flights or (round_trip and not return_flights):
+            logger.warning("No direct route for fare calendar: %s <-> %s", source, destination)
+            return {
+                "status": "error",
+                "error_message": (f"No direct flights {'between' if round_trip else 'from'} {source} "
+                                  f"{'and' if round_trip else 'to'} {destination}; the fare calendar covers "
+                                  "direct routes. Try search_connecting_flights.")
+            }
+
+        fare_source = get_fare_source()
+        outbound = FareCalendar(flights, start, days, today, fare_source)
+        cheapest = outbound.cheapest_day()
         result = {
             "status": "success",
-            "flights": flights,
-            "route": f"{source} to {destination}",
-            "date": travel_date
+            "route": f"{source.title()} to {destination.title()}",
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "days": days,
+            "cheapest_day": _fare_entry(outbound, cheapest),
+            "daily_fares": [_fare_entry(outbound, index) for index in range(days)],
+            "weekly_fares": [
+                {
+                    "week_start": outbound.date(first).isoformat(),
+                    "week_end": outbound.date(last).isoformat(),
+                    "cheapest_date": outbound.date(best).isoformat(),
+                    "fare": format_price(outbound.fares[best]),
+                }
+                for first, last, best in outbound.weeks()
+            ],
+            "note": ("Fares are per person, for the cheapest direct flight on each day"
+                     + (", estimated by the fare model; search_flights quotes catalog fares."
+                        if fare_source.estimated else "."))
         }
-        
+
+        if round_trip:
+            inbound = FareCalendar(return_flights, start + datetime.timedelta(days=min_stay_nights),
+                                   days + max_stay_nights - min_stay_nights, today, fare_source)
+            pairs = round_trips(outbound, inbound, min_stay_nights, max_stay_nights)
+            trips = [
+                {
+                    "depart": outbound.date(day).isoformat(),
+                    "return": inbound.date(back).isoformat(),
+                    "nights": (inbound.date(back) - outbound.date(day)).days,
+                    "outbound_flight": _cheapest_flight(outbound, day),
+                    "return_flight": _cheapest_flight(inbound, back),
+                    "total_fare": format_price(total),
+                }
+                for day, back, total in pairs
+            ]
+            result["stay_nights"] = f"{min_stay_nights}-{max_stay_nights}"
+            result["round_trips"] = trips
+            result["cheapest_round_trip"] = trips[min(range(days), key=lambda day: pairs[day][2])]
+
+        logger.info("Fare calendar %s -> %s: %s days, cheapest %s on %s", source, destination, days, result['cheapest_day']['fare'], result['cheapest_day']['date'])
         return result
-        
+
     except Exception as e:
-        logger.error(f"Error searching flights {source} -> {destination}: {str(e)}", exc_info=True)
+        logger.error("Error searching fare calendar %s -> %s: %s", source, destination, e, exc_info=True)
         return {
             "status": "error",
-            "error_message": f"Error searching flights: {str(e)}"
+            "error_message": f"Error searching fare calendar: {str(e)}"
         }
 
-flight_agent = Agent(
-    name="flight_booking_agent",
-    model=MODEL_NAME,
-    description=(
-        "Flight booking agent that can search for flights between cities across India."
-    ),
-    instruction=(
-        "You are a helpful flight booking agent who specializes in finding flights between cities. "
-        "When users ask about flights, provide them with available options including flight numbers, "
-        "departure/arrival times, prices, and airlines. Help users find the best flight options "
-        "based on their travel preferences, budget, and schedule. Always be helpful and provide "
-        "clear information about available flight options."
-    ),
-    tools=[search_flights],
-)
+def build_flight_agent(model=None):
+    """Builds the flight booking agent. Imports google.adk on first call.
+
+    Args:
+        model: Model name or ADK BaseLlm instance (e.g. a stub for load tests).
+            Defaults to config.MODEL_NAME.
+    """
+    from google.adk.agents import Agent
+    from llm_cache import agent_callbacks
+
+    return Agent(
+        name="flight_booking_agent",
+        model=model or MODEL_NAME,
+        description=(
+            "Flight booking agent that can search for flights between cities across India."
+        ),
+        instruction=(
+            "You are a helpful flight booking agent who specializes in finding flights between cities. "
+            "When users ask about flights, provide them with available options including flight numbers, "
+            "departure/arrival times, prices, and airlines. Help users find the best flight options "
+            "based on their travel preferences, budget, and schedule. When there is no direct flight, "
+            "offer the connecting itineraries with their stops and layover times. When the user's dates are "
+            "flexible or they ask for the cheapest day or week to fly, call search_fare_calendar once for the "
+            "whole date range rather than searching day by day. Always be helpful and provide "
+            "clear information about available flight options. " + COMPACT_FORMAT_INSTRUCTION
+        ),
+        tools=[search_flights, search_connecting_flights, search_fare_calendar, get_option_details],
+        **agent_callbacks(),
+    )
 
-# Export as root_agent for Google ADK compatibility
-root_agent = flight_agent
\ No newline at end of file
+# flight_agent and root_agent (for Google ADK compatibility) are built on first access
+__getattr__ = lazy_agent(globals(), build_flight_agent, ("flight_agent", "root_agent"))
@@ -0,0 +1,321 @@
+"""
+Connecting-flight search over a precomputed route graph.
+
+Flights repeat daily, so the search runs over a time-expanded graph: each
+label is a concrete flight taken at an absolute minute offset from the first
+departure, and a connection is only feasible when the next flight leaves at
+least the minimum connection time after the previous one lands (rolling over
+to the next day when needed). Labels are expanded best-first (A*) with
+admissible per-query lower bounds on the remaining price or travel time, so
+itineraries come out of the queue already ranked and the search stops after
+the k best.
+"""
+
+import heapq
+from itertools import count
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from inventory import FlightInventory, FlightRecord, format_clock, format_price
+from inventory.records import MINUTES_PER_DAY
+from config import MIN_CONNECTION_MINUTES, MAX_LAYOVER_MINUTES, MAX_CONNECTION_RESULTS
+
+SORT_KEYS = ("price", "duration")
+
+def format_elapsed(minutes: int) -> str:
+    """Format a span of minutes as "5h 30m"."""
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+class Itinerary:
+    """A ranked sequence of 1-3 flights from source to destination."""
+
+    __slots__ = ("legs", "departures", "total_price_paise", "elapsed_minutes")
+
+    def __init__(self, legs: Tuple[FlightRecord, ...], departures: Tuple[int, ...],
+                 total_price_paise: int, elapsed_minutes: int):
+        self.legs = legs
+        self.departures = departures  # absolute departure minute of each leg, day 0 based
+        self.total_price_paise = total_price_paise
+        self.elapsed_minutes = elapsed_minutes
+
+    @property
+    def stops(self) -> int:
+        return len(self.legs) - 1
+
+    def to_dict(self) -> dict:
+        """Build the display dict returned by the flight tools."""
+        legs = []
+        layovers = []
+        previous_arrival = None
+        for flight, departure in zip(self.legs, self.departures):
+            arrival = departure + flight.duration_minutes
+            if previous_arrival is not None:
+                layovers.append({
+                    "city": flight.source.title(),
+                    "duration": format_elapsed(departure - previous_arrival),
+                })
+            leg = flight.to_dict()
+            leg["from"] = flight.source.title()
+            leg["to"] = flight.destination.title()
+            leg["day"] = departure // MINUTES_PER_DAY
+            legs.append(leg)
+            previous_arrival = arrival
+
+        first_departure = self.departures[0]
+        final_arrival = first_departure + self.elapsed_minutes
+        return {
+            "stops": self.stops,
+            "via": [flight.destination.title() for flight in self.legs[:-1]],
+            "total_price": format_price(self.total_price_paise),
+            "total_duration": format_elapsed(self.elapsed_minutes),
+            "departure": format_clock(first_departure),
+            "arrival": format_clock(final_arrival),
+            "arrival_day_offset": final_arrival // MINUTES_PER_DAY,
+            "legs": legs,
+            "layovers": layovers,
+        }
+
+class RouteGraph:
+    """Adjacency view of a FlightInventory, built once for connection search.
+
+    Attributes:
+        out_routes: source -> destination -> flights on that route.
+        in_routes: destination -> source -> (cheapest fare in paise, shortest
+            block time in minutes) on that route.
+        min_out_price: city -> cheapest fare on any route out of the city.
+        min_out_duration: city -> shortest block time on any route out of the city.
+    """
+
+    __slots__ = ("out_routes", "in_routes", "min_out_price", "min_out_duration")
+
+    def __init__(self, inventory: FlightInventory):
+        self.out_routes: Dict[str, Dict[str, Tuple[FlightRecord, ...]]] = {}
+        self.in_routes: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self.min_out_price: Dict[str, int] = {}
+        self.min_out_duration: Dict[str, int] = {}
+
+        for (source, destination), flights in inventory.routes.items():
+            if not flights:
+                continue
+            self.out_routes.setdefault(source, {})[destination] = flights
+            price = min(f.price_paise for f in flights)
+            duration = min(f.duration_minutes for f in flights)
+            self.in_routes.setdefault(destination, {})[source] = (price, duration)
+            self.min_out_price[source] = min(price, self.min_out_price.get(source, price))
+            self.min_out_duration[source] = min(duration, self.min_out_duration.get(source, duration))
+
+    def with_routes(self, routes: Dict[Tuple[str, str], Optional[Tuple[FlightRecord, ...]]]) -> "RouteGraph":
+        """
+        A copy of the graph with some routes replaced, for an inventory delta.
+
+        Only the changed routes and the per-city minimums of their endpoints
+        are recomputed; adjacency of untouched cities is shared with this
+        graph, which stays valid for calls still running on the previous
+        catalog.
+
+        Args:
+            routes: (source, destination) -> the route's flights; None or an
+                empty tuple removes the route.
+
+        Returns:
+            RouteGraph: The updated graph.
+        """
+        graph = RouteGraph.__new__(RouteGraph)
+        graph.out_routes = dict(self.out_routes)
+        graph.in_routes = dict(self.in_routes)
+        graph.min_out_price = dict(self.min_out_price)
+        graph.min_out_duration = dict(self.min_out_duration)
+
+        # source -> (old, new) minimums of each changed route out of it, None for no route
+        sources: Dict[str, List[Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]]] = {}
+        destinations: Set[str] = set()
+        for (source, destination), flights in routes.items():
+            if source not in sources:
+                graph.out_routes[source] = dict(self.out_routes.get(source, {}))
+                sources[source] = []
+            if destination not in destinations:
+                graph.in_routes[destination] = dict(self.in_routes.get(destination, {}))
+                destinations.add(destination)
+            old = graph.in_routes[destination].get(source)
+            if flights:
+                new = (min(f.price_paise for f in flights), min(f.duration_minutes for f in flights))
+                graph.out_routes[source][destination] = flights
+                graph.in_routes[destination][source] = new
+            else:
+                new = None
+                graph.out_routes[source].pop(destination, None)
+                graph.in_routes[destination].pop(source, None)
+            sources[source].append((old, new))
+
+        for source, changed in sources.items():
+            out = graph.out_routes[source]
+            if not out:
+                del graph.out_routes[source]
+                graph.min_out_price.pop(source, None)
+                graph.min_out_duration.pop(source, None)
+                continue
+            for field, minimums in enumerate((graph.min_out_price, graph.min_out_duration)):
+                previous = minimums.get(source)
+                # Rescan the city's routes only if the route holding its minimum got dearer or went away
+                if previous is None or any(old is not None and old[field] == previous
+                                           and (new is None or new[field] > previous) for old, new in changed):
+                    minimums[source] = min(graph.in_routes[d][source][field] for d in out)
+                else:
+                    minimums[source] = min([previous] + [new[field] for _, new in changed if new is not None])
+        for destination in destinations:
+            if not graph.in_routes[destination]:
+                del graph.in_routes[destination]
+        return graph
+
+    def find_connections(self, source: str, destination: str,
+                         k: int = MAX_CONNECTION_RESULTS,
+                         sort_by: str = "price",
+                         max_stops: int = 2,
+                         include_direct: bool = False,
+                         min_connection_minutes: int = MIN_CONNECTION_MINUTES,
+                         max_layover_minutes: int = MAX_LAYOVER_MINUTES) -> List[Itinerary]:
+        """Find the k best itineraries from source to destination.
+
+        Args:
+            source (str): Lower-cased departure city.
+            destination (str): Lower-cased arrival city.
+            k (int): Maximum number of itineraries to return.
+            sort_by (str): "price" for lowest total fare or "duration" for shortest
+                elapsed time from first departure to final arrival.
+            max_stops (int): Maximum number of intermediate stops (0-2).
+            include_direct (bool): Whether non-stop flights count towards the k results.
+            min_connection_minutes (int): Minimum time between landing and the next departure.
+            max_layover_minutes (int): Longest acceptable wait at a connecting city.
+
+        Returns:
+            list: Itineraries ranked by the requested criterion.
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"sort_by must be one of {', '.join(SORT_KEYS)}")
+        if source == destination or source not in self.out_routes or destination not in self.in_routes:
+            return []
+
+        by_price = sort_by == "price"
+        max_legs = min(max_stops, 2) + 1
+
+        # Admissible bounds on the cost still to come. For duration ranking every
+        # remaining leg also costs at least one minimum connection time.
+        if by_price:
+            field, min_out, per_leg = 0, self.min_out_price, 0
+        else:
+            field, min_out, per_leg = 1, self.min_out_duration, min_connection_minutes
+        one_leg = {city: minimums[field] + per_leg for city, minimums in self.in_routes[destination].items()}
+        cheapest_last_leg = min(one_leg.values())
+
+        # Queue entries: (estimate, tie_break, seq, cost, arrival_abs, legs, departures)
+        queue = []
+        seq = count()
+        # Costs of the best k complete itineraries queued so far; anything estimated
+        # above the worst of them can never make the top k.
+        complete_costs: List[int] = []
+
+        def push(estimate, tie, cost, arrival, legs, departures):
+            if len(complete_costs) == k and estimate > -complete_costs[0]:
+                return
+            if legs[-1].destination == destination and (len(legs) > 1 or include_direct):
+                if len(complete_costs) < k:
+                    heapq.heappush(complete_costs, -cost)
+                else:
+                    heapq.heapreplace(complete_costs, -cost)
+            heapq.heappush(queue, (estimate, tie, next(seq), cost, arrival, legs, departures))
+
+        for city, flights in self.out_routes[source].items():
+            if city == destination:
+                bound = 0
+            else:
+                bound = None
+                if max_legs >= 2 and city in one_leg:
+                    bound = one_leg[city]
+                if max_legs >= 3 and city in min_out:
+                    # Two legs to go: resolved exactly when the label is expanded
+                    via_hub = min_out[city] + per_leg + cheapest_last_leg
+                    bound = via_hub if bound is None else min(bound, via_hub)
+                if bound is None:
+                    continue
+            for flight in flights:
+                arrival = flight.departure_minutes + flight.duration_minutes
+                cost = flight.price_paise if by_price else flight.duration_minutes
+                tie = flight.duration_minutes if by_price else flight.price_paise
+                push(cost + bound, tie, cost, arrival, (flight,), (flight.departure_minutes,))
+
+        results: List[Itinerary] = []
+        while queue and len(results) < k:
+            _, tie, _, cost, arrival, legs, departures = heapq.heappop(queue)
+            city = legs[-1].destination
+
+            if city == destination:
+                if len(legs) > 1 or include_direct:
+                    price = cost if by_price else tie
+                    elapsed = arrival - departures[0]
+                    results.append(Itinerary(legs, departures, price, elapsed))
+                continue
+
+            # Only the destination, or a city one leg from it, can still complete the trip
+            routes = self.out_routes.get(city, {})
+            next_cities = list(routes.keys() & one_leg.keys()) if max_legs - len(legs) >= 2 else []
+            if destination in routes:
+                next_cities.append(destination)
+
+            earliest = arrival + min_connection_minutes
+            first_departure = departures[0]
+            previous_stop = legs[-2].destination if len(legs) > 1 else source
+            for next_city in next_cities:
+                if next_city == source or next_city == previous_stop:
+                    continue
+                bound = one_leg[next_city] if next_city != destination else 0
+                for flight in routes[next_city]:
+                    departure = earliest + (flight.departure_minutes - earliest) % MINUTES_PER_DAY
+                    if departure - arrival > max_layover_minutes:
+                        continue
+                    next_arrival = departure + flight.duration_minutes
+                    if by_price:
+                        next_cost = cost + flight.price_paise
+                        next_tie = next_arrival - first_departure
+                    else:
+                        next_cost = next_arrival - first_departure
+                        next_tie = tie + flight.price_paise
+                    push(next_cost + bound, next_tie, next_cost, next_arrival,
+                         legs + (flight,), departures + (departure,))
+
+        return results
+
+    def itinerary(self, source: str, flight_numbers: Sequence[str],
+                  min_connection_minutes: int = MIN_CONNECTION_MINUTES) -> Optional[Itinerary]:
+        """Rebuild the itinerary that takes the given flights in order from source.
+
+        Each leg is taken at its first daily departure at least the minimum
+        connection time after the previous landing, as find_connections does.
+
+        Args:
+            source (str): Lower-cased departure city.
+            flight_numbers (Sequence[str]): Flight number of each leg.
+            min_connection_minutes (int): Minimum time between landing and the next departure.
+
+        Returns:
+            Itinerary: The itinerary, or None if the flights do not form a route from source.
+        """
+        legs: List[FlightRecord] = []
+        departures: List[int] = []
+        city, arrival = source, None
+        for number in flight_numbers:
+            flight = next((flight for flights in self.out_routes.get(city, {}).values()
+                           for flight in flights if flight.flight_number == number), None)
+            if flight is None:
+                return None
+            if arrival is None:
+                departure = flight.departure_minutes
+            else:
+                earliest = arrival + min_connection_minutes
+                departure = earliest + (flight.departure_minutes - earliest) % MINUTES_PER_DAY
+            legs.append(flight)
+            departures.append(departure)
+            arrival = departure + flight.duration_minutes
+            city = flight.destination
+        if not legs:
+            return None
+        return Itinerary(tuple(legs), tuple(departures), sum(leg.price_paise for leg in legs),
+                         arrival - departures[0])
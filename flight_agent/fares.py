@@ -0,0 +1,269 @@
+"""
+The flexible-date fare calendar and the fare sources behind it.
+
+The inventory holds one catalog fare per scheduled flight, which is what
+flight searches and travel plans quote. The calendar's per-day fares come
+from a pluggable FareSource (set_fare_source, FARE_SOURCE in config.py):
+
+- FareModel estimates the fare on a day as the catalog fare scaled by a
+  day-of-week factor, a booking lead-time factor and a per-flight, per-day
+  variation, all integer percentages. For a date range the factors are laid
+  out once as arrays covering every day and combined with each flight's
+  catalog fare element-wise (map over the arrays, no Python loop per day);
+- CatalogFares is the catalog fare on every day.
+
+The cheapest flight per day is a single element-wise min across the
+flights' arrays, so a 30- or 180-day calendar costs about as much as a few
+single-day lookups.
+
+Round trips pair each outbound day with the cheapest return inside the
+allowed stay window using a sliding-window minimum, so the pairing is linear
+in the number of days whatever the window width.
+"""
+
+import datetime
+import functools
+import logging
+import operator
+import random
+import zlib
+from array import array
+from collections import deque
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+from inventory import FlightRecord, PAISE_PER_RUPEE
+from cache_utils import invalidate_search_cache
+from config import FARE_CALENDAR_MAX_DAYS, FARE_CALENDAR_MAX_STAY_NIGHTS, FARE_SOURCE
+
+logger = logging.getLogger('travel_agent.flight_agent')
+
+# Fare factors in percent of the base fare
+DAY_OF_WEEK_FARE_PERCENT = (100, 94, 92, 97, 112, 106, 118)  # Monday first
+LEAD_TIME_FARE_PERCENT = ((3, 140), (7, 125), (14, 110), (30, 100))  # (booked less than N days out, percent)
+ADVANCE_FARE_PERCENT = 92  # booked 30 or more days out
+FARE_VARIATION_PERCENT = 8  # per-flight, per-day variation, +/-
+
+# Variation cycle length; prime so flights drift out of step with each other
+_VARIATION_PERIOD = 997
+_VARIATION_SEED = 7
+# base * day percent * variation percent / _FARE_DIVISOR = fare in whole rupees
+_FARE_DIVISOR = 100 * 100 * 100 * PAISE_PER_RUPEE
+
+@functools.lru_cache(maxsize=1)
+def _variation_table() -> array:
+    rng = random.Random(_VARIATION_SEED)
+    values = [100 + rng.randint(-FARE_VARIATION_PERCENT, FARE_VARIATION_PERCENT)
+              for _ in range(_VARIATION_PERIOD)]
+    # Tiled so any run of consecutive days is one contiguous slice
+    return array("l", values + values[:FARE_CALENDAR_MAX_DAYS + FARE_CALENDAR_MAX_STAY_NIGHTS])
+
+def day_percents(start: datetime.date, days: int, today: Optional[datetime.date] = None) -> array:
+    """
+    Day-of-week times lead-time factor for each day of a range.
+
+    Args:
+        start: First day of the range.
+        days: Number of days.
+        today: Booking date for the lead-time factor. Defaults to today.
+
+    Returns:
+        array: One value per day, in percent of percent (10000 = base fare).
+    """
+    today = today or datetime.date.today()
+    weekday = start.weekday()
+    week = DAY_OF_WEEK_FARE_PERCENT[weekday:] + DAY_OF_WEEK_FARE_PERCENT[:weekday]
+    day_of_week = (week * (days // 7 + 1))[:days]
+
+    # Lead time only grows across the range, so each bucket is one run of days
+    lead_days = (start - today).days
+    lead_time: List[int] = []
+    for within, percent in LEAD_TIME_FARE_PERCENT:
+        lead_time += [percent] * (min(days, within - lead_days) - len(lead_time))
+    lead_time += [ADVANCE_FARE_PERCENT] * (days - len(lead_time))
+
+    return array("l", map(operator.mul, day_of_week, lead_time))
+
+def flight_fares(flight: FlightRecord, start: datetime.date, percents: array) -> List[int]:
+    """Fare in paise of one flight on each day of a range, given day_percents for the range."""
+    offset = (zlib.crc32(flight.flight_number.encode()) + start.toordinal()) % _VARIATION_PERIOD
+    variation = _variation_table()[offset:offset + len(percents)]
+    scaled = map(flight.price_paise.__mul__, map(operator.mul, percents, variation))
+    return list(map(PAISE_PER_RUPEE.__mul__, map(operator.floordiv, scaled, repeat(_FARE_DIVISOR))))
+
+def fares_on(flights: Sequence[FlightRecord], day: datetime.date,
+             today: Optional[datetime.date] = None) -> Tuple[FlightRecord, ...]:
+    """The flights of a route re-priced at their FareModel fares on one day, in schedule order."""
+    percents = day_percents(day, 1, today)
+    return tuple(flight.with_price(flight_fares(flight, day, percents)[0]) for flight in flights)
+
+# ---------------------------------------------------------------------------
+# Fare sources
+# ---------------------------------------------------------------------------
+
+class FareSource:
+    """Per-day fares of a route's flights, for the fare calendar.
+
+    Attributes:
+        name: Short name, as in FARE_SOURCE.
+        estimated: True when the fares are estimates rather than what the
+            flights sell for on each day.
+    """
+
+    name = "abstract"
+    estimated = True
+
+    def route_fares(self, flights: Sequence[FlightRecord], start: datetime.date, days: int,
+                    today: datetime.date) -> List[List[int]]:
+        """
+        Fares of each flight on each day of a range.
+
+        Args:
+            flights: The route's flights.
+            start: First day of the range.
+            days: Number of days.
+            today: Booking date.
+
+        Returns:
+            list: One list of fares in paise per flight, one fare per day.
+        """
+        raise NotImplementedError
+
+class CatalogFares(FareSource):
+    """The catalog fare on every day, as flight searches and travel plans quote it."""
+
+    name = "catalog"
+    estimated = False
+
+    def route_fares(self, flights, start, days, today):
+        return [[flight.price_paise] * days for flight in flights]
+
+class FareModel(FareSource):
+    """Fares estimated from the catalog fare by day of week, booking lead time and a daily variation."""
+
+    name = "model"
+    estimated = True
+
+    def route_fares(self, flights, start, days, today):
+        percents = day_percents(start, days, today)
+        return [flight_fares(flight, start, percents) for flight in flights]
+
+FARE_SOURCES: Dict[str, Type[FareSource]] = {
+    "catalog": CatalogFares,
+    "model": FareModel,
+}
+
+_fare_source: Optional[FareSource] = None
+
+def get_fare_source() -> FareSource:
+    """The fare source of the fare calendar (FARE_SOURCE unless set_fare_source replaced it)."""
+    global _fare_source
+    if _fare_source is None:
+        factory = FARE_SOURCES.get(FARE_SOURCE)
+        if factory is None:
+            raise ValueError(f"Unknown FARE_SOURCE '{FARE_SOURCE}'. Use one of: {', '.join(FARE_SOURCES)}")
+        _fare_source = factory()
+    return _fare_source
+
+def set_fare_source(source: FareSource) -> Optional[FareSource]:
+    """
+    Price the fare calendar from another source, e.g. a supplier's per-date fare feed.
+
+    Cached calendars were priced by the previous source, so they are dropped.
+
+    Args:
+        source: The fare source to use.
+
+    Returns:
+        The previous fare source (None if none was created yet).
+    """
+    global _fare_source
+    previous, _fare_source = _fare_source, source
+    invalidate_search_cache("search_fare_calendar")
+    logger.info("Fare calendar source set to %s", source.name)
+    return previous
+
+class FareCalendar:
+    """Cheapest fare on each day of a date range for one route."""
+
+    __slots__ = ("start", "flights", "fares", "cheapest")
+
+    def __init__(self, flights: Sequence[FlightRecord], start: datetime.date, days: int,
+                 today: Optional[datetime.date] = None, source: Optional[FareSource] = None):
+        """
+        Args:
+            flights: The route's flights (non-empty).
+            start: First day of the calendar.
+            days: Number of days.
+            today: Booking date for the lead-time factor. Defaults to today.
+            source: Where the fares come from. Defaults to get_fare_source().
+        """
+        self.start = start
+        self.flights = tuple(flights)
+        fares = (source or get_fare_source()).route_fares(self.flights, start, days, today or datetime.date.today())
+        count = len(self.flights)
+        # fare * count + flight index, so one element-wise min also yields the cheapest flight
+        tagged = [
+            list(map(operator.add, map(count.__mul__, flight_fares), repeat(index)))
+            for index, flight_fares in enumerate(fares)
+        ]
+        cheapest_tagged = list(map(min, *tagged)) if count > 1 else tagged[0]
+        self.fares = array("q", map(operator.floordiv, cheapest_tagged, repeat(count)))
+        self.cheapest = array("l", map(operator.mod, cheapest_tagged, repeat(count)))
+
+    def __len__(self) -> int:
+        return len(self.fares)
+
+    def date(self, index: int) -> datetime.date:
+        return self.start + datetime.timedelta(days=index)
+
+    def cheapest_day(self) -> int:
+        """Index of the cheapest day (the earliest on a tie)."""
+        return min(range(len(self.fares)), key=self.fares.__getitem__)
+
+    def weeks(self) -> List[Tuple[int, int, int]]:
+        """(first index, last index, cheapest index) for each Monday-Sunday week in the range."""
+        weeks = []
+        first = 0
+        while first < len(self.fares):
+            last = min(len(self.fares), first + 7 - self.date(first).weekday()) - 1
+            cheapest = min(range(first, last + 1), key=self.fares.__getitem__)
+            weeks.append((first, last, cheapest))
+            first = last + 1
+        return weeks
+
+def sliding_window_minimum(values: Sequence[int], width: int) -> List[int]:
+    """Index of the minimum (earliest on a tie) of every window values[i:i + width]."""
+    window: deque = deque()
+    minimums = []
+    for index, value in enumerate(values):
+        while window and values[window[-1]] > value:
+            window.pop()
+        window.append(index)
+        if window[0] <= index - width:
+            window.popleft()
+        if index >= width - 1:
+            minimums.append(window[0])
+    return minimums
+
+def round_trips(outbound: FareCalendar, inbound: FareCalendar,
+                min_stay: int, max_stay: int) -> List[Tuple[int, int, int]]:
+    """
+    Cheapest return for each outbound day within a stay-length range.
+
+    Args:
+        outbound: Outbound calendar.
+        inbound: Return calendar starting min_stay days after outbound.start and
+            covering at least len(outbound) + max_stay - min_stay days.
+        min_stay: Minimum nights between outbound and return.
+        max_stay: Maximum nights between outbound and return.
+
+    Returns:
+        list: (outbound index, return index in inbound, total fare in paise) per outbound day.
+    """
+    width = max_stay - min_stay + 1
+    best_returns = sliding_window_minimum(inbound.fares[:len(outbound) + width - 1], width)
+    return [
+        (day, back, fare + inbound.fares[back])
+        for day, (fare, back) in enumerate(zip(outbound.fares, best_returns))
+    ]
@@ -1,5 +1,7 @@
 """Mock flight data for the travel agent application."""
 
+from inventory import build_flight_inventory
+
 # Mock flight database - Tourist cities across India
 FLIGHTS_DB = {
     # Metro cities
@@ -119,10 +121,9 @@ FLIGHTS_DB = {
     ],
 }
 
+# Parsed, typed view of FLIGHTS_DB used by the search tools
+FLIGHT_INVENTORY = build_flight_inventory(FLIGHTS_DB)
+
 def get_all_cities():
     """Returns a list of all cities in the flight database."""
-    cities = set()
-    for route in FLIGHTS_DB.keys():
-        cities.add(route[0])
-        cities.add(route[1])
-    return sorted(list(cities))
+    return list(FLIGHT_INVENTORY.cities)
@@ -1,16 +1,119 @@
 import datetime
-from typing import Optional
+from typing import Optional, List, Sequence
 import logging
 
-from google.adk.agents import Agent
-from .mock_data import HOTELS_DB, get_hotel_cities
+from inventory import (
+    HotelRecord, HotelCitySummary, PAISE_PER_RUPEE, amenity_key, get_backend, inventory_tool, parse_amenities,
+    resolve_city,
+)
+from cache_utils import cached_search, normalize_amenities, normalize_city, normalize_date, normalize_filter
+from agent_utils import lazy_agent
+from logging_utils import tool_metrics
+from response_utils import (
+    COMPACT_FORMAT_INSTRUCTION, CompactResponse, get_option_details, hotel_item, use_compact
+)
 from config import MODEL_NAME
 
 # Setup logger for hotel agent
 logger = logging.getLogger('travel_agent.hotel_agent')
 
+def find_hotels(city: str, max_price: Optional[int] = None, min_rating: Optional[int] = None,
+                amenities: Optional[Sequence[str]] = None) -> Optional[List[HotelRecord]]:
+    """Filters the typed hotel records for a city.
+
+    Args:
+        city (str): The city to search for hotels.
+        max_price (int, optional): Maximum price per night in rupees.
+        min_rating (int, optional): Minimum hotel rating (1-5 stars).
+        amenities (Sequence[str], optional): Amenities every returned hotel must offer.
+
+    Returns:
+        list: Matching hotel records sorted by rating (highest first) then price
+            (lowest first), or None if the city is not covered.
+    """
+    return get_backend().hotels(
+        resolve_city(city),
+        max_price_paise=max_price * PAISE_PER_RUPEE if max_price else None,
+        min_rating=min_rating or None,
+        amenities=parse_amenities(amenities) or None,
+    )
+
+def find_hotel_summary(city: str) -> Optional[HotelCitySummary]:
+    """Returns the precomputed hotel aggregates for a city, or None if it is not covered."""
+    return get_backend().hotel_summary(resolve_city(city))
+
+def hotel_search_response(city: str, hotels: Optional[List[HotelRecord]],
+                          checkin_date: Optional[str] = None, checkout_date: Optional[str] = None,
+                          max_price: Optional[int] = None, min_rating: Optional[int] = None,
+                          amenities: Optional[Sequence[str]] = None) -> dict:
+    """Builds the search_hotels response for a set of hotel records.
+
+    Args:
+        city (str): The city as given by the caller.
+        hotels (List[HotelRecord], optional): Records returned by find_hotels.
+        checkin_date (str, optional): Check-in date in YYYY-MM-DD format. Defaults to today.
+        checkout_date (str, optional): Check-out date in YYYY-MM-DD format. Defaults to tomorrow.
+        max_price (int, optional): The max_price filter that was applied.
+        min_rating (int, optional): The min_rating filter that was applied.
+        amenities (Sequence[str], optional): The amenities filter that was applied.
+
+    Returns:
+        dict: status and list of available hotels or error message.
+    """
+    if hotels is None:
+        available_cities = get_backend().hotel_cities()
+        return {
+            "status": "error",
+            "error_message": f"No hotels available in {city.title()}. Available cities: {', '.join([c.title() for c in available_cities])}"
+        }
+
+    if not hotels:
+        if amenities:
+            offered = get_backend().hotel_amenities(resolve_city(city)) or []
+            return {
+                "status": "error",
+                "error_message": f"No hotels found in {city.title()} matching your criteria. Amenities offered "
+                                 f"in {city.title()}: {', '.join(offered)}. Try adjusting your filters."
+            }
+        return {
+            "status": "error", 
+            "error_message": f"No hotels found in {city.title()} matching your criteria. Try adjusting your filters."
+        }
+
+    # Set default dates
+    if not checkin_date:
+        checkin_date = datetime.datetime.now().strftime("%Y-%m-%d")
+    if not checkout_date:
+        checkout_date = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+
+    response = {
+        "status": "success",
+        "city": city.title(),
+        "checkin_date": checkin_date,
+        "checkout_date": checkout_date,
+        "hotels_found": len(hotels),
+        "hotels": [hotel.to_dict() for hotel in hotels],
+        "filters_applied": {
+            "max_price": f"₹{max_price:,}" if max_price else "None",
+            "min_rating": f"{min_rating} stars" if min_rating else "None"
+        }
+    }
+    if amenities:
+        # Every hotel offers them all, so the first one has the catalog spelling
+        spelling = {amenity_key(amenity): amenity for amenity in hotels[0].amenities}
+        response["filters_applied"]["amenities"] = [spelling.get(amenity_key(a), a) for a in amenities]
+    return response
+
+@tool_metrics(label="city", results=("hotels",))
+@inventory_tool
+@cached_search("search_hotels", scopes=[("hotels", "city")], city=normalize_city,
+               checkin_date=normalize_date, checkout_date=normalize_date, max_price=normalize_filter,
+               min_rating=normalize_filter, amenities=normalize_amenities, compact=use_compact,
+               top_k=normalize_filter)
 def search_hotels(city: str, checkin_date: Optional[str] = None, checkout_date: Optional[str] = None, 
-                 max_price: Optional[int] = None, min_rating: Optional[int] = None) -> dict:
+                 max_price: Optional[int] = None, min_rating: Optional[int] = None,
+                 amenities: Optional[List[str]] = None,
+                 compact: Optional[bool] = None, top_k: Optional[int] = None) -> dict:
     """Searches for available hotels in a city with optional filters.
 
     Args:
@@ -19,96 +122,72 @@ def search_hotels(city: str, checkin_date: Optional[str] = None, checkout_date:
         checkout_date (str, optional): Check-out date in YYYY-MM-DD format. Defaults to tomorrow.
         max_price (int, optional): Maximum price per night in rupees. 
         min_rating (int, optional): Minimum hotel rating (1-5 stars).
+        amenities (List[str], optional): Amenities every hotel must offer, e.g. ["Pool", "Beach Access"].
+        compact (bool, optional): Return only the top hotels as rows of key fields, each
+            with an id for get_option_details. Defaults to config.COMPACT_TOOL_RESPONSES.
+        top_k (int, optional): Hotels to list in compact mode. Defaults to config.COMPACT_TOP_K.
 
     Returns:
         dict: status and list of available hotels or error message.
     """
-    logger.info(f"Searching hotels in {city}, filters: max_price={max_price}, min_rating={min_rating}")
+    logger.info("Searching hotels in %s, filters: max_price=%s, min_rating=%s, amenities=%s",
+                city, max_price, min_rating, amenities)
     
     try:
-        city_key = city.lower()
+        amenities = parse_amenities(amenities)
+        hotels = find_hotels(city, max_price, min_rating, amenities)
         
-        # Check if city exists in hotels database
-        if city_key not in HOTELS_DB:
-            available_cities = get_hotel_cities()
-            logger.warning(f"No hotels available in {city}. Available cities: {available_cities}")
-            return {
-                "status": "error",
-                "error_message": f"No hotels available in {city.title()}. Available cities: {', '.join([c.title() for c in available_cities])}"
-            }
+        if hotels is None:
+            logger.warning("No hotels available in %s. Available cities: %s", city, get_backend().hotel_cities())
+        elif not hotels:
+            logger.warning("No hotels found in %s matching criteria", city)
+        else:
+            logger.info("Hotel search completed for %s: %s hotels found", city, len(hotels))
         
-        # Set default dates
-        if not checkin_date:
-            checkin_date = datetime.datetime.now().strftime("%Y-%m-%d")
-        if not checkout_date:
-            checkout_date = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+        response = hotel_search_response(city, hotels, checkin_date, checkout_date, max_price, min_rating,
+                                         amenities)
+        if not use_compact(compact) or response["status"] != "success":
+            return response
         
-        # Get all hotels for the city
-        all_hotels = HOTELS_DB[city_key]
-        filtered_hotels = []
-        logger.info(f"Found {len(all_hotels)} total hotels in {city}, applying filters...")
-        
-        # Apply filters
-        for hotel in all_hotels:
-            # Price filter
-            if max_price:
-                hotel_price = int(hotel["price_per_night"].replace("₹", "").replace(",", ""))
-                if hotel_price > max_price:
-                    continue
-            
-            # Rating filter
-            if min_rating and hotel["rating"] < min_rating:
-                continue
-                
-            filtered_hotels.append(hotel)
-    
-        if not filtered_hotels:
-            logger.warning(f"No hotels found in {city} matching criteria")
-            return {
-                "status": "error", 
-                "error_message": f"No hotels found in {city.title()} matching your criteria. Try adjusting your filters."
-            }
-        
-        # Sort by rating (highest first), then by price (lowest first)
-        filtered_hotels.sort(key=lambda h: (-h["rating"], int(h["price_per_night"].replace("₹", "").replace(",", ""))))
-        
-        logger.info(f"Hotel search completed for {city}: {len(filtered_hotels)} hotels found")
-        
-        return {
-            "status": "success",
-            "city": city.title(),
-            "checkin_date": checkin_date,
-            "checkout_date": checkout_date,
-            "hotels_found": len(filtered_hotels),
-            "hotels": filtered_hotels,
-            "filters_applied": {
-                "max_price": f"₹{max_price:,}" if max_price else "None",
-                "min_rating": f"{min_rating} stars" if min_rating else "None"
-            }
-        }
+        compact_response = CompactResponse(top_k)
+        compact_response.add_options("hotels", "hotel", hotels, hotel_item)
+        return compact_response.build({key: response[key] for key in ("city", "checkin_date", "checkout_date")})
         
     except Exception as e:
-        logger.error(f"Error searching hotels in {city}: {str(e)}", exc_info=True)
+        logger.error("Error searching hotels in %s: %s", city, e, exc_info=True)
         return {
             "status": "error",
             "error_message": f"Error searching hotels: {str(e)}"
         }
 
-hotel_agent = Agent(
-    name="hotel_booking_agent",
-    model=MODEL_NAME,
-    description=(
-        "Hotel booking agent that can search for accommodations across tourist cities in India."
-    ),
-    instruction=(
-        "You are a helpful hotel booking agent who specializes in finding accommodations. "
-        "When users ask about hotels, show them available accommodations with ratings, prices, "
-        "amenities, and locations. You can apply filters like price range and minimum rating. "
-        "Provide detailed information about hotel amenities, locations, and help users choose "
-        "the best option based on their preferences and budget. Always be helpful and informative."
-    ),
-    tools=[search_hotels],
-)
+def build_hotel_agent(model=None):
+    """Builds the hotel booking agent. Imports google.adk on first call.
+
+    Args:
+        model: Model name or ADK BaseLlm instance (e.g. a stub for load tests).
+            Defaults to config.MODEL_NAME.
+    """
+    from google.adk.agents import Agent
+    from llm_cache import agent_callbacks
+
+    return Agent(
+        name="hotel_booking_agent",
+        model=model or MODEL_NAME,
+        description=(
+            "Hotel booking agent that can search for accommodations across tourist cities in India."
+        ),
+        instruction=(
+            "You are a helpful hotel booking agent who specializes in finding accommodations. "
+            "When users ask about hotels, show them available accommodations with ratings, prices, "
+            "amenities, and locations. You can apply filters like price range, minimum rating and "
+            "required amenities (e.g. pool, spa, beach access). "
+            "Provide detailed information about hotel amenities, locations, and help users choose "
+            "the best option based on their preferences and budget. Always be helpful and informative. "
+            + COMPACT_FORMAT_INSTRUCTION
+        ),
+        tools=[search_hotels, get_option_details],
+        **agent_callbacks(),
+    )
 
-# Export as root_agent for Google ADK compatibility
-root_agent = hotel_agent
+# hotel_agent and root_agent (for Google ADK compatibility) are built on first access
+__getattr__ = lazy_agent(globals(), build_hotel_agent, ("hotel_agent", "root_agent"))
@@ -1,5 +1,7 @@
 """Mock hotel data for the travel agent application."""
 
+from inventory import build_hotel_inventory
+
 # Mock hotel database - Tourist cities across India
 HOTELS_DB = {
     "delhi": [
@@ -58,6 +60,9 @@ HOTELS_DB = {
     ],
 }
 
+# Parsed, typed view of HOTELS_DB used by the search tools
+HOTEL_INVENTORY = build_hotel_inventory(HOTELS_DB)
+
 def get_hotel_cities():
     """Returns a list of all cities with available hotels."""
-    return sorted(list(HOTELS_DB.keys()))
\ No newline at end of file
+    return list(HOTEL_INVENTORY.cities)
@@ -0,0 +1,50 @@
+from .records import (
+    FlightRecord,
+    HotelRecord,
+    ActivityRecord,
+    HotelCitySummary,
+    ActivityCitySummary,
+    FlightInventory,
+    HotelInventory,
+    ActivityInventory,
+    build_flight_inventory,
+    build_hotel_inventory,
+    build_activity_inventory,
+    parse_price,
+    format_price,
+    format_clock,
+    format_duration,
+    amenity_key,
+    parse_amenities,
+    catalog_digest,
+    record_state,
+    PAISE_PER_RUPEE,
+)
+from .backends import InventoryBackend, MemoryBackend, SQLiteBackend
+from .snapshot import SnapshotBackend, SnapshotError, build_snapshot
+from .datafiles import load_inventory_data, read_data_files, write_data_files
+from .store import (
+    GeneratorPin, bind_backend, create_backend, get_backend, inventory_tool, pinned_backend, retire_backend,
+    set_backend,
+)
+from .reload import InventoryWatcher, register_index_builder, reload_inventory, start_inventory_watcher
+from .deltas import CatalogChanges, DeltaBackend, apply_deltas, register_index_updater
+from .cities import CityMatch, CityResolver, get_city_resolver, resolve_city
+
+__all__ = [
+    'FlightRecord', 'HotelRecord', 'ActivityRecord',
+    'HotelCitySummary', 'ActivityCitySummary',
+    'FlightInventory', 'HotelInventory', 'ActivityInventory',
+    'build_flight_inventory', 'build_hotel_inventory', 'build_activity_inventory',
+    'parse_price', 'format_price', 'format_clock', 'format_duration',
+    'amenity_key', 'parse_amenities', 'catalog_digest', 'record_state',
+    'PAISE_PER_RUPEE',
+    'InventoryBackend', 'MemoryBackend', 'SQLiteBackend',
+    'SnapshotBackend', 'SnapshotError', 'build_snapshot',
+    'load_inventory_data', 'read_data_files', 'write_data_files',
+    'GeneratorPin', 'bind_backend', 'create_backend', 'get_backend', 'inventory_tool', 'pinned_backend',
+    'retire_backend', 'set_backend',
+    'InventoryWatcher', 'register_index_builder', 'reload_inventory', 'start_inventory_watcher',
+    'CatalogChanges', 'DeltaBackend', 'apply_deltas', 'register_index_updater',
+    'CityMatch', 'CityResolver', 'get_city_resolver', 'resolve_city',
+]
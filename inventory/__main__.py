@@ -0,0 +1,57 @@
+"""
+Inventory maintenance commands.
+
+    python -m inventory snapshot [PATH] [--data DIR]    Compile the catalog into a snapshot file
+    python -m inventory export [DIR]                    Write the mock data as data files
+
+The snapshot is compiled from the data files in INVENTORY_DATA_DIR (or
+--data), or from the mock data when there are none. Running workers pick up
+a new snapshot file without a restart (see inventory.reload).
+"""
+
+import argparse
+import os
+from typing import Optional
+
+def build_catalog_snapshot(path: str, data_dir: Optional[str] = None):
+    """Compile the catalog's flight, hotel and activity databases into a snapshot at path."""
+    from .datafiles import load_inventory_data
+    from .snapshot import build_snapshot
+
+    header = build_snapshot(path, *load_inventory_data(data_dir))
+    counts = ", ".join(f"{count} {name}" for name, count in header["counts"].items())
+    print(f"Wrote {path}: catalog {header['catalog_version']} ({counts}, {os.path.getsize(path):,} bytes)")
+
+def export_mock_data(directory: str):
+    """Write the mock flight, hotel and activity databases as data files in directory."""
+    from flight_agent.mock_data import FLIGHTS_DB
+    from hotel_agent.mock_data import HOTELS_DB
+    from activities_agent.mock_data import ACTIVITIES_DB
+    from .datafiles import DATA_FILES, write_data_files
+
+    write_data_files(directory, FLIGHTS_DB, HOTELS_DB, ACTIVITIES_DB)
+    print(f"Wrote {', '.join(os.path.join(directory, name) for name in DATA_FILES)}")
+
+def main():
+    from config import INVENTORY_DATA_DIR, INVENTORY_SNAPSHOT_PATH
+
+    parser = argparse.ArgumentParser(prog="python -m inventory", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    snapshot = commands.add_parser("snapshot", help="compile the catalog into a snapshot file")
+    snapshot.add_argument("path", nargs="?", default=INVENTORY_SNAPSHOT_PATH,
+                          help=f"output file (default: {INVENTORY_SNAPSHOT_PATH})")
+    snapshot.add_argument("--data", default=INVENTORY_DATA_DIR,
+                          help=f"data file directory (default: {INVENTORY_DATA_DIR}; mock data if it has none)")
+    export = commands.add_parser("export", help="write the mock data as data files")
+    export.add_argument("directory", nargs="?", default=INVENTORY_DATA_DIR,
+                        help=f"output directory (default: {INVENTORY_DATA_DIR})")
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        build_catalog_snapshot(args.path, args.data)
+    elif args.command == "export":
+        export_mock_data(args.directory)
+
+if __name__ == "__main__":
+    main()
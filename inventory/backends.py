@@ -0,0 +1,584 @@
+"""
+Pluggable storage backends for the travel inventory.
+
+The search tools never touch the mock dicts directly; they ask the active
+backend (see inventory.store) for typed records with the filters and
+ordering already applied:
+
+- MemoryBackend serves the pre-parsed, pre-sorted in-process inventories.
+- SQLiteBackend keeps the catalog in a local SQLite file and pushes filters
+  and sorting into indexed SQL, so a worker only holds the rows a query returns.
+
+Both return the same records in the same order for the same data.
+"""
+
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .records import (
+    FlightRecord,
+    HotelRecord,
+    ActivityRecord,
+    HotelCitySummary,
+    ActivityCitySummary,
+    FlightInventory,
+    HotelInventory,
+    ActivityInventory,
+    amenity_mask,
+    assign_amenity_bits,
+    build_activity_inventory,
+    build_flight_inventory,
+    build_hotel_inventory,
+    catalog_digest,
+    parse_clock,
+    parse_duration,
+    parse_price,
+)
+
+class InventoryBackend(ABC):
+    """Read interface used by the search tools.
+
+    City arguments are lower-cased keys. Price filters are in paise; a None
+    filter is not applied. Lookups for a city or route that is not covered
+    return None, while a covered city with no matches returns an empty list.
+    """
+
+    name = "abstract"
+    # Content hash of the catalog served (see records.catalog_digest), or None if unknown
+    catalog_version: Optional[str] = None
+
+    # Flights
+
+    @abstractmethod
+    def flights(self, source: str, destination: str) -> Optional[Sequence[FlightRecord]]:
+        """Flights on a route in schedule order, or None if the route is not served."""
+
+    def serves_route(self, source: str, destination: str) -> bool:
+        """Whether a route has flights, without loading them."""
+        return self.flights(source, destination) is not None
+
+    @abstractmethod
+    def flight_cities(self) -> List[str]:
+        """All cities with at least one flight, sorted."""
+
+    @abstractmethod
+    def flight_inventory(self) -> FlightInventory:
+        """The whole route network, for connection search which needs every route in memory."""
+
+    # Hotels
+
+    @abstractmethod
+    def hotels(self, city: str, max_price_paise: Optional[int] = None, min_rating: Optional[int] = None,
+               amenities: Optional[Sequence[str]] = None) -> Optional[List[HotelRecord]]:
+        """Hotels in a city matching the filters, by rating (highest first) then price (lowest first).
+
+        A hotel matches an amenity filter when it offers every listed amenity
+        (compared by amenity_key).
+        """
+
+    @abstractmethod
+    def hotel_amenities(self, city: str) -> Optional[List[str]]:
+        """Amenities offered by any hotel in a city, sorted, or None if the city is not covered."""
+
+    @abstractmethod
+    def hotel_summary(self, city: str) -> Optional[HotelCitySummary]:
+        """Hotel aggregates for a city, or None if the city is not covered."""
+
+    @abstractmethod
+    def hotel_cities(self) -> List[str]:
+        """All cities with hotels, sorted."""
+
+    # Activities
+
+    @abstractmethod
+    def activities(self, city: str, min_rating: Optional[float] = None,
+                   max_price_paise: Optional[int] = None) -> Optional[List[ActivityRecord]]:
+        """Activities in a city matching the filters, by rating (highest first)."""
+
+    @abstractmethod
+    def activity_summary(self, city: str) -> Optional[ActivityCitySummary]:
+        """Activity aggregates for a city, or None if the city is not covered."""
+
+    @abstractmethod
+    def activity_cities(self) -> List[str]:
+        """All cities with activities, sorted."""
+
+    @abstractmethod
+    def activity_categories(self) -> List[str]:
+        """All activity categories, sorted."""
+
+    @abstractmethod
+    def all_activities(self) -> Dict[str, Sequence[ActivityRecord]]:
+        """Every city's activities by rating, cities in catalog order."""
+
+    @abstractmethod
+    def activity_category(self, category: str) -> Optional[str]:
+        """The catalog spelling of a category (case-insensitive), or None if no activity has it."""
+
+    @abstractmethod
+    def activities_by_category(self, category: str, min_rating: Optional[float] = None,
+                               top_k: Optional[int] = None) -> Dict[str, Sequence[ActivityRecord]]:
+        """Activities in a category (case-insensitive) by rating, per city in catalog order.
+
+        Args:
+            category: Category name in any case.
+            min_rating: Leave out activities rated below this.
+            top_k: Keep at most this many of each city's highest-rated activities.
+
+        Cities without a matching activity are left out.
+        """
+
+    def activity_city_order(self) -> List[str]:
+        """Cities with activities in catalog order (the city order of all_activities)."""
+        return list(self.all_activities())
+
+    @property
+    def root(self) -> "InventoryBackend":
+        """The backend holding this one's resources: itself, or the catalog a DeltaBackend is layered on."""
+        return self
+
+    def cache_scope(self, scope: Tuple[str, ...]) -> Tuple[str, ...]:
+        """
+        The part of the catalog a cached search response over scope is computed from.
+
+        Scopes are ("route", source, destination), ("hotels", city),
+        ("activities", city) and ("catalog",). A ("flights", source,
+        destination) scope is a route's flight search: the route if it is
+        served, otherwise the whole network, which its connections come from.
+        """
+        if scope[0] == "flights":
+            if self.serves_route(*scope[1:]):
+                return ("route",) + scope[1:]
+            return ("network",)
+        return scope
+
+    def scope_version(self, scope: Tuple[str, ...]) -> Optional[str]:
+        """Version of the part of the catalog a scope covers (see cache_scope); changes when that part does."""
+        return self.catalog_version
+
+    def build_indexes(self):
+        """Build any lookup structures the backend would otherwise build on its first query."""
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+class MemoryBackend(InventoryBackend):
+    """Backend over the in-process inventories built from the mock databases."""
+
+    name = "memory"
+
+    def __init__(self, flights: FlightInventory, hotels: HotelInventory, activities: ActivityInventory,
+                 catalog_version: Optional[str] = None):
+        self._flights = flights
+        self._hotels = hotels
+        self._activities = activities
+        self.catalog_version = catalog_version
+
+    @classmethod
+    def from_databases(cls, flights_db: Dict[Tuple[str, str], List[dict]], hotels_db: Dict[str, List[dict]],
+                       activities_db: Dict[str, List[dict]]) -> "MemoryBackend":
+        """Parse mock-database-shaped dicts into a new backend versioned by their content hash."""
+        return cls(build_flight_inventory(flights_db), build_hotel_inventory(hotels_db),
+                   build_activity_inventory(activities_db), catalog_digest(flights_db, hotels_db, activities_db))
+
+    def flights(self, source, destination):
+        return self._flights.flights_for(source, destination)
+
+    def serves_route(self, source, destination):
+        return (source, destination) in self._flights.routes
+
+    def flight_cities(self):
+        return list(self._flights.cities)
+
+    def flight_inventory(self):
+        return self._flights
+
+    def hotels(self, city, max_price_paise=None, min_rating=None, amenities=None):
+        if amenities:
+            all_hotels = self._hotels.hotels_with(city, amenities)
+        else:
+            all_hotels = self._hotels.hotels_in(city)
+        if all_hotels is None:
+            return None
+        return [
+            hotel for hotel in all_hotels
+            if (max_price_paise is None or hotel.price_paise <= max_price_paise)
+            and (min_rating is None or hotel.rating >= min_rating)
+        ]
+
+    def hotel_amenities(self, city):
+        hotels = self._hotels.hotels_in(city)
+        if hotels is None:
+            return None
+        return sorted({amenity for hotel in hotels for amenity in hotel.amenities})
+
+    def hotel_summary(self, city):
+        return self._hotels.summaries.get(city)
+
+    def hotel_cities(self):
+        return list(self._hotels.cities)
+
+    def activities(self, city, min_rating=None, max_price_paise=None):
+        all_activities = self._activities.activities_in(city)
+        if all_activities is None:
+            return None
+        return [
+            activity for activity in all_activities
+            if (min_rating is None or activity.rating >= min_rating)
+            and (max_price_paise is None or activity.price_paise <= max_price_paise)
+        ]
+
+    def activity_summary(self, city):
+        return self._activities.summaries.get(city)
+
+    def activity_cities(self):
+        return list(self._activities.cities)
+
+    def activity_categories(self):
+        return list(self._activities.categories)
+
+    def all_activities(self):
+        return dict(self._activities.by_city)
+
+    def activity_city_order(self):
+        return list(self._activities.by_city)
+
+    def activity_category(self, category):
+        return self._activities.category_names.get(category.lower())
+
+    def activities_by_category(self, category, min_rating=None, top_k=None):
+        return self._activities.activities_by_category(category, min_rating, top_k)
+
+# ---------------------------------------------------------------------------
+# SQLite
+# ---------------------------------------------------------------------------
+
+# Amenity lists are stored as one column joined with the ASCII unit separator
+AMENITY_SEPARATOR = "\x1f"
+# Bits of the amenity_mask column (a signed 64-bit INTEGER); rarer amenities are checked in Python
+SQL_AMENITY_BITS = 63
+# PRAGMA user_version of the current schema; older databases are repopulated
+SCHEMA_VERSION = 3
+
+_TABLES = """
+CREATE TABLE flights (
+    seq INTEGER PRIMARY KEY,
+    flight_number TEXT NOT NULL,
+    airline TEXT NOT NULL,
+    source TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    departure_minutes INTEGER NOT NULL,
+    arrival_minutes INTEGER NOT NULL,
+    price_paise INTEGER NOT NULL
+);
+CREATE TABLE hotels (
+    seq INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    city TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    price_paise INTEGER NOT NULL,
+    amenities TEXT NOT NULL,
+    location TEXT NOT NULL,
+    amenity_mask INTEGER NOT NULL
+);
+CREATE TABLE activities (
+    seq INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    city TEXT NOT NULL,
+    category TEXT NOT NULL,
+    duration_minutes INTEGER NOT NULL,
+    price_paise INTEGER NOT NULL,
+    rating REAL NOT NULL,
+    description TEXT NOT NULL,
+    city_position INTEGER NOT NULL
+);
+-- Sorted lookup lists: flight/hotel/activity cities and activity categories;
+-- for amenities, position is the amenity key's bit in hotels.amenity_mask;
+-- the one 'catalog' row holds the catalog version
+CREATE TABLE cities (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (kind, name)
+) WITHOUT ROWID;
+"""
+
+# Created after the bulk insert; each matches the ORDER BY of the query it
+# serves so SQLite walks the index instead of sorting.
+_INDEXES = """
+CREATE INDEX flights_route ON flights (source, destination, seq);
+CREATE INDEX hotels_city_rating ON hotels (city, rating DESC, price_paise, seq);
+CREATE INDEX hotels_city_price ON hotels (city, price_paise);
+CREATE INDEX activities_city_rating ON activities (city, rating DESC, seq);
+CREATE INDEX activities_city_price ON activities (city, price_paise);
+CREATE INDEX activities_catalog ON activities (city_position, rating DESC, seq);
+CREATE INDEX activities_category ON activities (category COLLATE NOCASE, city_position, rating DESC, seq);
+ANALYZE;
+"""
+
+_FLIGHT_COLUMNS = "flight_number, airline, source, destination, departure_minutes, arrival_minutes, price_paise"
+_HOTEL_COLUMNS = "name, city, rating, price_paise, amenities, location"
+_ACTIVITY_COLUMNS = "name, city, category, duration_minutes, price_paise, rating, description"
+
+def _hotel_record(row: tuple) -> HotelRecord:
+    name, city, rating, price_paise, amenities, location = row
+    return HotelRecord(name, city, rating, price_paise,
+                       tuple(amenities.split(AMENITY_SEPARATOR)) if amenities else (), location)
+
+class SQLiteBackend(InventoryBackend):
+    """Backend over a local SQLite database.
+
+    Each thread gets its own connection, so the planner's fan-out threads can
+    query concurrently. Populate the database once with load().
+
+    Args:
+        path: Database file path.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._amenity_bits: Optional[Dict[str, int]] = None
+        self._catalog_version: Optional[str] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        return self._connection().execute(sql, tuple(params)).fetchall()
+
+    def _has_city(self, kind: str, city: str) -> bool:
+        return bool(self._query("SELECT 1 FROM cities WHERE kind = ? AND name = ?", (kind, city)))
+
+    def _cities(self, kind: str) -> List[str]:
+        return [name for (name,) in self._query("SELECT name FROM cities WHERE kind = ? ORDER BY name", (kind,))]
+
+    def _amenity_bit_map(self) -> Dict[str, int]:
+        if self._amenity_bits is None:
+            self._amenity_bits = dict(self._query("SELECT name, position FROM cities WHERE kind = 'amenity'"))
+        return self._amenity_bits
+
+    @property
+    def catalog_version(self) -> Optional[str]:
+        if self._catalog_version is None:
+            rows = self._query("SELECT name FROM cities WHERE kind = 'catalog'")
+            self._catalog_version = rows[0][0] if rows else None
+        return self._catalog_version
+
+    def build_indexes(self):
+        self._amenity_bit_map()
+
+    def is_loaded(self) -> bool:
+        """Whether the database already holds an inventory in the current schema."""
+        return self._query("PRAGMA user_version")[0][0] == SCHEMA_VERSION
+
+    def load(self, flights_db: Dict[Tuple[str, str], List[dict]],
+             hotels_db: Dict[str, List[dict]],
+             activities_db: Dict[str, List[dict]]):
+        """Replace the stored inventory with mock-database-shaped dicts.
+
+        Args:
+            flights_db: FLIGHTS_DB-shaped dict.
+            hotels_db: HOTELS_DB-shaped dict.
+            activities_db: ACTIVITIES_DB-shaped dict.
+        """
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode = WAL")
+        amenity_bits = assign_amenity_bits(
+            hotel["amenities"] for hotels in hotels_db.values() for hotel in hotels
+        )
+        sql_mask = (1 << SQL_AMENITY_BITS) - 1
+        with connection:
+            for table in ("flights", "hotels", "activities", "cities"):
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+            connection.executescript(_TABLES)
+            connection.executemany(
+                f"INSERT INTO flights ({_FLIGHT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (flight["flight_number"], flight["airline"], source, destination,
+                     parse_clock(flight["departure"]), parse_clock(flight["arrival"]),
+                     parse_price(flight["price"]))
+                    for (source, destination), flights in flights_db.items()
+                    for flight in flights
+                ),
+            )
+            connection.executemany(
+                f"INSERT INTO hotels ({_HOTEL_COLUMNS}, amenity_mask) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (hotel["name"], city, hotel["rating"], parse_price(hotel["price_per_night"]),
+                     AMENITY_SEPARATOR.join(hotel["amenities"]), hotel["location"],
+                     amenity_mask(amenity_bits, hotel["amenities"]) & sql_mask)
+                    for city, hotels in hotels_db.items()
+                    for hotel in hotels
+                ),
+            )
+            connection.executemany(
+                f"INSERT INTO activities ({_ACTIVITY_COLUMNS}, city_position) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (activity["name"], city, activity["category"], parse_duration(activity["duration"]),
+                     parse_price(activity["price"]), activity["rating"], activity["description"], position)
+                    for position, (city, activities) in enumerate(activities_db.items())
+                    for activity in activities
+                ),
+            )
+            flight_cities = sorted({city for route in flights_db for city in route})
+            categories = sorted({a["category"] for activities in activities_db.values() for a in activities})
+            connection.executemany(
+                "INSERT INTO cities (kind, name, position) VALUES (?, ?, ?)",
+                [("flight", city, position) for position, city in enumerate(flight_cities)]
+                + [("hotel", city, position) for position, city in enumerate(hotels_db)]
+                + [("activity", city, position) for position, city in enumerate(activities_db)]
+                + [("category", category, position) for position, category in enumerate(categories)]
+                + [("amenity", key, bit) for key, bit in amenity_bits.items()]
+                + [("catalog", catalog_digest(flights_db, hotels_db, activities_db), 0)],
+            )
+            connection.executescript(_INDEXES)
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._amenity_bits = None
+        self._catalog_version = None
+
+    # Flights
+
+    def flights(self, source, destination):
+        rows = self._query(
+            f"SELECT {_FLIGHT_COLUMNS} FROM flights WHERE source = ? AND destination = ? ORDER BY seq",
+            (source, destination),
+        )
+        if not rows:
+            return None
+        return tuple(FlightRecord(*row) for row in rows)
+
+    def serves_route(self, source, destination):
+        return bool(self._query("SELECT 1 FROM flights WHERE source = ? AND destination = ? LIMIT 1",
+                                (source, destination)))
+
+    def flight_cities(self):
+        return self._cities("flight")
+
+    def flight_inventory(self):
+        routes: Dict[Tuple[str, str], List[FlightRecord]] = {}
+        for row in self._query(f"SELECT {_FLIGHT_COLUMNS} FROM flights ORDER BY seq"):
+            flight = FlightRecord(*row)
+            routes.setdefault((flight.source, flight.destination), []).append(flight)
+        return FlightInventory({route: tuple(flights) for route, flights in routes.items()})
+
+    # Hotels
+
+    def hotels(self, city, max_price_paise=None, min_rating=None, amenities=None):
+        sql = f"SELECT {_HOTEL_COLUMNS} FROM hotels WHERE city = ?"
+        params = [city]
+        required = 0
+        if amenities:
+            required = amenity_mask(self._amenity_bit_map(), amenities)
+            if required is None:
+                return [] if self._has_city("hotel", city) else None
+            sql_required = required & ((1 << SQL_AMENITY_BITS) - 1)
+            if sql_required:
+                sql += " AND amenity_mask & ? = ?"
+                params += [sql_required, sql_required]
+        if max_price_paise is not None:
+            sql += " AND price_paise <= ?"
+            params.append(max_price_paise)
+        if min_rating is not None:
+            sql += " AND rating >= ?"
+            params.append(min_rating)
+        rows = self._query(sql + " ORDER BY rating DESC, price_paise, seq", params)
+        if not rows and not self._has_city("hotel", city):
+            return None
+        hotels = [_hotel_record(row) for row in rows]
+        if required >> SQL_AMENITY_BITS:
+            bits = self._amenity_bit_map()
+            hotels = [hotel for hotel in hotels if amenity_mask(bits, hotel.amenities) & required == required]
+        return hotels
+
+    def hotel_amenities(self, city):
+        rows = self._query("SELECT DISTINCT amenities FROM hotels WHERE city = ?", (city,))
+        if not rows and not self._has_city("hotel", city):
+            return None
+        return sorted({amenity for (amenities,) in rows if amenities for amenity in amenities.split(AMENITY_SEPARATOR)})
+
+    def hotel_summary(self, city):
+        total, price_sum, luxury = self._query(
+            "SELECT COUNT(*), SUM(price_paise), SUM(rating >= 4) FROM hotels WHERE city = ?", (city,)
+        )[0]
+        if not total:
+            return HotelCitySummary(()) if self._has_city("hotel", city) else None
+        return HotelCitySummary.from_totals(total, price_sum // total, luxury)
+
+    def hotel_cities(self):
+        return self._cities("hotel")
+
+    # Activities
+
+    def activities(self, city, min_rating=None, max_price_paise=None):
+        sql = f"SELECT {_ACTIVITY_COLUMNS} FROM activities WHERE city = ?"
+        params = [city]
+        if min_rating is not None:
+            sql += " AND rating >= ?"
+            params.append(min_rating)
+        if max_price_paise is not None:
+            sql += " AND price_paise <= ?"
+            params.append(max_price_paise)
+        rows = self._query(sql + " ORDER BY rating DESC, seq", params)
+        if not rows and not self._has_city("activity", city):
+            return None
+        return [ActivityRecord(*row) for row in rows]
+
+    def activity_summary(self, city):
+        activities = self.activities(city)
+        # Categories are listed in rating order, so aggregate over the sorted rows
+        return ActivityCitySummary(tuple(activities)) if activities is not None else None
+
+    def activity_cities(self):
+        return self._cities("activity")
+
+    def activity_categories(self):
+        return self._cities("category")
+
+    def all_activities(self):
+        by_city: Dict[str, List[ActivityRecord]] = {}
+        for row in self._query(
+                f"SELECT {_ACTIVITY_COLUMNS} FROM activities ORDER BY city_position, rating DESC, seq"):
+            by_city.setdefault(row[1], []).append(ActivityRecord(*row))
+        return by_city
+
+    def activity_city_order(self):
+        return [city for (city,) in self._query(
+            "SELECT city FROM activities GROUP BY city_position ORDER BY city_position")]
+
+    def activity_category(self, category):
+        rows = self._query("SELECT name FROM cities WHERE kind = 'category' AND name = ? COLLATE NOCASE "
+                           "ORDER BY name LIMIT 1", (category,))
+        return rows[0][0] if rows else None
+
+    def activities_by_category(self, category, min_rating=None, top_k=None):
+        sql = f"SELECT {_ACTIVITY_COLUMNS} FROM activities WHERE category = ? COLLATE NOCASE"
+        params = [category]
+        if min_rating is not None:
+            sql += " AND rating >= ?"
+            params.append(min_rating)
+        by_city: Dict[str, List[ActivityRecord]] = {}
+        for row in self._query(sql + " ORDER BY city_position, rating DESC, seq", params):
+            activities = by_city.setdefault(row[1], [])
+            if top_k is None or len(activities) < top_k:
+                activities.append(ActivityRecord(*row))
+        return {city: activities for city, activities in by_city.items() if activities}
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
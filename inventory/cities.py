@@ -0,0 +1,390 @@
+"""
+City name resolution for the search tools.
+
+Users and the model name cities in many ways: "Bengaluru", "New Delhi",
+"Srinagar" or "Gulmarg" for Kashmir, or a typo like "Udaypur". The inventory
+is keyed by one lower-cased name per city, so CityResolver maps a name to that
+key in stages:
+
+1. exact: the city key itself;
+2. alias: CITY_ALIASES, plus hotel locations ("Koramangala", "Gulmarg");
+   a location found in several cities, or made only of generic words
+   ("Old City", "Airport Road"), is left out;
+3. prefix: the one city whose key or alias starts with the name, for names
+   of at least CITY_PREFIX_MIN_CHARS characters;
+4. fuzzy: the most similar name by trigram Dice similarity, if it is at least
+   CITY_FUZZY_MIN_SIMILARITY (CITY_FUZZY_LOCATION_MIN_SIMILARITY for hotel
+   locations, so "Lake" does not find "Dal Lake").
+
+The index is built once per backend (by a reload, before the backend goes
+live). Exact and alias matches are a single dict lookup. Prefix matching is
+a binary search over the sorted names.
+Fuzzy matching uses an inverted trigram index whose posting lists are
+ordered by name length. The query's lists are counted for names within one
+trigram of its length first, then for the other lengths that could reach
+the minimum similarity, rarest first, up to CITY_FUZZY_MAX_POSTINGS entries
+in all; only the CITY_FUZZY_MAX_CANDIDATES names seen most often are
+scored. A lookup therefore costs the same however many names are indexed.
+A typo changes only a few trigrams and the length by at most one, so this
+nearly always finds the name scoring every name would.
+"""
+
+import bisect
+import logging
+import math
+import re
+import weakref
+from collections import Counter
+from itertools import chain
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .backends import InventoryBackend
+from .deltas import CatalogChanges, register_index_updater
+from .reload import register_index_builder
+from .store import get_backend
+from logging_utils import METRICS
+from config import (
+    CITY_FUZZY_LOCATION_MIN_SIMILARITY, CITY_FUZZY_MAX_CANDIDATES, CITY_FUZZY_MAX_POSTINGS, CITY_FUZZY_MIN_SIMILARITY,
+    CITY_PREFIX_MIN_CHARS,
+)
+
+logger = logging.getLogger('travel_agent.inventory')
+
+# Alternative names -> city key; entries for cities the backend does not cover are ignored
+CITY_ALIASES = {
+    "new delhi": "delhi",
+    "delhi ncr": "delhi",
+    "bombay": "mumbai",
+    "bengaluru": "bangalore",
+    "bangaluru": "bangalore",
+    "panaji": "goa",
+    "panjim": "goa",
+    "north goa": "goa",
+    "south goa": "goa",
+    "pink city": "jaipur",
+    "city of lakes": "udaipur",
+    "kullu": "manali",
+    "kochi": "kerala",
+    "cochin": "kerala",
+    "trivandrum": "kerala",
+    "thiruvananthapuram": "kerala",
+    "alleppey": "kerala",
+    "alappuzha": "kerala",
+    "srinagar": "kashmir",
+    "jammu and kashmir": "kashmir",
+}
+
+# Hotel locations made only of these words name no particular place ("Old City", "Airport Road")
+GENERIC_LOCATION_WORDS = frozenset({
+    "airport", "area", "bay", "beach", "bridge", "central", "centre", "city", "colony", "cross", "drive", "east",
+    "fort", "gate", "hill", "hills", "lake", "lane", "main", "market", "marg", "new", "north", "old", "palace",
+    "park", "place", "point", "road", "sector", "south", "square", "station", "street", "town", "valley", "west",
+})
+
+MATCH_TYPES = ("exact", "alias", "prefix", "fuzzy")
+
+CITY_RESOLUTIONS = METRICS.counter(
+    "travel_agent_city_resolutions_total", "City name lookups by how they matched (or none).", ("match",))
+
+_NON_ALPHANUMERIC = re.compile(r"[\W_]+")
+
+def normalize_city_name(name: str) -> str:
+    """Case-fold, keep the part before any comma ("Udaipur, Rajasthan") and reduce punctuation to single spaces."""
+    return _NON_ALPHANUMERIC.sub(" ", name.split(",", 1)[0].casefold()).strip()
+
+def trigrams(name: str) -> Set[str]:
+    """Character trigrams of a normalized name, padded so the start and end count."""
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class CityMatch:
+    """A resolved city name."""
+
+    __slots__ = ("city", "match", "similarity")
+
+    def __init__(self, city: str, match: str, similarity: float = 1.0):
+        self.city = city
+        self.match = match  # one of MATCH_TYPES
+        self.similarity = similarity
+
+    def __repr__(self) -> str:
+        return f"CityMatch({self.city!r}, {self.match}, {self.similarity:.2f})"
+
+class CityResolver:
+    """Index of city keys, aliases and locations for resolving free-form city names."""
+
+    def __init__(self, cities: Iterable[str], aliases: Optional[Dict[str, str]] = None,
+                 locations: Iterable[Tuple[str, str]] = ()):
+        """
+        Args:
+            cities: The inventory's city keys.
+            aliases: Alternative name -> city key; entries for unknown cities are ignored.
+            locations: (location name, city key) pairs, e.g. hotel locations.
+        """
+        self._cities: Dict[str, str] = {normalize_city_name(city): city for city in cities}
+
+        self._aliases: Dict[str, str] = {}
+        location_cities: Dict[str, Set[str]] = {}
+        for location, city in locations:
+            location_cities.setdefault(normalize_city_name(location), set()).add(city)
+        for location, owners in location_cities.items():
+            if len(owners) == 1 and not GENERIC_LOCATION_WORDS.issuperset(location.split()):
+                self._aliases[location] = next(iter(owners))
+        locations_indexed = set(self._aliases)
+        known = set(self._cities.values())
+        table_aliases = {normalize_city_name(alias): city for alias, city in (aliases or {}).items() if city in known}
+        self._aliases.update(table_aliases)
+        for name in self._cities:
+            self._aliases.pop(name, None)
+        locations_indexed.difference_update(table_aliases)
+
+        # Prefix search covers city keys and the alias table, not locations
+        prefix_entries = sorted({**table_aliases, **self._cities}.items())
+        self._prefix_names = [name for name, _ in prefix_entries]
+        self._prefix_cities = [city for _, city in prefix_entries]
+
+        # Fuzzy search covers every name
+        self._names: List[str] = []
+        self._name_cities: List[str] = []
+        self._name_trigrams: List[Set[str]] = []
+        self._name_minimums: List[float] = []
+        for name, city in list(self._cities.items()) + list(self._aliases.items()):
+            self._names.append(name)
+            self._name_cities.append(city)
+            self._name_trigrams.append(trigrams(name))
+            self._name_minimums.append(
+                CITY_FUZZY_LOCATION_MIN_SIMILARITY if name in locations_indexed else CITY_FUZZY_MIN_SIMILARITY)
+        # Trigram -> (trigram counts of the names, name indexes), by trigram count
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        for index in sorted(range(len(self._names)), key=lambda index: len(self._name_trigrams[index])):
+            grams = self._name_trigrams[index]
+            for gram in grams:
+                sizes, indexes = self._postings.setdefault(gram, ([], []))
+                sizes.append(len(grams))
+                indexes.append(index)
+
+    @classmethod
+    def from_backend(cls, backend: InventoryBackend, aliases: Optional[Dict[str, str]] = None) -> "CityResolver":
+        """Index every city with flights, hotels or activities, the alias table and hotel locations."""
+        cities = set(backend.flight_cities()) | set(backend.hotel_cities()) | set(backend.activity_cities())
+        locations = [
+            (hotel.location, city)
+            for city in backend.hotel_cities()
+            for hotel in backend.hotels(city) or ()
+            if hotel.location
+        ]
+        return cls(cities, CITY_ALIASES if aliases is None else aliases, locations)
+
+    def with_cities(self, cities: Iterable[str]) -> "CityResolver":
+        """
+        A copy of the index that also resolves new city keys, for cities an inventory delta added.
+
+        Only the new names' trigram posting lists are copied; the rest is shared
+        with this index. Hotel locations added by deltas are indexed by the
+        next reload.
+
+        Args:
+            cities: City keys to add.
+
+        Returns:
+            CityResolver: The extended index.
+        """
+        resolver = CityResolver.__new__(CityResolver)
+        resolver._cities = dict(self._cities)
+        resolver._aliases = dict(self._aliases)
+        resolver._prefix_names = list(self._prefix_names)
+        resolver._prefix_cities = list(self._prefix_cities)
+        resolver._names = list(self._names)
+        resolver._name_cities = list(self._name_cities)
+        resolver._name_trigrams = list(self._name_trigrams)
+        resolver._name_minimums = list(self._name_minimums)
+        resolver._postings = dict(self._postings)
+        copied: Set[str] = set()
+        for city in cities:
+            name = normalize_city_name(city)
+            if not name or name in resolver._cities:
+                continue
+            resolver._cities[name] = city
+            position = bisect.bisect_left(resolver._prefix_names, name)
+            if position < len(resolver._prefix_names) and resolver._prefix_names[position] == name:
+                resolver._prefix_cities[position] = city
+            else:
+                resolver._prefix_names.insert(position, name)
+                resolver._prefix_cities.insert(position, city)
+            if resolver._aliases.pop(name, None) is not None:
+                # A city key wins over an alias of the same name, as in a full build
+                index = resolver._names.index(name)
+                resolver._name_cities[index] = city
+                resolver._name_minimums[index] = CITY_FUZZY_MIN_SIMILARITY
+                continue
+            index = len(resolver._names)
+            grams = trigrams(name)
+            resolver._names.append(name)
+            resolver._name_cities.append(city)
+            resolver._name_trigrams.append(grams)
+            resolver._name_minimums.append(CITY_FUZZY_MIN_SIMILARITY)
+            for gram in grams:
+                if gram not in copied:
+                    sizes, indexes = resolver._postings.get(gram, ((), ()))
+                    resolver._postings[gram] = (list(sizes), list(indexes))
+                    copied.add(gram)
+                sizes, indexes = resolver._postings[gram]
+                position = bisect.bisect_right(sizes, len(grams))
+                sizes.insert(position, len(grams))
+                indexes.insert(position, index)
+        return resolver
+
+    def without_cities(self, cities: Iterable[str]) -> "CityResolver":
+        """
+        A copy of the index that no longer resolves to the given city keys, for cities inventory deltas removed.
+
+        Their names and aliases leave the exact, alias and prefix lookups; their
+        fuzzy names stay in the posting lists but can no longer match.
+
+        Args:
+            cities: City keys to drop.
+
+        Returns:
+            CityResolver: The reduced index.
+        """
+        removed = set(cities)
+        resolver = CityResolver.__new__(CityResolver)
+        resolver._cities = {name: city for name, city in self._cities.items() if city not in removed}
+        resolver._aliases = {name: city for name, city in self._aliases.items() if city not in removed}
+        kept = [position for position, city in enumerate(self._prefix_cities) if city not in removed]
+        resolver._prefix_names = [self._prefix_names[position] for position in kept]
+        resolver._prefix_cities = [self._prefix_cities[position] for position in kept]
+        resolver._names = self._names
+        resolver._name_cities = self._name_cities
+        resolver._name_trigrams = self._name_trigrams
+        # No similarity reaches a minimum above 1
+        resolver._name_minimums = [
+            2.0 if city in removed else minimum for city, minimum in zip(self._name_cities, self._name_minimums)]
+        resolver._postings = self._postings
+        return resolver
+
+    @property
+    def size(self) -> int:
+        """Names indexed (cities, aliases and locations)."""
+        return len(self._names)
+
+    def resolve(self, name: str) -> Optional[CityMatch]:
+        """
+        Resolve a city name.
+
+        Args:
+            name: City name as given by a user or the model.
+
+        Returns:
+            CityMatch: The city key and how it matched, or None if nothing matched.
+        """
+        query = normalize_city_name(name)
+        if not query:
+            return None
+        city = self._cities.get(query)
+        if city is not None:
+            return CityMatch(city, "exact")
+        city = self._aliases.get(query)
+        if city is not None:
+            return CityMatch(city, "alias")
+        if len(query) >= CITY_PREFIX_MIN_CHARS:
+            city = self._prefix(query)
+            if city is not None:
+                return CityMatch(city, "prefix")
+        return self._fuzzy(query)
+
+    def _prefix(self, query: str) -> Optional[str]:
+        """The single city with a name starting with query, or None if none or several do."""
+        start = bisect.bisect_left(self._prefix_names, query)
+        end = bisect.bisect_left(self._prefix_names, query + "￿", start)
+        cities = set(self._prefix_cities[start:end])
+        return cities.pop() if len(cities) == 1 else None
+
+    def _fuzzy(self, query: str) -> Optional[CityMatch]:
+        grams = trigrams(query)
+        size = len(grams)
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        # Names with n trigrams can reach similarity s only if size * s / (2 - s) <= n <= size * (2 - s) / s
+        shortest = math.ceil(size * CITY_FUZZY_MIN_SIMILARITY / (2 - CITY_FUZZY_MIN_SIMILARITY) - 1e-9)
+        longest = math.floor(size * (2 - CITY_FUZZY_MIN_SIMILARITY) / CITY_FUZZY_MIN_SIMILARITY + 1e-9)
+        # Count names within one trigram of the query's length first (a typo changes it by at most
+        # one), then the other lengths, each rarest list first, until CITY_FUZZY_MAX_POSTINGS entries
+        budget = CITY_FUZZY_MAX_POSTINGS
+        counted = []
+        for ranges in (((size - 1, size + 1),), ((shortest, size - 2), (size + 2, longest))):
+            spans = sorted(
+                ((start, end, indexes) for sizes, indexes in postings for low, high in ranges
+                 for start, end in [(bisect.bisect_left(sizes, low), bisect.bisect_right(sizes, high))]
+                 if start < end),
+                key=lambda span: span[1] - span[0])
+            for start, end, indexes in spans:
+                if end - start > budget:
+                    break
+                budget -= end - start
+                counted.append(indexes[start:end])
+        counts = Counter(chain.from_iterable(counted))
+        candidates = sorted(counts.items(), key=itemgetter(1), reverse=True)[:CITY_FUZZY_MAX_CANDIDATES]
+        index, similarity, tied = self._best_match(grams, (index for index, _ in candidates))
+        if index is None or tied:
+            return None
+        return CityMatch(self._name_cities[index], "fuzzy", similarity)
+
+    def _best_match(self, grams: Set[str], indexes: Iterable[int]) -> Tuple[Optional[int], float, bool]:
+        """Score names against the query; returns (name index, similarity, tied with another city)."""
+        best_index, best_similarity, tied = None, CITY_FUZZY_MIN_SIMILARITY, False
+        for index in indexes:
+            name_grams = self._name_trigrams[index]
+            similarity = 2 * len(grams & name_grams) / (len(grams) + len(name_grams))
+            if similarity < best_similarity or similarity < self._name_minimums[index]:
+                continue
+            if best_index is None or similarity > best_similarity:
+                best_index, best_similarity, tied = index, similarity, False
+            elif self._name_cities[index] != self._name_cities[best_index]:
+                tied = True
+        return best_index, best_similarity, tied
+
+# City indexes, built once per inventory backend
+_resolvers: "weakref.WeakKeyDictionary[InventoryBackend, CityResolver]" = weakref.WeakKeyDictionary()
+
+@register_index_builder
+def get_city_resolver(backend: Optional[InventoryBackend] = None) -> CityResolver:
+    """Returns the city index of a backend (default: the current one), building it on first use."""
+    backend = backend or get_backend()
+    resolver = _resolvers.get(backend)
+    if resolver is None:
+        resolver = _resolvers[backend] = CityResolver.from_backend(backend)
+        logger.info("Built city index for %s backend: %s names", backend.name, resolver.size)
+    return resolver
+
+@register_index_updater
+def update_city_resolver(previous: InventoryBackend, backend: InventoryBackend, changes: CatalogChanges):
+    """Carry the city index over to a catalog version produced by inventory deltas."""
+    resolver = _resolvers.get(previous)
+    if resolver is not None:
+        if changes.removed_cities:
+            resolver = resolver.without_cities(changes.removed_cities)
+        if changes.new_cities:
+            resolver = resolver.with_cities(sorted(changes.new_cities))
+        _resolvers[backend] = resolver
+
+def resolve_city(name: str) -> str:
+    """
+    The inventory key for a city name, resolving aliases, prefixes and typos.
+
+    Args:
+        name: City name as given by a user or the model.
+
+    Returns:
+        str: The city key, or the lower-cased name when nothing matches (so
+            the caller's "not covered" handling applies).
+    """
+    match = get_city_resolver().resolve(name)
+    if match is None:
+        CITY_RESOLUTIONS.labels("none").inc()
+        return name.lower()
+    CITY_RESOLUTIONS.labels(match.match).inc()
+    if match.match != "exact":
+        logger.info("Resolved city %r to %s (%s match, similarity %.2f)", name, match.city, match.match,
+                    match.similarity)
+    return match.city
@@ -0,0 +1,79 @@
+"""
+Inventory data files.
+
+The catalog can be kept as JSON files in INVENTORY_DATA_DIR instead of the
+mock dicts in the agent packages, so prices and listings change without a
+code deploy:
+
+    flights.json      [{"source": ..., "destination": ..., "flights": [...]}, ...]
+    hotels.json       {"city": [hotel, ...], ...}
+    activities.json   {"city": [activity, ...], ...}
+
+Records use the same fields and display strings as FLIGHTS_DB, HOTELS_DB
+and ACTIVITIES_DB. `python -m inventory export` writes the mock data in this
+layout as a starting point. When the directory does not exist, the mock
+data is used.
+"""
+
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from config import INVENTORY_DATA_DIR
+
+DATA_FILES = ("flights.json", "hotels.json", "activities.json")
+
+Databases = Tuple[Dict[Tuple[str, str], List[dict]], Dict[str, List[dict]], Dict[str, List[dict]]]
+
+def has_data_files(directory: str = INVENTORY_DATA_DIR) -> bool:
+    """Whether directory holds all three data files."""
+    return all(os.path.isfile(os.path.join(directory, name)) for name in DATA_FILES)
+
+def read_data_files(directory: str = INVENTORY_DATA_DIR) -> Databases:
+    """
+    Read the data files into mock-database-shaped dicts.
+
+    Args:
+        directory: Directory holding the data files.
+
+    Returns:
+        tuple: (flights_db, hotels_db, activities_db).
+    """
+    flights, hotels_db, activities_db = (_read_json(os.path.join(directory, name)) for name in DATA_FILES)
+    flights_db = {(route["source"], route["destination"]): route["flights"] for route in flights}
+    return flights_db, hotels_db, activities_db
+
+def write_data_files(directory: str, flights_db: Dict[Tuple[str, str], List[dict]],
+                     hotels_db: Dict[str, List[dict]], activities_db: Dict[str, List[dict]]):
+    """Write mock-database-shaped dicts as data files, each replaced atomically."""
+    os.makedirs(directory, exist_ok=True)
+    flights = [
+        {"source": source, "destination": destination, "flights": flights}
+        for (source, destination), flights in flights_db.items()
+    ]
+    for name, data in zip(DATA_FILES, (flights, hotels_db, activities_db)):
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as out:
+                json.dump(data, out, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, os.path.join(directory, name))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+def load_inventory_data(directory: Optional[str] = None) -> Databases:
+    """The catalog from the data files if they exist, otherwise the mock data."""
+    directory = directory or INVENTORY_DATA_DIR
+    if has_data_files(directory):
+        return read_data_files(directory)
+    # Imported here: the mock data modules live in the agent packages, which import this one
+    from flight_agent.mock_data import FLIGHTS_DB
+    from hotel_agent.mock_data import HOTELS_DB
+    from activities_agent.mock_data import ACTIVITIES_DB
+
+    return FLIGHTS_DB, HOTELS_DB, ACTIVITIES_DB
+
+def _read_json(path: str):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,744 @@
+"""
+Incremental inventory updates from a supplier delta feed.
+
+apply_deltas() applies a batch of upserts and deletes to the live catalog
+without rebuilding it:
+
+    {"op": "upsert", "kind": "flight", "source": "delhi", "destination": "goa",
+     "record": {"flight_number": "AI131", "price": "₹7,900"}}
+    {"op": "upsert", "kind": "hotel", "city": "goa", "record": {"name": "Sea Breeze Inn", ...}}
+    {"op": "delete", "kind": "activity", "city": "goa", "record": {"name": "Dolphin Watching"}}
+
+Records use the fields and display strings of FLIGHTS_DB, HOTELS_DB and
+ACTIVITIES_DB and are keyed by flight_number (within a route) or name
+(within a city). An upsert of an existing record only needs the fields that
+change; a new record needs them all. Deleting a record that is not there is
+a no-op, so a feed can be replayed.
+
+Each batch produces a new catalog version, a DeltaBackend layered on the
+catalog the last reload loaded. It holds the full, re-sorted record lists
+of the routes and cities deltas have touched and shares everything else
+with the base, so a batch costs time in proportion to the records it
+touches (and the size of their cities), not the catalog:
+
+- a delta finds its record through a name map per route and city, the
+  changed record is moved to its sorted position by binary search, and
+  only the touched cities' summaries and category postings are recomputed
+  (their amenity masks on their first amenity search);
+- derived indexes are carried over by the updaters registered with
+  register_index_updater (the route graph replaces only the changed routes;
+  the city index adds new cities and drops removed ones);
+- cached search results stay valid for untouched routes and cities: each
+  version records which routes and cities it changed, and cache keys hold
+  the versions of what they were computed from (see cached_search). Only
+  the entries for changed routes and cities are dropped.
+
+Deleting the last record of a route, city or category removes it, as a
+rebuild would: a city with no hotels left is no longer a hotel city, and a
+city with no flights, hotels or activities left is no longer resolved.
+
+The new version then goes live like a reload (see inventory.reload): calls
+already running finish on the version they started on. Versions share the
+base, which is closed when a reload replaces it; the next reload starts
+again from the published snapshot or data files, so publish the changes
+there too.
+"""
+
+import bisect
+import functools
+import hashlib
+import json
+import logging
+import operator
+import sys
+import threading
+import time
+from collections import Counter
+from itertools import chain
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from .backends import InventoryBackend
+from .records import (
+    ActivityCitySummary,
+    ActivityRecord,
+    FlightInventory,
+    FlightRecord,
+    HotelCitySummary,
+    HotelRecord,
+    amenity_key,
+    amenity_mask,
+    parse_activity,
+    parse_flight,
+    parse_hotel,
+    top_rated,
+)
+from .reload import _reload_lock
+from .store import gc_paused, get_backend, set_backend
+from cache_utils import invalidate_search_scopes
+from logging_utils import METRICS
+
+logger = logging.getLogger('travel_agent.inventory')
+
+DELTA_OPS = ("upsert", "delete")
+DELTA_KINDS = ("flight", "hotel", "activity")
+
+DELTAS = METRICS.counter(
+    "travel_agent_inventory_deltas_total", "Inventory deltas applied by kind and op (upsert or delete).",
+    ("kind", "op"))
+
+# (kind, op, route or city, record fields)
+Delta = Tuple[str, str, Any, dict]
+
+# Bound on _BaseCatalog.amenity_spellings
+_MAX_AMENITY_SPELLINGS = 4096
+
+# DeltaBackend attributes a new version starts from, copied before the first write
+_OVERLAY_FIELDS = ("_routes", "_route_counts", "_hotels", "_hotel_masks", "_hotel_summaries",
+                   "_hotel_price_totals", "_activities", "_activity_summaries", "_category_postings",
+                   "_category_names", "_category_counts", "_new_flight_cities", "_new_hotel_cities",
+                   "_new_activity_cities", "_scope_versions")
+
+def parse_delta(delta: dict) -> Delta:
+    """
+    Validate one delta from the feed.
+
+    Args:
+        delta: A delta in the layout described in the module docstring.
+
+    Returns:
+        tuple: (kind, op, (source, destination) or city, record fields).
+
+    Raises:
+        ValueError: If the delta is malformed.
+    """
+    if not isinstance(delta, dict):
+        raise ValueError(f"A delta must be an object, not {type(delta).__name__}")
+    op, kind, record = delta.get("op"), delta.get("kind"), delta.get("record")
+    if op not in DELTA_OPS:
+        raise ValueError(f"Delta op must be one of {', '.join(DELTA_OPS)}, not {op!r}")
+    if kind not in DELTA_KINDS:
+        raise ValueError(f"Delta kind must be one of {', '.join(DELTA_KINDS)}, not {kind!r}")
+    if not isinstance(record, dict):
+        raise ValueError("A delta needs a record object")
+    if kind == "flight":
+        source, destination = delta.get("source"), delta.get("destination")
+        if not isinstance(source, str) or not isinstance(destination, str) or not source or not destination:
+            raise ValueError("A flight delta needs source and destination cities")
+        if not record.get("flight_number"):
+            raise ValueError("A flight delta record needs a flight_number")
+        return kind, op, (_city_key(source), _city_key(destination)), record
+    city = delta.get("city")
+    if not isinstance(city, str) or not city:
+        raise ValueError(f"A {kind} delta needs a city")
+    if not record.get("name"):
+        raise ValueError(f"A {kind} delta record needs a name")
+    return kind, op, _city_key(city), record
+
+def _city_key(city: str) -> str:
+    return sys.intern(city.strip().lower())
+
+class CatalogChanges:
+    """What one batch of deltas changed, passed to the index updaters.
+
+    Attributes:
+        routes: (source, destination) -> the route's flights on the new
+            version, None if it is no longer served.
+        hotel_cities: Cities whose hotels changed.
+        activity_cities: Cities whose activities changed.
+        new_cities: City keys the catalog did not cover before.
+        removed_cities: City keys the catalog no longer covers (no flights,
+            hotels or activities left).
+    """
+
+    __slots__ = ("routes", "hotel_cities", "activity_cities", "new_cities", "removed_cities")
+
+    def __init__(self, routes: Dict[Tuple[str, str], Optional[Tuple[FlightRecord, ...]]],
+                 hotel_cities: FrozenSet[str], activity_cities: FrozenSet[str], new_cities: FrozenSet[str],
+                 removed_cities: FrozenSet[str] = frozenset()):
+        self.routes = routes
+        self.hotel_cities = hotel_cities
+        self.activity_cities = activity_cities
+        self.new_cities = new_cities
+        self.removed_cities = removed_cities
+
+    def __bool__(self) -> bool:
+        return bool(self.routes or self.hotel_cities or self.activity_cities)
+
+    def scopes(self) -> List[Tuple[str, ...]]:
+        """The parts of the catalog that changed, as cache scopes (see InventoryBackend.cache_scope)."""
+        scopes = [("catalog",)]
+        if self.routes:
+            # Any route can change the connections of an unserved one
+            scopes.append(("network",))
+            scopes.extend(("route",) + route for route in self.routes)
+        scopes.extend(("hotels", city) for city in self.hotel_cities)
+        scopes.extend(("activities", city) for city in self.activity_cities)
+        return scopes
+
+class _BaseCatalog:
+    """A delta feed's base catalog with lookups shared by every version layered on it.
+
+    The amenity bits only ever grow (one per distinct amenity key), so versions
+    share them without copying. Hotel masks are not kept here: each version
+    computes a touched city's masks on its first amenity search, on request
+    threads, and drops them with the city's hotels when a delta replaces them.
+    """
+
+    def __init__(self, backend: InventoryBackend):
+        self.backend = backend
+        self.amenity_bits: Dict[str, int] = {}
+        # Amenity names as spelled in records -> bit, so masks skip amenity_key; cleared
+        # when it reaches _MAX_AMENITY_SPELLINGS, as a feed may spell amenities any way
+        self.amenity_spellings: Dict[str, int] = {}
+        self._mask_lock = threading.Lock()
+        # (kind, route or city) -> record name (flight number) -> record on version names_version,
+        # so deltas find their record without a scan. derive() updates the maps in place, as
+        # apply_deltas only ever derives from the latest version
+        self.record_names: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        self.names_version: Optional[str] = None
+
+    def names(self, kind: str, key: Any, records: List[Any]) -> Dict[str, Any]:
+        """The name -> record map of a route's or city's records, built from them on first use."""
+        names = self.record_names.get((kind, key))
+        if names is None:
+            field = "flight_number" if kind == "flight" else "name"
+            # Reversed, so the first of any records with the same name wins, as in a scan
+            names = self.record_names[kind, key] = dict(
+                zip(map(operator.attrgetter(field), reversed(records)), reversed(records)))
+        return names
+
+    def hotel_masks(self, hotels: Iterable[HotelRecord]) -> Tuple[int, ...]:
+        """The amenity bitsets of a touched city's hotels, assigning bits to new amenities."""
+        masks = []
+        with self._mask_lock:
+            spellings = self.amenity_spellings
+            for hotel in hotels:
+                mask = 0
+                for amenity in hotel.amenities:
+                    bit = spellings.get(amenity)
+                    if bit is None:
+                        key = amenity_key(amenity)
+                        bit = self.amenity_bits.setdefault(key, len(self.amenity_bits))
+                        if len(spellings) >= _MAX_AMENITY_SPELLINGS:
+                            spellings.clear()
+                        spellings[amenity] = bit
+                    mask |= 1 << bit
+                masks.append(mask)
+        return tuple(masks)
+
+    @functools.cached_property
+    def flight_cities(self) -> FrozenSet[str]:
+        return frozenset(self.backend.flight_cities())
+
+    @functools.cached_property
+    def hotel_cities(self) -> FrozenSet[str]:
+        return frozenset(self.backend.hotel_cities())
+
+    @functools.cached_property
+    def activity_cities(self) -> FrozenSet[str]:
+        return frozenset(self.backend.activity_cities())
+
+    @functools.cached_property
+    def activity_positions(self) -> Dict[str, int]:
+        return {city: position for position, city in enumerate(self.backend.activity_city_order())}
+
+    @functools.cached_property
+    def route_counts(self) -> Dict[str, int]:
+        """City -> routes served from or to it."""
+        return Counter(chain.from_iterable(self.backend.flight_inventory().routes))
+
+    @functools.cached_property
+    def category_counts(self) -> Dict[str, int]:
+        """Lower-cased category -> activities in it."""
+        return Counter(activity.category.lower()
+                       for activities in self.backend.all_activities().values() for activity in activities)
+
+    def covers(self, city: str) -> bool:
+        return city in self.flight_cities or city in self.hotel_cities or city in self.activity_cities
+
+class DeltaBackend(InventoryBackend):
+    """A catalog version made of a base backend plus the routes and cities deltas have replaced.
+
+    Lookups for a touched route or city are served from the replacement
+    records; everything else goes to the base. Instances are immutable:
+    apply_deltas derives the next version with derive().
+    """
+
+    def __init__(self, base: _BaseCatalog, catalog_version: str):
+        self._base = base
+        self.catalog_version = catalog_version
+        # Touched routes and cities -> their full record lists on this version (None or empty: removed)
+        self._routes: Dict[Tuple[str, str], Optional[Tuple[FlightRecord, ...]]] = {}
+        # Cities that routes were added to or removed from -> routes served from or to them
+        self._route_counts: Dict[str, int] = {}
+        self._hotels: Dict[str, Tuple[HotelRecord, ...]] = {}
+        # Touched cities -> their hotels' amenity masks, filled in by amenity searches
+        self._hotel_masks: Dict[str, Tuple[int, ...]] = {}
+        self._hotel_summaries: Dict[str, Optional[HotelCitySummary]] = {}
+        # Sum of the touched cities' hotel prices, so summaries are updated rather than recomputed
+        self._hotel_price_totals: Dict[str, int] = {}
+        self._activities: Dict[str, Tuple[ActivityRecord, ...]] = {}
+        self._activity_summaries: Dict[str, Optional[ActivityCitySummary]] = {}
+        # Lower-cased category -> touched city -> its activities in the category, by rating
+        self._category_postings: Dict[str, Dict[str, Tuple[ActivityRecord, ...]]] = {}
+        self._category_names: Dict[str, str] = {}
+        # Lower-cased categories touched -> activities in them
+        self._category_counts: Dict[str, int] = {}
+        # Cities the base does not cover, in the order deltas added them
+        self._new_flight_cities: Tuple[str, ...] = ()
+        self._new_hotel_cities: Tuple[str, ...] = ()
+        self._new_activity_cities: Tuple[str, ...] = ()
+        # Cache scopes changed since the base -> the version that last changed them
+        self._scope_versions: Dict[Tuple[str, ...], str] = {}
+
+    @property
+    def name(self) -> str:
+        return self._base.backend.name
+
+    @property
+    def root(self) -> InventoryBackend:
+        return self._base.backend
+
+    def scope_version(self, scope):
+        return self._scope_versions.get(self.cache_scope(scope), self._base.backend.catalog_version)
+
+    @classmethod
+    def derive(cls, current: InventoryBackend, deltas: Sequence[Delta]) -> Tuple["DeltaBackend", CatalogChanges]:
+        """
+        The catalog version that results from applying deltas to current.
+
+        current is left unchanged, so calls running on it are unaffected.
+
+        Args:
+            current: The active backend, a DeltaBackend or a reloaded base.
+            deltas: Deltas validated by parse_delta.
+
+        Returns:
+            tuple: (new version, what changed).
+
+        Raises:
+            ValueError: If an upsert adds a record with fields missing.
+        """
+        previous = current if isinstance(current, DeltaBackend) else None
+        base = previous._base if previous else _BaseCatalog(current)
+        version = hashlib.sha256(json.dumps(
+            [current.catalog_version, [[kind, op, key, record] for kind, op, key, record in deltas]],
+            ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()[:16]
+        backend = cls(base, version)
+        if previous:
+            for name in _OVERLAY_FIELDS:
+                setattr(backend, name, getattr(previous, name))
+
+        # Working copies of the touched record lists, in the order the tools return them
+        routes: Dict[Tuple[str, str], List[FlightRecord]] = {}
+        hotels: Dict[str, List[HotelRecord]] = {}
+        activities: Dict[str, List[ActivityRecord]] = {}
+        # city -> (removed, added) hotel of each hotel delta, for the summaries
+        hotel_changes: Dict[str, List[Tuple[Optional[HotelRecord], Optional[HotelRecord]]]] = {}
+        # (kind, route or city) -> whether its list had records before the batch
+        had_records: Dict[Tuple[str, Any], bool] = {}
+        if base.names_version != current.catalog_version:
+            base.record_names.clear()
+        try:
+            for kind, op, key, record in deltas:
+                if kind == "flight":
+                    if key not in routes:
+                        routes[key] = list(current.flights(*key) or ())
+                        had_records[kind, key] = bool(routes[key])
+                    _apply_flight(routes[key], base.names(kind, key, routes[key]), op, key, record)
+                elif kind == "hotel":
+                    if key not in hotels:
+                        hotels[key] = list(current.hotels(key) or ())
+                        had_records[kind, key] = bool(hotels[key])
+                    hotel_changes.setdefault(key, []).append(
+                        _apply_hotel(hotels[key], base.names(kind, key, hotels[key]), op, key, record))
+                else:
+                    if key not in activities:
+                        activities[key] = list(current.activities(key) or ())
+                        had_records[kind, key] = bool(activities[key])
+                    _apply_activity(activities[key], base.names(kind, key, activities[key]), op, key, record)
+        except ValueError:
+            # The maps are part way through the batch
+            base.record_names.clear()
+            raise
+        base.names_version = version
+
+        if routes:
+            backend._routes = dict(backend._routes)
+            counts = None
+            for route, flights in routes.items():
+                backend._routes[route] = tuple(flights) or None
+                if bool(flights) != had_records["flight", route]:
+                    if counts is None:
+                        counts = backend._route_counts = dict(backend._route_counts)
+                    for city in route:
+                        counts[city] = counts.get(city, base.route_counts.get(city, 0)) + (1 if flights else -1)
+            backend._new_flight_cities += _added((city for route in routes for city in route),
+                                                 base.flight_cities, backend._new_flight_cities)
+        if hotels:
+            backend._set_hotels(hotels, hotel_changes)
+            backend._new_hotel_cities += _added(hotels, base.hotel_cities, backend._new_hotel_cities)
+        if activities:
+            backend._set_activities(activities)
+            backend._new_activity_cities += _added(activities, base.activity_cities, backend._new_activity_cities)
+
+        # Only a list that gained its first record or lost its last can change which cities are covered
+        lists = {("flight", route): flights for route, flights in routes.items()}
+        lists.update((("hotel", city), city_hotels) for city, city_hotels in hotels.items())
+        lists.update((("activity", city), city_activities) for city, city_activities in activities.items())
+        flipped = {(kind, key) for (kind, key), records in lists.items() if bool(records) != had_records[kind, key]}
+        candidates = set(chain.from_iterable(key if kind == "flight" else (key,) for kind, key in flipped))
+        covered = previous._covers if previous else base.covers
+        changes = CatalogChanges(
+            {route: backend._routes[route] for route in routes}, frozenset(hotels), frozenset(activities),
+            frozenset(city for city in candidates if backend._covers(city) and not covered(city)),
+            frozenset(city for city in candidates if covered(city) and not backend._covers(city)))
+        backend._scope_versions = dict(backend._scope_versions)
+        backend._scope_versions.update(dict.fromkeys(changes.scopes(), version))
+        return backend, changes
+
+    def _flies(self, city: str) -> bool:
+        count = self._route_counts.get(city)
+        return city in self._base.flight_cities if count is None else count > 0
+
+    def _has_hotels(self, city: str) -> bool:
+        return bool(self._hotels[city]) if city in self._hotels else city in self._base.hotel_cities
+
+    def _has_activities(self, city: str) -> bool:
+        return bool(self._activities[city]) if city in self._activities else city in self._base.activity_cities
+
+    def _covers(self, city: str) -> bool:
+        return self._flies(city) or self._has_hotels(city) or self._has_activities(city)
+
+    def _set_hotels(self, hotels: Dict[str, List[HotelRecord]],
+                    changes: Dict[str, List[Tuple[Optional[HotelRecord], Optional[HotelRecord]]]]):
+        previous_summaries, previous_totals = self._hotel_summaries, self._hotel_price_totals
+        self._hotels = dict(self._hotels)
+        self._hotel_masks = dict(self._hotel_masks)
+        self._hotel_summaries = dict(self._hotel_summaries)
+        self._hotel_price_totals = dict(self._hotel_price_totals)
+        for city, city_hotels in hotels.items():
+            city_hotels = tuple(city_hotels)
+            self._hotels[city] = city_hotels
+            self._hotel_masks.pop(city, None)
+            if not city_hotels:
+                self._hotel_summaries[city] = None
+                self._hotel_price_totals.pop(city, None)
+                continue
+            if city in previous_totals:
+                total_price = previous_totals[city]
+                luxury_options = previous_summaries[city].luxury_options
+                for removed, added in changes[city]:
+                    if removed is not None:
+                        total_price -= removed.price_paise
+                        luxury_options -= removed.rating >= 4
+                    if added is not None:
+                        total_price += added.price_paise
+                        luxury_options += added.rating >= 4
+                summary = HotelCitySummary.from_totals(len(city_hotels), total_price // len(city_hotels),
+                                                       luxury_options)
+            else:
+                # First change to a city: one pass over its hotels
+                total_price = sum(hotel.price_paise for hotel in city_hotels)
+                summary = HotelCitySummary(city_hotels)
+            self._hotel_summaries[city] = summary
+            self._hotel_price_totals[city] = total_price
+
+    def _set_activities(self, activities: Dict[str, List[ActivityRecord]]):
+        previous_activities = self._activities
+        self._activities = dict(self._activities)
+        self._activity_summaries = dict(self._activity_summaries)
+        postings = dict(self._category_postings)
+        names = self._category_names
+        counts = dict(self._category_counts)
+        base_counts = self._base.category_counts
+        copied = set()
+        for city, city_activities in activities.items():
+            city_activities = tuple(city_activities)
+            if city in previous_activities:
+                old = previous_activities[city]
+            else:
+                old = self._base.backend.activities(city) or ()
+            by_category: Dict[str, List[ActivityRecord]] = {}
+            for activity, category_key in zip(city_activities, map(str.lower, map(_category, city_activities))):
+                by_category.setdefault(category_key, []).append(activity)
+            old_counts = Counter(map(str.lower, map(_category, old)))
+            # The city's postings are replaced in every category it had or now has
+            for category_key in old_counts.keys() | by_category.keys():
+                if category_key not in copied:
+                    postings[category_key] = dict(postings.get(category_key, {}))
+                    copied.add(category_key)
+                category_activities = tuple(by_category.get(category_key, ()))
+                postings[category_key][city] = category_activities
+                count = counts.get(category_key, base_counts.get(category_key, 0))
+                counts[category_key] = count - old_counts[category_key] + len(category_activities)
+                if category_activities:
+                    spelling = min(map(_category, category_activities))
+                    if category_key not in names or spelling < names[category_key]:
+                        if names is self._category_names:
+                            names = dict(names)
+                        names[category_key] = spelling
+            self._activities[city] = city_activities
+            self._activity_summaries[city] = ActivityCitySummary(city_activities) if city_activities else None
+        self._category_postings = postings
+        self._category_names = names
+        self._category_counts = counts
+
+    # Flights
+
+    def flights(self, source, destination):
+        route = (source, destination)
+        if route in self._routes:
+            return self._routes[route]
+        return self._base.backend.flights(source, destination)
+
+    def serves_route(self, source, destination):
+        route = (source, destination)
+        if route in self._routes:
+            return self._routes[route] is not None
+        return self._base.backend.serves_route(source, destination)
+
+    def flight_cities(self):
+        return sorted(filter(self._flies, self._base.flight_cities.union(self._new_flight_cities)))
+
+    @functools.cached_property
+    def _flight_inventory(self) -> FlightInventory:
+        routes = dict(self._base.backend.flight_inventory().routes)
+        for route, flights in self._routes.items():
+            if flights:
+                routes[route] = flights
+            else:
+                routes.pop(route, None)
+        return FlightInventory(routes)
+
+    def flight_inventory(self):
+        return self._flight_inventory
+
+    # Hotels
+
+    def hotels(self, city, max_price_paise=None, min_rating=None, amenities=None):
+        if city not in self._hotels:
+            return self._base.backend.hotels(city, max_price_paise, min_rating, amenities)
+        hotels: Iterable[HotelRecord] = self._hotels[city]
+        if not hotels:
+            return None
+        if max_price_paise is None and min_rating is None and not amenities:
+            return list(hotels)
+        if amenities:
+            masks = self._hotel_masks.get(city)
+            if masks is None:
+                # Assigns bits to the city's new amenities, so before the filter's mask
+                masks = self._hotel_masks[city] = self._base.hotel_masks(hotels)
+            required = amenity_mask(self._base.amenity_bits, amenities)
+            if required is None:
+                return []
+            hotels = [hotel for hotel, mask in zip(hotels, masks) if mask & required == required]
+        return [
+            hotel for hotel in hotels
+            if (max_price_paise is None or hotel.price_paise <= max_price_paise)
+            and (min_rating is None or hotel.rating >= min_rating)
+        ]
+
+    def hotel_amenities(self, city):
+        if city not in self._hotels:
+            return self._base.backend.hotel_amenities(city)
+        if not self._hotels[city]:
+            return None
+        return sorted({amenity for hotel in self._hotels[city] for amenity in hotel.amenities})
+
+    def hotel_summary(self, city):
+        if city not in self._hotel_summaries:
+            return self._base.backend.hotel_summary(city)
+        return self._hotel_summaries[city]
+
+    def hotel_cities(self):
+        return sorted(filter(self._has_hotels, self._base.hotel_cities.union(self._new_hotel_cities)))
+
+    # Activities
+
+    def activities(self, city, min_rating=None, max_price_paise=None):
+        if city not in self._activities:
+            return self._base.backend.activities(city, min_rating, max_price_paise)
+        if not self._activities[city]:
+            return None
+        if min_rating is None and max_price_paise is None:
+            return list(self._activities[city])
+        return [
+            activity for activity in self._activities[city]
+            if (min_rating is None or activity.rating >= min_rating)
+            and (max_price_paise is None or activity.price_paise <= max_price_paise)
+        ]
+
+    def activity_summary(self, city):
+        if city not in self._activity_summaries:
+            return self._base.backend.activity_summary(city)
+        return self._activity_summaries[city]
+
+    def activity_cities(self):
+        return sorted(filter(self._has_activities, self._base.activity_cities.union(self._new_activity_cities)))
+
+    def activity_categories(self):
+        counts = self._category_counts
+        names = {name for name in self._base.backend.activity_categories() if counts.get(name.lower(), 1)}
+        names.update(name for category_key, name in self._category_names.items() if counts[category_key])
+        return sorted(names)
+
+    def all_activities(self):
+        by_city = dict(self._base.backend.all_activities())
+        by_city.update(self._activities)
+        for city, activities in self._activities.items():
+            if not activities:
+                del by_city[city]
+        return by_city
+
+    def activity_city_order(self):
+        cities = self._base.backend.activity_city_order() + list(self._new_activity_cities)
+        return [city for city in cities if self._activities.get(city, True)]
+
+    def activity_category(self, category):
+        if not self._category_counts.get(category.lower(), 1):
+            return None
+        names = [self._base.backend.activity_category(category), self._category_names.get(category.lower())]
+        return min((name for name in names if name is not None), default=None)
+
+    def activities_by_category(self, category, min_rating=None, top_k=None):
+        by_city = self._base.backend.activities_by_category(category, min_rating, top_k)
+        if not self._activities:
+            return by_city
+        touched = self._category_postings.get(category.lower(), {})
+        entries = [(city, activities) for city, activities in by_city.items() if city not in self._activities]
+        for city, activities in touched.items():
+            activities = top_rated(activities, min_rating, top_k)
+            if activities:
+                entries.append((city, activities))
+        # Back into catalog city order; cities added by deltas come after the base's
+        positions, added = self._base.activity_positions, len(self._base.activity_positions)
+        new_positions = {city: added + index for index, city in enumerate(self._new_activity_cities)}
+        entries.sort(key=lambda entry: positions.get(entry[0], new_positions.get(entry[0], added)))
+        return dict(entries)
+
+def _added(cities: Iterable[str], base_cities: FrozenSet[str], added_before: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Cities the base does not have and earlier deltas did not add, in first-seen order."""
+    known = set(added_before)
+    return tuple(city for city in dict.fromkeys(cities) if city not in base_cities and city not in known)
+
+_category = operator.attrgetter("category")
+
+def _merged(existing: Any, fields: dict) -> dict:
+    """An upserted record's fields: the existing record's display fields updated with the delta's."""
+    return {**existing.to_dict(), **fields} if existing is not None else fields
+
+def _parse(parse: Callable[..., Any], *args) -> Any:
+    try:
+        return parse(*args)
+    except KeyError as e:
+        raise ValueError(f"New record {args[-1]!r} is missing field {e.args[0]!r}") from None
+    except (AttributeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid record {args[-1]!r}: {e}") from None
+
+def _apply_flight(flights: List[FlightRecord], names: Dict[str, FlightRecord], op: str,
+                  route: Tuple[str, str], fields: dict):
+    """Upsert or delete a flight in a route's schedule-ordered list and its name map."""
+    existing = names.pop(fields["flight_number"], None)
+    index = flights.index(existing) if existing is not None else None
+    if op == "delete":
+        if index is not None:
+            del flights[index]
+        return
+    flight = _parse(parse_flight, route[0], route[1], _merged(existing, fields))
+    names[flight.flight_number] = flight
+    if index is not None and existing.departure_minutes == flight.departure_minutes:
+        flights[index] = flight
+        return
+    if index is not None:
+        del flights[index]
+    flights.insert(bisect.bisect_right(flights, flight.departure_minutes, key=lambda f: f.departure_minutes),
+                   flight)
+
+def _apply_hotel(hotels: List[HotelRecord], names: Dict[str, HotelRecord], op: str, city: str,
+                 fields: dict) -> Tuple[Optional[HotelRecord], Optional[HotelRecord]]:
+    """Upsert or delete a hotel in a city's list sorted by rating, then price, and its name map.
+
+    An upserted hotel goes after the hotels it ties with, where re-sorting
+    the catalog with the hotel moved to the end of its city would put it.
+
+    Returns:
+        tuple: (hotel removed, hotel added), either None.
+    """
+    removed = names.pop(fields["name"], None)
+    hotel = _parse(parse_hotel, city, _merged(removed, fields)) if op == "upsert" else None
+    if removed is not None:
+        del hotels[hotels.index(removed)]
+    if hotel is not None:
+        names[hotel.name] = hotel
+        hotels.insert(bisect.bisect_right(hotels, (-hotel.rating, hotel.price_paise),
+                                          key=lambda h: (-h.rating, h.price_paise)), hotel)
+    return removed, hotel
+
+def _apply_activity(activities: List[ActivityRecord], names: Dict[str, ActivityRecord], op: str, city: str,
+                    fields: dict):
+    """Upsert or delete an activity in a city's list sorted by rating, placed like a hotel, and its name map."""
+    existing = names.pop(fields["name"], None)
+    activity = _parse(parse_activity, city, _merged(existing, fields)) if op == "upsert" else None
+    if existing is not None:
+        del activities[activities.index(existing)]
+    if activity is not None:
+        names[activity.name] = activity
+        activities.insert(bisect.bisect_right(activities, -activity.rating, key=lambda a: -a.rating), activity)
+
+# ---------------------------------------------------------------------------
+# Applying a batch
+# ---------------------------------------------------------------------------
+
+# Functions that carry a derived index over to the version a batch produced
+_index_updaters: List[Callable[[InventoryBackend, InventoryBackend, CatalogChanges], Any]] = []
+
+def register_index_updater(
+        updater: Callable[[InventoryBackend, InventoryBackend, CatalogChanges], Any],
+) -> Callable[[InventoryBackend, InventoryBackend, CatalogChanges], Any]:
+    """Have apply_deltas update a derived index from the previous version's, as updater(previous, new, changes)."""
+    _index_updaters.append(updater)
+    return updater
+
+def apply_deltas(deltas: Iterable[dict]) -> Optional[str]:
+    """
+    Apply a batch of deltas to the live inventory as one new catalog version.
+
+    The batch is validated first and applied all or nothing. Serialized with
+    reloads; request threads never wait for it.
+
+    Args:
+        deltas: Deltas in the layout described in the module docstring.
+
+    Returns:
+        str: The catalog version now active (unchanged if the batch changed nothing).
+
+    Raises:
+        ValueError: If a delta is malformed; nothing is applied.
+    """
+    parsed = []
+    for position, delta in enumerate(deltas):
+        try:
+            parsed.append(parse_delta(delta))
+        except ValueError as e:
+            raise ValueError(f"Delta {position}: {e}") from None
+
+    with _reload_lock:
+        current = get_backend()
+        started = time.perf_counter()
+        with gc_paused():
+            backend, changes = DeltaBackend.derive(current, parsed)
+            if not changes:
+                return current.catalog_version
+            for updater in _index_updaters:
+                updater(current, backend, changes)
+        set_backend(backend, invalidate_cache=False)
+        dropped = invalidate_search_scopes(changes.scopes())
+        for kind, op, _, _ in parsed:
+            DELTAS.labels(kind, op).inc()
+        logger.debug("Applied %s inventory deltas: catalog %s -> %s in %.1f ms (%s routes, %s hotel cities, "
+                     "%s activity cities changed; %s cached results dropped)",
+                     len(parsed), current.catalog_version, backend.catalog_version,
+                     (time.perf_counter() - started) * 1000, len(changes.routes), len(changes.hotel_cities),
+                     len(changes.activity_cities), dropped)
+        return backend.catalog_version
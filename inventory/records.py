@@ -0,0 +1,433 @@
+"""
+Typed inventory records for the travel agent application.
+
+The mock databases store display strings ("₹8,500", "06:00", "2.5 hours").
+These records hold the parsed values once - prices in integer paise, times
+and durations in minutes - so the search tools never re-parse strings on the
+hot path. Display strings are produced again only when a response is built.
+"""
+
+import bisect
+import hashlib
+import json
+import operator
+import sys
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+PAISE_PER_RUPEE = 100
+MINUTES_PER_DAY = 24 * 60
+FREE_PRICE_LABEL = "₹free"
+
+# ---------------------------------------------------------------------------
+# Parsing and formatting helpers
+# ---------------------------------------------------------------------------
+
+def parse_price(price: str) -> int:
+    """Parse a display price like "₹8,500" (or "₹free") into integer paise."""
+    if price == FREE_PRICE_LABEL:
+        return 0
+    return int(price.replace("₹", "").replace(",", "")) * PAISE_PER_RUPEE
+
+def format_price(price_paise: int) -> str:
+    """Format integer paise as a whole-rupee display price like "₹8,500"."""
+    return f"₹{price_paise // PAISE_PER_RUPEE:,}"
+
+def parse_clock(clock: str) -> int:
+    """Parse a "HH:MM" clock time into minutes after midnight."""
+    hours, minutes = clock.split(":")
+    return int(hours) * 60 + int(minutes)
+
+def amenity_key(amenity: str) -> str:
+    """Case- and punctuation-insensitive form of an amenity name, so "Wi-Fi" matches "WiFi"."""
+    return "".join(character for character in amenity.casefold() if character.isalnum())
+
+def parse_amenities(amenities: Union[str, Iterable[str], None]) -> Tuple[str, ...]:
+    """An amenity filter as distinct names in key order; a string is read as a comma-separated list."""
+    if isinstance(amenities, str):
+        amenities = amenities.split(",")
+    names: Dict[str, str] = {}
+    for amenity in amenities or ():
+        key = amenity_key(amenity)
+        if key:
+            names.setdefault(key, amenity.strip())
+    return tuple(names[key] for key in sorted(names))
+
+def assign_amenity_bits(amenity_lists: Iterable[Iterable[str]]) -> Dict[str, int]:
+    """Amenity key -> bit number, most common amenities in the lowest bits."""
+    counts = Counter(key for amenities in amenity_lists for key in {amenity_key(a) for a in amenities})
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return {key: bit for bit, (key, _) in enumerate(ranked)}
+
+def amenity_mask(bits: Dict[str, int], amenities: Iterable[str]) -> Optional[int]:
+    """Bitset of the given amenities, or None if one of them is not in bits (no hotel offers it)."""
+    mask = 0
+    for amenity in amenities:
+        bit = bits.get(amenity_key(amenity))
+        if bit is None:
+            return None
+        mask |= 1 << bit
+    return mask
+
+def format_clock(minutes: int) -> str:
+    """Format minutes after midnight as a "HH:MM" clock time."""
+    minutes %= MINUTES_PER_DAY
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def parse_duration(duration: str) -> int:
+    """Parse a duration like "3 hours", "1 hour" or "2.5 hours" into minutes."""
+    value = duration.split()[0]
+    return round(float(value) * 60)
+
+def format_duration(minutes: int) -> str:
+    """Format minutes as an hours duration like "3 hours", "1 hour" or "2.5 hours"."""
+    hours = minutes / 60
+    if hours == 1:
+        return "1 hour"
+    return f"{hours:g} hours"
+
+# ---------------------------------------------------------------------------
+# Records
+# ---------------------------------------------------------------------------
+
+class FlightRecord:
+    """A single scheduled flight on a route."""
+
+    __slots__ = ("flight_number", "airline", "source", "destination",
+                 "departure_minutes", "arrival_minutes", "duration_minutes", "price_paise")
+
+    def __init__(self, flight_number: str, airline: str, source: str, destination: str,
+                 departure_minutes: int, arrival_minutes: int, price_paise: int):
+        self.flight_number = flight_number
+        self.airline = airline
+        self.source = source
+        self.destination = destination
+        self.departure_minutes = departure_minutes
+        self.arrival_minutes = arrival_minutes
+        # Block time, allowing for flights that land after midnight
+        self.duration_minutes = (arrival_minutes - departure_minutes) % MINUTES_PER_DAY
+        self.price_paise = price_paise
+
+    def to_dict(self) -> dict:
+        """Build the display dict returned by the flight tools."""
+        return {
+            "flight_number": self.flight_number,
+            "departure": format_clock(self.departure_minutes),
+            "arrival": format_clock(self.arrival_minutes),
+            "price": format_price(self.price_paise),
+            "airline": self.airline,
+        }
+
+    def with_price(self, price_paise: int) -> "FlightRecord":
+        """Copy of this flight at another fare, e.g. the fare on a given day."""
+        record = FlightRecord.__new__(FlightRecord)
+        for name in FlightRecord.__slots__:
+            setattr(record, name, getattr(self, name))
+        record.price_paise = price_paise
+        return record
+
+    def __repr__(self) -> str:
+        return f"FlightRecord({self.flight_number} {self.source}->{self.destination})"
+
+class HotelRecord:
+    """A hotel in a city."""
+
+    __slots__ = ("name", "city", "rating", "price_paise", "amenities", "location")
+
+    def __init__(self, name: str, city: str, rating: int, price_paise: int,
+                 amenities: Tuple[str, ...], location: str):
+        self.name = name
+        self.city = city
+        self.rating = rating
+        self.price_paise = price_paise
+        self.amenities = amenities
+        self.location = location
+
+    def to_dict(self) -> dict:
+        """Build the display dict returned by the hotel tools."""
+        return {
+            "name": self.name,
+            "rating": self.rating,
+            "price_per_night": format_price(self.price_paise),
+            "amenities": list(self.amenities),
+            "location": self.location,
+        }
+
+    def __repr__(self) -> str:
+        return f"HotelRecord({self.name!r}, {self.city})"
+
+class ActivityRecord:
+    """A bookable activity in a city."""
+
+    __slots__ = ("name", "city", "category", "duration_minutes", "price_paise",
+                 "rating", "description")
+
+    def __init__(self, name: str, city: str, category: str, duration_minutes: int,
+                 price_paise: int, rating: float, description: str):
+        self.name = name
+        self.city = city
+        self.category = category
+        self.duration_minutes = duration_minutes
+        self.price_paise = price_paise
+        self.rating = rating
+        self.description = description
+
+    @property
+    def is_free(self) -> bool:
+        return self.price_paise == 0
+
+    def to_dict(self) -> dict:
+        """Build the display dict returned by the activity tools."""
+        return {
+            "name": self.name,
+            "category": self.category,
+            "duration": format_duration(self.duration_minutes),
+            "price": FREE_PRICE_LABEL if self.is_free else format_price(self.price_paise),
+            "rating": self.rating,
+            "description": self.description,
+        }
+
+    def __repr__(self) -> str:
+        return f"ActivityRecord({self.name!r}, {self.city})"
+
+# Record type -> getter for its fields in slot order
+_STATE_GETTERS: Dict[type, Callable] = {}
+
+def record_state(record) -> tuple:
+    """A record's fields in slot order, e.g. to size it as JSON (tuple fields encode as arrays)."""
+    getter = _STATE_GETTERS.get(type(record))
+    if getter is None:
+        getter = _STATE_GETTERS[type(record)] = operator.attrgetter(*type(record).__slots__)
+    return getter(record)
+
+# ---------------------------------------------------------------------------
+# Per-city aggregates
+# ---------------------------------------------------------------------------
+
+class HotelCitySummary:
+    """Precomputed hotel aggregates for one city."""
+
+    __slots__ = ("total_hotels", "avg_price_paise", "luxury_options")
+
+    def __init__(self, hotels: Tuple[HotelRecord, ...]):
+        self.total_hotels = len(hotels)
+        self.avg_price_paise = sum(h.price_paise for h in hotels) // len(hotels) if hotels else 0
+        self.luxury_options = sum(1 for h in hotels if h.rating >= 4)
+
+    @classmethod
+    def from_totals(cls, total_hotels: int, avg_price_paise: int, luxury_options: int) -> "HotelCitySummary":
+        """Build a summary from aggregates computed elsewhere (e.g. in SQL)."""
+        summary = cls.__new__(cls)
+        summary.total_hotels = total_hotels
+        summary.avg_price_paise = avg_price_paise
+        summary.luxury_options = luxury_options
+        return summary
+
+    def to_dict(self) -> dict:
+        return {
+            "total_hotels": self.total_hotels,
+            "avg_price": format_price(self.avg_price_paise),
+            "luxury_options": self.luxury_options,
+        }
+
+class ActivityCitySummary:
+    """Precomputed activity aggregates for one city."""
+
+    __slots__ = ("total_activities", "categories", "avg_rating")
+
+    def __init__(self, activities: Tuple[ActivityRecord, ...]):
+        self.total_activities = len(activities)
+        self.categories = tuple(dict.fromkeys(a.category for a in activities))
+        self.avg_rating = round(sum(a.rating for a in activities) / len(activities), 1) if activities else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "total_activities": self.total_activities,
+            "categories": list(self.categories),
+            "avg_rating": self.avg_rating,
+        }
+
+# ---------------------------------------------------------------------------
+# Inventories
+# ---------------------------------------------------------------------------
+
+class FlightInventory:
+    """Flights grouped by (source, destination) route, in schedule order."""
+
+    __slots__ = ("routes", "cities")
+
+    def __init__(self, routes: Dict[Tuple[str, str], Tuple[FlightRecord, ...]]):
+        self.routes = routes
+        self.cities = sorted({city for route in routes for city in route})
+
+    def flights_for(self, source: str, destination: str) -> Optional[Tuple[FlightRecord, ...]]:
+        """Return the flights on a route, or None if the route is not served."""
+        return self.routes.get((source, destination))
+
+class HotelInventory:
+    """Hotels grouped by city, pre-sorted by rating (highest first) then price (lowest first).
+
+    Each amenity has a bit in amenity_bits, and amenity_masks holds every
+    hotel's amenity bitset in the same order as by_city, so an amenity filter
+    is one AND per hotel.
+    """
+
+    __slots__ = ("by_city", "cities", "summaries", "amenity_bits", "amenity_masks")
+
+    def __init__(self, by_city: Dict[str, Tuple[HotelRecord, ...]]):
+        self.by_city = {
+            city: tuple(sorted(hotels, key=lambda h: (-h.rating, h.price_paise)))
+            for city, hotels in by_city.items()
+        }
+        self.cities = sorted(by_city)
+        self.summaries = {city: HotelCitySummary(hotels) for city, hotels in self.by_city.items()}
+        self.amenity_bits = assign_amenity_bits(h.amenities for hotels in self.by_city.values() for h in hotels)
+        self.amenity_masks = {
+            city: tuple(amenity_mask(self.amenity_bits, h.amenities) for h in hotels)
+            for city, hotels in self.by_city.items()
+        }
+
+    def hotels_in(self, city: str) -> Optional[Tuple[HotelRecord, ...]]:
+        """Return the hotels in a city, or None if the city is not covered."""
+        return self.by_city.get(city)
+
+    def hotels_with(self, city: str, amenities: Iterable[str]) -> Optional[List[HotelRecord]]:
+        """Return the hotels in a city offering all of the amenities, or None if the city is not covered."""
+        hotels = self.by_city.get(city)
+        if hotels is None:
+            return None
+        required = amenity_mask(self.amenity_bits, amenities)
+        if required is None:
+            return []
+        return [hotel for hotel, mask in zip(hotels, self.amenity_masks[city]) if mask & required == required]
+
+class ActivityInventory:
+    """Activities grouped by city, pre-sorted by rating (highest first).
+
+    category_postings maps each lower-cased category to its activities per
+    city, in catalog city order and by rating, so a category lookup never
+    scans the other categories.
+    """
+
+    __slots__ = ("by_city", "cities", "categories", "category_names", "category_postings", "summaries")
+
+    def __init__(self, by_city: Dict[str, Tuple[ActivityRecord, ...]]):
+        self.by_city = {
+            city: tuple(sorted(activities, key=lambda a: a.rating, reverse=True))
+            for city, activities in by_city.items()
+        }
+        self.cities = sorted(by_city)
+        self.categories = sorted({a.category for activities in by_city.values() for a in activities})
+        # Lower-cased category -> its first spelling in sorted order
+        self.category_names: Dict[str, str] = {}
+        for category in self.categories:
+            self.category_names.setdefault(category.lower(), category)
+        postings: Dict[str, Dict[str, List[ActivityRecord]]] = {}
+        for city, activities in self.by_city.items():
+            for activity in activities:
+                postings.setdefault(activity.category.lower(), {}).setdefault(city, []).append(activity)
+        self.category_postings = {
+            category: {city: tuple(activities) for city, activities in cities.items()}
+            for category, cities in postings.items()
+        }
+        self.summaries = {city: ActivityCitySummary(activities) for city, activities in self.by_city.items()}
+
+    def activities_in(self, city: str) -> Optional[Tuple[ActivityRecord, ...]]:
+        """Return the activities in a city, or None if the city is not covered."""
+        return self.by_city.get(city)
+
+    def activities_by_category(self, category: str, min_rating: Optional[float] = None,
+                               top_k: Optional[int] = None) -> Dict[str, Tuple[ActivityRecord, ...]]:
+        """Return a category's activities (case-insensitive) per city, cut off by rating and count."""
+        cities = self.category_postings.get(category.lower(), {})
+        if min_rating is None and top_k is None:
+            return dict(cities)
+        by_city = {}
+        for city, activities in cities.items():
+            activities = top_rated(activities, min_rating, top_k)
+            if activities:
+                by_city[city] = activities
+        return by_city
+
+def top_rated(activities: Tuple[ActivityRecord, ...], min_rating: Optional[float] = None,
+              top_k: Optional[int] = None) -> Tuple[ActivityRecord, ...]:
+    """The leading activities of a rating-sorted tuple rated at least min_rating, at most top_k of them."""
+    end = len(activities) if top_k is None else min(top_k, len(activities))
+    if min_rating is not None:
+        end = bisect.bisect_right(activities, -min_rating, hi=end, key=lambda activity: -activity.rating)
+    return activities[:end]
+
+# ---------------------------------------------------------------------------
+# Builders from the mock database layout
+# ---------------------------------------------------------------------------
+
+def catalog_digest(flights_db: Dict[Tuple[str, str], List[dict]], hotels_db: Dict[str, List[dict]],
+                   activities_db: Dict[str, List[dict]]) -> str:
+    """Content hash of a catalog in the mock database layout, used as its catalog version."""
+    catalog = [
+        [[source, destination, flights] for (source, destination), flights in flights_db.items()],
+        list(hotels_db.items()),
+        list(activities_db.items()),
+    ]
+    encoded = json.dumps(catalog, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+def parse_flight(source: str, destination: str, flight: dict) -> FlightRecord:
+    """Parse one FLIGHTS_DB flight on a route into a FlightRecord."""
+    return FlightRecord(
+        flight_number=flight["flight_number"],
+        airline=sys.intern(flight["airline"]),
+        source=source,
+        destination=destination,
+        departure_minutes=parse_clock(flight["departure"]),
+        arrival_minutes=parse_clock(flight["arrival"]),
+        price_paise=parse_price(flight["price"]),
+    )
+
+def parse_hotel(city: str, hotel: dict) -> HotelRecord:
+    """Parse one HOTELS_DB hotel in a city into a HotelRecord."""
+    return HotelRecord(
+        name=hotel["name"],
+        city=city,
+        rating=hotel["rating"],
+        price_paise=parse_price(hotel["price_per_night"]),
+        amenities=tuple(sys.intern(amenity) for amenity in hotel["amenities"]),
+        location=hotel["location"],
+    )
+
+def parse_activity(city: str, activity: dict) -> ActivityRecord:
+    """Parse one ACTIVITIES_DB activity in a city into an ActivityRecord."""
+    return ActivityRecord(
+        name=activity["name"],
+        city=city,
+        category=sys.intern(activity["category"]),
+        duration_minutes=parse_duration(activity["duration"]),
+        price_paise=parse_price(activity["price"]),
+        rating=activity["rating"],
+        description=activity["description"],
+    )
+
+def build_flight_inventory(flights_db: Dict[Tuple[str, str], List[dict]]) -> FlightInventory:
+    """Parse a FLIGHTS_DB-shaped dict into a FlightInventory."""
+    intern = sys.intern
+    routes = {}
+    for (source, destination), flights in flights_db.items():
+        source, destination = intern(source), intern(destination)
+        routes[(source, destination)] = tuple(parse_flight(source, destination, flight) for flight in flights)
+    return FlightInventory(routes)
+
+def build_hotel_inventory(hotels_db: Dict[str, List[dict]]) -> HotelInventory:
+    """Parse a HOTELS_DB-shaped dict into a HotelInventory."""
+    by_city = {}
+    for city, hotels in hotels_db.items():
+        city = sys.intern(city)
+        by_city[city] = tuple(parse_hotel(city, hotel) for hotel in hotels)
+    return HotelInventory(by_city)
+
+def build_activity_inventory(activities_db: Dict[str, List[dict]]) -> ActivityInventory:
+    """Parse an ACTIVITIES_DB-shaped dict into an ActivityInventory."""
+    by_city = {}
+    for city, activities in activities_db.items():
+        city = sys.intern(city)
+        by_city[city] = tuple(parse_activity(city, activity) for activity in activities)
+    return ActivityInventory(by_city)
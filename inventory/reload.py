@@ -0,0 +1,178 @@
+"""
+Hot reload of the inventory catalog.
+
+reload_inventory() swaps in a new catalog without a restart:
+
+1. A new backend is created from the current snapshot or data files, and
+   its derived indexes (the backend's own lookup tables, the city resolver,
+   the route graph, ...) are built, all on the reloading thread.
+2. The new backend becomes active in one reference swap. Tool calls that
+   started earlier stay pinned to the old backend and finish on it; new
+   calls see the new catalog version in their inventory_version.
+3. The old backend is closed once its last pinned call finishes, and its
+   leftover search cache entries are dropped.
+
+Reloads are serialized and each waits for step 3, so at most two catalogs
+are held at any time. Request threads never wait for a reload: they only
+take a short lock to pin a backend.
+
+InventoryWatcher polls the snapshot and data files and reloads when they
+change, so publishing a catalog is `python -m inventory snapshot` (or
+replacing the data files for the memory backend).
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from .backends import InventoryBackend
+from .datafiles import DATA_FILES
+from .store import create_backend, get_backend, retire_backend, set_backend
+from cache_utils import invalidate_search_cache
+from logging_utils import METRICS
+from config import (
+    INVENTORY_BACKEND, INVENTORY_DATA_DIR, INVENTORY_SNAPSHOT_PATH, INVENTORY_RELOAD_INTERVAL_SECONDS,
+)
+
+logger = logging.getLogger('travel_agent.inventory')
+
+RELOADS = METRICS.counter(
+    "travel_agent_inventory_reloads_total", "Inventory reloads by result (swapped, unchanged or failed).",
+    ("result",))
+
+# Functions that build a derived index for a backend, run before it goes live
+_index_builders: List[Callable[[InventoryBackend], Any]] = []
+_reload_lock = threading.Lock()
+
+def register_index_builder(builder: Callable[[InventoryBackend], Any]) -> Callable[[InventoryBackend], Any]:
+    """Have reloads build a derived index (e.g. the city resolver) for a new backend before it goes live."""
+    _index_builders.append(builder)
+    return builder
+
+def reload_inventory(factory: Optional[Callable[[], InventoryBackend]] = None) -> bool:
+    """
+    Load the current catalog into a new backend and make it active.
+
+    Runs on the calling thread, which waits until the replaced backend's
+    pinned calls have finished; call it from a background thread (see
+    InventoryWatcher), not a request thread.
+
+    Args:
+        factory: Creates the new backend. Defaults to the configured kind
+            (inventory.store.create_backend).
+
+    Returns:
+        bool: True if a new backend went live; False if the catalog and
+            backend kind are unchanged or the new catalog failed to load.
+    """
+    with _reload_lock:
+        current = get_backend()
+        started = time.perf_counter()
+        try:
+            backend = (factory or create_backend)()
+        except Exception as e:
+            RELOADS.labels("failed").inc()
+            logger.error("Inventory reload failed, keeping catalog %s: %s", current.catalog_version, e, exc_info=True)
+            return False
+        if (backend.name, backend.catalog_version) == (current.name, current.catalog_version):
+            backend.close()
+            RELOADS.labels("unchanged").inc()
+            logger.info("Inventory unchanged (%s catalog %s)", backend.name, backend.catalog_version)
+            return False
+        try:
+            backend.build_indexes()
+            for builder in _index_builders:
+                builder(backend)
+        except Exception as e:
+            backend.close()
+            RELOADS.labels("failed").inc()
+            logger.error("Building indexes for catalog %s failed, keeping catalog %s: %s",
+                         backend.catalog_version, current.catalog_version, e, exc_info=True)
+            return False
+        built = time.perf_counter() - started
+
+        set_backend(backend)
+        drained = retire_backend(current)
+        # Calls finishing on the old catalog (or an older delta version of it) may have cached results after the swap
+        invalidate_search_cache(
+            predicate=lambda key: any(version != backend.catalog_version for version in key[1]))
+        RELOADS.labels("swapped").inc()
+        logger.info("Inventory reloaded: %s catalog %s (was %s %s), built in %.2fs, old catalog drained in %.2fs",
+                    backend.name, backend.catalog_version, current.name, current.catalog_version, built, drained)
+        return True
+
+def watched_paths() -> List[str]:
+    """Files a new catalog is published to for the configured backend (none for SQLite)."""
+    data_files = [os.path.join(INVENTORY_DATA_DIR, name) for name in DATA_FILES]
+    if INVENTORY_BACKEND == "snapshot":
+        # Without a snapshot file the catalog is served from memory, built from the data files
+        return [INVENTORY_SNAPSHOT_PATH] + data_files
+    if INVENTORY_BACKEND == "memory":
+        return data_files
+    return []
+
+class InventoryWatcher:
+    """Background thread that reloads the inventory when its files change.
+
+    A change is acted on once the files have stayed the same for one more
+    interval, so a publish that replaces several files reloads once.
+    """
+
+    def __init__(self, interval: float, paths: Sequence[str]):
+        self.interval = interval
+        self.paths = list(paths)
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="inventory-reload", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        if self._thread.is_alive():
+            self._stopping.set()
+            self._thread.join()
+
+    def signature(self) -> Tuple[Optional[Tuple[int, int, int]], ...]:
+        """(inode, mtime, size) of each watched file, None for a missing one."""
+        signature = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _run(self):
+        loaded = pending = self.signature()
+        while not self._stopping.wait(self.interval):
+            current = self.signature()
+            if current != pending:
+                pending = current
+            elif current != loaded:
+                reload_inventory()
+                loaded = current
+
+def start_inventory_watcher(interval: float = INVENTORY_RELOAD_INTERVAL_SECONDS) -> Optional[InventoryWatcher]:
+    """
+    Reload the inventory whenever its snapshot or data files change.
+
+    Args:
+        interval: Seconds between checks; 0 disables the watcher.
+
+    Returns:
+        InventoryWatcher: The running watcher (stopped at exit), or None if
+            disabled or the backend has no files to watch (SQLite).
+    """
+    paths = watched_paths()
+    if not interval or not paths:
+        return None
+    watcher = InventoryWatcher(interval, paths)
+    watcher.start()
+    atexit.register(watcher.stop)
+    logger.info("Watching %s for inventory changes every %ss", ", ".join(paths), interval)
+    return watcher
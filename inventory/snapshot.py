@@ -0,0 +1,572 @@
+"""
+Memory-mapped columnar inventory snapshots.
+
+build_snapshot() compiles the flight, hotel and activity databases, with
+their lookup indexes and per-city aggregates, into one binary file of
+fixed-width columns. SnapshotBackend maps that file read-only and decodes
+only the rows a query touches. Opening a snapshot reads a small header, so
+cold start does not depend on catalog size, and worker processes mapping
+the same file share its pages through the OS page cache.
+
+File layout (native byte order, recorded in the header):
+
+    MAGIC | u32 header length | JSON header | padding to 8 bytes | columns
+
+The header records the format version, a catalog version (content hash),
+row counts and each column's offset, byte length and array typecode.
+Rows are stored in the order the backends return them: flights grouped by
+route, hotels by city then rating/price, activities by city then rating.
+Each hotel also has an amenity bitset of one or more 64-bit words
+(hotel_amenity_mask), with bit n standing for the amenity key amenity_key[n].
+
+Build a snapshot of the mock data with:
+
+    python -m inventory snapshot [PATH]
+"""
+
+import array
+import bisect
+import datetime
+import functools
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Tuple
+
+from .backends import InventoryBackend
+from .records import (
+    FlightRecord,
+    HotelRecord,
+    ActivityRecord,
+    HotelCitySummary,
+    ActivityCitySummary,
+    FlightInventory,
+    amenity_mask,
+    assign_amenity_bits,
+    catalog_digest,
+    parse_clock,
+    parse_duration,
+    parse_price,
+)
+
+MAGIC = b"TRVSNAP\0"
+FORMAT_VERSION = 2
+STRING_CACHE_SIZE = 64 * 1024
+_HEADER_LENGTH = struct.Struct("<I")
+
+# City kind flags
+_FLIGHT, _HOTEL, _ACTIVITY = 1, 2, 4
+
+class SnapshotError(ValueError):
+    """Raised when a file is not a readable inventory snapshot."""
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+_WORD_MASK = (1 << 64) - 1
+
+def _mask_words(num_amenities: int) -> int:
+    """64-bit words per hotel amenity bitset."""
+    return max(1, -(-num_amenities // 64))
+
+class _StringTable:
+    """Deduplicated strings, stored as one UTF-8 blob plus offsets."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.ids)
+        return string_id
+
+    def columns(self) -> Dict[str, array.array]:
+        blob = bytearray()
+        offsets = array.array("I", [0])
+        for value in self.ids:  # insertion order == id order
+            blob += value.encode("utf-8")
+            offsets.append(len(blob))
+        return {"string_offsets": offsets, "string_blob": array.array("B", blob)}
+
+def build_snapshot(path: str, flights_db: Dict[Tuple[str, str], List[dict]],
+                   hotels_db: Dict[str, List[dict]],
+                   activities_db: Dict[str, List[dict]]) -> dict:
+    """
+    Compile mock-database-shaped dicts into a snapshot file.
+
+    The file is written next to path and renamed into place, so readers never
+    see a partially written snapshot.
+
+    Args:
+        path: Destination file.
+        flights_db: FLIGHTS_DB-shaped dict.
+        hotels_db: HOTELS_DB-shaped dict.
+        activities_db: ACTIVITIES_DB-shaped dict.
+
+    Returns:
+        dict: The snapshot header (format and catalog version, counts, columns).
+    """
+    strings = _StringTable()
+    cities = sorted({city for route in flights_db for city in route} | set(hotels_db) | set(activities_db))
+    city_code = {city: code for code, city in enumerate(cities)}
+    kinds = array.array("B", bytes(len(cities)))
+    for source, destination in flights_db:
+        kinds[city_code[source]] |= _FLIGHT
+        kinds[city_code[destination]] |= _FLIGHT
+    for city in hotels_db:
+        kinds[city_code[city]] |= _HOTEL
+    for city in activities_db:
+        kinds[city_code[city]] |= _ACTIVITY
+
+    columns: Dict[str, array.array] = {
+        "city_name": array.array("I", (strings.add(city) for city in cities)),
+        "city_kinds": kinds,
+    }
+
+    # Flights, grouped by route in (source, destination) code order
+    route_key, route_start = array.array("Q"), array.array("I", [0])
+    flight_number, airline = array.array("I"), array.array("I")
+    departure, arrival, flight_price = array.array("H"), array.array("H"), array.array("q")
+    for source, destination in sorted(flights_db, key=lambda route: (city_code[route[0]], city_code[route[1]])):
+        route_key.append(city_code[source] * len(cities) + city_code[destination])
+        for flight in flights_db[(source, destination)]:
+            flight_number.append(strings.add(flight["flight_number"]))
+            airline.append(strings.add(flight["airline"]))
+            departure.append(parse_clock(flight["departure"]))
+            arrival.append(parse_clock(flight["arrival"]))
+            flight_price.append(parse_price(flight["price"]))
+        route_start.append(len(flight_number))
+    columns.update(route_key=route_key, route_start=route_start, flight_number=flight_number,
+                   flight_airline=airline, flight_departure=departure, flight_arrival=arrival,
+                   flight_price=flight_price)
+
+    # Hotels, per city by rating (highest first) then price (lowest first)
+    hotel_city_start = array.array("I", [0])
+    hotel_name, hotel_rating, hotel_price = array.array("I"), array.array("B"), array.array("q")
+    hotel_location, amenity_start, amenities = array.array("I"), array.array("I", [0]), array.array("I")
+    summary_total, summary_avg_price, summary_luxury = array.array("I"), array.array("q"), array.array("I")
+    amenity_bits = assign_amenity_bits(hotel["amenities"] for hotels in hotels_db.values() for hotel in hotels)
+    mask_words = _mask_words(len(amenity_bits))
+    amenity_masks = array.array("Q")
+    for city in cities:
+        hotels = sorted(
+            ((hotel["rating"], parse_price(hotel["price_per_night"]), hotel) for hotel in hotels_db.get(city, ())),
+            key=lambda entry: (-entry[0], entry[1]),
+        )
+        for rating, price, hotel in hotels:
+            hotel_name.append(strings.add(hotel["name"]))
+            hotel_rating.append(rating)
+            hotel_price.append(price)
+            hotel_location.append(strings.add(hotel["location"]))
+            amenities.extend(strings.add(amenity) for amenity in hotel["amenities"])
+            amenity_start.append(len(amenities))
+            mask = amenity_mask(amenity_bits, hotel["amenities"])
+            amenity_masks.extend((mask >> (64 * word)) & _WORD_MASK for word in range(mask_words))
+        hotel_city_start.append(len(hotel_name))
+        total = len(hotels)
+        summary_total.append(total)
+        summary_avg_price.append(sum(price for _, price, _ in hotels) // total if total else 0)
+        summary_luxury.append(sum(1 for rating, _, _ in hotels if rating >= 4))
+    columns.update(hotel_city_start=hotel_city_start, hotel_name=hotel_name, hotel_rating=hotel_rating,
+                   hotel_price=hotel_price, hotel_location=hotel_location, hotel_amenity_start=amenity_start,
+                   hotel_amenities=amenities, hotel_summary_total=summary_total,
+                   hotel_summary_avg_price=summary_avg_price, hotel_summary_luxury=summary_luxury,
+                   amenity_key=array.array("I", (strings.add(key) for key in amenity_bits)),
+                   hotel_amenity_mask=amenity_masks)
+
+    # Activities, per city by rating (highest first); category postings in catalog order
+    catalog_position = {city: position for position, city in enumerate(activities_db)}
+    activity_city_start = array.array("I", [0])
+    activity_name, activity_category, activity_duration = array.array("I"), array.array("I"), array.array("I")
+    activity_price, activity_rating, activity_description = array.array("q"), array.array("d"), array.array("I")
+    activity_city_position = array.array("I")
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    for city in cities:
+        for activity in sorted(activities_db.get(city, ()), key=lambda a: -a["rating"]):
+            row = len(activity_name)
+            activity_name.append(strings.add(activity["name"]))
+            activity_category.append(strings.add(activity["category"]))
+            activity_duration.append(parse_duration(activity["duration"]))
+            activity_price.append(parse_price(activity["price"]))
+            activity_rating.append(activity["rating"])
+            activity_description.append(strings.add(activity["description"]))
+            activity_city_position.append(catalog_position[city])
+            postings.setdefault(activity["category"], []).append((catalog_position[city], row))
+        activity_city_start.append(len(activity_name))
+    categories = sorted(postings)
+    category_start, category_rows = array.array("I", [0]), array.array("I")
+    for category in categories:
+        category_rows.extend(row for _, row in sorted(postings[category]))
+        category_start.append(len(category_rows))
+    columns.update(activity_city_start=activity_city_start, activity_name=activity_name,
+                   activity_category=activity_category, activity_duration=activity_duration,
+                   activity_price=activity_price, activity_rating=activity_rating,
+                   activity_description=activity_description, activity_city_position=activity_city_position,
+                   activity_city_order=array.array("I", (city_code[city] for city in activities_db)),
+                   category_name=array.array("I", (strings.add(category) for category in categories)),
+                   category_start=category_start, category_rows=category_rows)
+
+    columns.update(strings.columns())
+
+    # Lay out the columns
+    sections = {}
+    offset = 0
+    for name, column in columns.items():
+        length = len(column) * column.itemsize
+        sections[name] = [offset, length, column.typecode]
+        offset = _align(offset + length)
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        # The same content hash the memory and SQLite backends report for these databases
+        "catalog_version": catalog_digest(flights_db, hotels_db, activities_db),
+        "built_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "byteorder": sys.byteorder,
+        "counts": {
+            "cities": len(cities),
+            "routes": len(route_key),
+            "flights": len(flight_number),
+            "hotels": len(hotel_name),
+            "activities": len(activity_name),
+        },
+        "sections": sections,
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    data_start = _align(len(MAGIC) + _HEADER_LENGTH.size + len(header_bytes))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(MAGIC)
+            out.write(_HEADER_LENGTH.pack(len(header_bytes)))
+            out.write(header_bytes)
+            for name, column in columns.items():
+                out.write(b"\0" * (data_start + sections[name][0] - out.tell()))
+                column.tofile(out)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return header
+
+class _Strings(Sequence):
+    """Read-only view of snapshot strings selected by an id column, for bisect."""
+
+    def __init__(self, snapshot: "Snapshot", ids: memoryview):
+        self._snapshot = snapshot
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index: int) -> str:
+        return self._snapshot.string(self._ids[index])
+
+class Snapshot:
+    """A read-only, memory-mapped snapshot file.
+
+    Columns are exposed as typed memoryviews over the mapping, so nothing is
+    copied until a row is decoded.
+
+    Args:
+        path: Snapshot file written by build_snapshot().
+
+    Raises:
+        SnapshotError: The file is not a snapshot this code can read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.header = self._read_header()
+        except Exception:
+            self._mmap.close()
+            raise
+        data_start = _align(len(MAGIC) + _HEADER_LENGTH.size + self._header_length)
+        view = memoryview(self._mmap)
+        self._views = [view]
+        self.columns: Dict[str, memoryview] = {}
+        for name, (offset, length, typecode) in self.header["sections"].items():
+            column = view[data_start + offset:data_start + offset + length].cast(typecode)
+            self._views.append(column)
+            self.columns[name] = column
+        self.catalog_version: str = self.header["catalog_version"]
+        self.counts: Dict[str, int] = self.header["counts"]
+        self._string_offsets = self.columns["string_offsets"]
+        self._string_blob = self.columns["string_blob"]
+        # Bounded memo: amenities, airlines and categories repeat across rows
+        self.string = functools.lru_cache(maxsize=STRING_CACHE_SIZE)(self._decode)
+        self.city_names = _Strings(self, self.columns["city_name"])
+
+    def _read_header(self) -> dict:
+        prefix = len(MAGIC) + _HEADER_LENGTH.size
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise SnapshotError(f"{self.path} is not an inventory snapshot")
+        (self._header_length,) = _HEADER_LENGTH.unpack(self._mmap[len(MAGIC):prefix])
+        header = json.loads(self._mmap[prefix:prefix + self._header_length])
+        if header["format_version"] != FORMAT_VERSION:
+            raise SnapshotError(f"{self.path} has snapshot format {header['format_version']}, "
+                                f"expected {FORMAT_VERSION}")
+        if header["byteorder"] != sys.byteorder:
+            raise SnapshotError(f"{self.path} was built on a {header['byteorder']}-endian machine")
+        return header
+
+    def _decode(self, string_id: int) -> str:
+        offsets = self._string_offsets
+        return str(self._string_blob[offsets[string_id]:offsets[string_id + 1]], "utf-8")
+
+    def city_code(self, city: str) -> Optional[int]:
+        """Position of a city in the sorted city table, or None if it is not in the snapshot."""
+        code = bisect.bisect_left(self.city_names, city)
+        if code < len(self.city_names) and self.city_names[code] == city:
+            return code
+        return None
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self.columns = {}
+        self._string_offsets = self._string_blob = None
+        self.string.cache_clear()
+        self._mmap.close()
+
+class SnapshotBackend(InventoryBackend):
+    """Backend that serves queries straight from a memory-mapped snapshot.
+
+    Args:
+        path: Snapshot file written by build_snapshot().
+    """
+
+    name = "snapshot"
+
+    def __init__(self, path: str):
+        self.snapshot = Snapshot(path)
+        self.catalog_version = self.snapshot.catalog_version
+
+    @functools.cached_property
+    def _amenity_bits(self) -> Dict[str, int]:
+        """Amenity key -> bit, decoded on the first amenity query."""
+        return {self.snapshot.string(key): bit for bit, key in enumerate(self.snapshot.columns["amenity_key"])}
+
+    @functools.cached_property
+    def _category_indexes(self) -> Dict[str, List[int]]:
+        """Lower-cased category -> indexes of its spellings in category_name, decoded on the first category query."""
+        indexes: Dict[str, List[int]] = {}
+        for index, name in enumerate(self.activity_categories()):
+            indexes.setdefault(name.lower(), []).append(index)
+        return indexes
+
+    def build_indexes(self):
+        # Touch the cached lookup tables so they are decoded now rather than on the first query
+        self._amenity_bits
+        self._category_indexes
+
+    def _required_words(self, amenities) -> Optional[List[Tuple[int, int]]]:
+        """(word, bits) pairs an amenity filter requires, or None if no hotel offers one of the amenities."""
+        required = amenity_mask(self._amenity_bits, amenities)
+        if required is None:
+            return None
+        words = _mask_words(len(self._amenity_bits))
+        return [(word, bits) for word in range(words) if (bits := (required >> (64 * word)) & _WORD_MASK)]
+
+    def _code(self, city: str, kind: int) -> Optional[int]:
+        code = self.snapshot.city_code(city)
+        if code is None or not self.snapshot.columns["city_kinds"][code] & kind:
+            return None
+        return code
+
+    def _cities(self, kind: int) -> List[str]:
+        kinds = self.snapshot.columns["city_kinds"]
+        return [self.snapshot.city_names[code] for code in range(len(kinds)) if kinds[code] & kind]
+
+    # Flights
+
+    def _flight(self, row: int, source: str, destination: str) -> FlightRecord:
+        columns, string = self.snapshot.columns, self.snapshot.string
+        return FlightRecord(string(columns["flight_number"][row]), string(columns["flight_airline"][row]),
+                            source, destination, columns["flight_departure"][row],
+                            columns["flight_arrival"][row], columns["flight_price"][row])
+
+    def _route(self, source: str, destination: str) -> Optional[int]:
+        """Index of a route in the route columns, or None if it is not served."""
+        source_code = self._code(source, _FLIGHT)
+        destination_code = self._code(destination, _FLIGHT)
+        if source_code is None or destination_code is None:
+            return None
+        route_key = self.snapshot.columns["route_key"]
+        key = source_code * len(self.snapshot.city_names) + destination_code
+        route = bisect.bisect_left(route_key, key)
+        if route == len(route_key) or route_key[route] != key:
+            return None
+        return route
+
+    def flights(self, source, destination):
+        route = self._route(source, destination)
+        if route is None:
+            return None
+        start, end = self.snapshot.columns["route_start"][route:route + 2]
+        return tuple(self._flight(row, source, destination) for row in range(start, end))
+
+    def serves_route(self, source, destination):
+        return self._route(source, destination) is not None
+
+    def flight_cities(self):
+        return self._cities(_FLIGHT)
+
+    def flight_inventory(self):
+        num_cities = len(self.snapshot.city_names)
+        route_start = self.snapshot.columns["route_start"]
+        routes = {}
+        for route, key in enumerate(self.snapshot.columns["route_key"]):
+            source = sys.intern(self.snapshot.city_names[key // num_cities])
+            destination = sys.intern(self.snapshot.city_names[key % num_cities])
+            routes[(source, destination)] = tuple(
+                self._flight(row, source, destination)
+                for row in range(route_start[route], route_start[route + 1])
+            )
+        return FlightInventory(routes)
+
+    # Hotels
+
+    def hotels(self, city, max_price_paise=None, min_rating=None, amenities=None):
+        code = self._code(city, _HOTEL)
+        if code is None:
+            return None
+        required = self._required_words(amenities) if amenities else []
+        if required is None:
+            return []
+        columns, string = self.snapshot.columns, self.snapshot.string
+        prices, ratings = columns["hotel_price"], columns["hotel_rating"]
+        amenity_start, amenity_ids = columns["hotel_amenity_start"], columns["hotel_amenities"]
+        masks, words = columns["hotel_amenity_mask"], _mask_words(len(columns["amenity_key"]))
+        start, end = columns["hotel_city_start"][code:code + 2]
+        hotels = []
+        for row in range(start, end):
+            if min_rating is not None and ratings[row] < min_rating:
+                # Rows are sorted by rating, so nothing later can match
+                break
+            if max_price_paise is not None and prices[row] > max_price_paise:
+                continue
+            if required and any(masks[row * words + word] & bits != bits for word, bits in required):
+                continue
+            hotels.append(HotelRecord(
+                string(columns["hotel_name"][row]), city, ratings[row], prices[row],
+                tuple(string(a) for a in amenity_ids[amenity_start[row]:amenity_start[row + 1]]),
+                string(columns["hotel_location"][row]),
+            ))
+        return hotels
+
+    def hotel_amenities(self, city):
+        code = self._code(city, _HOTEL)
+        if code is None:
+            return None
+        columns = self.snapshot.columns
+        start, end = columns["hotel_city_start"][code:code + 2]
+        amenity_start = columns["hotel_amenity_start"]
+        ids = set(columns["hotel_amenities"][amenity_start[start]:amenity_start[end]])
+        return sorted({self.snapshot.string(string_id) for string_id in ids})
+
+    def hotel_summary(self, city):
+        code = self._code(city, _HOTEL)
+        if code is None:
+            return None
+        columns = self.snapshot.columns
+        return HotelCitySummary.from_totals(columns["hotel_summary_total"][code],
+                                            columns["hotel_summary_avg_price"][code],
+                                            columns["hotel_summary_luxury"][code])
+
+    def hotel_cities(self):
+        return self._cities(_HOTEL)
+
+    # Activities
+
+    def _activity(self, row: int, city: str) -> ActivityRecord:
+        columns, string = self.snapshot.columns, self.snapshot.string
+        return ActivityRecord(string(columns["activity_name"][row]), city,
+                              string(columns["activity_category"][row]), columns["activity_duration"][row],
+                              columns["activity_price"][row], columns["activity_rating"][row],
+                              string(columns["activity_description"][row]))
+
+    def _city_activities(self, code: int) -> Tuple[int, int]:
+        return tuple(self.snapshot.columns["activity_city_start"][code:code + 2])
+
+    def activities(self, city, min_rating=None, max_price_paise=None):
+        code = self._code(city, _ACTIVITY)
+        if code is None:
+            return None
+        prices, ratings = self.snapshot.columns["activity_price"], self.snapshot.columns["activity_rating"]
+        start, end = self._city_activities(code)
+        activities = []
+        for row in range(start, end):
+            if min_rating is not None and ratings[row] < min_rating:
+                break
+            if max_price_paise is not None and prices[row] > max_price_paise:
+                continue
+            activities.append(self._activity(row, city))
+        return activities
+
+    def activity_summary(self, city):
+        activities = self.activities(city)
+        return ActivityCitySummary(tuple(activities)) if activities is not None else None
+
+    def activity_cities(self):
+        return self._cities(_ACTIVITY)
+
+    def activity_categories(self):
+        return list(_Strings(self.snapshot, self.snapshot.columns["category_name"]))
+
+    def all_activities(self):
+        by_city = {}
+        for code in self.snapshot.columns["activity_city_order"]:
+            city = self.snapshot.city_names[code]
+            start, end = self._city_activities(code)
+            by_city[city] = [self._activity(row, city) for row in range(start, end)]
+        return by_city
+
+    def activity_city_order(self):
+        return [self.snapshot.city_names[code] for code in self.snapshot.columns["activity_city_order"]]
+
+    def activity_category(self, category):
+        indexes = self._category_indexes.get(category.lower())
+        return self.snapshot.string(self.snapshot.columns["category_name"][indexes[0]]) if indexes else None
+
+    def activities_by_category(self, category, min_rating=None, top_k=None):
+        columns = self.snapshot.columns
+        category_start, category_rows = columns["category_start"], columns["category_rows"]
+        indexes = self._category_indexes.get(category.lower(), ())
+        rows: List[int] = []
+        for index in indexes:
+            rows.extend(category_rows[category_start[index]:category_start[index + 1]])
+        positions = columns["activity_city_position"]
+        if len(indexes) > 1:
+            # Postings are in (catalog city, rating) order; re-merge when several spellings matched
+            rows.sort(key=lambda row: (positions[row], row))
+        ratings, order = columns["activity_rating"], columns["activity_city_order"]
+        by_city: Dict[str, List[ActivityRecord]] = {}
+        city_position, city, activities = None, None, []
+        for row in rows:
+            if positions[row] != city_position:
+                city_position = positions[row]
+                city = self.snapshot.city_names[order[city_position]]
+                activities = []
+            # Each city's rows are by rating, so the cutoffs only skip the tail
+            if min_rating is not None and ratings[row] < min_rating:
+                continue
+            if top_k is not None and len(activities) >= top_k:
+                continue
+            if not activities:
+                by_city[city] = activities
+            activities.append(self._activity(row, city))
+        return by_city
+
+    def close(self):
+        self.snapshot.close()
@@ -0,0 +1,260 @@
+"""
+Process-wide selection of the inventory backend.
+
+The default backend is chosen by INVENTORY_BACKEND in config.py and created on
+first use, so importing the agents never opens a database or snapshot. Call set_backend()
+to swap in another backend (e.g. a larger SQLite catalog) at runtime.
+
+Tool calls run inside pinned_backend() (see inventory_tool), so every lookup
+in one call, including those on the planner's fan-out threads, goes to the
+backend that was active when the call started. A backend replaced by a
+reload stays open until the last call pinned to it finishes (see
+retire_backend and inventory.reload).
+"""
+
+import contextlib
+import contextvars
+import functools
+import gc
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from .backends import InventoryBackend, MemoryBackend, SQLiteBackend
+from .datafiles import load_inventory_data
+from .snapshot import SnapshotBackend, SnapshotError
+from cache_utils import invalidate_search_cache
+from config import (
+    INVENTORY_BACKEND, INVENTORY_DB_PATH, INVENTORY_GC_FREEZE, INVENTORY_GC_TUNING, INVENTORY_SNAPSHOT_PATH,
+    INVENTORY_RELOAD_DRAIN_WARNING_SECONDS,
+)
+
+logger = logging.getLogger('travel_agent.inventory')
+
+T = TypeVar("T")
+
+_backend: Optional[InventoryBackend] = None
+_backend_lock = threading.Lock()
+
+# Calls pinned to each backend, counted by its root (every catalog version a delta
+# feed layers on one base shares the base's count); set_backend swaps under the
+# same condition, so a pin always lands on the backend that is active at that moment
+_pins: "Counter[InventoryBackend]" = Counter()
+_pins_changed = threading.Condition()
+_closed: "weakref.WeakSet[InventoryBackend]" = weakref.WeakSet()
+_pinned: ContextVar[Optional[InventoryBackend]] = ContextVar("travel_agent_inventory_backend", default=None)
+
+def _memory_backend() -> InventoryBackend:
+    return MemoryBackend.from_databases(*load_inventory_data())
+
+def _sqlite_backend() -> InventoryBackend:
+    backend = SQLiteBackend(INVENTORY_DB_PATH)
+    if not backend.is_loaded():
+        logger.info("Populating inventory database %s", INVENTORY_DB_PATH)
+        backend.load(*load_inventory_data())
+    return backend
+
+def _snapshot_backend() -> InventoryBackend:
+    if not os.path.exists(INVENTORY_SNAPSHOT_PATH):
+        logger.info("No inventory snapshot at %s, serving the catalog from memory", INVENTORY_SNAPSHOT_PATH)
+        return _memory_backend()
+    try:
+        backend = SnapshotBackend(INVENTORY_SNAPSHOT_PATH)
+    except SnapshotError as e:
+        logger.warning("Ignoring inventory snapshot: %s; serving the catalog from memory", e)
+        return _memory_backend()
+    logger.info("Mapped inventory snapshot %s (catalog %s)", INVENTORY_SNAPSHOT_PATH, backend.catalog_version)
+    return backend
+
+_BACKEND_FACTORIES = {
+    "memory": _memory_backend,
+    "sqlite": _sqlite_backend,
+    "snapshot": _snapshot_backend,
+}
+
+def create_backend() -> InventoryBackend:
+    """Create a new backend of the configured INVENTORY_BACKEND kind from the current catalog files."""
+    factory = _BACKEND_FACTORIES.get(INVENTORY_BACKEND)
+    if factory is None:
+        raise ValueError(f"Unknown INVENTORY_BACKEND '{INVENTORY_BACKEND}'. "
+                         f"Use one of: {', '.join(_BACKEND_FACTORIES)}")
+    return factory()
+
+def get_backend() -> InventoryBackend:
+    """Return the backend pinned for the current call, else the active one (creating the default on first use)."""
+    backend = _pinned.get()
+    if backend is None:
+        backend = _backend
+    if backend is None:
+        with _backend_lock:
+            if _backend is None:
+                set_backend(create_backend())
+                freeze_catalog()
+            backend = _backend
+    return backend
+
+def freeze_catalog():
+    """Exclude the objects alive now, the loaded catalog among them, from cyclic GC (see INVENTORY_GC_FREEZE)."""
+    if INVENTORY_GC_FREEZE:
+        gc.collect()
+        gc.freeze()
+
+@contextlib.contextmanager
+def gc_paused() -> Iterator[None]:
+    """Pause cyclic GC while building a catalog version (see INVENTORY_GC_TUNING)."""
+    if not INVENTORY_GC_TUNING or not gc.isenabled():
+        yield
+        return
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+@contextlib.contextmanager
+def pinned_backend(backend: Optional[InventoryBackend] = None) -> Iterator[InventoryBackend]:
+    """
+    Serve every get_backend() in this context from one backend.
+
+    The backend is not closed by a reload until every context pinned to it
+    has exited, so a call that started on one catalog version finishes on it.
+
+    Args:
+        backend: Backend to pin, e.g. one pinned by the caller on another
+            thread. Defaults to the backend already pinned, else the active
+            one. A backend that a reload has already closed is replaced by
+            the active one.
+
+    Yields:
+        InventoryBackend: The pinned backend.
+    """
+    if backend is None:
+        backend = _pinned.get()
+    if _backend is None:
+        get_backend()
+    with _pins_changed:
+        if backend is None or backend.root in _closed:
+            backend = _backend
+        root = backend.root
+        _pins[root] += 1
+    token = _pinned.set(backend)
+    try:
+        yield backend
+    finally:
+        _pinned.reset(token)
+        with _pins_changed:
+            _pins[root] -= 1
+            if not _pins[root]:
+                del _pins[root]
+                _pins_changed.notify_all()
+
+def inventory_tool(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Decorator that runs a tool on one pinned backend and reports its catalog version.
+
+    Dict responses get an "inventory_version" key. Apply it below
+    tool_metrics and above cached_search, so cache lookups are pinned too.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs) -> Any:
+        with pinned_backend() as backend:
+            result = func(*args, **kwargs)
+        if isinstance(result, dict):
+            result["inventory_version"] = backend.catalog_version
+        return result
+
+    return wrapper
+
+def bind_backend(task: Callable[[], T]) -> Callable[[], T]:
+    """Wrap a task for another thread so it runs on the backend pinned by the caller."""
+    backend = _pinned.get()
+
+    def run() -> T:
+        with pinned_backend(backend):
+            return task()
+
+    return run
+
+class GeneratorPin:
+    """
+    A backend pin for a generator that yields between its lookups.
+
+    pinned_backend() cannot be held across a yield: the pin would leak into
+    the consumer's context. GeneratorPin keeps the pin in a context of its
+    own and runs the generator's work in it, so every step sees one backend
+    and a reload waits for release() (call it from the generator's finally).
+    """
+
+    def __init__(self, backend: Optional[InventoryBackend] = None):
+        self._context = contextvars.copy_context()
+        self._stack = contextlib.ExitStack()
+        self.backend = self._context.run(self._stack.enter_context, pinned_backend(backend))
+
+    def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Call func on the pinned backend."""
+        return self._context.run(func, *args, **kwargs)
+
+    def release(self):
+        self._context.run(self._stack.close)
+
+def set_backend(backend: InventoryBackend, invalidate_cache: bool = True) -> Optional[InventoryBackend]:
+    """
+    Make a backend the active one for all search tools.
+
+    Cached search results came from the previous backend, so they are dropped.
+
+    Args:
+        backend: The backend to activate.
+        invalidate_cache: False when the caller drops the cached results the
+            change made stale itself (see inventory.deltas).
+
+    Returns:
+        The previously active backend (None if none was created yet); the
+        caller decides whether to close it.
+    """
+    global _backend
+    with _pins_changed:
+        previous, _backend = _backend, backend
+    if invalidate_cache:
+        invalidate_search_cache()
+    logger.info("Inventory backend set to %s", backend.name)
+    return previous
+
+def retire_backend(backend: InventoryBackend) -> float:
+    """
+    Close a backend that is no longer active once no call is pinned to it.
+
+    Waits on the calling thread (a reload thread, never a request thread);
+    calls pinned to the backend keep running until they finish. For a
+    DeltaBackend this retires its base, and so every catalog version layered
+    on it.
+
+    Args:
+        backend: A backend replaced by set_backend.
+
+    Returns:
+        float: Seconds spent waiting for pinned calls.
+    """
+    started = time.monotonic()
+    warned = False
+    root = backend.root
+    with _pins_changed:
+        if _backend is not None and root is _backend.root:
+            raise ValueError("Cannot retire the active inventory backend")
+        while _pins[root]:
+            _pins_changed.wait(INVENTORY_RELOAD_DRAIN_WARNING_SECONDS)
+            if _pins[root] and not warned and time.monotonic() - started >= INVENTORY_RELOAD_DRAIN_WARNING_SECONDS:
+                logger.warning("Still waiting for %s calls on the previous %s backend (catalog %s)",
+                               _pins[root], backend.name, backend.catalog_version)
+                warned = True
+        _closed.add(root)
+    # A frozen catalog is never collected; thaw it so whatever of it is garbage now can be
+    if INVENTORY_GC_FREEZE:
+        gc.unfreeze()
+    root.close()
+    return time.monotonic() - started
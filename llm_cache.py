@@ -0,0 +1,314 @@
+"""
+Model response cache for the travel agents.
+
+Near-identical first turns ("plan a 3-day trip from Delhi to Goa for 2")
+produce the same tool calls and, given the same tool results, the same final
+summary. The agents' before_model_callback serves such turns from a local
+SQLite store instead of calling the model, and after_model_callback stores
+what the model answered.
+
+An entry is keyed on the model, the agent, a hash of its system instruction
+and tool declarations, and the conversation so far: user text normalized (case,
+whitespace, trailing punctuation), tool calls by name and arguments, and tool
+results with volatile fields (LLM_CACHE_IGNORED_RESULT_FIELDS) removed.
+Only model responses are cached, never tool results: a cached tool-call
+decision makes the runner execute the tool again against the current
+inventory, and the summary that follows is looked up with those fresh
+results, so it is never served for results that have since changed.
+
+The store lives at LLM_CACHE_PATH, by default in the user's cache directory
+($XDG_CACHE_HOME or ~/.cache, under travel_agent/) so that it does not depend
+on where the app is started. Entries expire after LLM_CACHE_TTL_SECONDS and
+the least recently used are evicted beyond LLM_CACHE_MAX_ENTRIES /
+LLM_CACHE_MAX_BYTES. The cache is off unless LLM_CACHE_ENABLED is set; the
+session state key LLM_CACHE_BYPASS_STATE_KEY bypasses it for one conversation.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, List, Optional
+
+from config import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_TTL_SECONDS,
+    LLM_CACHE_IGNORED_RESULT_FIELDS,
+)
+from logging_utils import METRICS
+
+logger = logging.getLogger('travel_agent.llm_cache')
+
+# Session state key that turns the cache off for a conversation
+LLM_CACHE_BYPASS_STATE_KEY = "llm_cache_bypass"
+# Invocation-scoped state key (per agent) holding the key of the request the model is answering;
+# temp: state is dropped when the session is persisted
+_PENDING_STATE_KEY = "temp:llm_cache_pending:"
+
+LLM_CACHE_LOOKUPS = METRICS.counter(
+    "travel_agent_llm_cache_lookups_total", "Model response cache lookups by agent and result (hit or miss).",
+    ("agent", "result"))
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?]+$")
+
+def normalize_prompt(text: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation."""
+    return _TRAILING_PUNCTUATION.sub("", _WHITESPACE.sub(" ", text.casefold()).strip())
+
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _strip_volatile(item) for key, item in value.items()
+                if key not in LLM_CACHE_IGNORED_RESULT_FIELDS}
+    if isinstance(value, list):
+        return [_strip_volatile(item) for item in value]
+    return value
+
+def _content_key(content) -> list:
+    """Stable description of one content; call ids and other per-run fields are left out."""
+    parts = []
+    for part in content.parts or ():
+        if part.text:
+            parts.append(["text", normalize_prompt(part.text) if content.role == "user" else part.text])
+        elif part.function_call:
+            parts.append(["call", part.function_call.name, part.function_call.args or {}])
+        elif part.function_response:
+            parts.append(["result", part.function_response.name,
+                          _strip_volatile(part.function_response.response or {})])
+    return [content.role, parts]
+
+def _instruction_text(llm_request) -> str:
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    if instruction is None or isinstance(instruction, str):
+        return instruction or ""
+    # A Content (or list of parts) rather than a string
+    parts = getattr(instruction, "parts", instruction)
+    return "".join(getattr(part, "text", "") or "" for part in parts)
+
+def _tool_declarations(llm_request) -> list:
+    """The tool declarations sent with the request, so a changed signature or docstring splits the key."""
+    tools = llm_request.config.tools if llm_request.config else None
+    return [tool.model_dump(mode="json", exclude_none=True) if hasattr(tool, "model_dump") else repr(tool)
+            for tool in tools or ()]
+
+def request_key(agent_name: str, llm_request) -> str:
+    """
+    Cache key for a model request.
+
+    Args:
+        agent_name: Name of the agent making the request.
+        llm_request: The ADK LlmRequest.
+
+    Returns:
+        str: Hex digest over the model, agent, instruction and tool declarations hash, and conversation.
+    """
+    instruction_hash = hashlib.sha256(_instruction_text(llm_request).encode()).hexdigest()
+    tools_hash = hashlib.sha256(json.dumps(_tool_declarations(llm_request), sort_keys=True, ensure_ascii=False,
+                                           default=str).encode()).hexdigest()
+    described = [
+        llm_request.model,
+        agent_name,
+        instruction_hash,
+        tools_hash,
+        [_content_key(content) for content in llm_request.contents],
+    ]
+    encoded = json.dumps(described, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+class LLMResponseCache:
+    """
+    SQLite-backed response store with per-entry expiry and LRU eviction.
+
+    Safe to share between threads; the connection is opened on first use.
+    """
+
+    def __init__(self, path: str, max_entries: int, max_bytes: int, ttl: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expirations": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )""")
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._connection = connection
+        return self._connection
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the stored response JSON for a key, or None if absent or expired."""
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute("SELECT response, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._counters["misses"] += 1
+                return None
+            if row[1] <= now:
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._counters["hits"] += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        """Store response JSON for a key, evicting least recently used entries over the bounds."""
+        size = len(response.encode())
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now + self.ttl, now))
+            self._counters["stores"] += 1
+            self._evict_over_budget(connection)
+
+    def _evict_over_budget(self, connection: sqlite3.Connection):
+        entries, total = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if entries <= self.max_entries and total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if entries <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            entries -= 1
+            total -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self._counters["evictions"] += len(doomed)
+
+    def clear(self) -> int:
+        """Drop every entry; returns how many there were."""
+        with self._lock:
+            connection = self._connect()
+            dropped = connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            connection.execute("DELETE FROM responses")
+        logger.info("LLM response cache cleared: %s entries dropped", dropped)
+        return dropped
+
+    def stats(self) -> dict:
+        """Counters plus current size."""
+        with self._lock:
+            entries, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": total,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                **self._counters,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+def default_llm_cache_path() -> str:
+    """travel_agent/llm_cache.db in $XDG_CACHE_HOME, or ~/.cache when it is unset."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "travel_agent", "llm_cache.db")
+
+def get_llm_cache() -> LLMResponseCache:
+    """The process-wide response cache, opened on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                path = LLM_CACHE_PATH or default_llm_cache_path()
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                _cache = LLMResponseCache(path, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_BYTES,
+                                          LLM_CACHE_TTL_SECONDS)
+    return _cache
+
+def set_llm_cache(cache: Optional[LLMResponseCache]) -> Optional[LLMResponseCache]:
+    """Replace the process-wide cache (None reopens the configured one on next use); returns the previous one."""
+    global _cache
+    with _cache_lock:
+        previous, _cache = _cache, cache
+    return previous
+
+def _bypassed(callback_context) -> bool:
+    return not LLM_CACHE_ENABLED or bool(callback_context.state.get(LLM_CACHE_BYPASS_STATE_KEY))
+
+def before_model_callback(callback_context, llm_request):
+    """Agent before_model_callback: answer from the cache when the same request was seen."""
+    if _bypassed(callback_context):
+        return None
+    from google.adk.models import LlmResponse
+
+    agent_name = callback_context.agent_name
+    key = request_key(agent_name, llm_request)
+    cached = get_llm_cache().get(key)
+    if cached is None:
+        LLM_CACHE_LOOKUPS.labels(agent_name, "miss").inc()
+        callback_context.state[_PENDING_STATE_KEY + agent_name] = key
+        return None
+    LLM_CACHE_LOOKUPS.labels(agent_name, "hit").inc()
+    logger.debug("LLM cache hit for %s: %s", agent_name, key[:12])
+    return LlmResponse.model_validate_json(cached)
+
+def _take_pending(callback_context) -> Optional[str]:
+    """The key stored by before_model_callback for this agent's model call, cleared once read."""
+    state_key = _PENDING_STATE_KEY + callback_context.agent_name
+    key = callback_context.state.get(state_key)
+    if key is not None:
+        callback_context.state[state_key] = None
+    return key
+
+def after_model_callback(callback_context, llm_response):
+    """Agent after_model_callback: store complete, successful model responses."""
+    if llm_response.partial:
+        # Streamed chunks; the key waits for the final response
+        return None
+    key = _take_pending(callback_context)
+    if key is None or llm_response.error_code or not llm_response.content:
+        return None
+    response = llm_response.model_copy(update={"usage_metadata": None})
+    get_llm_cache().put(key, response.model_dump_json(exclude_none=True))
+    return None
+
+def on_model_error_callback(callback_context, llm_request, error):
+    """Agent on_model_error_callback: forget the pending request; the error propagates."""
+    _take_pending(callback_context)
+    return None
+
+def agent_callbacks() -> dict:
+    """Model callback keyword arguments that put an ADK Agent behind the cache."""
+    return {
+        "before_model_callback": before_model_callback,
+        "after_model_callback": after_model_callback,
+        "on_model_error_callback": on_model_error_callback,
+    }
+
+def get_llm_cache_stats() -> dict:
+    """Hit/miss/eviction counters and size of the model response cache, for monitoring."""
+    return get_llm_cache().stats()
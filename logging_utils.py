@@ -3,10 +3,20 @@ Logging utilities for the travel agent application.
 Provides consistent logging patterns and helper functions.
 """
 
+import atexit
+import bisect
+import copy
+import itertools
 import logging
+import logging.handlers
 import functools
+import os
+import queue
+import threading
 import time
-from typing import Callable, Any, Optional, Dict
+from typing import Callable, Any, Optional, Dict, List, Sequence, TextIO, Tuple
+
+from config import METRICS_ENABLED, METRICS_MAX_LABEL_SETS
 
 def log_function_call(func: Callable) -> Callable:
     """
@@ -23,29 +33,32 @@ def log_function_call(func: Callable) -> Callable:
         logger = logging.getLogger(f'travel_agent.{func.__module__}.{func.__name__}')
         
         # Log function start
-        func_args = ', '.join([str(arg) for arg in args[:2]])  # Log first 2 args only
-        func_kwargs = ', '.join([f"{k}={v}" for k, v in list(kwargs.items())[:3]])  # Log first 3 kwargs
-        
-        logger.info(f"Function called: {func.__name__}({func_args}{', ' if func_kwargs else ''}{func_kwargs})")
+        if logger.isEnabledFor(logging.INFO):
+            func_args = ', '.join([str(arg) for arg in args[:2]])  # Log first 2 args only
+            func_kwargs = ', '.join([f"{k}={v}" for k, v in list(kwargs.items())[:3]])  # Log first 3 kwargs
+            
+            logger.info("Function called: %s(%s%s%s)", func.__name__, func_args, ', ' if func_kwargs else '', func_kwargs)
         
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
             result = func(*args, **kwargs)
-            execution_time = time.time() - start_time
+            elapsed_ns = time.perf_counter_ns() - start_ns
             
             # Log successful completion
             result_status = "unknown"
             if isinstance(result, dict) and "status" in result:
                 result_status = result["status"]
             
-            logger.info(f"Function completed: {func.__name__} - Status: {result_status} - Time: {execution_time:.3f}s")
+            record_tool_call(func.__name__, "", result_status, elapsed_ns)
+            logger.info("Function completed: %s - Status: %s - Time: %.3fs", func.__name__, result_status, elapsed_ns / 1e9)
             
             return result
             
         except Exception as e:
-            execution_time = time.time() - start_time
-            logger.error(f"Function failed: {func.__name__} - Error: {str(e)} - Time: {execution_time:.3f}s", exc_info=True)
+            elapsed_ns = time.perf_counter_ns() - start_ns
+            record_tool_call(func.__name__, "", "exception", elapsed_ns)
+            logger.error("Function failed: %s - Error: %s - Time: %.3fs", func.__name__, e, elapsed_ns / 1e9, exc_info=True)
             raise
     
     return wrapper
@@ -60,7 +73,7 @@ def log_agent_interaction(agent_name: str, action: str, details: str = ""):
         details: Additional details about the action
     """
     logger = logging.getLogger(f'travel_agent.agent_flow')
-    logger.info(f"AGENT: {agent_name} | ACTION: {action} | DETAILS: {details}")
+    logger.info("AGENT: %s | ACTION: %s | DETAILS: %s", agent_name, action, details)
 
 def log_search_metrics(search_type: str, query: str, results_count: int, filters: Optional[Dict] = None):
     """
@@ -72,10 +85,14 @@ def log_search_metrics(search_type: str, query: str, results_count: int, filters
         results_count: Number of results found
         filters: Applied filters
     """
+    if METRICS_ENABLED:
+        SEARCH_RESULTS.labels(search_type, metric_label(query)).observe(results_count)
     logger = logging.getLogger(f'travel_agent.search_metrics')
+    if not logger.isEnabledFor(logging.INFO):
+        return
     
     filters_str = ", ".join([f"{k}={v}" for k, v in (filters or {}).items()])
-    logger.info(f"SEARCH: {search_type} | QUERY: {query} | RESULTS: {results_count} | FILTERS: {filters_str}")
+    logger.info("SEARCH: %s | QUERY: %s | RESULTS: %s | FILTERS: %s", search_type, query, results_count, filters_str)
 
 def log_business_event(event_type: str, event_data: dict):
     """
@@ -86,9 +103,11 @@ def log_business_event(event_type: str, event_data: dict):
         event_data: Event data dictionary
     """
     logger = logging.getLogger(f'travel_agent.business_events')
+    if not logger.isEnabledFor(logging.INFO):
+        return
     
     data_str = ", ".join([f"{k}={v}" for k, v in event_data.items()])
-    logger.info(f"BUSINESS_EVENT: {event_type} | DATA: {data_str}")
+    logger.info("BUSINESS_EVENT: %s | DATA: %s", event_type, data_str)
 
 class LoggingContext:
     """
@@ -98,26 +117,29 @@ class LoggingContext:
     def __init__(self, operation_name: str, logger_name: str = 'travel_agent.operations'):
         self.operation_name = operation_name
         self.logger = logging.getLogger(logger_name)
-        self.start_time: Optional[float] = None
+        self.start_ns = 0
     
     def __enter__(self):
-        self.start_time = time.time()
-        self.logger.info(f"Starting operation: {self.operation_name}")
+        self.start_ns = time.perf_counter_ns()
+        self.logger.info("Starting operation: %s", self.operation_name)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        execution_time = time.time() - (self.start_time or 0)
+        elapsed_ns = time.perf_counter_ns() - self.start_ns
+        execution_time = elapsed_ns / 1e9
+        if METRICS_ENABLED:
+            OPERATION_LATENCY.labels(self.operation_name, "ok" if exc_type is None else "error").observe(elapsed_ns)
         
         if exc_type is None:
-            self.logger.info(f"Operation completed: {self.operation_name} - Time: {execution_time:.3f}s")
+            self.logger.info("Operation completed: %s - Time: %.3fs", self.operation_name, execution_time)
         else:
-            self.logger.error(f"Operation failed: {self.operation_name} - Error: {str(exc_val)} - Time: {execution_time:.3f}s")
+            self.logger.error("Operation failed: %s - Error: %s - Time: %.3fs", self.operation_name, exc_val, execution_time)
         
         return False  # Don't suppress exceptions
     
     def log_step(self, step_name: str, details: str = ""):
         """Log a step within the operation."""
-        self.logger.info(f"  Step: {step_name} | {details}")
+        self.logger.info("  Step: %s | %s", step_name, details)
 
 # Example usage patterns for consistent logging
 def log_travel_plan_start(source: str, destination: str, travelers: int, budget: Optional[int] = None):
@@ -137,4 +159,685 @@ def log_travel_plan_completion(plan_data: dict):
         "destination": plan_data.get("trip_overview", {}).get("destination", "unknown"),
         "total_cost": total_cost,
         "duration": plan_data.get("trip_overview", {}).get("duration_days", "unknown")
-    })
\ No newline at end of file
+    })
+
+# ---------------------------------------------------------------------------
+# Queue-based logging pipeline
+#
+# Request threads only create a record and put it on a bounded queue; a single
+# writer thread formats the queued records, writes them in batches and flushes
+# each handler once per batch. Call sites pass %-style arguments rather than
+# f-strings, so the message is only built when a handler actually emits it
+# (arguments must not be mutated after the call).
+# ---------------------------------------------------------------------------
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the writer and never blocks.
+
+    Once `max_queued` records are waiting, further records are dropped and
+    counted in `dropped` instead of making the caller wait.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_queued: int):
+        super().__init__(log_queue)
+        self.max_queued = max_queued
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the traceback now so its frames are not kept alive in the queue
+        if record.exc_info:
+            record = copy.copy(record)
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.queue.qsize() >= self.max_queued:
+            self.dropped += 1
+        else:
+            self.queue.put(record)
+
+class _BatchFlushMixin:
+    """Write without flushing; the log writer flushes once per batch."""
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+class BatchStreamHandler(_BatchFlushMixin, logging.StreamHandler):
+    """StreamHandler for the log writer thread."""
+
+class BatchFileHandler(_BatchFlushMixin, logging.FileHandler):
+    """FileHandler for the log writer thread."""
+
+class LogWriter:
+    """Background thread that drains the log queue into handlers in batches.
+
+    After the first record of a batch arrives the writer waits `flush_interval`
+    seconds to collect more (unless a full batch is already queued), so request
+    threads are not preempted once per record, then writes up to `batch_size`
+    records and flushes each handler once.
+    """
+
+    _STOP = object()
+
+    def __init__(self, log_queue: queue.SimpleQueue, handlers: List[logging.Handler],
+                 batch_size: int = 256, flush_interval: float = 0.05):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.batches = 0
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Write everything queued so far, then stop the thread and close the handlers."""
+        if self._thread.is_alive():
+            self._stopping.set()
+            self.queue.put(self._STOP)
+            self._thread.join()
+        for handler in self.handlers:
+            handler.close()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            # Collect a batch, unless there is already a full one waiting
+            if self.queue.qsize() < self.batch_size and not self._stopping.is_set():
+                self._stopping.wait(self.flush_interval)
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = False
+            for record in batch:
+                if record is self._STOP:
+                    stopping = True
+                    continue
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            for handler in self.handlers:
+                handler.flush()
+            self.batches += 1
+            if stopping:
+                return
+
+class LogSampler:
+    """Keeps one in every `every` blocks of records for a logger."""
+
+    def __init__(self, every: int):
+        self.every = max(1, every)
+        self._seen = itertools.count()
+
+    def keep(self) -> bool:
+        return next(self._seen) % self.every == 0
+
+# Logger name -> sampler, set by apply_log_sampling
+_SAMPLERS: Dict[str, LogSampler] = {}
+
+def apply_log_sampling(sample_every: Dict[str, int]):
+    """
+    Configure per-logger sampling for verbose blocks of records.
+
+    Args:
+        sample_every: Logger name -> keep one block in this many (1 keeps all).
+    """
+    for name, every in sample_every.items():
+        if every > 1:
+            _SAMPLERS[name] = LogSampler(every)
+        else:
+            _SAMPLERS.pop(name, None)
+
+def sampled(logger: logging.Logger, level: int = logging.INFO) -> bool:
+    """
+    Whether to emit a sampled block of records (e.g. one plan's option listing) on logger.
+
+    Checked before any record is built, so a skipped block costs one counter
+    increment: no LogRecord, no argument formatting, nothing queued.
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    sampler = _SAMPLERS.get(logger.name)
+    return sampler is None or sampler.keep()
+
+def skip_unused_record_fields(log_format: str):
+    """Stop filling LogRecord thread/process fields the format never prints.
+
+    These lookups run on the logging thread for every record, so turning them
+    off makes each logging call cheaper (see the logging HOWTO on optimization).
+    """
+    logging.logThreads = "%(thread" in log_format
+    logging.logProcesses = "%(process)" in log_format
+    logging.logMultiprocessing = "%(processName)" in log_format
+    if hasattr(logging, "logAsyncioTasks"):
+        logging.logAsyncioTasks = "%(taskName)" in log_format
+
+def start_queue_logging(handlers: List[logging.Handler], level: int, max_queued: int = 10_000,
+                        batch_size: int = 256, flush_interval: float = 0.05) -> LogWriter:
+    """
+    Route every record through a queue to a background writer.
+
+    Replaces the root logger's handlers with a DeferredQueueHandler; `handlers`
+    are only called from the writer thread, so use BatchStreamHandler and
+    BatchFileHandler to get one flush per batch. The writer is stopped (and
+    the queue drained) at interpreter exit.
+
+    Args:
+        handlers: Handlers the writer emits to.
+        level: Root logger level.
+        max_queued: Queue bound; records beyond it are dropped, never waited on.
+        batch_size: Maximum records written between flushes.
+        flush_interval: Seconds the writer collects records before writing a batch.
+
+    Returns:
+        LogWriter: The running writer.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    queue_handler = DeferredQueueHandler(log_queue, max_queued)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    METRICS.gauge("travel_agent_log_records_dropped",
+                  "Log records dropped because the log queue was full.").set_function(lambda: queue_handler.dropped)
+    METRICS.gauge("travel_agent_log_queue_depth",
+                  "Log records waiting for the log writer.").set_function(log_queue.qsize)
+
+    writer = LogWriter(log_queue, handlers, batch_size, flush_interval)
+    writer.start()
+    atexit.register(writer.stop)
+    return writer
+
+def build_log_handlers(log_file: Optional[str], stream: Optional[TextIO], log_format: str,
+                       batched: bool) -> List[logging.Handler]:
+    """File and/or stream handlers with the application format.
+
+    Args:
+        log_file: Log file path, or None for no file.
+        stream: Stream such as sys.stdout, or None for no stream output.
+        log_format: Format string for every handler.
+        batched: Build writer-thread handlers that flush once per batch.
+    """
+    stream_class, file_class = ((BatchStreamHandler, BatchFileHandler) if batched
+                                else (logging.StreamHandler, logging.FileHandler))
+    handlers: List[logging.Handler] = []
+    if log_file:
+        handlers.append(file_class(log_file))
+    if stream is not None:
+        handlers.append(stream_class(stream))
+    formatter = logging.Formatter(log_format)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+# ---------------------------------------------------------------------------
+# Metrics
+#
+# Counters, gauges and fixed-bucket histograms kept in process and exported
+# in the Prometheus text format, either over a local HTTP endpoint or as a
+# periodically rewritten file. Recording is a dict lookup for the label set,
+# a bisect over the bucket bounds and an increment under a per-series lock,
+# so it is cheap enough to run on every tool call. Latencies are measured
+# with perf_counter_ns and stored as integer nanoseconds; they are converted
+# to seconds only when rendered.
+# ---------------------------------------------------------------------------
+
+metrics_logger = logging.getLogger('travel_agent.metrics')
+
+NS_PER_SECOND = 10**9
+# Tool and operation latency bucket bounds, in nanoseconds (50us .. 10s)
+LATENCY_BUCKETS_NS = tuple(int(seconds * 1e9) for seconds in (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+))
+# Search result count bucket bounds
+RESULT_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# Replaces label values past a metric's label set limit (all but the first label)
+OVERFLOW_LABEL = "other"
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+class _CounterSeries:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+class _GaugeSeries:
+    __slots__ = ("value", "function", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self.function: Optional[Callable[[], float]] = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from function at export time instead."""
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is None:
+            return self.value
+        try:
+            return self.function()
+        except Exception:
+            metrics_logger.debug("Gauge function failed", exc_info=True)
+            return 0
+
+class _HistogramSeries:
+    __slots__ = ("bounds", "counts", "total", "_lock")
+
+    def __init__(self, bounds: Tuple[int, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last bucket is +Inf
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: int):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+
+    def snapshot(self) -> Tuple[List[int], int]:
+        with self._lock:
+            return list(self.counts), self.total
+
+    def percentile(self, fraction: float) -> Optional[int]:
+        """Upper bound of the bucket holding the given fraction (0..1) of observations.
+
+        Returns None when nothing was observed, and the largest bound when the
+        fraction falls in the +Inf bucket.
+        """
+        counts, _ = self.snapshot()
+        observed = sum(counts)
+        if not observed:
+            return None
+        cumulative = 0
+        for bound, count in zip(self.bounds, counts):
+            cumulative += count
+            if cumulative >= fraction * observed:
+                return bound
+        return self.bounds[-1]
+
+class _Metric:
+    """A named metric family with one series per label set."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 max_label_sets: int = METRICS_MAX_LABEL_SETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_label_sets = max_label_sets
+        self._series: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """
+        The series for one set of label values, created on first use.
+
+        Once max_label_sets series exist, new label sets share one series per
+        first label value with the remaining labels set to OVERFLOW_LABEL, so a
+        stream of unexpected values (e.g. misspelt cities) cannot grow memory
+        or the export without bound.
+        """
+        series = self._series.get(values)
+        if series is not None:
+            return series
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        with self._lock:
+            if values not in self._series and len(self._series) >= self.max_label_sets:
+                values = values[:1] + (OVERFLOW_LABEL,) * (len(values) - 1)
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = self._new_series()
+        return series
+
+    def series(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        with self._lock:
+            return list(self._series.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, series in sorted(self.series(), key=lambda item: item[0]):
+            lines.extend(self._render_series(_format_labels(self.labelnames, values), values, series))
+        return lines
+
+    def _render_series(self, labels: str, values: Tuple[str, ...], series) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. tool calls or cache hits."""
+
+    kind = "counter"
+
+    def _new_series(self):
+        return _CounterSeries()
+
+    def inc(self, amount: int = 1):
+        """Increment the unlabelled series."""
+        self.labels().inc(amount)
+
+    def _render_series(self, labels, values, series):
+        return [f"{self.name}{labels} {_format_value(series.value)}"]
+
+class Gauge(_Metric):
+    """Value that can go up and down, set directly or read from a function at export time."""
+
+    kind = "gauge"
+
+    def _new_series(self):
+        return _GaugeSeries()
+
+    def set(self, value: float):
+        """Set the unlabelled series."""
+        self.labels().set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the unlabelled series from function at export time."""
+        self.labels().set_function(function)
+
+    def _render_series(self, labels, values, series):
+        return [f"{self.name}{labels} {_format_value(series.get())}"]
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram of integer observations (nanoseconds for latencies).
+
+    Observations and bucket bounds are divided by `divisor` on export, e.g.
+    10**9 to export nanosecond observations in seconds.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[int] = LATENCY_BUCKETS_NS, divisor: int = 1,
+                 max_label_sets: int = METRICS_MAX_LABEL_SETS):
+        super().__init__(name, documentation, labelnames, max_label_sets)
+        self.buckets = tuple(sorted(buckets))
+        self.divisor = divisor
+
+    def _new_series(self):
+        return _HistogramSeries(self.buckets)
+
+    def observe(self, value: int):
+        """Record one observation in the unlabelled series."""
+        self.labels().observe(value)
+
+    def _exported(self, value: int):
+        return value if self.divisor == 1 else value / self.divisor
+
+    def _render_series(self, labels, values, series):
+        counts, total = series.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (None,), counts):
+            cumulative += count
+            le = "+Inf" if bound is None else _format_value(self._exported(bound))
+            bucket_labels = _format_labels(self.labelnames, values, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{self.name}_sum{labels} {_format_value(self._exported(total))}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Named metrics, rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, *args, **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, *args, **kwargs)
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge."""
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[int] = LATENCY_BUCKETS_NS, divisor: int = 1) -> Histogram:
+        """Get or create a histogram."""
+        return self._register(Histogram, name, documentation, labelnames, buckets, divisor)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Process-wide registry and the metrics the tools record into
+METRICS = MetricsRegistry()
+TOOL_LATENCY = METRICS.histogram(
+    "travel_agent_tool_latency_seconds", "Tool call latency, cache hits included.",
+    ("tool", "destination"), LATENCY_BUCKETS_NS, divisor=NS_PER_SECOND)
+TOOL_CALLS = METRICS.counter(
+    "travel_agent_tool_calls_total", "Tool calls by response status (success, error or exception).",
+    ("tool", "destination", "status"))
+SEARCH_RESULTS = METRICS.histogram(
+    "travel_agent_search_results", "Results returned per search.",
+    ("tool", "destination"), RESULT_COUNT_BUCKETS)
+OPERATION_LATENCY = METRICS.histogram(
+    "travel_agent_operation_latency_seconds", "LoggingContext operation latency.",
+    ("operation", "outcome"), LATENCY_BUCKETS_NS, divisor=NS_PER_SECOND)
+
+def metric_label(value: Any) -> str:
+    """Normalize a city-like argument for use as a label value ("" when absent)."""
+    return value.strip().lower() if isinstance(value, str) else ""
+
+def record_tool_call(tool: str, destination: str, status: str, elapsed_ns: int):
+    """Record one tool call's latency and status."""
+    if not METRICS_ENABLED:
+        return
+    TOOL_LATENCY.labels(tool, destination).observe(elapsed_ns)
+    TOOL_CALLS.labels(tool, destination, status).inc()
+
+def tool_metrics(tool_name: Optional[str] = None, label: Optional[str] = None,
+                 results: Sequence[str] = ()) -> Callable:
+    """
+    Decorator that records latency, status and result counts for a tool.
+
+    Apply it outermost (above cached_search) so cache hits are measured too.
+    Only metrics are recorded; nothing is logged.
+
+    Args:
+        tool_name: Tool label. Defaults to the function name.
+        label: Parameter whose value is the destination label (e.g. "city").
+        results: Keys of list values in a successful response whose combined
+            length is recorded as the result count.
+
+    Returns:
+        Decorator for the tool function.
+    """
+    def decorator(func: Callable) -> Callable:
+        name = tool_name or func.__name__
+        position = None
+        if label is not None:
+            target = func
+            while hasattr(target, "__wrapped__"):  # e.g. below cached_search
+                target = target.__wrapped__
+            code = target.__code__
+            position = code.co_varnames[:code.co_argcount].index(label)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            if not METRICS_ENABLED:
+                return func(*args, **kwargs)
+            destination = ""
+            if position is not None:
+                destination = metric_label(args[position] if position < len(args) else kwargs.get(label))
+
+            start_ns = time.perf_counter_ns()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                record_tool_call(name, destination, "exception", time.perf_counter_ns() - start_ns)
+                raise
+            elapsed_ns = time.perf_counter_ns() - start_ns
+
+            status = result.get("status", "unknown") if isinstance(result, dict) else "unknown"
+            record_tool_call(name, destination, status, elapsed_ns)
+            if results and status == "success":
+                SEARCH_RESULTS.labels(name, destination).observe(
+                    sum(len(result.get(key) or ()) for key in results))
+            return result
+
+        return wrapper
+
+    return decorator
+
+def start_metrics_server(port: int, host: str = "127.0.0.1",
+                         registry: MetricsRegistry = METRICS) -> "ThreadingHTTPServer":
+    """
+    Serve the registry at http://host:port/metrics from a background thread.
+
+    Args:
+        port: Port to listen on (0 picks a free port; see server.server_address).
+        host: Interface to bind; local only by default.
+        registry: Registry to export.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it.
+    """
+    # Imported here: http.server pulls in the email package, too slow for startup
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            metrics_logger.debug("Metrics request: " + format, *args)
+
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    metrics_logger.info("Metrics endpoint: http://%s:%s/metrics", *server.server_address[:2])
+    return server
+
+class MetricsFileDump:
+    """Background thread that rewrites a Prometheus text file every `interval` seconds.
+
+    The file is written to a temporary name and renamed into place, so a
+    scraper (e.g. node_exporter's textfile collector) never reads a partial
+    export. A final dump is written when stopped.
+    """
+
+    def __init__(self, path: str, interval: float, registry: MetricsRegistry = METRICS):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        if self._thread.is_alive():
+            self._stopping.set()
+            self._thread.join()
+
+    def dump(self):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(self.registry.render())
+        os.replace(temporary, self.path)
+
+    def _run(self):
+        while True:
+            stopping = self._stopping.wait(self.interval)
+            try:
+                self.dump()
+            except OSError as e:
+                metrics_logger.warning("Metrics dump to %s failed: %s", self.path, e)
+            if stopping:
+                return
+
+def start_metrics_file_dump(path: str, interval: float,
+                            registry: MetricsRegistry = METRICS) -> MetricsFileDump:
+    """
+    Periodically write the registry to path in the Prometheus text format.
+
+    Args:
+        path: File to rewrite.
+        interval: Seconds between dumps.
+        registry: Registry to export.
+
+    Returns:
+        MetricsFileDump: The running dumper; it is stopped (after a final dump) at exit.
+    """
+    dumper = MetricsFileDump(path, interval, registry)
+    dumper.start()
+    atexit.register(dumper.stop)
+    metrics_logger.info("Dumping metrics to %s every %ss", path, interval)
+    return dumper
@@ -1,33 +1,106 @@
 import warnings
 import logging
+import os
 import sys
-from logging_utils import log_business_event
-from config import LOG_LEVEL, LOG_FORMAT, LOG_FILE
+from logging_utils import (
+    apply_log_sampling, build_log_handlers, log_business_event, skip_unused_record_fields, start_queue_logging,
+    start_metrics_file_dump, start_metrics_server,
+)
+from config import (
+    LOG_LEVEL, LOG_FORMAT, LOG_FILE, LOG_MODE,
+    LOG_QUEUE_MAX_RECORDS, LOG_QUEUE_BATCH_SIZE, LOG_QUEUE_FLUSH_INTERVAL_SECONDS, LOG_SAMPLE_EVERY,
+    METRICS_ENABLED, METRICS_HTTP_HOST, METRICS_HTTP_PORT, METRICS_DUMP_PATH, METRICS_DUMP_INTERVAL_SECONDS,
+    INVENTORY_RELOAD_INTERVAL_SECONDS,
+    SERVER_HOST, SERVER_PORT, SERVER_MAX_CONCURRENT_SESSIONS, SERVER_MAX_QUEUED_REQUESTS,
+    SERVER_REQUEST_TIMEOUT_SECONDS, SERVER_DRAIN_TIMEOUT_SECONDS,
+)
 
 warnings.filterwarnings("ignore", category=UserWarning, module="google.adk")
 
 # Configure logging
 def setup_logging():
     """Setup centralized logging configuration."""
-    logging.basicConfig(
-        level=getattr(logging, LOG_LEVEL),
-        format=LOG_FORMAT,
-        handlers=[
-            logging.FileHandler(LOG_FILE),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    level = getattr(logging, LOG_LEVEL)
+    skip_unused_record_fields(LOG_FORMAT)
+    if LOG_MODE == "queue":
+        handlers = build_log_handlers(LOG_FILE, sys.stdout, LOG_FORMAT, batched=True)
+        start_queue_logging(handlers, level, LOG_QUEUE_MAX_RECORDS, LOG_QUEUE_BATCH_SIZE,
+                            LOG_QUEUE_FLUSH_INTERVAL_SECONDS)
+    else:
+        logging.basicConfig(
+            level=level,
+            handlers=build_log_handlers(LOG_FILE, sys.stdout, LOG_FORMAT, batched=False)
+        )
+    apply_log_sampling(LOG_SAMPLE_EVERY)
     
     logger = logging.getLogger('travel_agent.main')
-    logger.info("Logging system initialized")
+    logger.info("Logging system initialized (%s mode)", LOG_MODE)
     return logger
 
-def main():
-    """Main function with options for demo or interactive mode."""
+def setup_metrics_export():
+    """Start the configured metrics exporters (HTTP endpoint and/or file dump)."""
+    if not METRICS_ENABLED:
+        return
+    if METRICS_HTTP_PORT is not None:
+        start_metrics_server(METRICS_HTTP_PORT, METRICS_HTTP_HOST)
+    if METRICS_DUMP_PATH:
+        start_metrics_file_dump(METRICS_DUMP_PATH, METRICS_DUMP_INTERVAL_SECONDS)
+
+def setup_inventory_reload():
+    """Reload the inventory when a new snapshot or data files are published."""
+    if INVENTORY_RELOAD_INTERVAL_SECONDS:
+        from inventory import start_inventory_watcher
+
+        start_inventory_watcher(INVENTORY_RELOAD_INTERVAL_SECONDS)
+
+def parse_args(argv=None):
+    """Command line: no command runs the demo; `serve` serves the travel planner over HTTP (see server.py)."""
+    import argparse
+
+    # stub_llm.DEFAULT_CORPUS; stub_llm imports google.adk, which only serving needs
+    stub_corpus = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_corpus.jsonl")
+    parser = argparse.ArgumentParser(description="Travel Agent application")
+    commands = parser.add_subparsers(dest="command")
+    serve = commands.add_parser("serve", help="serve the travel planner agent over HTTP")
+    serve.add_argument("--host", default=SERVER_HOST)
+    serve.add_argument("--port", type=int, default=SERVER_PORT)
+    serve.add_argument("--max-sessions", type=int, default=SERVER_MAX_CONCURRENT_SESSIONS,
+                       help="agent turns running at once")
+    serve.add_argument("--max-queued", type=int, default=SERVER_MAX_QUEUED_REQUESTS,
+                       help="requests waiting for a turn before new ones are rejected with 503")
+    serve.add_argument("--request-timeout", type=float, default=SERVER_REQUEST_TIMEOUT_SECONDS,
+                       help="per-request deadline in seconds, queue wait included")
+    serve.add_argument("--drain-timeout", type=float, default=SERVER_DRAIN_TIMEOUT_SECONDS,
+                       help="seconds admitted requests get to finish on shutdown")
+    serve.add_argument("--stub-model", nargs="?", const=stub_corpus, metavar="CORPUS",
+                       help="answer with the scripted stub model instead of Gemini, offline "
+                            "(default corpus: stub_corpus.jsonl)")
+    serve.add_argument("--stub-think-ms", type=float, default=0.0, help="stub model latency per model turn")
+    return parser.parse_args(argv)
+
+def run_server(args):
+    """Serve the travel planner until SIGTERM or Ctrl+C."""
+    # Imported here: server imports google.adk, which only serving needs
+    from server import build_server, serve
+
+    server = build_server(args.stub_model, args.stub_think_ms, max_sessions=args.max_sessions,
+                          max_queued=args.max_queued, request_timeout=args.request_timeout)
+    serve(server, args.host, args.port, args.drain_timeout)
+
+def main(argv=None):
+    """Main function with options for demo or serving mode."""
+    args = parse_args(argv)
     logger = setup_logging()
+    setup_metrics_export()
+    setup_inventory_reload()
     logger.info("Starting Travel Agent Application")
     
     try:
+        if args.command == "serve":
+            log_business_event("application_started", {"version": "1.0", "mode": "serve"})
+            run_server(args)
+            return
+
         print("Welcome to Travel Agent!!")
         logger.info("Application started successfully")
         log_business_event("application_started", {"version": "1.0", "mode": "demo"})
@@ -35,7 +108,7 @@ def main():
         # Add any additional main application logic here
         
     except Exception as e:
-        logger.error(f"Error in main application: {str(e)}", exc_info=True)
+        logger.error("Error in main application: %s", e, exc_info=True)
         raise
     finally:
         logger.info("Travel Agent Application shutting down")
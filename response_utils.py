@@ -0,0 +1,255 @@
+"""
+Compact tool responses for the travel agent application.
+
+A full tool response lists every option with every field, and all of it is
+serialized into the model context. In compact mode the planner and the search
+tools instead return, per section, the top options (COMPACT_TOP_K, or the
+tool's top_k) as rows of the fields the agents' summaries use
+(COMPACT_FIELDS), with the field names given once under "fields". Strings
+repeated across rows (airlines, amenities, categories) are stored once under
+"strings" and referenced as "@N" when that is shorter. The first field of
+every row is an option id that get_option_details resolves to the full
+record on demand.
+"""
+
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from config import COMPACT_FIELDS, COMPACT_MAX_AMENITIES, COMPACT_TOOL_RESPONSES, COMPACT_TOP_K
+from inventory import inventory_tool
+from logging_utils import tool_metrics
+
+logger = logging.getLogger('travel_agent.responses')
+
+# Explains the format to the model; part of every agent's instruction rather than every response
+COMPACT_FORMAT_INSTRUCTION = (
+    "Compact tool responses list each section's top options as rows of fields[section], with "
+    "\"@N\" standing for strings[N] and found[section] counting all options. When the user asks "
+    "for more about one option, call get_option_details with its id (the first field of its row)."
+)
+STRING_REFERENCE_PREFIX = "@"
+
+def use_compact(compact: Optional[bool]) -> bool:
+    """A tool's compact argument, or COMPACT_TOOL_RESPONSES when it was not given."""
+    return COMPACT_TOOL_RESPONSES if compact is None else bool(compact)
+
+# ---------------------------------------------------------------------------
+# Option ids and items
+# ---------------------------------------------------------------------------
+
+def flight_option_id(flight, date: str) -> str:
+    return f"flight:{flight.source}:{flight.destination}:{date}:{flight.flight_number}"
+
+def connection_option_id(itinerary) -> str:
+    legs = itinerary.legs
+    numbers = "+".join(leg.flight_number for leg in legs)
+    return f"connection:{legs[0].source}:{legs[-1].destination}:{numbers}"
+
+def hotel_option_id(hotel) -> str:
+    return f"hotel:{hotel.city}:{hotel.name}"
+
+def activity_option_id(activity) -> str:
+    return f"activity:{activity.city}:{activity.name}"
+
+def flight_item(flight, date: str) -> dict:
+    """Display dict of a flight priced for a date, with its option id."""
+    return {"id": flight_option_id(flight, date), **flight.to_dict()}
+
+def connection_item(itinerary) -> dict:
+    """Display dict of a connecting itinerary with its option id and a one-line list of its flights."""
+    item = {"id": connection_option_id(itinerary), **itinerary.to_dict()}
+    item["flights"] = " + ".join(f"{leg.airline} {leg.flight_number}" for leg in itinerary.legs)
+    return item
+
+def hotel_item(hotel) -> dict:
+    """Display dict of a hotel with its option id and first COMPACT_MAX_AMENITIES amenities."""
+    item = {"id": hotel_option_id(hotel), **hotel.to_dict()}
+    item["amenities"] = item["amenities"][:COMPACT_MAX_AMENITIES]
+    return item
+
+def activity_item(activity) -> dict:
+    """Display dict of an activity with its option id."""
+    return {"id": activity_option_id(activity), **activity.to_dict()}
+
+# ---------------------------------------------------------------------------
+# Compact responses
+# ---------------------------------------------------------------------------
+
+def _count_strings(value: Any, counts: Counter):
+    if isinstance(value, str):
+        counts[value] += 1
+    elif isinstance(value, list):
+        for item in value:
+            _count_strings(item, counts)
+
+def _replace_strings(value: Any, references: Dict[str, str]) -> Any:
+    if isinstance(value, str):
+        return references.get(value, value)
+    if isinstance(value, list):
+        return [_replace_strings(item, references) for item in value]
+    return value
+
+class CompactResponse:
+    """
+    Builds one compact response from tables of options.
+
+    Add each section with add_options (top-k option rows) or add_rows (a
+    plain table), then call build for the response dict.
+    """
+
+    def __init__(self, top_k: Optional[int] = None):
+        self.top_k = top_k if top_k and top_k > 0 else COMPACT_TOP_K
+        self.tables: Dict[str, List[list]] = {}
+        self.fields: Dict[str, Sequence[str]] = {}
+        self.found: Dict[str, int] = {}
+        self.errors: Dict[str, str] = {}
+
+    def add_options(self, section: str, kind: str, records: Sequence, to_item: Callable[[Any], dict],
+                    pinned: Sequence = ()):
+        """
+        Add the top options of a section as rows of COMPACT_FIELDS[kind].
+
+        Args:
+            section: Response key for the rows.
+            kind: "flight", "connection", "hotel" or "activity".
+            records: The section's records, best first.
+            to_item: Builds a record's display dict, including its "id".
+            pinned: Records to list first whatever their rank (e.g. the ones a
+                plan chose); they count towards top_k but are never cut.
+        """
+        pinned_ids = {id(record) for record in pinned}
+        shown = list(pinned)
+        for record in records:
+            if len(shown) >= self.top_k:
+                break
+            if id(record) not in pinned_ids:
+                shown.append(record)
+        fields = COMPACT_FIELDS[kind]
+        self.add_rows(section, fields, [[item.get(field) for field in fields] for item in map(to_item, shown)])
+        self.found[section] = len(records)
+
+    def add_rows(self, section: str, fields: Sequence[str], rows: List[list]):
+        """Add a table as is."""
+        self.fields[section] = list(fields)
+        self.tables[section] = rows
+
+    def add_error(self, section: str, message: str):
+        """Record a section that has no options (its search failed or found nothing)."""
+        self.errors[section] = message
+
+    def _string_table(self) -> List[str]:
+        """Move repeated strings in the rows to a shared table where that saves space."""
+        counts: Counter = Counter()
+        for rows in self.tables.values():
+            _count_strings(rows, counts)
+        strings: List[str] = []
+        references: Dict[str, str] = {}
+        for value, count in counts.most_common():
+            reference = f"{STRING_REFERENCE_PREFIX}{len(strings)}"
+            # A real value that looks like a reference always goes through the table
+            if value.startswith(STRING_REFERENCE_PREFIX) or count * (len(value) - len(reference)) > len(value) + 3:
+                references[value] = reference
+                strings.append(value)
+        if references:
+            for section, rows in self.tables.items():
+                self.tables[section] = _replace_strings(rows, references)
+        return strings
+
+    def build(self, summary: Dict[str, Any]) -> dict:
+        """
+        Assemble the response.
+
+        Args:
+            summary: Fields that describe the whole response (route, dates,
+                cost estimate, ...), included before the tables.
+
+        Returns:
+            dict: status, the summary fields, the tables with their fields and
+            found counts, errors for empty sections and the shared strings.
+        """
+        strings = self._string_table()
+        response = {"status": "success", **summary, **self.tables}
+        response["fields"] = self.fields
+        if self.found:
+            response["found"] = self.found
+        if self.errors:
+            response["section_errors"] = self.errors
+        if strings:
+            response["strings"] = strings
+        return response
+
+# ---------------------------------------------------------------------------
+# Option details
+# ---------------------------------------------------------------------------
+
+def _find_option(option_id: str) -> Optional[tuple]:
+    """(option type, summary fields, details dict) for an option id, or None if nothing matches."""
+    # Imported here: the agent modules import this one
+    from flight_agent.agent import find_flights, get_route_graph
+    from hotel_agent.agent import find_hotels
+    from activities_agent.agent import find_activities
+
+    kind, _, rest = option_id.strip().partition(":")
+    if kind == "flight":
+        parts = rest.split(":", 3)
+        if len(parts) != 4:
+            return None
+        source, destination, date, number = parts
+        for flight in find_flights(source, destination) or ():
+            if flight.flight_number == number:
+                return kind, {"route": f"{source.title()} to {destination.title()}", "date": date}, flight.to_dict()
+    elif kind == "connection":
+        parts = rest.split(":", 2)
+        if len(parts) != 3:
+            return None
+        source, destination, numbers = parts
+        itinerary = get_route_graph().itinerary(source.lower(), numbers.split("+"))
+        if itinerary is not None and itinerary.legs[-1].destination == destination.lower():
+            return kind, {"route": f"{source.title()} to {destination.title()}"}, itinerary.to_dict()
+    elif kind in ("hotel", "activity"):
+        city, _, name = rest.partition(":")
+        records = (find_hotels if kind == "hotel" else find_activities)(city)
+        for record in records or ():
+            if record.name.lower() == name.lower():
+                return kind, {"city": city.title()}, record.to_dict()
+    return None
+
+@tool_metrics()
+@inventory_tool
+def get_option_details(option_id: str) -> dict:
+    """Gets the full details of one flight, connecting itinerary, hotel or activity from a compact response.
+
+    Args:
+        option_id (str): The option's id, the first field of its row in a compact
+            response (e.g. "hotel:goa:Grand Hyatt Goa").
+
+    Returns:
+        dict: status and the option's full details, or error message.
+    """
+    logger.info("Getting option details: %s", option_id)
+
+    try:
+        option = _find_option(option_id)
+        if option is None:
+            logger.warning("No option matches id %s", option_id)
+            return {
+                "status": "error",
+                "error_message": f"No option with id '{option_id}'. Use an id from the first field of a compact response row."
+            }
+
+        kind, summary, details = option
+        return {
+            "status": "success",
+            "option_id": option_id,
+            "option_type": kind,
+            **summary,
+            "details": details
+        }
+
+    except Exception as e:
+        logger.error("Error getting option details %s: %s", option_id, e, exc_info=True)
+        return {
+            "status": "error",
+            "error_message": f"Error getting option details: {str(e)}"
+        }
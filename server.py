@@ -0,0 +1,373 @@
+"""
+Async serving entry point for the travel planner.
+
+AgentServer runs travel_planner's root agent on the ADK Runner for many
+users at once, on one event loop:
+
+- At most SERVER_MAX_CONCURRENT_SESSIONS turns run at a time. Further
+  requests wait, first come first served, in an admission queue of
+  SERVER_MAX_QUEUED_REQUESTS. When the queue is full a request is rejected
+  at once, so overload shows up as fast 503s rather than growing latency.
+- Each request has a deadline (SERVER_REQUEST_TIMEOUT_SECONDS, or less if
+  the client asks) covering its queue wait and its turn. The request is
+  answered at its deadline, and its turn, which runs as a task of its own,
+  is cancelled. The turn keeps its slot until it has unwound, since a tool
+  it started on a thread may still be running.
+- drain() stops admitting requests and waits for the admitted ones.
+- Synchronous tools run on the runner's tool thread pool, so the loop
+  keeps admitting and answering requests while they run.
+
+create_app() serves it over HTTP with Starlette (POST /run, GET /healthz,
+GET /metrics), and serve() runs that app on uvicorn, draining on SIGTERM
+or Ctrl+C: `python main.py serve`, or `python main.py serve --stub-model`
+to answer with the scripted stub model offline.
+"""
+
+import asyncio
+import contextlib
+import logging
+import signal
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from google.adk.agents.run_config import RunConfig, ToolThreadPoolConfig
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from config import (
+    SERVER_DRAIN_TIMEOUT_SECONDS, SERVER_HOST, SERVER_MAX_CONCURRENT_SESSIONS, SERVER_MAX_QUEUED_REQUESTS,
+    SERVER_PORT, SERVER_REQUEST_TIMEOUT_SECONDS, SERVER_TOOL_THREADS,
+)
+from logging_utils import LATENCY_BUCKETS_NS, METRICS, NS_PER_SECOND
+
+logger = logging.getLogger('travel_agent.server')
+
+APP_NAME = "travel_planner"
+
+REQUESTS = METRICS.counter(
+    "travel_agent_server_requests_total",
+    "Agent server requests by result (ok, rejected, draining, timeout, busy, not_found, error).", ("result",))
+REQUEST_LATENCY = METRICS.histogram(
+    "travel_agent_server_request_seconds", "Agent server request latency, queue wait included, by result.",
+    ("result",), LATENCY_BUCKETS_NS, divisor=NS_PER_SECOND)
+QUEUE_WAIT = METRICS.histogram(
+    "travel_agent_server_queue_wait_seconds", "Time admitted requests waited for a turn.",
+    (), LATENCY_BUCKETS_NS, divisor=NS_PER_SECOND)
+
+class ServerOverloaded(Exception):
+    """The admission queue is full."""
+
+class ServerDraining(Exception):
+    """The server is shutting down and admits no new requests."""
+
+class SessionBusy(Exception):
+    """A turn is already running in the session."""
+
+class SessionNotFound(Exception):
+    """No session with the requested id."""
+
+# Expected failures: exception type -> (result label, HTTP status)
+_FAILURES = {
+    ServerOverloaded: ("rejected", 503),
+    ServerDraining: ("draining", 503),
+    TimeoutError: ("timeout", 504),
+    SessionBusy: ("busy", 409),
+    SessionNotFound: ("not_found", 404),
+}
+
+def _failure(e: Exception) -> Optional[Tuple[str, int]]:
+    """(result label, HTTP status) for an expected failure, else None."""
+    for kind, failure in _FAILURES.items():
+        if isinstance(e, kind):
+            return failure
+    return None
+
+class AdmissionControl:
+    """
+    Bounded concurrency with a bounded queue in front.
+
+    slot() lets max_in_flight holders in at once. Up to max_queued more wait
+    for a slot in arrival order; past that, slot() raises ServerOverloaded
+    without waiting. All methods must be called on the event loop.
+    """
+
+    def __init__(self, max_in_flight: int, max_queued: int):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.in_flight = 0
+        self.queued = 0
+        self.draining = False
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Hold one of the slots, waiting in the queue if none is free."""
+        if self.draining:
+            raise ServerDraining("server is shutting down")
+        # locked() is also True while others are queued, so newcomers can't jump the queue
+        if self._slots.locked() and self.queued >= self.max_queued:
+            raise ServerOverloaded(f"{self.in_flight} requests running and {self.queued} queued")
+        started_ns = time.perf_counter_ns()
+        self.queued += 1
+        self._idle.clear()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            self.queued -= 1
+            self._check_idle()
+            raise
+        self.queued -= 1
+        self.in_flight += 1
+        QUEUE_WAIT.observe(time.perf_counter_ns() - started_ns)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+            self._check_idle()
+
+    def _check_idle(self):
+        if not self.in_flight and not self.queued:
+            self._idle.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """Stop admitting and wait for admitted holders to finish; False if some were still running at timeout."""
+        self.draining = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except TimeoutError:
+            return False
+
+class AgentServer:
+    """Runs agent turns for concurrent users under admission control."""
+
+    def __init__(self, agent: Any = None, max_sessions: int = SERVER_MAX_CONCURRENT_SESSIONS,
+                 max_queued: int = SERVER_MAX_QUEUED_REQUESTS,
+                 request_timeout: float = SERVER_REQUEST_TIMEOUT_SECONDS,
+                 tool_threads: int = SERVER_TOOL_THREADS, session_service: Any = None):
+        """
+        Args:
+            agent: Agent to serve. Defaults to travel_planner.root_agent.
+            max_sessions: Turns running at once.
+            max_queued: Requests waiting for a turn before new ones are rejected.
+            request_timeout: Longest deadline a request gets, queue wait included.
+            tool_threads: Threads for synchronous tools.
+            session_service: ADK session service; in memory by default.
+        """
+        if agent is None:
+            from travel_planner import root_agent as agent
+        self.runner = Runner(app_name=APP_NAME, agent=agent,
+                             session_service=session_service or InMemorySessionService())
+        self.run_config = RunConfig(tool_thread_pool_config=ToolThreadPoolConfig(max_workers=tool_threads))
+        self.admission = AdmissionControl(max_sessions, max_queued)
+        self.request_timeout = request_timeout
+        self._busy: Set[Tuple[str, str]] = set()
+        self._turns: Set[asyncio.Task] = set()
+        METRICS.gauge("travel_agent_server_queue_depth", "Requests waiting for a turn.").set_function(
+            lambda: self.admission.queued)
+        METRICS.gauge("travel_agent_server_in_flight_sessions", "Agent turns running now.").set_function(
+            lambda: self.admission.in_flight)
+
+    def stats(self) -> dict:
+        """Queue depth, turns in flight and limits, for health checks."""
+        admission = self.admission
+        return {
+            "status": "draining" if admission.draining else "ok",
+            "in_flight": admission.in_flight,
+            "queued": admission.queued,
+            "max_in_flight": admission.max_in_flight,
+            "max_queued": admission.max_queued,
+        }
+
+    async def handle(self, message: str, user_id: str = "anonymous", session_id: Optional[str] = None,
+                     timeout: Optional[float] = None) -> dict:
+        """
+        Run one user turn.
+
+        Args:
+            message: The user's message.
+            user_id: User the session belongs to.
+            session_id: Session to continue; a new session when None.
+            timeout: Deadline in seconds, capped at request_timeout.
+
+        Returns:
+            dict: status, session_id, reply (the agent's final text) and elapsed_ms.
+
+        Raises:
+            ServerOverloaded, ServerDraining, SessionBusy, SessionNotFound,
+            TimeoutError (deadline passed), or whatever the runner raised.
+        """
+        started_ns = time.perf_counter_ns()
+        deadline = min(timeout, self.request_timeout) if timeout else self.request_timeout
+        result = "error"
+        # A task of its own, so the request is answered at the deadline: cancelling the runner
+        # only takes effect once the model call or tool it is waiting on returns
+        turn = asyncio.create_task(self._turn(message, user_id, session_id))
+        self._turns.add(turn)
+        turn.add_done_callback(self._turn_done)
+        try:
+            try:
+                reply = await asyncio.wait_for(asyncio.shield(turn), deadline)
+            except BaseException:
+                turn.cancel()
+                raise
+            result = "ok"
+        except Exception as e:
+            result = (_failure(e) or ("error",))[0]
+            raise
+        finally:
+            elapsed_ns = time.perf_counter_ns() - started_ns
+            REQUESTS.labels(result).inc()
+            REQUEST_LATENCY.labels(result).observe(elapsed_ns)
+        reply["elapsed_ms"] = round(elapsed_ns / 1e6, 3)
+        return reply
+
+    def _turn_done(self, turn: asyncio.Task):
+        self._turns.discard(turn)
+        # A turn that failed while its request was still waiting re-raised there; one that
+        # failed unwinding after its deadline has nobody left to tell
+        if not turn.cancelled() and turn.exception() is not None:
+            logger.debug("Turn ended with %r", turn.exception())
+
+    async def _turn(self, message: str, user_id: str, session_id: Optional[str]) -> dict:
+        # Admitted first, so rejected requests never create sessions
+        async with self.admission.slot():
+            sessions = self.runner.session_service
+            if session_id is None:
+                session = await sessions.create_session(app_name=APP_NAME, user_id=user_id)
+            else:
+                session = await sessions.get_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+                if session is None:
+                    raise SessionNotFound(f"no session {session_id} for user {user_id}")
+            key = (user_id, session.id)
+            # Turns in one session must not interleave
+            if key in self._busy:
+                raise SessionBusy(f"a turn is already running in session {session.id}")
+            self._busy.add(key)
+            try:
+                content = types.Content(role="user", parts=[types.Part(text=message)])
+                reply = []
+                events = self.runner.run_async(user_id=user_id, session_id=session.id, new_message=content,
+                                               run_config=self.run_config)
+                # aclosing: on a deadline the runner's generator is closed here, not left to the GC
+                async with contextlib.aclosing(events):
+                    async for event in events:
+                        if event.error_code:
+                            raise RuntimeError(f"agent error {event.error_code}: {event.error_message}")
+                        if event.is_final_response() and event.content and event.content.parts:
+                            reply.extend(part.text for part in event.content.parts if part.text)
+            finally:
+                self._busy.discard(key)
+        return {"status": "success", "session_id": session.id, "reply": "".join(reply)}
+
+    async def drain(self, timeout: float = SERVER_DRAIN_TIMEOUT_SECONDS) -> bool:
+        """Refuse new requests and wait up to timeout for admitted ones; True if they all finished."""
+        logger.info("Draining: %s requests running, %s queued", self.admission.in_flight, self.admission.queued)
+        drained = await self.admission.drain(timeout)
+        if not drained:
+            logger.warning("Drain timed out after %.1fs with %s requests running and %s queued",
+                           timeout, self.admission.in_flight, self.admission.queued)
+        return drained
+
+def create_app(server: AgentServer, drain_timeout: float = SERVER_DRAIN_TIMEOUT_SECONDS):
+    """
+    Starlette app serving an AgentServer.
+
+    POST /run takes {"message": ..., "user_id": ..., "session_id": ...,
+    "timeout_seconds": ...} (all but message optional) and answers with
+    AgentServer.handle's dict, or {"status": "error", "error_message": ...}
+    with 400, 404, 409, 500, 503 (overloaded or draining, with Retry-After)
+    or 504 (deadline). GET /healthz reports AgentServer.stats (503 while
+    draining) and GET /metrics the Prometheus metrics.
+    """
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, PlainTextResponse
+    from starlette.routing import Route
+
+    def error(status: int, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+        return JSONResponse({"status": "error", "error_message": message}, status_code=status, headers=headers)
+
+    async def run(request):
+        try:
+            body = await request.json()
+            message = body["message"]
+            timeout = body.get("timeout_seconds")
+            if not isinstance(message, str) or not (timeout is None or isinstance(timeout, (int, float))):
+                raise TypeError
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return error(400, 'expected a JSON object with a "message" string')
+        try:
+            reply = await server.handle(message, str(body.get("user_id") or "anonymous"), body.get("session_id"),
+                                        timeout)
+        except Exception as e:
+            failure = _failure(e)
+            if failure is None:
+                logger.error("Request failed: %s", e, exc_info=True)
+                return error(500, f"An error occurred: {e}")
+            status = failure[1]
+            return error(status, str(e) or "request deadline exceeded",
+                         {"Retry-After": "1"} if status == 503 else None)
+        return JSONResponse(reply)
+
+    async def healthz(request):
+        stats = server.stats()
+        return JSONResponse(stats, status_code=503 if stats["status"] == "draining" else 200)
+
+    async def metrics(request):
+        return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        # uvicorn has already stopped accepting and waited for open requests; this catches any left
+        await server.drain(drain_timeout)
+
+    return Starlette(routes=[Route("/run", run, methods=["POST"]), Route("/healthz", healthz),
+                             Route("/metrics", metrics)], lifespan=lifespan)
+
+def build_server(stub_corpus: Optional[str] = None, stub_think_ms: float = 0.0, **options) -> AgentServer:
+    """
+    AgentServer for travel_planner's agent, or for one on the scripted stub model.
+
+    Args:
+        stub_corpus: JSONL corpus scripting stub_llm.ScriptedLlm
+            (see load_scripts), to serve offline without Gemini.
+        stub_think_ms: The stub model's latency per model turn.
+        **options: AgentServer options.
+    """
+    agent = None
+    if stub_corpus:
+        from stub_llm import load_scripts
+        from travel_planner.agent import build_travel_planner_agent
+
+        model, _ = load_scripts(stub_corpus)
+        model.think_time_ms = stub_think_ms
+        agent = build_travel_planner_agent(model=model)
+    return AgentServer(agent, **options)
+
+def serve(server: AgentServer, host: str = SERVER_HOST, port: int = SERVER_PORT,
+          drain_timeout: float = SERVER_DRAIN_TIMEOUT_SECONDS):
+    """Serve over HTTP until SIGTERM or Ctrl+C, then drain for up to drain_timeout seconds."""
+    import uvicorn
+
+    # log_config=None keeps main.setup_logging's handlers; request metrics replace the access log
+    config = uvicorn.Config(create_app(server, drain_timeout), host=host, port=port, log_config=None,
+                            access_log=False, timeout_graceful_shutdown=drain_timeout)
+    logger.info("Serving %s on http://%s:%s (%s sessions, queue of %s)", APP_NAME, host, port,
+                server.admission.max_in_flight, server.admission.max_queued)
+    # uvicorn re-raises the shutdown signal once it has drained. Exit normally on SIGTERM, so atexit
+    # hooks (the queue log writer, the metrics file dump) still run
+    previous = signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    try:
+        uvicorn.Server(config).run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+def _exit_on_sigterm(signum, frame):
+    raise SystemExit(0)
@@ -0,0 +1,124 @@
+"""
+Scripted stand-in for the Gemini model, for serving offline and for tests and
+load benchmarks that must not call a real LLM.
+
+ScriptedLlm is an ADK BaseLlm, so it drops into any agent builder in place of
+config.MODEL_NAME (e.g. build_travel_planner_agent(model=ScriptedLlm())) and
+the runner, tool dispatch and session plumbing run exactly as in production.
+For each scripted user message it answers with the scripted tool calls, one
+model turn at a time, and once the script is exhausted replies with a text
+summary; unscripted messages get the text reply straight away. Every model
+turn waits think_time_ms first, standing in for model latency.
+
+stub_corpus.jsonl (DEFAULT_CORPUS) scripts a dozen typical requests; it is
+what `python main.py serve --stub-model` and the load benchmarks replay.
+"""
+
+import asyncio
+import datetime
+import json
+import os
+import re
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from google.adk.models import BaseLlm, LlmCapabilities, LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import Field
+
+# One model turn: the tool calls it makes, as {"name": ..., "args": {...}} dicts
+Turn = List[dict]
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_corpus.jsonl")
+
+def _conversation_position(contents: List[types.Content]) -> Tuple[str, int, List[str]]:
+    """(latest user message, tool-calling model turns since it, names of tools answered since it)."""
+    model_turns = 0
+    answered: List[str] = []
+    for content in reversed(contents):
+        parts = content.parts or []
+        if content.role == "user" and any(part.text for part in parts):
+            message = "".join(part.text for part in parts if part.text)
+            return message, model_turns, answered[::-1]
+        if content.role == "model" and any(part.function_call for part in parts):
+            model_turns += 1
+        answered.extend(part.function_response.name for part in parts if part.function_response)
+    return "", model_turns, answered[::-1]
+
+class ScriptedLlm(BaseLlm):
+    """BaseLlm that replays scripted tool calls with a fixed think time per model turn."""
+
+    model: str = "stub/scripted"
+    think_time_ms: float = 0.0
+    reply_chars: int = 600
+    scripts: Dict[str, List[Turn]] = Field(default_factory=dict)
+    calls: int = 0  # model turns generated, e.g. to check what a cache saved
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [r"stub/.*"]
+
+    @property
+    def capabilities(self) -> LlmCapabilities:
+        return LlmCapabilities(output_schema_and_tools=True)
+
+    def script(self, message: str, turns: List[Turn]):
+        """Answer `message` with these tool-call turns before the final text reply."""
+        self.scripts[message] = turns
+
+    async def generate_content_async(self, llm_request: LlmRequest,
+                                     stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        if self.think_time_ms:
+            await asyncio.sleep(self.think_time_ms / 1000)
+        message, step, answered = _conversation_position(llm_request.contents)
+        turns = self.scripts.get(message, ())
+        if step < len(turns):
+            parts = [
+                types.Part(function_call=types.FunctionCall(name=call["name"], args=call.get("args", {})))
+                for call in turns[step]
+            ]
+        else:
+            parts = [types.Part(text=self._reply(message, answered))]
+        yield LlmResponse(content=types.Content(role="model", parts=parts), turn_complete=True)
+
+    def _reply(self, message: str, answered: List[str]) -> str:
+        summary = f"Scripted reply to {json.dumps(message)} using {', '.join(answered) or 'no tools'}. "
+        return (summary * (self.reply_chars // len(summary) + 1))[:self.reply_chars]
+
+_RELATIVE_DATE = re.compile(r"\{date\+(\d+)\}")
+
+def resolve_dates(value: Any, today: datetime.date) -> Any:
+    """Replace "{date+N}" in string values (nested in lists and dicts) with today + N days."""
+    if isinstance(value, str):
+        return _RELATIVE_DATE.sub(
+            lambda match: (today + datetime.timedelta(days=int(match.group(1)))).isoformat(), value)
+    if isinstance(value, list):
+        return [resolve_dates(item, today) for item in value]
+    if isinstance(value, dict):
+        return {key: resolve_dates(item, today) for key, item in value.items()}
+    return value
+
+def load_scripts(path: str, model: Optional[ScriptedLlm] = None) -> Tuple[ScriptedLlm, List[dict]]:
+    """
+    Read a JSONL corpus and script its tool calls into a ScriptedLlm.
+
+    Each line is {"message": ..., "turns": [[{"name": ..., "args": {...}}, ...], ...]}
+    with optional extra fields (e.g. "id"), which are kept in the returned entries.
+    "{date+N}" in tool arguments becomes the date N days from today.
+
+    Args:
+        path: Corpus file.
+        model: Model to add the scripts to; a new ScriptedLlm by default.
+
+    Returns:
+        tuple: (model, corpus entries in file order).
+    """
+    model = model or ScriptedLlm()
+    entries = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                entry = resolve_dates(json.loads(line), datetime.date.today())
+                model.script(entry["message"], entry.get("turns", []))
+                entries.append(entry)
+    return model, entries
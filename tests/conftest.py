@@ -0,0 +1,114 @@
+"""
+Shared fixtures: a small catalog served by each inventory backend.
+
+The catalog is small enough to check results by hand and has the ties the
+backends must break the same way (hotels of equal rating, activities of
+equal rating in one city). Mumbai has flights only, for connections.
+"""
+
+import pytest
+
+import inventory.store
+from cache_utils import invalidate_search_cache
+from inventory import MemoryBackend, SQLiteBackend, SnapshotBackend, build_snapshot, set_backend
+
+FLIGHTS_DB = {
+    ("delhi", "goa"): [
+        {"flight_number": "AI101", "departure": "06:00", "arrival": "08:30", "price": "₹9,000", "airline": "Air India"},
+        {"flight_number": "6E201", "departure": "09:15", "arrival": "11:45", "price": "₹6,500", "airline": "IndiGo"},
+        {"flight_number": "UK301", "departure": "18:00", "arrival": "20:30", "price": "₹7,200", "airline": "Vistara"},
+    ],
+    ("goa", "delhi"): [
+        {"flight_number": "6E202", "departure": "13:00", "arrival": "15:30", "price": "₹6,800", "airline": "IndiGo"},
+    ],
+    # Connections through Mumbai, one of them too tight and one too long a layover
+    ("delhi", "mumbai"): [
+        {"flight_number": "AI805", "departure": "06:00", "arrival": "08:10", "price": "₹4,000", "airline": "Air India"},
+        {"flight_number": "6E605", "departure": "20:00", "arrival": "22:10", "price": "₹3,000", "airline": "IndiGo"},
+    ],
+    ("mumbai", "goa"): [
+        {"flight_number": "6E531", "departure": "08:40", "arrival": "09:50", "price": "₹1,500", "airline": "IndiGo"},
+        {"flight_number": "AI663", "departure": "09:30", "arrival": "10:40", "price": "₹2,500", "airline": "Air India"},
+    ],
+    ("goa", "mumbai"): [
+        {"flight_number": "AI664", "departure": "14:00", "arrival": "15:10", "price": "₹2,000", "airline": "Air India"},
+    ],
+    ("mumbai", "delhi"): [
+        {"flight_number": "AI806", "departure": "12:00", "arrival": "14:10", "price": "₹3,500", "airline": "Air India"},
+        {"flight_number": "UK944", "departure": "18:00", "arrival": "20:10", "price": "₹5,000", "airline": "Vistara"},
+    ],
+}
+
+HOTELS_DB = {
+    "goa": [
+        {"name": "Sea Breeze Resort", "rating": 5, "price_per_night": "₹12,000",
+         "amenities": ["WiFi", "Pool", "Beach Access", "Spa"], "location": "Calangute"},
+        {"name": "Palm Grove", "rating": 4, "price_per_night": "₹6,000",
+         "amenities": ["WiFi", "Pool"], "location": "Baga"},
+        {"name": "Sunset Inn", "rating": 4, "price_per_night": "₹4,500",
+         "amenities": ["WiFi"], "location": "Anjuna"},
+        {"name": "Backpacker Hostel", "rating": 2, "price_per_night": "₹1,200",
+         "amenities": ["WiFi"], "location": "Arambol"},
+        {"name": "Fort View", "rating": 5, "price_per_night": "₹9,500",
+         "amenities": ["WiFi", "Spa", "Restaurant"], "location": "Panjim"},
+    ],
+    "delhi": [
+        {"name": "The Imperial", "rating": 5, "price_per_night": "₹15,000",
+         "amenities": ["WiFi", "Pool", "Spa", "Restaurant"], "location": "Connaught Place"},
+        {"name": "Budget Stay", "rating": 3, "price_per_night": "₹2,500",
+         "amenities": ["WiFi"], "location": "Paharganj"},
+    ],
+}
+
+ACTIVITIES_DB = {
+    "goa": [
+        {"name": "Scuba Diving", "category": "Adventure", "duration": "3 hours", "price": "₹3,500",
+         "rating": 4.6, "description": "Dive the reefs off Grande Island"},
+        {"name": "Basilica Tour", "category": "Heritage", "duration": "2 hours", "price": "₹free",
+         "rating": 4.4, "description": "Visit the Basilica of Bom Jesus"},
+        {"name": "Spice Farm Visit", "category": "Culinary", "duration": "4 hours", "price": "₹1,200",
+         "rating": 4.4, "description": "Lunch on a spice plantation"},
+        {"name": "Parasailing", "category": "Adventure", "duration": "1 hour", "price": "₹2,000",
+         "rating": 4.2, "description": "Fly over Calangute beach"},
+    ],
+    "delhi": [
+        {"name": "Red Fort Tour", "category": "Heritage", "duration": "3 hours", "price": "₹800",
+         "rating": 4.5, "description": "Explore the Mughal fort"},
+        {"name": "Food Walk", "category": "Culinary", "duration": "2.5 hours", "price": "₹1,500",
+         "rating": 4.7, "description": "Street food in Chandni Chowk"},
+        {"name": "Rock Climbing", "category": "Adventure", "duration": "2 hours", "price": "₹2,500",
+         "rating": 4.1, "description": "Climb at Damdama"},
+    ],
+}
+
+CATALOG = (FLIGHTS_DB, HOTELS_DB, ACTIVITIES_DB)
+
+def _memory(tmp_path):
+    return MemoryBackend.from_databases(*CATALOG)
+
+def _sqlite(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "inventory.db"))
+    backend.load(*CATALOG)
+    return backend
+
+def _snapshot(tmp_path):
+    path = str(tmp_path / "inventory.snapshot")
+    build_snapshot(path, *CATALOG)
+    return SnapshotBackend(path)
+
+BACKENDS = {
+    "memory": _memory,
+    "sqlite": _sqlite,
+    "snapshot": _snapshot,
+}
+
+@pytest.fixture(params=list(BACKENDS))
+def backend(request, tmp_path, monkeypatch):
+    """The test catalog in each backend, active for the search tools for the duration of the test."""
+    backend = BACKENDS[request.param](tmp_path)
+    # Restored after the test, so a backend created before it stays the active one
+    monkeypatch.setattr(inventory.store, "_backend", None)
+    set_backend(backend)
+    yield backend
+    invalidate_search_cache()
+    backend.close()
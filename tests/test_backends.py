@@ -0,0 +1,149 @@
+"""
+The search tools give the same answers on every inventory backend.
+
+Each test runs once per backend (the backend fixture in conftest.py), so
+filters and sorting pushed down into SQL or the snapshot's columns are
+checked against the in-memory implementation's results.
+"""
+
+import pytest
+
+from activities_agent.agent import get_activities_by_category, search_activities
+from flight_agent.agent import search_flights
+from hotel_agent.agent import search_hotels
+
+def _names(records):
+    return [record["name"] for record in records]
+
+# ---------------------------------------------------------------------------
+# Flights
+# ---------------------------------------------------------------------------
+
+def test_flights_in_schedule_order_at_catalog_fares(backend):
+    result = search_flights("Delhi", "Goa", "2030-01-15", compact=False)
+
+    assert result["status"] == "success"
+    assert result["date"] == "2030-01-15"
+    assert result["flights"] == [
+        {"flight_number": "AI101", "departure": "06:00", "arrival": "08:30", "price": "₹9,000", "airline": "Air India"},
+        {"flight_number": "6E201", "departure": "09:15", "arrival": "11:45", "price": "₹6,500", "airline": "IndiGo"},
+        {"flight_number": "UK301", "departure": "18:00", "arrival": "20:30", "price": "₹7,200", "airline": "Vistara"},
+    ]
+
+def test_flights_are_directional(backend):
+    result = search_flights("goa", "DELHI", compact=False)
+
+    assert [flight["flight_number"] for flight in result["flights"]] == ["6E202"]
+
+def test_flights_unserved_route(backend):
+    assert search_flights("Delhi", "Atlantis", compact=False)["status"] == "error"
+
+def test_serves_route_matches_flights(backend):
+    for route in (("delhi", "goa"), ("goa", "delhi"), ("delhi", "atlantis"), ("atlantis", "goa")):
+        assert backend.serves_route(*route) == (backend.flights(*route) is not None)
+
+# ---------------------------------------------------------------------------
+# Hotels
+# ---------------------------------------------------------------------------
+
+def test_hotels_sorted_by_rating_then_price(backend):
+    result = search_hotels("Goa", compact=False)
+
+    assert result["status"] == "success"
+    assert result["hotels_found"] == 5
+    assert _names(result["hotels"]) == ["Fort View", "Sea Breeze Resort", "Sunset Inn", "Palm Grove", "Backpacker Hostel"]
+    assert result["hotels"][0] == {"name": "Fort View", "rating": 5, "price_per_night": "₹9,500",
+                                   "amenities": ["WiFi", "Spa", "Restaurant"], "location": "Panjim"}
+
+@pytest.mark.parametrize("filters, expected", [
+    ({"max_price": 6000}, ["Sunset Inn", "Palm Grove", "Backpacker Hostel"]),
+    ({"min_rating": 4}, ["Fort View", "Sea Breeze Resort", "Sunset Inn", "Palm Grove"]),
+    ({"max_price": 10000, "min_rating": 5}, ["Fort View"]),
+    ({"amenities": ["pool"]}, ["Sea Breeze Resort", "Palm Grove"]),
+    ({"amenities": ["Spa", "POOL"]}, ["Sea Breeze Resort"]),
+    ({"amenities": ["WiFi"], "max_price": 5000}, ["Sunset Inn", "Backpacker Hostel"]),
+])
+def test_hotel_filters(backend, filters, expected):
+    result = search_hotels("goa", compact=False, **filters)
+
+    assert result["status"] == "success"
+    assert _names(result["hotels"]) == expected
+
+def test_hotel_amenity_filter_reports_catalog_spelling(backend):
+    result = search_hotels("Goa", amenities=["beach access"], compact=False)
+
+    assert result["filters_applied"]["amenities"] == ["Beach Access"]
+
+def test_hotels_no_match_lists_offered_amenities(backend):
+    result = search_hotels("Delhi", amenities=["Beach Access"], compact=False)
+
+    assert result["status"] == "error"
+    assert "Pool, Restaurant, Spa, WiFi" in result["error_message"]
+
+def test_hotels_unknown_city(backend):
+    result = search_hotels("Atlantis", compact=False)
+
+    assert result["status"] == "error"
+    assert "Goa" in result["error_message"] and "Delhi" in result["error_message"]
+
+# ---------------------------------------------------------------------------
+# Activities
+# ---------------------------------------------------------------------------
+
+def test_activities_sorted_by_rating_in_catalog_order(backend):
+    result = search_activities("Goa", compact=False)
+
+    assert result["status"] == "success"
+    assert _names(result["activities"]) == ["Scuba Diving", "Basilica Tour", "Spice Farm Visit", "Parasailing"]
+    assert result["activities"][1] == {"name": "Basilica Tour", "category": "Heritage", "duration": "2 hours",
+                                       "price": "₹free", "rating": 4.4,
+                                       "description": "Visit the Basilica of Bom Jesus"}
+
+@pytest.mark.parametrize("filters, expected", [
+    ({"min_rating": 4.4}, ["Scuba Diving", "Basilica Tour", "Spice Farm Visit"]),
+    ({"max_price": 1500}, ["Basilica Tour", "Spice Farm Visit"]),
+    ({"min_rating": 4.5, "max_price": 3000}, []),
+])
+def test_activity_filters(backend, filters, expected):
+    result = search_activities("goa", compact=False, **filters)
+
+    assert result["status"] == "success"
+    assert _names(result["activities"]) == expected
+
+def test_activities_unknown_city(backend):
+    assert search_activities("Atlantis", compact=False)["status"] == "error"
+
+# ---------------------------------------------------------------------------
+# Activities by category
+# ---------------------------------------------------------------------------
+
+def test_activities_by_category_any_case(backend):
+    result = get_activities_by_category("adventure")
+
+    assert result["status"] == "success"
+    assert result["category"] == "Adventure"
+    assert result["cities"] == ["Goa", "Delhi"]
+    assert {city: _names(activities) for city, activities in result["activities_by_city"].items()} == {
+        "Goa": ["Scuba Diving", "Parasailing"],
+        "Delhi": ["Rock Climbing"],
+    }
+
+def test_activities_by_category_min_rating(backend):
+    result = get_activities_by_category("Culinary", min_rating=4.5)
+
+    assert result["cities_with_activities"] == 1
+    assert _names(result["activities_by_city"]["Delhi"]) == ["Food Walk"]
+
+def test_activities_by_category_top_k(backend):
+    result = get_activities_by_category("Adventure", top_k=1)
+
+    assert {city: _names(activities) for city, activities in result["activities_by_city"].items()} == {
+        "Goa": ["Scuba Diving"],
+        "Delhi": ["Rock Climbing"],
+    }
+
+def test_activities_by_unknown_category(backend):
+    result = get_activities_by_category("Nightlife")
+
+    assert result["status"] == "error"
+    assert "Adventure, Culinary, Heritage" in result["error_message"]
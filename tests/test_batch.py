@@ -0,0 +1,114 @@
+"""
+Batch trip planning: each distinct sub-query runs once, plans match the
+single-trip planner's, and failures stay with the trips they affect.
+"""
+
+import copy
+import logging
+
+import pytest
+
+import travel_planner.batch as batch
+from inventory import MemoryBackend, set_backend
+from travel_planner.agent import create_comprehensive_travel_plan
+
+from conftest import ACTIVITIES_DB, FLIGHTS_DB, HOTELS_DB
+
+DATES = {"travel_date": "2030-01-15", "return_date": "2030-01-18"}
+
+TRIPS = [
+    dict(source="Delhi", destination="Goa", budget=60000, travelers=2, **DATES),
+    # Same route; only the hotel filters differ
+    dict(source="Delhi", destination="Goa", preferences="luxury", **DATES),
+    # The reverse route: both flight lookups are shared, the hotels and activities are Delhi's
+    dict(source="Goa", destination="Delhi", **DATES),
+    dict(source="Delhi", destination="Goa", travel_date="15/01/2030"),
+    dict(source="Delhi", destination="Goa", preferences="budget", **DATES),
+]
+# 4 valid trips x 4 sub-queries, of which 8 are distinct
+SUB_QUERIES_RUN, SUB_QUERIES_SHARED = 8, 8
+
+MODES = {
+    "inline": dict(workers=0),
+    "threads": dict(workers=4),
+}
+
+def _comparable(plan: dict) -> dict:
+    return {key: value for key, value in plan.items() if key != "plan_generated_at"}
+
+def _sub_query_counts() -> tuple:
+    return batch.SUB_QUERIES.labels("run").value, batch.SUB_QUERIES.labels("shared").value
+
+def _batches() -> int:
+    counts, _ = batch.BATCH_DURATION.labels().snapshot()
+    return sum(counts)
+
+@pytest.mark.parametrize("mode", list(MODES))
+def test_batch_matches_single_plans_sharing_sub_queries(backend, mode):
+    run, shared = _sub_query_counts()
+    trips, batches = batch.BATCH_TRIPS.labels("success").value, _batches()
+
+    plans = list(batch.plan_trips(TRIPS, **MODES[mode]))
+
+    assert sorted(index for index, _ in plans) == list(range(len(TRIPS)))
+    plans = dict(plans)
+    for index, trip in enumerate(TRIPS):
+        if index == 3:
+            continue
+        assert plans[index]["status"] == "success"
+        assert _comparable(plans[index]) == _comparable(create_comprehensive_travel_plan(**trip))
+    assert _sub_query_counts() == (run + SUB_QUERIES_RUN, shared + SUB_QUERIES_SHARED)
+    assert batch.BATCH_TRIPS.labels("success").value == trips + 4
+    assert _batches() == batches + 1
+
+@pytest.mark.parametrize("mode", list(MODES))
+def test_invalid_trip_gets_an_error_without_stopping_the_batch(backend, mode):
+    plans = dict(batch.plan_trips(TRIPS, **MODES[mode]))
+
+    assert plans[3]["status"] == "error"
+    assert plans[3]["inventory_version"] == backend.catalog_version
+    assert [plans[index]["status"] for index in (0, 1, 2, 4)] == ["success"] * 4
+
+@pytest.mark.parametrize("mode", list(MODES))
+def test_failed_sub_query_marks_its_section_in_every_trip_needing_it(backend, monkeypatch, mode):
+    run_sub_query = batch.run_sub_query
+    calls = []
+
+    def failing(key):
+        calls.append(key)
+        if key == ("flights", "goa", "delhi"):
+            raise RuntimeError("supplier down")
+        return run_sub_query(key)
+
+    monkeypatch.setattr(batch, "run_sub_query", failing)
+
+    plans = dict(batch.plan_trips(TRIPS, **MODES[mode]))
+
+    assert calls.count(("flights", "goa", "delhi")) == 1
+    # Trips 0, 1 and 4 return on it, trip 2 departs on it
+    for index, direction in ((0, "return"), (1, "return"), (2, "outbound"), (4, "return")):
+        assert plans[index]["status"] == "success"
+        assert plans[index]["incomplete_sections"] == [f"{direction}_flights"]
+        assert "supplier down" in plans[index]["flights"][direction]["error_message"]
+    assert "incomplete_sections" not in _comparable(create_comprehensive_travel_plan(**TRIPS[0]))
+
+def test_process_pool_serving_another_catalog_falls_back_to_the_caller(backend, caplog):
+    # The batch pins the fixture's catalog when it starts; the pool forks after another is active
+    flights = copy.deepcopy(FLIGHTS_DB)
+    flights[("delhi", "goa")][0]["price"] = "₹5,900"
+    other = MemoryBackend.from_databases(flights, HOTELS_DB, ACTIVITIES_DB)
+    trips = [TRIPS[3]] + TRIPS[:3]
+    plans = batch.plan_trips(trips, workers=1, processes=True)
+    try:
+        assert next(plans)[1]["status"] == "error"
+        set_backend(other)
+        with caplog.at_level(logging.WARNING, logger="travel_agent.travel_planner.batch"):
+            rest = dict(plans)
+        set_backend(backend)
+    finally:
+        other.close()
+
+    assert "running their sub-queries here" in caplog.text
+    for index, trip in enumerate(trips[1:], 1):
+        assert rest[index]["inventory_version"] == backend.catalog_version
+        assert _comparable(rest[index]) == _comparable(create_comprehensive_travel_plan(**trip))
@@ -0,0 +1,65 @@
+"""
+Category postings answer like a scan of every city's activities, for each
+rating cut-off and count, on each backend and after delta feeds.
+"""
+
+import pytest
+
+from inventory import apply_deltas, get_backend
+
+MIN_RATINGS = [None, 4.1, 4.4, 4.45, 4.7, 5]
+TOP_KS = [None, 1, 2, 10]
+
+DELTAS = [
+    # Re-rated above the city's other Adventure activity
+    {"op": "upsert", "kind": "activity", "city": "goa", "record": {"name": "Parasailing", "rating": 4.8}},
+    # Moved to another category; Delhi's Culinary posting is then the last one
+    {"op": "upsert", "kind": "activity", "city": "goa", "record": {"name": "Spice Farm Visit", "category": "Heritage"}},
+    {"op": "delete", "kind": "activity", "city": "delhi", "record": {"name": "Food Walk"}},
+    # A new city, after the catalog's in city order, and a category spelled differently
+    {"op": "upsert", "kind": "activity", "city": "pune",
+     "record": {"name": "Sinhagad Trek", "category": "ADVENTURE", "duration": "5 hours", "price": "₹600",
+                "rating": 4.4, "description": "Hike to the hill fort"}},
+]
+
+def scan(backend, category: str, min_rating=None, top_k=None) -> dict:
+    """Each city's activities in a category by a pass over all of them, city order kept."""
+    by_city = {}
+    for city, activities in backend.all_activities().items():
+        matches = [activity for activity in activities if activity.category.lower() == category.lower()
+                   and (min_rating is None or activity.rating >= min_rating)]
+        if matches[:top_k]:
+            by_city[city] = matches[:top_k]
+    return by_city
+
+def _names(by_city: dict) -> list:
+    return [(city, [activity.name for activity in activities]) for city, activities in by_city.items()]
+
+def check_postings(backend):
+    categories = backend.activity_categories()
+    assert categories == sorted({activity.category for activities in backend.all_activities().values()
+                                 for activity in activities})
+    for category in categories + [category.upper() for category in categories] + ["Nightlife"]:
+        for min_rating in MIN_RATINGS:
+            for top_k in TOP_KS:
+                assert _names(backend.activities_by_category(category, min_rating, top_k)) == _names(
+                    scan(backend, category, min_rating, top_k)), (category, min_rating, top_k)
+
+def test_postings_match_a_scan(backend):
+    check_postings(backend)
+
+def test_postings_match_a_scan_after_deltas(backend):
+    apply_deltas(DELTAS)
+    updated = get_backend()
+
+    check_postings(updated)
+    assert _names(updated.activities_by_category("adventure")) == [
+        ("goa", ["Parasailing", "Scuba Diving"]), ("delhi", ["Rock Climbing"]), ("pune", ["Sinhagad Trek"])]
+    assert updated.activity_category("culinary") is None
+    assert updated.activity_categories() == ["ADVENTURE", "Adventure", "Heritage"]
+    # One spelling per category whichever was first seen in sorted order
+    assert updated.activity_category("adventure") == "ADVENTURE"
+
+@pytest.mark.parametrize("category, expected", [("Culinary", "Culinary"), ("heritage", "Heritage"), ("Sports", None)])
+def test_catalog_spelling(backend, category, expected):
+    assert backend.activity_category(category) == expected
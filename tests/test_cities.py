@@ -0,0 +1,64 @@
+"""
+City name resolution: exact keys, aliases and hotel locations, prefixes and
+typos on each backend, and the locations the index must not learn.
+"""
+
+import pytest
+
+from hotel_agent.agent import search_hotels
+from inventory import apply_deltas, resolve_city
+from inventory.cities import CityResolver, get_city_resolver
+
+@pytest.mark.parametrize("name, city, match", [
+    ("Goa", "goa", "exact"),
+    ("  DELHI ", "delhi", "exact"),
+    ("New Delhi", "delhi", "alias"),
+    ("Bombay", "mumbai", "alias"),
+    ("Panjim", "goa", "alias"),
+    # Hotel locations
+    ("Calangute", "goa", "alias"),
+    ("Connaught Place", "delhi", "alias"),
+    ("Calangute, North Goa", "goa", "alias"),
+    ("Mum", "mumbai", "prefix"),
+    ("Del", "delhi", "prefix"),
+    ("Mumbia", "mumbai", "fuzzy"),
+    ("Deli", "delhi", "fuzzy"),
+])
+def test_resolves(backend, name, city, match):
+    resolved = get_city_resolver(backend).resolve(name)
+
+    assert (resolved.city, resolved.match) == (city, match)
+
+@pytest.mark.parametrize("name", ["Atlantis", "Bengaluru", "", "Place"])
+def test_unmatched(backend, name):
+    assert get_city_resolver(backend).resolve(name) is None
+
+def test_tools_resolve_and_fall_through(backend):
+    assert search_hotels("Panjim", compact=False)["hotels_found"] == 5
+    assert resolve_city("Atlantis") == "atlantis"
+
+def test_generic_and_ambiguous_locations_are_not_indexed():
+    resolver = CityResolver(["jaipur", "delhi", "kashmir"], {}, [
+        ("Old City", "jaipur"), ("Airport Road", "delhi"), ("Near Railway Station", "delhi"),
+        ("MG Road", "jaipur"), ("MG Road", "delhi"), ("Amer Fort Road", "jaipur"), ("Dal Lake", "kashmir"),
+    ])
+
+    assert resolver.resolve("Old City") is None
+    assert resolver.resolve("Airport Road") is None
+    assert resolver.resolve("MG Road") is None
+    assert (resolver.resolve("Amer Fort Road").city, resolver.resolve("Dal Lake").city) == ("jaipur", "kashmir")
+    # A location must be a close match, not a shared generic word
+    assert resolver.resolve("Lake") is None
+    assert resolver.resolve("Road") is None
+
+def test_index_follows_deltas(backend):
+    apply_deltas([{"op": "upsert", "kind": "hotel", "city": "pune",
+                   "record": {"name": "Koregaon House", "rating": 4, "price_per_night": "₹3,000",
+                              "amenities": ["WiFi"], "location": "Koregaon Park"}}])
+
+    assert resolve_city("Pune") == "pune"
+    assert resolve_city("Pun") == "pune"
+
+    apply_deltas([{"op": "delete", "kind": "hotel", "city": "pune", "record": {"name": "Koregaon House"}}])
+
+    assert get_city_resolver().resolve("Pune") is None
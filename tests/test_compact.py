@@ -0,0 +1,119 @@
+"""
+Compact responses: every row is the full record's fields, in the full
+response's order, and its id resolves through get_option_details to that
+record on each backend.
+"""
+
+import pytest
+
+from activities_agent.agent import search_activities
+from config import COMPACT_MAX_AMENITIES, COMPACT_TOP_K
+from flight_agent.agent import search_flights
+from hotel_agent.agent import search_hotels
+from inventory import apply_deltas
+from response_utils import STRING_REFERENCE_PREFIX, CompactResponse, get_option_details
+from travel_planner.agent import create_comprehensive_travel_plan
+
+DATE = "2030-01-15"
+
+def _rows(response: dict, section: str) -> list:
+    """A compact section's rows as dicts, with string references resolved."""
+    strings = response.get("strings", [])
+
+    def resolve(value):
+        if isinstance(value, str) and value.startswith(STRING_REFERENCE_PREFIX):
+            return strings[int(value[len(STRING_REFERENCE_PREFIX):])]
+        if isinstance(value, list):
+            return [resolve(item) for item in value]
+        return value
+
+    return [dict(zip(response["fields"][section], map(resolve, row))) for row in response[section]]
+
+def _check_round_trip(rows: list, records: list, kind: str):
+    """Each row is its record's fields and its id's details are the whole record."""
+    for row, record in zip(rows, records, strict=True):
+        details = get_option_details(row["id"])
+        assert details["status"] == "success"
+        assert details["option_type"] == kind
+        assert details["details"] == record
+        expected = {field: record.get(field) for field in row if field != "id"}
+        if kind == "hotel":
+            expected["amenities"] = record["amenities"][:COMPACT_MAX_AMENITIES]
+        if kind == "connection":
+            expected["flights"] = " + ".join(f"{leg['airline']} {leg['flight_number']}" for leg in record["legs"])
+        assert {field: value for field, value in row.items() if field != "id"} == expected
+
+@pytest.mark.parametrize("search, args, section, kind", [
+    (search_flights, ("Delhi", "Goa", DATE), "flights", "flight"),
+    (search_flights, ("Delhi", "Mumbai", DATE), "flights", "flight"),
+    (search_hotels, ("Goa",), "hotels", "hotel"),
+    (search_hotels, ("Delhi",), "hotels", "hotel"),
+    (search_activities, ("Goa",), "activities", "activity"),
+])
+@pytest.mark.parametrize("top_k", [None, 1, 10])
+def test_search_rows_round_trip(backend, search, args, section, kind, top_k):
+    full = search(*args, compact=False)[section]
+
+    compact = search(*args, compact=True, top_k=top_k)
+
+    assert compact["found"][section] == len(full)
+    rows = _rows(compact, section)
+    assert len(rows) == min(top_k or COMPACT_TOP_K, len(full))
+    _check_round_trip(rows, full[:len(rows)], kind)
+
+def test_connecting_rows_round_trip(backend):
+    # Without the only direct flight, Goa to Delhi falls back to connections through Mumbai
+    apply_deltas([{"op": "delete", "kind": "flight", "source": "goa", "destination": "delhi",
+                   "record": {"flight_number": "6E202"}}])
+    full = search_flights("Goa", "Delhi", DATE, compact=False)["connecting_flights"]
+
+    compact = search_flights("Goa", "Delhi", DATE, compact=True)
+
+    assert "flights" not in compact and compact["found"]["connecting_flights"] == len(full)
+    _check_round_trip(_rows(compact, "connecting_flights"), full, "connection")
+
+def test_plan_rows_round_trip_with_the_chosen_options_first(backend):
+    compact = create_comprehensive_travel_plan("Delhi", "Goa", DATE, "2030-01-18", compact=True)
+    chosen = compact["optimized_plan"]
+
+    outbound = _rows(compact, "outbound_flights")
+    assert f"{outbound[0]['airline']} {outbound[0]['flight_number']}" == chosen["outbound"]
+    assert _rows(compact, "hotels")[0]["name"] == chosen["hotel"].rsplit(" (", 1)[0]
+    activities = [row["name"] for row in _rows(compact, "activities")]
+    assert activities[:len(chosen["activities"])] == chosen["activities"]
+    for section, kind, search in (
+            ("outbound_flights", "flight", lambda: search_flights("Delhi", "Goa", DATE, compact=False)["flights"]),
+            ("return_flights", "flight", lambda: search_flights("Goa", "Delhi", "2030-01-18", compact=False)["flights"]),
+            ("hotels", "hotel", lambda: search_hotels("Goa", compact=False)["hotels"]),
+            ("activities", "activity", lambda: search_activities("Goa", compact=False)["activities"])):
+        records = {record["flight_number" if kind == "flight" else "name"]: record for record in search()}
+        rows = _rows(compact, section)
+        _check_round_trip(rows, [records[row["flight_number" if kind == "flight" else "name"]] for row in rows], kind)
+
+@pytest.mark.parametrize("option_id", [
+    "hotel:goa:Nowhere Inn",
+    "activity:atlantis:Scuba Diving",
+    "flight:delhi:goa:2030-01-15:XX999",
+    "flight:delhi:goa",
+    "connection:delhi:goa:AI805+XX1",
+    # A real itinerary, but not between these cities
+    "connection:delhi:mumbai:AI805+AI663",
+    "cruise:goa:Sunset Cruise",
+    "",
+])
+def test_unknown_ids_are_errors(backend, option_id):
+    result = get_option_details(option_id)
+
+    assert result["status"] == "error"
+    assert f"No option with id '{option_id}'" in result["error_message"]
+
+def test_string_table_keeps_values_that_look_like_references():
+    response = CompactResponse()
+    rows = [["Beach Access Resort", "@home", ["Beach Access", "Beach Access"]],
+            ["Beach Access Resort", "@0", ["Beach Access"]]]
+    response.add_rows("hotels", ("name", "tag", "amenities"), [list(row) for row in rows])
+
+    built = response.build({})
+
+    assert built["strings"]
+    assert [list(row.values()) for row in _rows(built, "hotels")] == rows
@@ -0,0 +1,99 @@
+"""
+Connecting-flight search: itineraries respect the connection and layover
+bounds, never revisit a city, and are the k best by brute force.
+"""
+
+import pytest
+
+from flight_agent.agent import get_route_graph, search_connecting_flights
+from flight_agent.connections import MINUTES_PER_DAY
+from config import MAX_LAYOVER_MINUTES, MIN_CONNECTION_MINUTES
+
+def _layovers(itinerary) -> list:
+    return [departure - (previous_departure + leg.duration_minutes)
+            for leg, previous_departure, departure in zip(itinerary.legs, itinerary.departures,
+                                                          itinerary.departures[1:])]
+
+def brute_force(graph, source, destination, min_connection, max_layover, max_stops=2) -> list:
+    """(price, elapsed) of every connecting itinerary, each leg at its first feasible departure."""
+    found = []
+
+    def extend(city, arrival, first_departure, price, visited):
+        for next_city, flights in graph.out_routes.get(city, {}).items():
+            if next_city in visited:
+                continue
+            for flight in flights:
+                earliest = arrival + min_connection
+                departure = earliest + (flight.departure_minutes - earliest) % MINUTES_PER_DAY
+                if departure - arrival > max_layover:
+                    continue
+                next_arrival = departure + flight.duration_minutes
+                if next_city == destination:
+                    found.append((price + flight.price_paise, next_arrival - first_departure))
+                elif len(visited) <= max_stops:
+                    extend(next_city, next_arrival, first_departure, price + flight.price_paise,
+                           visited | {next_city})
+
+    for city, flights in graph.out_routes.get(source, {}).items():
+        if city in (source, destination):
+            continue
+        for flight in flights:
+            extend(city, flight.departure_minutes + flight.duration_minutes, flight.departure_minutes,
+                   flight.price_paise, {source, city})
+    return found
+
+def check_itineraries(itineraries, source, destination, min_connection, max_layover):
+    for itinerary in itineraries:
+        cities = [itinerary.legs[0].source] + [leg.destination for leg in itinerary.legs]
+        assert cities[0] == source and cities[-1] == destination
+        assert 1 <= itinerary.stops <= 2
+        assert len(set(cities)) == len(cities)
+        assert all(min_connection <= layover <= max_layover for layover in _layovers(itinerary))
+        assert itinerary.total_price_paise == sum(leg.price_paise for leg in itinerary.legs)
+
+@pytest.mark.parametrize("sort_by", ["price", "duration"])
+@pytest.mark.parametrize("source, destination", [("delhi", "goa"), ("goa", "delhi"), ("mumbai", "delhi")])
+def test_k_best_match_brute_force(backend, source, destination, sort_by):
+    graph = get_route_graph(backend)
+    index = 0 if sort_by == "price" else 1
+
+    itineraries = graph.find_connections(source, destination, k=3, sort_by=sort_by)
+
+    check_itineraries(itineraries, source, destination, MIN_CONNECTION_MINUTES, MAX_LAYOVER_MINUTES)
+    expected = sorted(option[index] for option in brute_force(
+        graph, source, destination, MIN_CONNECTION_MINUTES, MAX_LAYOVER_MINUTES))[:3]
+    costs = [(itinerary.total_price_paise, itinerary.elapsed_minutes)[index] for itinerary in itineraries]
+    assert costs == expected
+
+@pytest.mark.parametrize("min_connection, max_layover, expected", [
+    # The 06:00 to Mumbai makes the 09:30 to Goa; the 20:00 makes both next morning
+    (MIN_CONNECTION_MINUTES, MAX_LAYOVER_MINUTES, {("AI805", "AI663"), ("6E605", "6E531"), ("6E605", "AI663")}),
+    # Overnight layovers are too long
+    (MIN_CONNECTION_MINUTES, 9 * 60, {("AI805", "AI663")}),
+    # A 30-minute connection onto the 08:40 is allowed
+    (30, MAX_LAYOVER_MINUTES, {("AI805", "6E531"), ("AI805", "AI663"), ("6E605", "6E531"), ("6E605", "AI663")}),
+])
+def test_connection_and_layover_bounds(backend, min_connection, max_layover, expected):
+    itineraries = get_route_graph(backend).find_connections(
+        "delhi", "goa", k=10, min_connection_minutes=min_connection, max_layover_minutes=max_layover)
+
+    check_itineraries(itineraries, "delhi", "goa", min_connection, max_layover)
+    assert {tuple(leg.flight_number for leg in itinerary.legs) for itinerary in itineraries} == expected
+
+def test_direct_flights_only_when_asked(backend):
+    graph = get_route_graph(backend)
+
+    assert all(itinerary.stops for itinerary in graph.find_connections("delhi", "goa", k=10))
+    direct = [itinerary for itinerary in graph.find_connections("delhi", "goa", k=10, include_direct=True)
+              if not itinerary.stops]
+    assert {itinerary.legs[0].flight_number for itinerary in direct} == {"AI101", "6E201", "UK301"}
+
+def test_tool_reports_layovers(backend):
+    result = search_connecting_flights("Delhi", "Goa", sort_by="duration")
+
+    assert result["status"] == "success"
+    fastest = result["itineraries"][0]
+    assert fastest["via"] == ["Mumbai"]
+    assert [leg["flight_number"] for leg in fastest["legs"]] == ["AI805", "AI663"]
+    assert fastest["layovers"] == [{"city": "Mumbai", "duration": "1h 20m"}]
+    assert search_connecting_flights("Delhi", "Goa", sort_by="cost")["status"] == "error"
@@ -0,0 +1,97 @@
+"""
+A catalog updated by a delta feed answers like a rebuild of the updated data,
+on each inventory backend, including the search results cached before the feed.
+"""
+
+import copy
+
+from activities_agent.agent import get_activities_by_category, search_activities
+from cache_utils import invalidate_search_cache
+from flight_agent.agent import search_connecting_flights, search_flights
+from hotel_agent.agent import search_hotels
+from inventory import MemoryBackend, apply_deltas, get_backend, set_backend
+
+from conftest import ACTIVITIES_DB, FLIGHTS_DB, HOTELS_DB
+
+DELTAS = [
+    # Price change
+    {"op": "upsert", "kind": "flight", "source": "delhi", "destination": "goa",
+     "record": {"flight_number": "AI101", "price": "₹5,900"}},
+    # New hotel, with an amenity the catalog has not seen
+    {"op": "upsert", "kind": "hotel", "city": "goa",
+     "record": {"name": "Coral Bay", "rating": 4, "price_per_night": "₹5,000",
+                "amenities": ["WiFi", "Pool", "Gym"], "location": "Candolim"}},
+    # Deleted flight, the route's last, leaving only connections through Mumbai
+    {"op": "delete", "kind": "flight", "source": "goa", "destination": "delhi", "record": {"flight_number": "6E202"}},
+    {"op": "delete", "kind": "hotel", "city": "delhi", "record": {"name": "Budget Stay"}},
+    # Category change, to a category the catalog has not seen
+    {"op": "upsert", "kind": "activity", "city": "goa", "record": {"name": "Parasailing", "category": "Water Sports"}},
+]
+
+def _updated_catalog():
+    """The test catalog with DELTAS applied by hand."""
+    flights, hotels, activities = copy.deepcopy((FLIGHTS_DB, HOTELS_DB, ACTIVITIES_DB))
+    flights[("delhi", "goa")][0]["price"] = "₹5,900"
+    del flights[("goa", "delhi")]
+    hotels["goa"].append({"name": "Coral Bay", "rating": 4, "price_per_night": "₹5,000",
+                          "amenities": ["WiFi", "Pool", "Gym"], "location": "Candolim"})
+    hotels["delhi"] = [hotel for hotel in hotels["delhi"] if hotel["name"] != "Budget Stay"]
+    activities["goa"][3]["category"] = "Water Sports"
+    return flights, hotels, activities
+
+def _searches() -> dict:
+    """The search tools' answers over the routes, cities and categories the deltas touch and some they don't."""
+    results = {
+        "flights delhi-goa": search_flights("Delhi", "Goa", "2030-01-15", compact=False),
+        "flights goa-delhi": search_flights("Goa", "Delhi", compact=False),
+        "connections goa-delhi": search_connecting_flights("Goa", "Delhi"),
+        "hotels goa": search_hotels("Goa", compact=False),
+        "hotels goa pool": search_hotels("Goa", amenities=["pool"], compact=False),
+        "hotels goa gym": search_hotels("Goa", amenities=["gym"], compact=False),
+        "hotels goa under 6000": search_hotels("Goa", max_price=6000, compact=False),
+        "hotels delhi": search_hotels("Delhi", compact=False),
+        "activities goa": search_activities("Goa", compact=False),
+        "activities delhi": search_activities("Delhi", compact=False),
+    }
+    for category in ("Adventure", "Water Sports", "Heritage"):
+        results[f"category {category}"] = get_activities_by_category(category)
+    for result in results.values():
+        result.pop("inventory_version", None)
+    return results
+
+def test_deltas_answer_like_a_rebuild(backend):
+    _searches()
+
+    version = apply_deltas(DELTAS)
+    updated = _searches()
+    cached = _searches()
+
+    assert version == get_backend().catalog_version != backend.catalog_version
+    rebuilt = MemoryBackend.from_databases(*_updated_catalog())
+    set_backend(rebuilt)
+    invalidate_search_cache()
+    expected = _searches()
+    assert updated == expected
+    assert cached == expected
+
+def test_spot_checks_after_deltas(backend):
+    apply_deltas(DELTAS)
+
+    assert search_flights("Delhi", "Goa", compact=False)["flights"][0]["price"] == "₹5,900"
+    goa_delhi = search_flights("Goa", "Delhi", compact=False)
+    assert goa_delhi["flights"] == [] and goa_delhi["connecting_flights"][0]["via"] == ["Mumbai"]
+    assert "Coral Bay" in [hotel["name"] for hotel in search_hotels("Goa", amenities=["Gym"], compact=False)["hotels"]]
+    assert [hotel["name"] for hotel in search_hotels("Delhi", compact=False)["hotels"]] == ["The Imperial"]
+    adventure = get_activities_by_category("Adventure")["activities_by_city"]
+    assert [activity["name"] for activity in adventure["Goa"]] == ["Scuba Diving"]
+    water_sports = get_activities_by_category("water sports")["activities_by_city"]
+    assert {city: [activity["name"] for activity in activities] for city, activities in water_sports.items()} == {
+        "Goa": ["Parasailing"]}
+
+def test_replayed_feed_answers_the_same(backend):
+    apply_deltas(DELTAS)
+    once = _searches()
+
+    apply_deltas(DELTAS)
+
+    assert _searches() == once
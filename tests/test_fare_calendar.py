@@ -0,0 +1,81 @@
+"""
+The fare calendar: date validation, and per-day, per-week and round-trip
+minimums that match a day-by-day search.
+"""
+
+import datetime
+
+import pytest
+
+from config import FARE_CALENDAR_DEFAULT_DAYS, FARE_CALENDAR_MAX_DAYS, FARE_CALENDAR_MAX_STAY_NIGHTS
+from flight_agent.agent import search_fare_calendar
+from flight_agent.fares import fares_on
+
+TODAY = datetime.date.today()
+
+def _day(offset: int) -> str:
+    return (TODAY + datetime.timedelta(days=offset)).isoformat()
+
+def _rupees(price: str) -> int:
+    return int(price.lstrip("₹").replace(",", ""))
+
+@pytest.mark.parametrize("args, message", [
+    ({"start_date": "15/01/2030"}, "YYYY-MM-DD"),
+    ({"start_date": _day(10), "end_date": "2030-02-30"}, "YYYY-MM-DD"),
+    ({"start_date": _day(-1)}, "in the past"),
+    ({"start_date": _day(10), "end_date": _day(9)}, "on or after start_date"),
+    ({"start_date": _day(1), "end_date": _day(FARE_CALENDAR_MAX_DAYS + 1)}, f"at most {FARE_CALENDAR_MAX_DAYS} days"),
+    ({"start_date": _day(1), "round_trip": True, "min_stay_nights": 5, "max_stay_nights": 3}, "min_stay_nights"),
+    ({"start_date": _day(1), "round_trip": True, "max_stay_nights": FARE_CALENDAR_MAX_STAY_NIGHTS + 1},
+     "max_stay_nights"),
+])
+def test_invalid_dates_and_stays(backend, args, message):
+    result = search_fare_calendar("Delhi", "Goa", **args)
+
+    assert result["status"] == "error"
+    assert message in result["error_message"]
+
+def test_range_bounds_are_inclusive(backend):
+    assert search_fare_calendar("Delhi", "Goa", start_date=_day(0), end_date=_day(0))["days"] == 1
+    longest = search_fare_calendar("Delhi", "Goa", start_date=_day(0), end_date=_day(FARE_CALENDAR_MAX_DAYS - 1))
+    assert longest["days"] == len(longest["daily_fares"]) == FARE_CALENDAR_MAX_DAYS
+    default = search_fare_calendar("Delhi", "Goa")
+    assert (default["start_date"], default["days"]) == (TODAY.isoformat(), FARE_CALENDAR_DEFAULT_DAYS)
+
+def test_unserved_route_points_to_connections(backend):
+    result = search_fare_calendar("Delhi", "Atlantis", round_trip=True)
+
+    assert result["status"] == "error"
+    assert "search_connecting_flights" in result["error_message"]
+
+def test_daily_weekly_and_round_trip_minimums(backend):
+    result = search_fare_calendar("Delhi", "Goa", start_date=_day(3), end_date=_day(23), round_trip=True,
+                                  min_stay_nights=2, max_stay_nights=4)
+
+    assert result["status"] == "success"
+    daily = result["daily_fares"]
+    assert [entry["date"] for entry in daily] == [_day(offset) for offset in range(3, 24)]
+    # Each day's fare is the cheapest flight re-priced for that day, as search_flights would quote it
+    for entry in daily:
+        day = datetime.date.fromisoformat(entry["date"])
+        cheapest = min(fares_on(backend.flights("delhi", "goa"), day, TODAY), key=lambda flight: flight.price_paise)
+        assert (_rupees(entry["fare"]), entry["flight"]) == (
+            cheapest.price_paise // 100, f"{cheapest.airline} {cheapest.flight_number}")
+    fares = [_rupees(entry["fare"]) for entry in daily]
+    assert _rupees(result["cheapest_day"]["fare"]) == min(fares)
+    assert result["cheapest_day"]["date"] == daily[fares.index(min(fares))]["date"]
+    for week in result["weekly_fares"]:
+        dates = [entry["date"] for entry in daily]
+        first, last = dates.index(week["week_start"]), dates.index(week["week_end"])
+        assert datetime.date.fromisoformat(week["week_end"]).weekday() == 6 or last == len(daily) - 1
+        assert _rupees(week["fare"]) == min(fares[first:last + 1])
+
+    back = search_fare_calendar("Goa", "Delhi", start_date=_day(5), end_date=_day(27))
+    returns = {entry["date"]: _rupees(entry["fare"]) for entry in back["daily_fares"]}
+    for trip, fare in zip(result["round_trips"], fares):
+        assert 2 <= trip["nights"] <= 4
+        depart = datetime.date.fromisoformat(trip["depart"])
+        best_return = min(returns[(depart + datetime.timedelta(days=nights)).isoformat()] for nights in range(2, 5))
+        assert _rupees(trip["total_fare"]) == fare + best_return
+    totals = [_rupees(trip["total_fare"]) for trip in result["round_trips"]]
+    assert _rupees(result["cheapest_round_trip"]["total_fare"]) == min(totals)
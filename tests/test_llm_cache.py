@@ -0,0 +1,75 @@
+"""
+The model response cache: what its keys cover, where it lives, and that the
+key of a request in flight stays with the invocation.
+"""
+
+import asyncio
+
+from google.adk.models import LlmRequest
+from google.genai import types
+
+import llm_cache
+from llm_cache import LLMResponseCache, get_llm_cache, request_key, set_llm_cache
+from server import APP_NAME, AgentServer
+from stub_llm import ScriptedLlm
+from travel_planner.agent import build_travel_planner_agent
+
+def make_request(description: str) -> LlmRequest:
+    declaration = types.FunctionDeclaration(
+        name="search_hotels", description=description,
+        parameters=types.Schema(type="OBJECT", properties={"city": types.Schema(type="STRING")}))
+    return LlmRequest(
+        model="stub/scripted",
+        contents=[types.Content(role="user", parts=[types.Part(text="Hotels in Goa")])],
+        config=types.GenerateContentConfig(system_instruction="Find hotels.",
+                                           tools=[types.Tool(function_declarations=[declaration])]))
+
+def test_key_covers_tool_declarations():
+    key = request_key("hotel_agent", make_request("Search hotels in a city."))
+
+    assert key == request_key("hotel_agent", make_request("Search hotels in a city."))
+    assert key != request_key("hotel_agent", make_request("Search hotels in a city, sorted by rating."))
+
+def test_default_path_is_in_the_user_cache_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_PATH", None)
+    previous = set_llm_cache(None)
+    try:
+        cache = get_llm_cache()
+        cache.stats()
+    finally:
+        set_llm_cache(previous).close()
+
+    assert cache.path == str(tmp_path / "cache" / "travel_agent" / "llm_cache.db")
+    assert (tmp_path / "cache" / "travel_agent" / "llm_cache.db").exists()
+
+def test_cache_is_off_by_default():
+    assert llm_cache.LLM_CACHE_ENABLED is False
+
+def test_repeated_turn_is_served_from_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.db"), 1000, 1024 * 1024, 3600)
+    previous = set_llm_cache(cache)
+    model = ScriptedLlm(think_time_ms=0)
+    server = AgentServer(build_travel_planner_agent(model=model))
+
+    async def scenario():
+        first = await server.handle("Hello")
+        calls = model.calls
+        second = await server.handle("hello!")
+        session = await server.runner.session_service.get_session(
+            app_name=APP_NAME, user_id="anonymous", session_id=second["session_id"])
+        return first, calls, second, session.state
+
+    try:
+        first, calls, second, state = asyncio.run(scenario())
+        stats = cache.stats()
+    finally:
+        set_llm_cache(previous)
+        cache.close()
+
+    assert second["reply"] == first["reply"]
+    assert model.calls == calls
+    assert stats["stores"] == calls and stats["hits"] == calls
+    # The pending key is invocation-scoped state and is never persisted with the session
+    assert not any(key.startswith("temp:") for key in state)
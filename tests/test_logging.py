@@ -0,0 +1,115 @@
+"""
+The queued logging pipeline: records are queued unformatted and formatted
+once by the writer, a full queue drops rather than blocks, and sampled
+blocks keep one in every N.
+"""
+
+import io
+import logging
+import queue
+
+import pytest
+
+import logging_utils
+from logging_utils import BatchStreamHandler, DeferredQueueHandler, LogSampler, LogWriter, apply_log_sampling, sampled
+
+class Rendered:
+    """Log argument that counts how often it is turned into text."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "rendered"
+
+@pytest.fixture
+def queued_logger():
+    """A logger whose records go only to a DeferredQueueHandler, and its queue."""
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue, max_queued=3)
+    # Outside the logger hierarchy, so pytest's capture handlers do not format its records
+    logger = logging.Logger("travel_agent.tests.queued", logging.INFO)
+    logger.addHandler(handler)
+    return logger, handler, log_queue
+
+def test_records_are_queued_unformatted(queued_logger):
+    logger, _, log_queue = queued_logger
+    argument = Rendered()
+
+    logger.info("Plan for %s", argument)
+
+    record = log_queue.get_nowait()
+    assert argument.calls == 0
+    assert (record.msg, record.args) == ("Plan for %s", (argument,))
+    assert not hasattr(record, "message")
+
+def test_tracebacks_are_rendered_before_queueing(queued_logger):
+    logger, _, log_queue = queued_logger
+
+    try:
+        raise RuntimeError("supplier down")
+    except RuntimeError:
+        logger.exception("Search failed for %s", "goa")
+
+    record = log_queue.get_nowait()
+    # The frames are not kept alive in the queue; the message is still left to the writer
+    assert record.exc_info is None
+    assert "RuntimeError: supplier down" in record.exc_text
+    assert (record.msg, record.args) == ("Search failed for %s", ("goa",))
+
+def test_full_queue_drops_and_counts(queued_logger):
+    logger, handler, log_queue = queued_logger
+
+    for number in range(5):
+        logger.info("Record %s", number)
+
+    assert log_queue.qsize() == 3
+    assert handler.dropped == 2
+    assert [log_queue.get_nowait().args for _ in range(3)] == [(0,), (1,), (2,)]
+
+def test_writer_formats_each_record_once(queued_logger):
+    logger, _, log_queue = queued_logger
+    output = io.StringIO()
+    handler = BatchStreamHandler(output)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    writer = LogWriter(log_queue, [handler], batch_size=2, flush_interval=0.01)
+    argument = Rendered()
+    logger.info("Plan for %s", argument)
+    logger.warning("No flights for %s", "atlantis")
+
+    writer.start()
+    writer.stop()
+
+    assert output.getvalue() == "INFO Plan for rendered\nWARNING No flights for atlantis\n"
+    assert argument.calls == 1
+    assert writer.batches >= 1
+
+@pytest.mark.parametrize("every, kept", [
+    (1, [True] * 7),
+    (0, [True] * 7),
+    (3, [True, False, False, True, False, False, True]),
+])
+def test_sampler_keeps_one_block_in_every(every, kept):
+    sampler = LogSampler(every)
+
+    assert [sampler.keep() for _ in range(7)] == kept
+
+def test_sampled_follows_the_configured_rates(monkeypatch):
+    monkeypatch.setattr(logging_utils, "_SAMPLERS", {})
+    sampled_logger = logging.getLogger("travel_agent.tests.sampled")
+    other = logging.getLogger("travel_agent.tests.unsampled")
+    for logger in (sampled_logger, other):
+        monkeypatch.setattr(logger, "level", logging.INFO)
+
+    apply_log_sampling({sampled_logger.name: 4, other.name: 1})
+
+    assert sum(sampled(sampled_logger) for _ in range(20)) == 5
+    assert all(sampled(other) for _ in range(20))
+    # A disabled level is skipped without using up a block
+    assert not sampled(sampled_logger, logging.DEBUG)
+    assert [sampled(sampled_logger) for _ in range(4)] == [True, False, False, False]
+
+    apply_log_sampling({sampled_logger.name: 1})
+
+    assert all(sampled(sampled_logger) for _ in range(4))
@@ -0,0 +1,112 @@
+"""
+In-process metrics: label-set overflow, what tool_metrics records for each
+outcome, and the Prometheus text the registry renders.
+"""
+
+import pytest
+
+import logging_utils
+from logging_utils import (
+    OVERFLOW_LABEL, SEARCH_RESULTS, TOOL_CALLS, TOOL_LATENCY, Counter, MetricsRegistry, tool_metrics,
+)
+
+def test_label_sets_past_the_limit_share_an_overflow_series():
+    counter = Counter("test_searches_total", "Searches.", ("tool", "city"), max_label_sets=2)
+    counter.labels("search_hotels", "goa").inc()
+    counter.labels("search_flights", "goa").inc()
+
+    counter.labels("search_hotels", "atlantis").inc()
+    counter.labels("search_hotels", "lemuria").inc(2)
+    counter.labels("search_flights", "atlantis").inc()
+    counter.labels("search_hotels", "goa").inc()
+
+    assert {values: series.value for values, series in counter.series()} == {
+        ("search_hotels", "goa"): 2,
+        ("search_flights", "goa"): 1,
+        ("search_hotels", OVERFLOW_LABEL): 3,
+        ("search_flights", OVERFLOW_LABEL): 1,
+    }
+    with pytest.raises(ValueError):
+        counter.labels("search_hotels")
+
+def _tool_counts(tool: str, destination: str) -> dict:
+    counts = {status: TOOL_CALLS.labels(tool, destination, status).value
+              for status in ("success", "error", "exception", "unknown")}
+    counts["timed"] = sum(TOOL_LATENCY.labels(tool, destination).snapshot()[0])
+    return counts
+
+def test_tool_metrics_records_each_outcome(monkeypatch):
+    monkeypatch.setattr(logging_utils, "METRICS_ENABLED", True)
+
+    @tool_metrics(tool_name="test_find_rooms", label="city", results=("hotels", "hostels"))
+    def find_rooms(city, outcome="success"):
+        if outcome == "raise":
+            raise RuntimeError("supplier down")
+        if outcome == "unknown":
+            return None
+        if outcome == "error":
+            return {"status": "error", "error_message": "no rooms"}
+        return {"status": "success", "hotels": ["Sea Breeze", "Palm Grove"], "hostels": ["Backpacker"]}
+
+    find_rooms("  Goa ")
+    find_rooms(city="goa", outcome="error")
+    find_rooms("GOA", "unknown")
+    with pytest.raises(RuntimeError):
+        find_rooms("goa", outcome="raise")
+
+    assert _tool_counts("test_find_rooms", "goa") == {
+        "success": 1, "error": 1, "exception": 1, "unknown": 1, "timed": 4}
+    # Only successful responses count results, summed over the listed keys
+    counts, total = SEARCH_RESULTS.labels("test_find_rooms", "goa").snapshot()
+    assert (sum(counts), total) == (1, 3)
+
+def test_tool_metrics_records_nothing_when_disabled(monkeypatch):
+    monkeypatch.setattr(logging_utils, "METRICS_ENABLED", False)
+
+    @tool_metrics(tool_name="test_disabled_tool", label="city")
+    def disabled_tool(city):
+        return {"status": "success"}
+
+    assert disabled_tool("goa") == {"status": "success"}
+    assert _tool_counts("test_disabled_tool", "goa")["success"] == 0
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_latency_seconds", "Latency.", ("tool",), buckets=(5000, 1000), divisor=1000)
+    for value in (500, 1000, 3000, 7000):
+        latency.labels("search_flights").observe(value)
+    registry.counter("test_calls_total", "Calls.", ("city",)).labels('Say "hi"\\now\n').inc(3)
+    registry.gauge("test_queue_depth", "Depth.").set_function(lambda: 2.5)
+    registry.histogram("test_results", "Results.", buckets=(1, 5)).observe(2)
+
+    assert registry.render() == "\n".join([
+        "# HELP test_calls_total Calls.",
+        "# TYPE test_calls_total counter",
+        'test_calls_total{city="Say \\"hi\\"\\\\now\\n"} 3',
+        # Bounds and observations in nanoseconds, exported in seconds; the bucket bound is inclusive
+        "# HELP test_latency_seconds Latency.",
+        "# TYPE test_latency_seconds histogram",
+        'test_latency_seconds_bucket{tool="search_flights",le="1.0"} 2',
+        'test_latency_seconds_bucket{tool="search_flights",le="5.0"} 3',
+        'test_latency_seconds_bucket{tool="search_flights",le="+Inf"} 4',
+        'test_latency_seconds_sum{tool="search_flights"} 11.5',
+        'test_latency_seconds_count{tool="search_flights"} 4',
+        "# HELP test_queue_depth Depth.",
+        "# TYPE test_queue_depth gauge",
+        "test_queue_depth 2.5",
+        "# HELP test_results Results.",
+        "# TYPE test_results histogram",
+        'test_results_bucket{le="1"} 0',
+        'test_results_bucket{le="5"} 1',
+        'test_results_bucket{le="+Inf"} 1',
+        "test_results_sum 2",
+        "test_results_count 1",
+    ]) + "\n"
+
+def test_registry_returns_the_registered_metric():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_hits_total", "Hits.")
+
+    assert registry.counter("test_hits_total", "Hits.") is counter
+    with pytest.raises(ValueError):
+        registry.gauge("test_hits_total", "Hits.")
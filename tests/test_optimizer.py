@@ -0,0 +1,67 @@
+"""
+The whole-trip optimizer is exact: its best plan and every frontier point
+match brute-force enumeration of every combination.
+"""
+
+import itertools
+import random
+
+import pytest
+
+from travel_planner.optimizer import TripOption, activity_options, flight_options, hotel_options, optimize_trip
+
+def brute_force_best(outbound, inbound, hotels, activities, max_activities, budget_paise):
+    """Highest score within budget by enumerating every combination."""
+    best = None
+    for count in range(max_activities + 1):
+        for chosen in itertools.combinations(activities, count):
+            activity_cost = sum(option.cost_paise for option in chosen)
+            activity_score = sum(option.score for option in chosen)
+            for fixed in itertools.product(outbound, inbound, hotels):
+                cost = activity_cost + sum(option.cost_paise for option in fixed)
+                if cost <= budget_paise:
+                    score = activity_score + sum(option.score for option in fixed)
+                    best = score if best is None else max(best, score)
+    return best
+
+def check_exact(outbound, inbound, hotels, activities, max_activities, budget_paise):
+    best, frontier = optimize_trip(outbound, inbound, hotels, activities, max_activities, budget_paise)
+
+    assert (best.score if best else None) == brute_force_best(
+        outbound, inbound, hotels, activities, max_activities, budget_paise)
+    for plan in frontier:
+        assert plan.cost_paise <= budget_paise
+        assert plan.cost_paise == sum(option.cost_paise for option in plan.options)
+        assert plan.score == sum(option.score for option in plan.options)
+        assert len(plan.chosen("activity")) <= max_activities
+        # Each frontier point is the optimum for its own cost
+        assert plan.score == brute_force_best(outbound, inbound, hotels, activities, max_activities, plan.cost_paise)
+    assert [plan.cost_paise for plan in frontier] == sorted({plan.cost_paise for plan in frontier})
+    assert [plan.score for plan in frontier] == sorted({plan.score for plan in frontier})
+
+def _random_options(category: str, count: int, rng: random.Random):
+    return [TripOption(category, f"{category} {i}", rng.randrange(1, 50) * 1000, rng.randrange(0, 40), None)
+            for i in range(count)]
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_brute_force_on_random_instances(seed):
+    rng = random.Random(seed)
+    outbound, inbound, hotels = (_random_options(category, 5, rng) for category in ("outbound", "return", "hotel"))
+    activities = _random_options("activity", 7, rng)
+    cheapest = sum(min(option.cost_paise for option in options) for options in (outbound, inbound, hotels))
+
+    check_exact(outbound, inbound, hotels, activities, rng.randint(0, 4), cheapest + rng.randrange(0, 3 * cheapest))
+
+@pytest.mark.parametrize("budget", [20000, 35000, 60000, 10**6])
+def test_matches_brute_force_on_the_catalog(backend, budget):
+    outbound = flight_options("outbound", backend.flights("delhi", "goa"), None, 2)
+    inbound = flight_options("return", backend.flights("goa", "delhi"), None, 2)
+    hotels = hotel_options(backend.hotels("goa"), 3, "luxury")
+    activities = activity_options(backend.activities("goa"), 2, "Adventure")
+
+    check_exact(outbound, inbound, hotels, activities, 3, budget * 100)
+
+def test_nothing_within_budget(backend):
+    outbound = flight_options("outbound", backend.flights("delhi", "goa"), None, 1)
+
+    assert optimize_trip(outbound, [], [], [], 2, budget_paise=100) == (None, [])
@@ -0,0 +1,99 @@
+"""
+The travel planner's sub-queries go through the search cache and single-flight
+layer, on each inventory backend, and a streamed plan can be cancelled mid-section.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import inventory.store
+import travel_planner.agent as planner
+import travel_planner.streaming as streaming
+
+PLAN_ARGS = {"source": "Delhi", "destination": "Goa", "travel_date": "2030-01-15", "return_date": "2030-01-18",
+             "budget": 60000, "travelers": 2}
+
+def _comparable(plan: dict) -> dict:
+    return {key: value for key, value in plan.items() if key != "plan_generated_at"}
+
+def _counted(monkeypatch, name: str, seconds: float) -> list:
+    """Patch a planner lookup to take a while and record each call; returns the call list."""
+    calls = []
+    lookup = getattr(planner, name)
+
+    def slow(*args, **kwargs):
+        calls.append(args)
+        time.sleep(seconds)
+        return lookup(*args, **kwargs)
+
+    monkeypatch.setattr(planner, name, slow)
+    return calls
+
+def test_herd_of_identical_plans_shares_each_lookup(backend, monkeypatch):
+    flight_calls = _counted(monkeypatch, "find_flights", 0.2)
+    hotel_calls = _counted(monkeypatch, "find_hotels", 0.2)
+    activity_calls = _counted(monkeypatch, "find_activities", 0.2)
+    herd = 8
+    start = threading.Barrier(herd)
+
+    def plan(_):
+        start.wait()
+        return planner.create_comprehensive_travel_plan(**PLAN_ARGS)
+
+    with ThreadPoolExecutor(max_workers=herd) as pool:
+        plans = list(pool.map(plan, range(herd)))
+
+    assert all(plan["status"] == "success" for plan in plans)
+    assert all(_comparable(plan) == _comparable(plans[0]) for plan in plans)
+    # One lookup per sub-query for the whole herd: each direction of the route, the hotels, the activities
+    assert len(flight_calls) == 2
+    assert len(hotel_calls) == 1 and len(activity_calls) == 1
+
+def test_repeated_plan_is_served_from_the_cache(backend, monkeypatch):
+    first = planner.create_comprehensive_travel_plan(**PLAN_ARGS)
+    hotel_calls = _counted(monkeypatch, "find_hotels", 0)
+
+    again = planner.create_comprehensive_travel_plan(**PLAN_ARGS)
+
+    assert hotel_calls == []
+    assert _comparable(again) == _comparable(first)
+
+def test_cancelled_stream_releases_its_pin(backend, monkeypatch):
+    run_sub_query = streaming.run_sub_query
+
+    def slow_sub_query(key):
+        time.sleep(0.3)
+        return run_sub_query(key)
+
+    monkeypatch.setattr(streaming, "run_sub_query", slow_sub_query)
+
+    async def scenario():
+        events = []
+
+        async def consume():
+            async for event in streaming.stream_plan_tool(**PLAN_ARGS):
+                events.append(event)
+
+        call = asyncio.ensure_future(consume())
+        # Cancelled while the first section's sub-searches are still running on the stream's thread
+        await asyncio.sleep(0.1)
+        call.cancel()
+        try:
+            await call
+        except asyncio.CancelledError:
+            pass
+        else:
+            raise AssertionError("the stream finished before it was cancelled")
+        await asyncio.sleep(0.01)
+        return events
+
+    events = asyncio.run(scenario())
+
+    assert events == []
+    # The stream closes, releasing its pin, once the step it was cancelled in returns
+    deadline = time.monotonic() + 5
+    while inventory.store._pins and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not inventory.store._pins
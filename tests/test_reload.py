@@ -0,0 +1,88 @@
+"""
+Hot reload: a new catalog goes live in one swap, and a replaced one is
+closed and freed once the calls pinned to it finish.
+"""
+
+import copy
+import gc
+import threading
+import time
+import weakref
+
+import inventory.store
+from cache_utils import invalidate_search_cache, get_search_cache_stats
+from flight_agent.agent import search_flights
+from inventory import MemoryBackend, get_backend, pinned_backend, reload_inventory, set_backend
+from inventory.datafiles import load_inventory_data, write_data_files
+
+from conftest import ACTIVITIES_DB, FLIGHTS_DB, HOTELS_DB
+
+def _catalog(fare: int) -> MemoryBackend:
+    """The test catalog with the first Delhi-Goa fare changed, so each fare is a new catalog version."""
+    flights = copy.deepcopy(FLIGHTS_DB)
+    flights[("delhi", "goa")][0]["price"] = f"₹{fare:,}"
+    return MemoryBackend.from_databases(flights, HOTELS_DB, ACTIVITIES_DB)
+
+def test_retired_catalogs_are_freed(backend, monkeypatch):
+    monkeypatch.setattr(inventory.store, "INVENTORY_GC_FREEZE", True)
+    retired = []
+    try:
+        inventory.store.freeze_catalog()
+        for fare in range(9001, 9006):
+            retired.append(weakref.ref(get_backend()))
+            assert reload_inventory(lambda: _catalog(fare))
+        assert gc.get_freeze_count() == 0
+    finally:
+        gc.unfreeze()
+    gc.collect()
+
+    # The fixture still holds the first one
+    assert [ref() is None for ref in retired] == [False] + [True] * (len(retired) - 1)
+
+def test_pinned_call_finishes_on_its_catalog_while_new_calls_see_the_reload(tmp_path, monkeypatch):
+    data_dir = str(tmp_path / "inventory_data")
+    write_data_files(data_dir, FLIGHTS_DB, HOTELS_DB, ACTIVITIES_DB)
+
+    def from_files() -> MemoryBackend:
+        return MemoryBackend.from_databases(*load_inventory_data(data_dir))
+
+    monkeypatch.setattr(inventory.store, "_backend", None)
+    old = from_files()
+    set_backend(old)
+    fares = {}
+    try:
+        with pinned_backend() as pinned:
+            search_flights("Delhi", "Goa", compact=False)
+            flights = copy.deepcopy(FLIGHTS_DB)
+            flights[("delhi", "goa")][0]["price"] = "₹5,900"
+            write_data_files(data_dir, flights, HOTELS_DB, ACTIVITIES_DB)
+            reload = threading.Thread(target=lambda: fares.setdefault("reloaded", reload_inventory(from_files)))
+            reload.start()
+            while inventory.store._backend is old:
+                time.sleep(0.001)
+
+            # A new call, outside this pin, runs on the new catalog
+            new_call = threading.Thread(
+                target=lambda: fares.setdefault("new", search_flights("Delhi", "Goa", compact=False)))
+            new_call.start()
+            new_call.join()
+            pinned_call = search_flights("Delhi", "Goa", compact=False)
+            # The reload waits for this pin before retiring the old catalog
+            reload.join(0.05)
+            assert reload.is_alive()
+        reload.join()
+        new = get_backend()
+        cached_after_retire = get_search_cache_stats()
+    finally:
+        invalidate_search_cache()
+        get_backend().close()
+
+    assert fares["reloaded"] is True
+    assert pinned is old and new is not old
+    assert pinned_call["inventory_version"] == old.catalog_version
+    assert fares["new"]["inventory_version"] == new.catalog_version != old.catalog_version
+    assert pinned_call["flights"][0]["price"] == "₹9,000"
+    assert fares["new"]["flights"][0]["price"] == "₹5,900"
+    # The old catalog is closed, and the results the pinned call cached on it are dropped
+    assert old in inventory.store._closed
+    assert cached_after_retire["entries"] == 1
@@ -0,0 +1,170 @@
+"""
+The agent server's admission control, deadlines, session locking and drain,
+offline: the travel planner runs on the scripted stub model, and requests go
+through the Starlette app in process.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import llm_cache
+from server import AgentServer, ServerDraining, create_app
+from stub_llm import ScriptedLlm
+from travel_planner.agent import build_travel_planner_agent
+
+@pytest.fixture(autouse=True)
+def no_llm_cache(monkeypatch):
+    """The model response cache off, so every turn reaches the stub model."""
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", False)
+
+def make_server(think_ms: float, **options) -> AgentServer:
+    """A server for the travel planner on the stub model, which takes think_ms per model turn."""
+    return AgentServer(build_travel_planner_agent(model=ScriptedLlm(think_time_ms=think_ms)), **options)
+
+def client(server: AgentServer) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(server)), base_url="http://server")
+
+async def wait_until(condition, timeout: float = 5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.005)
+
+def test_turn_and_session_continuation():
+    async def scenario():
+        server = make_server(0)
+        async with client(server) as http:
+            first = await http.post("/run", json={"message": "Hello", "user_id": "asha"})
+            session_id = first.json()["session_id"]
+            second = await http.post("/run", json={"message": "Thanks", "user_id": "asha",
+                                                   "session_id": session_id})
+            unknown = await http.post("/run", json={"message": "Hi", "user_id": "asha", "session_id": "nope"})
+            invalid = await http.post("/run", json={"text": "Hi"})
+        return first, second, unknown, invalid
+
+    first, second, unknown, invalid = asyncio.run(scenario())
+
+    assert first.status_code == 200
+    assert first.json()["reply"].startswith('Scripted reply to "Hello"')
+    assert second.status_code == 200 and second.json()["session_id"] == first.json()["session_id"]
+    assert unknown.status_code == 404
+    assert invalid.status_code == 400
+
+def test_full_queue_rejects_at_once_with_503():
+    async def scenario():
+        server = make_server(300, max_sessions=1, max_queued=1)
+        async with client(server) as http:
+            running = asyncio.create_task(http.post("/run", json={"message": "first"}))
+            queued = asyncio.create_task(http.post("/run", json={"message": "second"}))
+            await wait_until(lambda: server.admission.in_flight == 1 and server.admission.queued == 1)
+            started = time.perf_counter()
+            rejected = await http.post("/run", json={"message": "third"})
+            rejected_seconds = time.perf_counter() - started
+            return rejected, rejected_seconds, await running, await queued
+
+    rejected, rejected_seconds, running, queued = asyncio.run(scenario())
+
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "1"
+    assert rejected_seconds < 0.1
+    assert running.status_code == 200 and queued.status_code == 200
+
+class SlowToCancelLlm(ScriptedLlm):
+    """Stub model whose call, like a model client finishing its request, takes a while to cancel."""
+
+    async def generate_content_async(self, llm_request, stream=False):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.5)
+            raise
+        async for response in super().generate_content_async(llm_request, stream):
+            yield response
+
+def test_deadline_answers_504_without_waiting_for_the_turn_to_unwind():
+    async def scenario():
+        # The first turn in a process imports and builds ADK internals on the loop; not what is measured here
+        await make_server(0).handle("Hello")
+        server = AgentServer(build_travel_planner_agent(model=SlowToCancelLlm()), max_sessions=1)
+        async with client(server) as http:
+            started = time.perf_counter()
+            response = await http.post("/run", json={"message": "slow", "timeout_seconds": 0.05})
+            elapsed = time.perf_counter() - started
+            unwinding = server.admission.in_flight
+            # The cancelled turn gives its slot back once it has unwound
+            await wait_until(lambda: server.admission.in_flight == 0, timeout=2)
+            return response, elapsed, unwinding
+
+    response, elapsed, unwinding = asyncio.run(scenario())
+
+    assert response.status_code == 504
+    assert elapsed < 0.3
+    assert unwinding == 1
+
+def test_deadline_covers_the_queue_wait():
+    async def scenario():
+        server = make_server(500, max_sessions=1)
+        async with client(server) as http:
+            running = asyncio.create_task(http.post("/run", json={"message": "first"}))
+            await wait_until(lambda: server.admission.in_flight == 1)
+            queued = await http.post("/run", json={"message": "second", "timeout_seconds": 0.05})
+            return queued, await running, server.admission.queued
+
+    queued, running, still_queued = asyncio.run(scenario())
+
+    assert queued.status_code == 504
+    assert running.status_code == 200
+    assert still_queued == 0
+
+def test_concurrent_turn_in_one_session_gets_409():
+    async def scenario():
+        server = make_server(200)
+        async with client(server) as http:
+            session_id = (await http.post("/run", json={"message": "Hello"})).json()["session_id"]
+            first = asyncio.create_task(http.post("/run", json={"message": "one", "session_id": session_id}))
+            await wait_until(lambda: server.admission.in_flight == 1)
+            second = await http.post("/run", json={"message": "two", "session_id": session_id})
+            return await first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first.status_code == 200
+    assert second.status_code == 409
+
+def test_drain_finishes_admitted_requests_and_refuses_new_ones():
+    async def scenario():
+        server = make_server(200, max_sessions=1, max_queued=4)
+        async with client(server) as http:
+            admitted = [asyncio.create_task(http.post("/run", json={"message": f"trip {index}"}))
+                        for index in range(3)]
+            await wait_until(lambda: server.admission.in_flight + server.admission.queued == 3)
+            drained = await server.drain(timeout=5)
+            refused = await http.post("/run", json={"message": "late"})
+            health = await http.get("/healthz")
+            return drained, [await request for request in admitted], refused, health
+
+    drained, admitted, refused, health = asyncio.run(scenario())
+
+    assert drained
+    assert [response.status_code for response in admitted] == [200, 200, 200]
+    assert refused.status_code == 503
+    assert health.status_code == 503 and health.json()["status"] == "draining"
+
+def test_drain_times_out_with_turns_still_running():
+    async def scenario():
+        server = make_server(1000)
+        running = asyncio.create_task(server.handle("slow"))
+        await wait_until(lambda: server.admission.in_flight == 1)
+        drained = await server.drain(timeout=0.05)
+        with pytest.raises(ServerDraining):
+            await server.handle("late")
+        return drained, await running
+
+    drained, reply = asyncio.run(scenario())
+
+    assert not drained
+    assert reply["status"] == "success"
@@ -1,4 +1,7 @@
-from .agent import travel_planner_agent, root_agent
+from . import agent
 
-# Ensure root_agent is available at package level
-__all__ = ['travel_planner_agent', 'root_agent']
\ No newline at end of file
+def __getattr__(name):
+    # The agent is built on first access; see agent.py
+    if name in ("travel_planner_agent", "root_agent"):
+        return getattr(agent, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,16 +1,195 @@
 import datetime
-from typing import Optional, List
+import functools
+from typing import Dict, Optional, List
 import logging
 
-from google.adk.agents import Agent
-from flight_agent.agent import search_flights
-from hotel_agent.agent import search_hotels
-from activities_agent.agent import search_activities, get_activities_by_category
-from config import MODEL_NAME
+from flight_agent.agent import (
+    search_flights, search_connecting_flights, search_fare_calendar,
+    find_flights, find_connections, flight_search_response
+)
+from hotel_agent.agent import search_hotels, find_hotels, hotel_search_response
+from activities_agent.agent import (
+    search_activities, get_activities_by_category, find_activities, activity_search_response
+)
+from inventory import format_clock, format_price, inventory_tool, record_state, resolve_city, PAISE_PER_RUPEE
+from cache_utils import cached_search, normalize_city, normalize_filter
+from .fanout import SubSearchOutcome, run_sub_searches
+from .comparison import known_destinations, score_destinations, pick_recommendation
+from .optimizer import activity_options, flight_options, hotel_options, optimize_trip, thin_frontier
+from agent_utils import lazy_agent
+from logging_utils import sampled, tool_metrics
+from response_utils import (
+    COMPACT_FORMAT_INSTRUCTION, CompactResponse, activity_item, connection_item, flight_item, get_option_details,
+    hotel_item, use_compact,
+)
+from config import MODEL_NAME, PLANNER_ACTIVITIES_PER_DAY, PLANNER_FRONTIER_POINTS, STREAM_TRAVEL_PLANS
 
 # Setup logger for travel planner
 logger = logging.getLogger('travel_agent.travel_planner')
+# Per-option listing lines, sampled separately (LOG_SAMPLE_EVERY in config.py)
+options_logger = logging.getLogger('travel_agent.travel_planner.options')
+
+# The sub-queries' lookups go through the search cache and its single-flight like the
+# search tools, so a herd of plans for one route runs each lookup once. They return
+# typed records, which are never modified, so they are cached and shared as they are
+
+def _records_state(records) -> Optional[list]:
+    return None if records is None else [record_state(record) for record in records]
+
+def _route_options_state(options: tuple) -> list:
+    flights, connections = options
+    return [_records_state(flights),
+            None if connections is None else [
+                [_records_state(itinerary.legs), itinerary.departures, itinerary.total_price_paise,
+                 itinerary.elapsed_minutes]
+                for itinerary in connections]]
+
+@cached_search("plan_route_options", scopes=[("flights", "source", "destination")], source=normalize_city,
+               destination=normalize_city, immutable_state=_route_options_state)
+def _find_route_options(source: str, destination: str) -> tuple:
+    """Direct flights, or connecting itineraries when the route is not served directly."""
+    flights = find_flights(source, destination)
+    connections = find_connections(source, destination) if flights is None else None
+    return flights, connections
+
+@cached_search("plan_hotels", scopes=[("hotels", "city")], city=normalize_city, max_price=normalize_filter,
+               min_rating=normalize_filter, immutable_state=_records_state)
+def _find_plan_hotels(city: str, max_price: Optional[int] = None, min_rating: Optional[int] = None):
+    """Hotel records for a plan's accommodation section."""
+    return find_hotels(city, max_price=max_price, min_rating=min_rating)
+
+@cached_search("plan_activities", scopes=[("activities", "city")], city=normalize_city,
+               min_rating=normalize_filter, max_price=normalize_filter, immutable_state=_records_state)
+def _find_plan_activities(city: str, min_rating: Optional[float] = None, max_price: Optional[int] = None):
+    """Activity records for a plan's activities section."""
+    return find_activities(city, min_rating=min_rating, max_price=max_price)
+
+def _compact_travel_plan(travel_plan: dict, best_plan, top_k: Optional[int], routes: dict,
+                         hotel_records, activity_records) -> dict:
+    """Compact form of a finished travel plan; the options the plan chose are listed first in each section.
+
+    Args:
+        travel_plan (dict): The full plan.
+        best_plan (TripPlan): The optimizer's chosen combination.
+        top_k (int, optional): Options per section.
+        routes (dict): "outbound_flights"/"return_flights" -> (optimizer category,
+            flight records, connecting itineraries, travel date).
+        hotel_records (list): Hotels in the plan's accommodation section.
+        activity_records (list): Activities in the plan's activities section.
+
+    Returns:
+        dict: The compact plan.
+    """
+    response = CompactResponse(top_k)
+    sections = {
+        "outbound_flights": travel_plan["flights"]["outbound"],
+        "return_flights": travel_plan["flights"]["return"],
+        "hotels": travel_plan["accommodation"],
+        "activities": travel_plan["activities"],
+    }
+    for section, (category, flights, connections, date) in routes.items():
+        pinned = [option.record for option in best_plan.chosen(category)]
+        if sections[section].get("status") != "success":
+            response.add_error(section, sections[section].get("error_message", "Not available"))
+        elif flights is not None:
+            response.add_options(section, "flight", flights, lambda flight: flight_item(flight, date), pinned)
+        else:
+            response.add_options(section, "connection", connections, connection_item, pinned)
+    for section, kind, category, records, to_item in (
+        ("hotels", "hotel", "hotel", hotel_records, hotel_item),
+        ("activities", "activity", "activity", activity_records, activity_item),
+    ):
+        if sections[section].get("status") != "success":
+            response.add_error(section, sections[section].get("error_message", "Not available"))
+        else:
+            response.add_options(section, kind, records or (), to_item,
+                                 [option.record for option in best_plan.chosen(category)])
+    response.add_rows("cost_quality_frontier", ("total_cost", "quality_score"),
+                      [[point["total_cost"], point["quality_score"]] for point in travel_plan["cost_quality_frontier"]])
+
+    summary = {key: travel_plan[key] for key in ("trip_overview", "optimized_plan", "cost_estimate",
+                                                 "recommendations", "incomplete_sections") if key in travel_plan}
+    return response.build(summary)
+
+class PlanRequest:
+    """A travel plan's normalized arguments and the sub-queries that answer it.
+
+    Sub-queries are keys for run_sub_query, so plans that need the same
+    lookup (e.g. batch trips to one destination) can share its result.
+    """
+
+    __slots__ = ("source", "destination", "travel_date", "return_date", "duration_days", "budget", "travelers",
+                 "preferences", "compact", "top_k", "hotel_filters", "activity_filters", "preferred_category",
+                 "sub_queries")
+
+    def __init__(self, source: str, destination: str, travel_date: Optional[str] = None,
+                 return_date: Optional[str] = None, budget: Optional[int] = None, travelers: int = 1,
+                 preferences: Optional[str] = None, compact: Optional[bool] = None, top_k: Optional[int] = None):
+        self.source, self.destination = resolve_city(source), resolve_city(destination)
+
+        # Set default dates
+        if not travel_date:
+            travel_date = datetime.datetime.now().strftime("%Y-%m-%d")
+        if not return_date:
+            travel_date_obj = datetime.datetime.strptime(travel_date, "%Y-%m-%d")
+            return_date = (travel_date_obj + datetime.timedelta(days=2)).strftime("%Y-%m-%d")
+
+        # Calculate trip duration
+        travel_date_obj = datetime.datetime.strptime(travel_date, "%Y-%m-%d")
+        return_date_obj = datetime.datetime.strptime(return_date, "%Y-%m-%d")
+        self.travel_date, self.return_date = travel_date, return_date
+        self.duration_days = (return_date_obj - travel_date_obj).days
+        self.budget, self.travelers, self.preferences = budget, travelers, preferences
+        self.compact, self.top_k = compact, top_k
+
+        # Work out every search's filters up front so the sub-searches can run together
+        # The budget is not split up front: the optimizer picks the best
+        # combination of flights, hotel and activities that fits it as a whole
+        self.hotel_filters = {}
+        if preferences:
+            if "luxury" in preferences.lower():
+                self.hotel_filters["min_rating"] = 4
+            elif "budget" in preferences.lower():
+                self.hotel_filters["max_price"] = 5000
+
+        self.activity_filters = {}
+        self.preferred_category = None
+
+        if preferences:
+            if "adventure" in preferences.lower():
+                self.preferred_category = "Adventure"
+            elif "cultural" in preferences.lower() or "heritage" in preferences.lower():
+                self.preferred_category = "Heritage"
+            elif "food" in preferences.lower() or "culinary" in preferences.lower():
+                self.preferred_category = "Culinary"
 
+        self.sub_queries = {
+            "outbound_flights": ("flights", self.source, self.destination),
+            "return_flights": ("flights", self.destination, self.source),
+            "hotels": ("hotels", self.destination, tuple(sorted(self.hotel_filters.items()))),
+            "activities": ("activities", self.destination, tuple(sorted(self.activity_filters.items()))),
+        }
+
+def run_sub_query(key: tuple):
+    """Runs one travel plan sub-query, through the search cache.
+
+    Args:
+        key (tuple): ("flights", source, destination), ("hotels", city, filters) or
+            ("activities", city, filters), with filters as sorted (name, value) pairs.
+
+    Returns:
+        (flights, connections) for a route, else the matching records or None.
+    """
+    kind, *args = key
+    if kind == "flights":
+        return _find_route_options(*args)
+    city, filters = args
+    if kind == "hotels":
+        return _find_plan_hotels(city, **dict(filters))
+    return _find_plan_activities(city, **dict(filters))
+
+@tool_metrics(label="destination")
+@inventory_tool
 def create_comprehensive_travel_plan(
     source: str,
     destination: str,
@@ -18,7 +197,9 @@ def create_comprehensive_travel_plan(
     return_date: Optional[str] = None,
     budget: Optional[int] = None,
     travelers: int = 1,
-    preferences: Optional[str] = None
+    preferences: Optional[str] = None,
+    compact: Optional[bool] = None,
+    top_k: Optional[int] = None
 ) -> dict:
     """Creates a comprehensive travel plan including flights, hotels, and activities.
 
@@ -30,25 +211,143 @@ def create_comprehensive_travel_plan(
         budget (int, optional): Total budget in rupees.
         travelers (int, optional): Number of travelers. Defaults to 1.
         preferences (str, optional): Travel preferences (e.g., "luxury", "budget", "adventure", "cultural").
+        compact (bool, optional): Return each section's top options as rows of key fields, with
+            the chosen options first and an id per option for get_option_details.
+            Defaults to config.COMPACT_TOOL_RESPONSES.
+        top_k (int, optional): Options per section in compact mode. Defaults to config.COMPACT_TOP_K.
 
     Returns:
         dict: Comprehensive travel plan with flights, hotels, and activities.
     """
-    logger.info(f"Starting comprehensive travel plan creation: {source} -> {destination}, {travelers} travelers, budget: {budget}")
-    
-    # Set default dates
-    if not travel_date:
-        travel_date = datetime.datetime.now().strftime("%Y-%m-%d")
-    if not return_date:
-        travel_date_obj = datetime.datetime.strptime(travel_date, "%Y-%m-%d")
-        return_date = (travel_date_obj + datetime.timedelta(days=2)).strftime("%Y-%m-%d")
+    logger.info("Starting comprehensive travel plan creation: %s -> %s, %s travelers, budget: %s", source, destination, travelers, budget)
+    request = PlanRequest(source, destination, travel_date, return_date, budget, travelers, preferences, compact, top_k)
+
+    # Run the independent sub-searches concurrently, each with its own deadline
+    logger.info("Searching for outbound flights: %s -> %s on %s", request.source, request.destination, request.travel_date)
+    logger.info("Searching for return flights: %s -> %s on %s", request.destination, request.source, request.return_date)
+    logger.info("Searching for hotels in %s with filters: %s", request.destination, request.hotel_filters)
+    logger.info("Searching for activities in %s with filters: %s, preferred_category: %s", request.destination, request.activity_filters, request.preferred_category)
+    outcomes = run_sub_searches({
+        name: functools.partial(run_sub_query, key) for name, key in request.sub_queries.items()
+    })
+    return build_travel_plan(request, outcomes)
+
+def _preferred_activities(request: PlanRequest, activity_records):
+    """Activities shown in a plan: those in the preferred category, if there is one."""
+    if request.preferred_category and activity_records:
+        return [
+            act for act in activity_records 
+            if act.category.lower() == request.preferred_category.lower()
+        ]
+    return activity_records
+
+def plan_section(request: PlanRequest, name: str, outcome: SubSearchOutcome, log_options: bool = False) -> dict:
+    """Builds one section of a travel plan as soon as its sub-query has finished.
+
+    Args:
+        request (PlanRequest): The plan's normalized arguments.
+        name (str): "outbound_flights", "return_flights", "hotels" or "activities".
+        outcome (SubSearchOutcome): The section's sub-query outcome.
+        log_options (bool, optional): Also log the top options (for a sample of plans).
+
+    Returns:
+        dict: The section as it appears in the plan.
+    """
+    source, destination = request.source, request.destination
+    travel_date, return_date = request.travel_date, request.return_date
+
+    if name in ("outbound_flights", "return_flights"):
+        outbound = name == "outbound_flights"
+        origin, arrival, date = (source, destination, travel_date) if outbound else (destination, source, return_date)
+        label = "Outbound" if outbound else "Return"
+        records, connections = outcome.value or (None, None)
+        if outcome.ok:
+            section = flight_search_response(origin, arrival, date, records, connections)
+        else:
+            section = outcome.section()
+        logger.info("%s flights search status: %s", label, section.get('status', 'unknown'))
+        
+        # Log flight selection details
+        if records:
+            logger.info("✈️ %s FLIGHTS FOUND: %s options available", label.upper(), len(records))
+            if log_options:
+                for i, flight in enumerate(records[:3], 1):  # Log top 3 options
+                    options_logger.info("   Option %s: %s %s - %s to %s - %s", i, flight.airline, flight.flight_number, format_clock(flight.departure_minutes), format_clock(flight.arrival_minutes), format_price(flight.price_paise))
+        elif connections:
+            logger.info("🔁 %s CONNECTIONS FOUND: %s itineraries, cheapest %s", label.upper(), len(connections), format_price(connections[0].total_price_paise))
+        else:
+            logger.warning("❌ No %s flights found for %s -> %s on %s", label.lower(), origin, arrival, date)
+        return section
+
+    if name == "hotels":
+        hotel_records = outcome.value
+        if outcome.ok:
+            hotels = hotel_search_response(destination, hotel_records, travel_date, return_date, **request.hotel_filters)
+        else:
+            hotels = outcome.section()
+        logger.info("Hotels search status: %s", hotels.get('status', 'unknown'))
+        
+        # Log hotel selection details
+        if hotel_records:
+            logger.info("🏨 HOTELS FOUND: %s options available in %s", len(hotel_records), destination)
+            if log_options:
+                for i, hotel in enumerate(hotel_records[:3], 1):  # Log top 3 options
+                    options_logger.info("   Option %s: %s - %s/night - Rating: %s/5 - %s", i, hotel.name, format_price(hotel.price_paise), hotel.rating, list(hotel.amenities[:2]) if hotel.amenities else 'No amenities listed')
+        else:
+            logger.warning("❌ No hotels found in %s matching criteria: %s", destination, request.hotel_filters)
+        return hotels
+
+    # Filter by preferred category if specified; the optimizer weighs it rather than excluding the rest
+    activity_records = _preferred_activities(request, outcome.value)
+    if activity_records is not outcome.value:
+        logger.info("Filtered activities by category '%s': %s -> %s activities", request.preferred_category, len(outcome.value), len(activity_records))
     
-    # Calculate trip duration
-    travel_date_obj = datetime.datetime.strptime(travel_date, "%Y-%m-%d")
-    return_date_obj = datetime.datetime.strptime(return_date, "%Y-%m-%d")
-    duration_days = (return_date_obj - travel_date_obj).days
+    if outcome.ok:
+        activities = activity_search_response(destination, activity_records, **request.activity_filters)
+    else:
+        activities = outcome.section()
+    logger.info("Activities search status: %s", activities.get('status', 'unknown'))
     
-    # Initialize the travel plan
+    # Log activity selection details
+    paid_activities = [a for a in activity_records if not a.is_free] if activity_records else []
+    if activity_records:
+        logger.info("🎯 ACTIVITIES FOUND: %s options available in %s", len(activity_records), destination)
+        
+        if log_options:
+            # Group activities by category for better logging
+            categories = {}
+            for activity in activity_records:
+                categories.setdefault(activity.category, []).append(activity)
+            
+            for category, acts in categories.items():
+                options_logger.info("   %s: %s activities", category, len(acts))
+                for i, activity in enumerate(acts[:2], 1):  # Log top 2 per category
+                    options_logger.info("     • %s - %s - Rating: %s/5", activity.name, activity.to_dict()['price'], activity.rating)
+        
+        # Log free vs paid activities breakdown
+        logger.info("💰 ACTIVITY PRICING: %s free, %s paid activities", len(activity_records) - len(paid_activities), len(paid_activities))
+        
+    else:
+        logger.warning("❌ No activities found in %s matching criteria: %s", destination, request.activity_filters)
+    return activities
+
+def build_travel_plan(request: PlanRequest, outcomes: Dict[str, SubSearchOutcome],
+                      sections: Optional[Dict[str, dict]] = None) -> dict:
+    """Assembles a travel plan from the outcomes of its sub-queries.
+
+    Args:
+        request (PlanRequest): The plan's normalized arguments.
+        outcomes (dict): Sub-query name (as in request.sub_queries) -> SubSearchOutcome.
+        sections (dict, optional): Sections already built by plan_section, by name.
+
+    Returns:
+        dict: The travel plan, compact if requested, or an error response.
+    """
+    source, destination = request.source, request.destination
+    travel_date, return_date, duration_days = request.travel_date, request.return_date, request.duration_days
+    budget, travelers, preferences = request.budget, request.travelers, request.preferences
+    preferred_category = request.preferred_category
+
     try:
         travel_plan = {
             "trip_overview": {
@@ -64,125 +363,21 @@ def create_comprehensive_travel_plan(
             "status": "success",
             "plan_generated_at": datetime.datetime.now().isoformat()
         }
-        
 
-        # Search for flights
-        logger.info(f"Searching for outbound flights: {source} -> {destination} on {travel_date}")
-        outbound_flights = search_flights(source, destination, travel_date)
-        logger.info(f"Outbound flights search status: {outbound_flights.get('status', 'unknown')}")
-        
-        # Log outbound flight selection details
-        if outbound_flights.get('status') == 'success' and outbound_flights.get('flights'):
-            logger.info(f"✈️ OUTBOUND FLIGHTS FOUND: {len(outbound_flights['flights'])} options available")
-            for i, flight in enumerate(outbound_flights['flights'][:3], 1):  # Log top 3 options
-                logger.info(f"   Option {i}: {flight['airline']} {flight['flight_number']} - {flight['departure']} to {flight['arrival']} - {flight['price']}")
-        else:
-            logger.warning(f"❌ No outbound flights found for {source} -> {destination} on {travel_date}")
-        
-        logger.info(f"Searching for return flights: {destination} -> {source} on {return_date}")
-        return_flights = search_flights(destination, source, return_date)
-        logger.info(f"Return flights search status: {return_flights.get('status', 'unknown')}")
-        
-        # Log return flight selection details
-        if return_flights.get('status') == 'success' and return_flights.get('flights'):
-            logger.info(f"✈️ RETURN FLIGHTS FOUND: {len(return_flights['flights'])} options available")
-            for i, flight in enumerate(return_flights['flights'][:3], 1):  # Log top 3 options
-                logger.info(f"   Option {i}: {flight['airline']} {flight['flight_number']} - {flight['departure']} to {flight['arrival']} - {flight['price']}")
-        else:
-            logger.warning(f"❌ No return flights found for {destination} -> {source} on {return_date}")
-
-        # Search for hotels
-        hotel_filters = {}
-        if budget and preferences:
-            # Allocate budget: 40% flights, 40% hotels, 20% activities
-            max_hotel_budget = int((budget * 0.4) / duration_days) if duration_days > 0 else None
-            if max_hotel_budget:
-                hotel_filters["max_price"] = max_hotel_budget
-            
-            if "luxury" in preferences.lower():
-                hotel_filters["min_rating"] = 4
-            elif "budget" in preferences.lower():
-                hotel_filters["max_price"] = 5000
-        
-        logger.info(f"Searching for hotels in {destination} with filters: {hotel_filters}")
-        hotels = search_hotels(
-            destination, 
-            travel_date, 
-            return_date,
-            **hotel_filters
-        )
-        logger.info(f"Hotels search status: {hotels.get('status', 'unknown')}")
-        
-        # Log hotel selection details
-        if hotels.get('status') == 'success' and hotels.get('hotels'):
-            logger.info(f"🏨 HOTELS FOUND: {len(hotels['hotels'])} options available in {destination}")
-            for i, hotel in enumerate(hotels['hotels'][:3], 1):  # Log top 3 options
-                logger.info(f"   Option {i}: {hotel['name']} - {hotel['price_per_night']}/night - Rating: {hotel['rating']}/5 - {hotel['amenities'][:2] if hotel['amenities'] else 'No amenities listed'}")
-            
-            # Log the selected hotel (cheapest one) for cost calculation
-            cheapest_hotel = min(hotels['hotels'], key=lambda h: int(h['price_per_night'].replace('₹', '').replace(',', '')))
-            logger.info(f"🏆 SELECTED HOTEL FOR COST CALC: {cheapest_hotel['name']} at {cheapest_hotel['price_per_night']}/night (cheapest option)")
-        else:
-            logger.warning(f"❌ No hotels found in {destination} matching criteria: {hotel_filters}")
+        incomplete_sections = [name for name, outcome in outcomes.items() if not outcome.ok]
+        if sections is None:
+            # Per-option lines are logged for a sample of plans (LOG_SAMPLE_EVERY)
+            log_options = sampled(options_logger)
+            sections = {name: plan_section(request, name, outcomes[name], log_options) for name in request.sub_queries}
+        outbound_flights, return_flights = sections["outbound_flights"], sections["return_flights"]
+        hotels, activities = sections["hotels"], sections["activities"]
 
-        # Search for activities
-        activity_filters = {}
-        preferred_category = None
-        
-        if budget:
-            # Allocate 20% of budget for activities
-            max_activity_budget = int(budget * 0.2 / max(1, duration_days))
-            activity_filters["max_price"] = max_activity_budget
-        
-        if preferences:
-            if "adventure" in preferences.lower():
-                preferred_category = "Adventure"
-            elif "cultural" in preferences.lower() or "heritage" in preferences.lower():
-                preferred_category = "Heritage"
-            elif "food" in preferences.lower() or "culinary" in preferences.lower():
-                preferred_category = "Culinary"
-        
-        logger.info(f"Searching for activities in {destination} with filters: {activity_filters}, preferred_category: {preferred_category}")
-        activities = search_activities(destination, **activity_filters)
-        logger.info(f"Activities search status: {activities.get('status', 'unknown')}")
-        
-        # Filter by preferred category if specified
-        if preferred_category and activities.get('status') == 'success' and activities.get('activities'):
-            original_count = len(activities['activities'])
-            activities['activities'] = [
-                act for act in activities['activities'] 
-                if act.get('category', '').lower() == preferred_category.lower()
-            ]
-            logger.info(f"Filtered activities by category '{preferred_category}': {original_count} -> {len(activities['activities'])} activities")
-            activities['activities_found'] = len(activities['activities'])
-        
-        # Log activity selection details
-        if activities.get('status') == 'success' and activities.get('activities'):
-            logger.info(f"🎯 ACTIVITIES FOUND: {len(activities['activities'])} options available in {destination}")
-            
-            # Group activities by category for better logging
-            categories = {}
-            for activity in activities['activities']:
-                cat = activity['category']
-                if cat not in categories:
-                    categories[cat] = []
-                categories[cat].append(activity)
-            
-            for category, acts in categories.items():
-                logger.info(f"   {category}: {len(acts)} activities")
-                for i, activity in enumerate(acts[:2], 1):  # Log top 2 per category
-                    logger.info(f"     • {activity['name']} - {activity['price']} - Rating: {activity['rating']}/5")
-            
-            # Log free vs paid activities breakdown
-            free_activities = [a for a in activities['activities'] if a['price'] == '₹free']
-            paid_activities = [a for a in activities['activities'] if a['price'] != '₹free']
-            logger.info(f"💰 ACTIVITY PRICING: {len(free_activities)} free, {len(paid_activities)} paid activities")
-            
-            if paid_activities:
-                avg_paid_price = sum([int(a['price'].replace('₹', '').replace(',', '')) for a in paid_activities]) / len(paid_activities)
-                logger.info(f"💵 SELECTED ACTIVITIES FOR COST CALC: Average paid activity cost ₹{avg_paid_price:.0f}")
-        else:
-            logger.warning(f"❌ No activities found in {destination} matching criteria: {activity_filters}")
+        outbound_records, outbound_connections = outcomes["outbound_flights"].value or (None, None)
+        return_records, return_connections = outcomes["return_flights"].value or (None, None)
+        hotel_records = outcomes["hotels"].value
+        # The optimizer weighs the preferred category rather than excluding the rest
+        candidate_activities = outcomes["activities"].value
+        activity_records = _preferred_activities(request, candidate_activities)
         
         # Build the comprehensive plan
         travel_plan["flights"] = {
@@ -193,62 +388,51 @@ def create_comprehensive_travel_plan(
         travel_plan["accommodation"] = hotels
         travel_plan["activities"] = activities
         
-        # Calculate estimated costs
-        total_cost_estimate = 0
-        cost_breakdown = {}
-        
-        # Flight costs
-        if outbound_flights["status"] == "success" and return_flights["status"] == "success":
-            # Get cheapest flight options
-            outbound_cost = min([int(f["price"].replace("₹", "").replace(",", "")) 
-                            for f in outbound_flights["flights"]]) if outbound_flights["flights"] else 0
-            return_cost = min([int(f["price"].replace("₹", "").replace(",", "")) 
-                            for f in return_flights["flights"]]) if return_flights["flights"] else 0
-            flight_cost = (outbound_cost + return_cost) * travelers
-            cost_breakdown["flights"] = f"₹{flight_cost:,}"
-            total_cost_estimate += flight_cost
-            
-            # Log flight cost selection
-            logger.info(f"💸 FLIGHT COST CALCULATION: Outbound ₹{outbound_cost:,} + Return ₹{return_cost:,} × {travelers} travelers = ₹{flight_cost:,}")
-        
-        # Hotel costs
-        if hotels["status"] == "success" and hotels["hotels"]:
-            cheapest_hotel = min(hotels["hotels"], 
-                            key=lambda h: int(h["price_per_night"].replace("₹", "").replace(",", "")))
-            hotel_cost_per_night = int(cheapest_hotel["price_per_night"].replace("₹", "").replace(",", ""))
-            hotel_total_cost = hotel_cost_per_night * duration_days
-            cost_breakdown["accommodation"] = f"₹{hotel_total_cost:,} ({duration_days} nights)"
-            total_cost_estimate += hotel_total_cost
-            
-            # Log hotel cost selection
-            logger.info(f"💸 HOTEL COST CALCULATION: {cheapest_hotel['name']} at ₹{hotel_cost_per_night:,}/night × {duration_days} nights = ₹{hotel_total_cost:,}")
+        # Pick the best combination within budget (in paise, formatted only for the response)
+        nights = max(1, duration_days)
+        options = (
+            flight_options("outbound", outbound_records, outbound_connections, travelers),
+            flight_options("return", return_records, return_connections, travelers),
+            hotel_options(hotel_records, nights, preferences),
+            activity_options(candidate_activities, travelers, preferred_category),
+        )
+        max_activities = PLANNER_ACTIVITIES_PER_DAY * nights
+        best_plan, frontier = optimize_trip(*options, max_activities,
+                                            budget_paise=budget * PAISE_PER_RUPEE if budget else None)
+        within_budget = best_plan is not None
+        if best_plan is None:
+            # Nothing fits the budget: fall back to the cheapest trip
+            frontier = optimize_trip(*options, max_activities)[1]
+            best_plan = frontier[0]
+        travel_plan["optimized_plan"] = best_plan.to_dict()
+        logger.info("🧮 OPTIMIZED PLAN: %s from a frontier of %s plans", travel_plan["optimized_plan"], len(frontier))
+        travel_plan["cost_quality_frontier"] = [
+            {"total_cost": format_price(plan.cost_paise), "quality_score": plan.score}
+            for plan in thin_frontier(frontier, PLANNER_FRONTIER_POINTS)
+        ]
         
-        # Activity costs
-        if activities["status"] == "success" and activities["activities"]:
-            # Estimate 2-3 activities per day
-            activities_per_day = 2
-            total_activities = duration_days * activities_per_day
-            avg_activity_cost = 0
-            free_activities = [a for a in activities["activities"] if a["price"] == "₹free"]
-            paid_activities = [a for a in activities["activities"] if a["price"] != "₹free"]
-            
-            if paid_activities:
-                avg_activity_cost = sum([int(a["price"].replace("₹", "").replace(",", "")) 
-                                    for a in paid_activities[:total_activities]]) // min(len(paid_activities), total_activities)
-            
-            activity_cost = avg_activity_cost * min(total_activities, len(paid_activities))
-            cost_breakdown["activities"] = f"₹{activity_cost:,} (estimated {total_activities} activities)"
-            total_cost_estimate += activity_cost
-            
-            # Log activity cost selection
-            activities_count = min(total_activities, len(paid_activities))
-            logger.info(f"💸 ACTIVITY COST CALCULATION: {activities_count} activities × ₹{avg_activity_cost:,} average = ₹{activity_cost:,} (estimated {activities_per_day} activities/day × {duration_days} days)")
+        cost_breakdown = {}
+        if best_plan.chosen("outbound") or best_plan.chosen("return"):
+            flight_cost = best_plan.cost_of("outbound") + best_plan.cost_of("return")
+            cost_breakdown["flights"] = format_price(flight_cost)
+            logger.info("💸 FLIGHT COST CALCULATION: Outbound %s + Return %s for %s travelers = %s", format_price(best_plan.cost_of('outbound')), format_price(best_plan.cost_of('return')), travelers, format_price(flight_cost))
+        if best_plan.chosen("hotel"):
+            hotel_total_cost = best_plan.cost_of("hotel")
+            cost_breakdown["accommodation"] = f"{format_price(hotel_total_cost)} ({nights} nights)"
+            logger.info("💸 HOTEL COST CALCULATION: %s × %s nights = %s", best_plan.chosen('hotel')[0].label, nights, format_price(hotel_total_cost))
+        if candidate_activities:
+            chosen_activities = best_plan.chosen("activity")
+            activity_cost = best_plan.cost_of("activity")
+            cost_breakdown["activities"] = f"{format_price(activity_cost)} ({len(chosen_activities)} activities)"
+            logger.info("💸 ACTIVITY COST CALCULATION: %s activities for %s travelers = %s", len(chosen_activities), travelers, format_price(activity_cost))
+        
+        total_cost_estimate = best_plan.cost_paise // PAISE_PER_RUPEE
         
         travel_plan["cost_estimate"] = {
             "total": f"₹{total_cost_estimate:,}",
             "per_person": f"₹{total_cost_estimate // travelers:,}" if travelers > 1 else f"₹{total_cost_estimate:,}",
             "breakdown": cost_breakdown,
-            "budget_status": "Within budget" if budget and total_cost_estimate <= budget else "Over budget" if budget else "No budget specified"
+            "budget_status": ("Within budget" if within_budget else "Over budget") if budget else "No budget specified"
         }
         
         # Add recommendations
@@ -280,16 +464,34 @@ def create_comprehensive_travel_plan(
         
         travel_plan["recommendations"] = recommendations
         
-        logger.info(f"Travel plan created successfully. Total cost estimate: {travel_plan['cost_estimate']['total']}")
+        if incomplete_sections:
+            # Sections that missed their deadline are left out of the cost estimate
+            travel_plan["incomplete_sections"] = incomplete_sections
+            travel_plan["cost_estimate"]["note"] = f"Excludes sections that did not complete: {', '.join(incomplete_sections)}"
+            logger.warning("Travel plan is partial, incomplete sections: %s", incomplete_sections)
+        
+        logger.info("Travel plan created successfully. Total cost estimate: %s", travel_plan['cost_estimate']['total'])
+        if use_compact(request.compact):
+            routes = {
+                "outbound_flights": ("outbound", outbound_records, outbound_connections, travel_date),
+                "return_flights": ("return", return_records, return_connections, return_date),
+            }
+            return _compact_travel_plan(travel_plan, best_plan, request.top_k, routes, hotel_records, activity_records)
         return travel_plan
         
     except Exception as e:
-        logger.error(f"Error creating comprehensive travel plan: {str(e)}", exc_info=True)
-        return {
-            "status": "error",
-            "error_message": f"Failed to create travel plan: {str(e)}"
-        }
+        return plan_error(e)
 
+def plan_error(e: Exception) -> dict:
+    """Logs a failed travel plan and returns the error response for it."""
+    logger.error("Error creating comprehensive travel plan: %s", e, exc_info=True)
+    return {
+        "status": "error",
+        "error_message": f"Failed to create travel plan: {str(e)}"
+    }
+
+@tool_metrics(label="destination", results=("activities",))
+@inventory_tool
 def search_destination_activities(destination: str, activity_type: Optional[str] = None) -> dict:
     """Search for activities in a specific destination with optional type filtering.
     
@@ -300,21 +502,23 @@ def search_destination_activities(destination: str, activity_type: Optional[str]
     Returns:
         dict: Available activities in the destination.
     """
-    logger.info(f"Searching destination activities: {destination}, type: {activity_type}")
+    logger.info("Searching destination activities: %s, type: %s", destination, activity_type)
     
     try:
         result = search_activities(destination)
         
-        logger.info(f"Destination activities search completed for {destination}")
+        logger.info("Destination activities search completed for %s", destination)
         return result
         
     except Exception as e:
-        logger.error(f"Error searching destination activities {destination}: {str(e)}", exc_info=True)
+        logger.error("Error searching destination activities %s: %s", destination, e, exc_info=True)
         return {
             "status": "error",
             "error_message": f"Error searching activities: {str(e)}"
         }
 
+@tool_metrics()
+@inventory_tool
 def get_travel_inspiration(activity_category: str) -> dict:
     """Get travel inspiration based on activity preferences across all destinations.
     
@@ -324,174 +528,139 @@ def get_travel_inspiration(activity_category: str) -> dict:
     Returns:
         dict: Cities and activities matching your interests.
     """
-    logger.info(f"Getting travel inspiration for category: {activity_category}")
+    logger.info("Getting travel inspiration for category: %s", activity_category)
     
     try:
         result = get_activities_by_category(activity_category)
-        logger.info(f"Travel inspiration search completed for {activity_category}")
+        logger.info("Travel inspiration search completed for %s", activity_category)
         return result
         
     except Exception as e:
-        logger.error(f"Error getting travel inspiration for {activity_category}: {str(e)}", exc_info=True)
+        logger.error("Error getting travel inspiration for %s: %s", activity_category, e, exc_info=True)
         return {
             "status": "error",
             "error_message": f"Error getting inspiration: {str(e)}"
         }
 
-def compare_destinations(destinations: List[str], preferences: Optional[str] = None) -> dict|None:
+@tool_metrics()
+@inventory_tool
+def compare_destinations(destinations: Optional[List[str]] = None, preferences: Optional[str] = None) -> dict:
     """Compare multiple destinations based on available activities and accommodations.
     
     Args:
-        destinations (List[str]): List of destination cities to compare.
+        destinations (List[str], optional): List of destination cities to compare.
+            Compares every known destination when omitted.
         preferences (str, optional): Travel preferences to filter comparison.
         
     Returns:
         dict: Comparison of destinations with recommendations.
     """
-    logger.info(f"Comparing destinations: {destinations}, preferences: {preferences}")
+    logger.info("Comparing destinations: %s, preferences: %s", destinations or 'all', preferences)
     
     try:
+        if not destinations:
+            destinations = [city.title() for city in known_destinations()]
+        
+        results = score_destinations(destinations, preferences)
+        recommendation = pick_recommendation(results)
+        
         comparison = {
             "destinations_compared": destinations,
             "preferences": preferences,
-            "comparison_results": {},
-            "recommendation": None
+            "comparison_results": results,
+            "recommendation": recommendation
         }
-    
-        for destination in destinations:
-            dest_info = {
-                "city": destination.title(),
-                "hotels": search_hotels(destination),
-                "activities": search_activities(destination)
-            }
-            
-            # Add scoring based on preferences
-            score = 0
-            highlights = []
-            
-            if dest_info["hotels"]["status"] == "success":
-                hotels = dest_info["hotels"]["hotels"]
-                avg_hotel_price = sum([int(h["price_per_night"].replace("₹", "").replace(",", "")) 
-                                    for h in hotels]) // len(hotels)
-                luxury_hotels = len([h for h in hotels if h["rating"] >= 4])
-                
-                dest_info["hotel_summary"] = {
-                    "total_hotels": len(hotels),
-                    "avg_price": f"₹{avg_hotel_price:,}",
-                    "luxury_options": luxury_hotels
-                }
-                
-                if preferences:
-                    if "budget" in preferences.lower() and avg_hotel_price <= 5000:
-                        score += 2
-                        highlights.append("Budget-friendly accommodation")
-                    elif "luxury" in preferences.lower() and luxury_hotels > 0:
-                        score += 2
-                        highlights.append("Luxury accommodation available")
-            
-            if dest_info["activities"]["status"] == "success":
-                activities = dest_info["activities"]["activities"]
-                activity_categories = set([a["category"] for a in activities])
-                
-                dest_info["activity_summary"] = {
-                    "total_activities": len(activities),
-                    "categories": list(activity_categories),
-                    "avg_rating": round(sum([a["rating"] for a in activities]) / len(activities), 1)
-                }
-                
-                if preferences:
-                    if "adventure" in preferences.lower() and "Adventure" in activity_categories:
-                        score += 3
-                        highlights.append("Great for adventure activities")
-                    elif "cultural" in preferences.lower() and "Heritage" in activity_categories:
-                        score += 3
-                        highlights.append("Rich cultural experiences")
-                    elif "food" in preferences.lower() and "Culinary" in activity_categories:
-                        score += 2
-                        highlights.append("Excellent food experiences")
-            
-            dest_info["score"] = score
-            dest_info["highlights"] = highlights
-            comparison["comparison_results"][destination.lower()] = dest_info
         
-            # Determine recommendation
-            if comparison["comparison_results"]:
-                best_destination = max(comparison["comparison_results"].values(), key=lambda x: x["score"])
-                comparison["recommendation"] = {
-                    "best_match": best_destination["city"],
-                    "score": best_destination["score"],
-                    "reasons": best_destination["highlights"]
-                }
-            
-            logger.info(f"Destinations comparison completed. Best match: {comparison.get('recommendation', {}).get('best_match', 'None')}")
-            return comparison
+        logger.info("Destinations comparison completed for %s cities. Best match: %s", len(results), (recommendation or {}).get('best_match', 'None'))
+        return comparison
         
     except Exception as e:
-        logger.error(f"Error comparing destinations {destinations}: {str(e)}", exc_info=True)
+        logger.error("Error comparing destinations %s: %s", destinations, e, exc_info=True)
         return {
             "status": "error",
             "error_message": f"Error comparing destinations: {str(e)}"
         }
 
-# Create the super travel planner agent
-travel_planner_agent = Agent(
-    name="travel_planner_super_agent",
-    model=MODEL_NAME,
-    description=(
-        "Comprehensive travel planning agent that coordinates flights, hotels, and activities to create "
-        "complete travel itineraries. Specializes in Indian destinations and provides budget-aware recommendations."
-    ),
-    instruction=(
-        "You are an expert travel planner who helps users create comprehensive travel plans. "
-        "You coordinate between flight booking, hotel reservations, and activity planning to provide "
-        "complete itineraries. You can:\n\n"
-        "1. Create full travel plans with flights, accommodation, and activities\n"
-        "2. Work within specified budgets and preferences\n"
-        "3. Provide cost breakdowns and budget analysis\n"
-        "4. Compare multiple destinations to help users decide\n"
-        "5. Suggest activities based on interests (adventure, cultural, culinary, etc.)\n"
-        "6. Give travel recommendations and tips\n\n"
-
-        "CRITICAL INSTRUCTION - RESPONSE FORMAT:\n"
-        "After calling create_comprehensive_travel_plan or any other tool, you MUST generate a complete text response\n"
-        "summarizing the results for the user. Structure your response as follows:\n\n"
-        "1. TRIP OVERVIEW: Summarize the trip details (destination, dates, travelers, budget)\n"
-        "2. FLIGHT OPTIONS: List the best 2-3 flight options for both outbound and return with:\n"
-        "   - Airline and flight number\n"
-        "   - Departure and arrival times\n"
-        "   - Price per person\n"
-        "3. ACCOMMODATION: Present the top hotel options with:\n"
-        "   - Hotel name and rating\n"
-        "   - Price per night and total cost\n"
-        "   - Key amenities\n"
-        "4. ACTIVITIES: Suggest 3-5 activities with:\n"
-        "   - Activity name and category\n"
-        "   - Price and duration\n"
-        "   - Brief description\n"
-        "5. COST BREAKDOWN: Show the detailed cost estimate:\n"
-        "   - Flights total\n"
-        "   - Accommodation total\n"
-        "   - Activities estimate\n"
-        "   - Grand total and per-person cost\n"
-        "   - Budget status (within/over budget)\n"
-        "6. RECOMMENDATIONS: Provide 3-5 helpful travel tips specific to this trip\n\n"
-        "DO NOT just return the raw function output. Always format it into a conversational, helpful response.\n\n"
-        "Always consider user preferences, budget constraints, and trip duration when making recommendations. "
-        "Provide detailed explanations for your suggestions and offer alternative options when possible. "
-        "Be helpful, informative, and ensure all recommendations are practical and well-reasoned."
-    ),
-    tools=[
-        create_comprehensive_travel_plan,
-        search_destination_activities,
-        get_travel_inspiration,
-        compare_destinations,
-        # Include individual agent tools for specific queries
-        search_flights,
-        search_hotels,
-        search_activities,
-        get_activities_by_category
-    ],
-)
+def build_travel_planner_agent(model=None):
+    """Builds the travel planner super agent. Imports google.adk on first call.
+
+    Args:
+        model: Model name or ADK BaseLlm instance (e.g. a stub for load tests).
+            Defaults to config.MODEL_NAME.
+    """
+    from google.adk.agents import Agent
+    from llm_cache import agent_callbacks
+
+    plan_tool = create_comprehensive_travel_plan
+    if STREAM_TRAVEL_PLANS:
+        from .streaming import stream_plan_tool as plan_tool
+
+    return Agent(
+        name="travel_planner_super_agent",
+        model=model or MODEL_NAME,
+        description=(
+            "Comprehensive travel planning agent that coordinates flights, hotels, and activities to create "
+            "complete travel itineraries. Specializes in Indian destinations and provides budget-aware recommendations."
+        ),
+        instruction=(
+            "You are an expert travel planner who helps users create comprehensive travel plans. "
+            "You coordinate between flight booking, hotel reservations, and activity planning to provide "
+            "complete itineraries. You can:\n\n"
+            "1. Create full travel plans with flights, accommodation, and activities\n"
+            "2. Work within specified budgets and preferences\n"
+            "3. Provide cost breakdowns and budget analysis\n"
+            "4. Compare multiple destinations to help users decide\n"
+            "5. Suggest activities based on interests (adventure, cultural, culinary, etc.)\n"
+            "6. Give travel recommendations and tips\n"
+            "7. Find the cheapest days to fly when dates are flexible (search_fare_calendar, one call per date range)\n\n"
+
+            "CRITICAL INSTRUCTION - RESPONSE FORMAT:\n"
+            "After calling create_comprehensive_travel_plan or any other tool, you MUST generate a complete text response\n"
+            "summarizing the results for the user. Structure your response as follows:\n\n"
+            "1. TRIP OVERVIEW: Summarize the trip details (destination, dates, travelers, budget)\n"
+            "2. FLIGHT OPTIONS: List the best 2-3 flight options for both outbound and return with:\n"
+            "   - Airline and flight number\n"
+            "   - Departure and arrival times\n"
+            "   - Price per person\n"
+            "3. ACCOMMODATION: Present the top hotel options with:\n"
+            "   - Hotel name and rating\n"
+            "   - Price per night and total cost\n"
+            "   - Key amenities\n"
+            "4. ACTIVITIES: Suggest 3-5 activities with:\n"
+            "   - Activity name and category\n"
+            "   - Price and duration\n"
+            "   - Brief description\n"
+            "5. COST BREAKDOWN: Show the detailed cost estimate:\n"
+            "   - Flights total\n"
+            "   - Accommodation total\n"
+            "   - Activities estimate\n"
+            "   - Grand total and per-person cost\n"
+            "   - Budget status (within/over budget)\n"
+            "6. RECOMMENDATIONS: Provide 3-5 helpful travel tips specific to this trip\n\n"
+            "7. BEST COMBINATION: Present optimized_plan as the recommended trip and mention one or two\n"
+            "   cheaper or higher-quality trade-offs from cost_quality_frontier\n\n"
+            "DO NOT just return the raw function output. Always format it into a conversational, helpful response.\n\n"
+            "Always consider user preferences, budget constraints, and trip duration when making recommendations. "
+            "Provide detailed explanations for your suggestions and offer alternative options when possible. "
+            "Be helpful, informative, and ensure all recommendations are practical and well-reasoned. "
+            + COMPACT_FORMAT_INSTRUCTION
+        ),
+        tools=[
+            plan_tool,
+            search_destination_activities,
+            get_travel_inspiration,
+            compare_destinations,
+            # Include individual agent tools for specific queries
+            search_flights,
+            search_connecting_flights,
+            search_fare_calendar,
+            search_hotels,
+            search_activities,
+            get_activities_by_category,
+            get_option_details
+        ],
+        **agent_callbacks(),
+    )
 
-# Export as root_agent for Google ADK compatibility
-root_agent = travel_planner_agent
\ No newline at end of file
+# travel_planner_agent and root_agent (for Google ADK compatibility) are built on first access
+__getattr__ = lazy_agent(globals(), build_travel_planner_agent, ("travel_planner_agent", "root_agent"))
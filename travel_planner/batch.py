@@ -0,0 +1,170 @@
+"""
+Batch trip planning with shared sub-queries.
+
+plan_trips() plans many trips at once, e.g. a corporate upload of 2,000
+employees flying from a few offices to three offsites. Each trip's flight,
+hotel and activity lookups are keyed by their normalized arguments
+(PlanRequest.sub_queries), so trips on the same route and date, or to the
+same destination with the same filters, share one lookup: such an upload
+needs a few dozen lookups instead of 8,000. Each unique sub-query runs
+once, inline, on a thread pool or on a process pool, and a trip's plan is
+assembled on the calling thread as soon as its last sub-query finishes,
+so plans stream back in completion order.
+
+The whole batch runs on one pinned catalog version, like a single tool
+call. Unlike create_comprehensive_travel_plan, sub-queries have no
+deadline; one that fails marks its section as an error in every trip
+that needs it.
+"""
+
+import functools
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from inventory import GeneratorPin, bind_backend, get_backend
+from logging_utils import METRICS, NS_PER_SECOND
+from .agent import PlanRequest, build_travel_plan, plan_error, run_sub_query
+from .fanout import SubSearchOutcome
+from config import BATCH_PLANNER_PROCESSES, BATCH_PLANNER_WORKERS
+
+logger = logging.getLogger('travel_agent.travel_planner.batch')
+
+SUB_QUERIES = METRICS.counter(
+    "travel_agent_batch_sub_queries_total",
+    "Batch plan sub-queries by result (run, or shared with a trip that needed the same lookup).", ("result",))
+# Whole-batch duration bucket bounds, in nanoseconds (100ms .. 10min)
+BATCH_DURATION_BUCKETS_NS = tuple(int(seconds * 1e9) for seconds in (
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+))
+# Throughput is rate(travel_agent_batch_trips_total); per batch, trips over duration
+BATCH_TRIPS = METRICS.counter(
+    "travel_agent_batch_trips_total", "Trips planned by plan_trips by plan status (success or error).", ("status",))
+BATCH_DURATION = METRICS.histogram(
+    "travel_agent_batch_plan_seconds", "Time plan_trips took to plan a whole batch.",
+    (), BATCH_DURATION_BUCKETS_NS, divisor=NS_PER_SECOND)
+
+def _run_in_process(key: tuple, catalog_version: str) -> Tuple[bool, Any]:
+    """Run a sub-query in a pool process: (True, result), or (False, version) if it serves another catalog."""
+    backend = get_backend()
+    if backend.catalog_version != catalog_version:
+        return False, backend.catalog_version
+    return True, run_sub_query(key)
+
+def plan_trips(trips: Iterable[Mapping[str, Any]], workers: int = BATCH_PLANNER_WORKERS,
+               processes: bool = BATCH_PLANNER_PROCESSES) -> Iterator[Tuple[int, dict]]:
+    """
+    Plan many trips, running each distinct sub-query once.
+
+    Args:
+        trips: Keyword arguments for create_comprehensive_travel_plan, one
+            mapping per trip (source, destination, travel_date, budget, ...).
+        workers: Pool size for the sub-queries; 0 runs them inline, trip by
+            trip, on the calling thread.
+        processes: Use a process pool instead of threads. Pool processes
+            must serve the same catalog version (they do when forked);
+            sub-queries a process cannot answer run on the calling thread.
+
+    Yields:
+        tuple: (trip index, plan) as each plan is ready. Plans are those
+            create_comprehensive_travel_plan returns, including its error
+            responses, with the batch's inventory_version.
+    """
+    started_ns = time.perf_counter_ns()
+    pin = GeneratorPin()
+    backend = pin.backend
+    pool: Optional[Executor] = None
+    try:
+        requests: Dict[int, PlanRequest] = {}
+        waiting: Dict[tuple, List[int]] = {}
+        for index, trip in enumerate(trips):
+            try:
+                request = pin.run(PlanRequest, **trip)
+            except Exception as e:
+                BATCH_TRIPS.labels("error").inc()
+                yield index, _stamped(plan_error(e), backend.catalog_version)
+                continue
+            requests[index] = request
+            for key in set(request.sub_queries.values()):
+                waiting.setdefault(key, []).append(index)
+
+        trips_planned = len(requests)
+        planned = sum(len(request.sub_queries) for request in requests.values())
+        SUB_QUERIES.labels("run").inc(len(waiting))
+        SUB_QUERIES.labels("shared").inc(planned - len(waiting))
+        # Sub-query key -> (result, error message)
+        results: Dict[tuple, Tuple[Any, Optional[str]]] = {}
+
+        def run_locally(key: tuple) -> Tuple[Any, Optional[str]]:
+            try:
+                return pin.run(run_sub_query, key), None
+            except Exception as e:
+                logger.error("Batch sub-query %s failed: %s", key, e, exc_info=True)
+                return None, str(e)
+
+        def plan(index: int) -> Tuple[int, dict]:
+            request = requests.pop(index)
+            outcomes = {}
+            for name, key in request.sub_queries.items():
+                value, error = results[key]
+                outcomes[name] = SubSearchOutcome(
+                    name, value=value, error=f"{name} search failed: {error}" if error is not None else None)
+            trip_plan = pin.run(build_travel_plan, request, outcomes)
+            BATCH_TRIPS.labels(trip_plan.get("status", "unknown")).inc()
+            return index, _stamped(trip_plan, backend.catalog_version)
+
+        if not workers:
+            # Trip by trip, so the first plans are ready after their own lookups
+            for index in list(requests):
+                for key in requests[index].sub_queries.values():
+                    if key not in results:
+                        results[key] = run_locally(key)
+                yield plan(index)
+        else:
+            remaining = {index: len(set(request.sub_queries.values())) for index, request in requests.items()}
+            if processes:
+                pool = ProcessPoolExecutor(max_workers=workers)
+                futures = {pool.submit(_run_in_process, key, backend.catalog_version): key for key in waiting}
+            else:
+                pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-planner")
+                futures = {
+                    pool.submit(pin.run(bind_backend, functools.partial(run_sub_query, key))): key
+                    for key in waiting
+                }
+            mismatched = 0
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    results[key] = future.result(), None
+                except Exception as e:
+                    logger.error("Batch sub-query %s failed: %s", key, e, exc_info=True)
+                    results[key] = None, str(e)
+                if processes and results[key][1] is None:
+                    answered, value = results[key][0]
+                    if answered:
+                        results[key] = value, None
+                    else:
+                        mismatched += 1
+                        if mismatched == 1:
+                            logger.warning("Batch pool processes serve catalog %s, not %s; running their "
+                                           "sub-queries here", value, backend.catalog_version)
+                        results[key] = run_locally(key)
+                for index in waiting[key]:
+                    remaining[index] -= 1
+                    if not remaining[index]:
+                        yield plan(index)
+
+        elapsed_ns = time.perf_counter_ns() - started_ns
+        BATCH_DURATION.observe(elapsed_ns)
+        logger.info("Planned a batch of %s trips with %s sub-queries (%s shared) in %.2fs",
+                    trips_planned, len(waiting), planned - len(waiting), elapsed_ns / NS_PER_SECOND)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        pin.release()
+
+def _stamped(plan: dict, catalog_version: str) -> dict:
+    """Report the batch's catalog version on a plan, as inventory_tool does for a single call."""
+    plan["inventory_version"] = catalog_version
+    return plan
@@ -0,0 +1,120 @@
+"""
+Batch destination scoring for compare_destinations.
+
+Every city is scored from the precomputed per-city hotel and activity
+aggregates, so a comparison costs a couple of dict lookups per city instead
+of two full searches. When the inventory lives behind remote backends the
+per-city evaluations fan out on the planner thread pool; the winner is
+picked once, after every city has been scored.
+"""
+
+import functools
+import logging
+from typing import Dict, List, Optional
+
+from hotel_agent.agent import find_hotel_summary
+from activities_agent.agent import find_activity_summary
+from inventory import PAISE_PER_RUPEE, get_backend, resolve_city
+from .fanout import run_sub_searches
+from config import REMOTE_INVENTORY
+
+logger = logging.getLogger('travel_agent.travel_planner.comparison')
+
+def known_destinations() -> List[str]:
+    """All cities that have hotels or activities, in alphabetical order."""
+    backend = get_backend()
+    return sorted(set(backend.hotel_cities()) | set(backend.activity_cities()))
+
+def evaluate_destination(destination: str, preferences: Optional[str] = None) -> dict:
+    """Score one destination against the travel preferences.
+
+    Args:
+        destination (str): The city to evaluate.
+        preferences (str, optional): Travel preferences such as "budget", "luxury",
+            "adventure", "cultural" or "food".
+
+    Returns:
+        dict: City summary with hotel/activity aggregates, score and highlights.
+    """
+    prefs = preferences.lower() if preferences else ""
+    dest_info = {"city": destination.title()}
+    score = 0
+    highlights = []
+    notes = []
+
+    hotel_summary = find_hotel_summary(destination)
+    if hotel_summary and hotel_summary.total_hotels:
+        dest_info["hotel_summary"] = hotel_summary.to_dict()
+        avg_hotel_price = hotel_summary.avg_price_paise // PAISE_PER_RUPEE
+
+        if "budget" in prefs and avg_hotel_price <= 5000:
+            score += 2
+            highlights.append("Budget-friendly accommodation")
+        elif "luxury" in prefs and hotel_summary.luxury_options > 0:
+            score += 2
+            highlights.append("Luxury accommodation available")
+    else:
+        notes.append(f"No hotels available in {destination.title()}")
+
+    activity_summary = find_activity_summary(destination)
+    if activity_summary and activity_summary.total_activities:
+        dest_info["activity_summary"] = activity_summary.to_dict()
+        activity_categories = activity_summary.categories
+
+        if "adventure" in prefs and "Adventure" in activity_categories:
+            score += 3
+            highlights.append("Great for adventure activities")
+        elif "cultural" in prefs and "Heritage" in activity_categories:
+            score += 3
+            highlights.append("Rich cultural experiences")
+        elif "food" in prefs and "Culinary" in activity_categories:
+            score += 2
+            highlights.append("Excellent food experiences")
+    else:
+        notes.append(f"No activities available in {destination.title()}")
+
+    dest_info["score"] = score
+    dest_info["highlights"] = highlights
+    if notes:
+        dest_info["notes"] = notes
+    return dest_info
+
+def score_destinations(destinations: List[str], preferences: Optional[str] = None,
+                       concurrent: Optional[bool] = None) -> Dict[str, dict]:
+    """Score every destination in one pass.
+
+    Args:
+        destinations (List[str]): Cities to evaluate; duplicates are scored once.
+        preferences (str, optional): Travel preferences used for scoring.
+        concurrent (bool, optional): Fan out per-city evaluation on the planner
+            thread pool. Defaults to REMOTE_INVENTORY.
+
+    Returns:
+        dict: Inventory city key -> evaluation, in request order.
+    """
+    if concurrent is None:
+        concurrent = REMOTE_INVENTORY
+
+    # Keyed by inventory city, so "Bengaluru" and "Bangalore" are scored once
+    cities = [resolve_city(city) for city in destinations]
+    tasks = {city: functools.partial(evaluate_destination, city, preferences) for city in cities}
+    outcomes = run_sub_searches(tasks, concurrent=concurrent)
+
+    results = {}
+    for city, outcome in outcomes.items():
+        if outcome.ok:
+            results[city] = outcome.value
+        else:
+            results[city] = {"city": city.title(), "score": 0, "highlights": [], "notes": [outcome.error]}
+    return results
+
+def pick_recommendation(results: Dict[str, dict]) -> Optional[dict]:
+    """Choose the best-scoring destination (first one wins ties)."""
+    if not results:
+        return None
+    best_destination = max(results.values(), key=lambda x: x["score"])
+    return {
+        "best_match": best_destination["city"],
+        "score": best_destination["score"],
+        "reasons": best_destination["highlights"]
+    }
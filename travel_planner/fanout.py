@@ -0,0 +1,129 @@
+"""
+Concurrent fan-out of independent sub-searches with per-search deadlines.
+
+The travel planner's flight, hotel and activity lookups do not depend on
+each other, so they run together on a bounded thread pool and the plan
+waits for the slowest one instead of the sum of all of them. A sub-search
+that misses its deadline is reported as a timed-out outcome so the caller
+can still assemble a partial plan. iter_sub_searches() yields the outcomes
+as they complete, for callers that stream a plan section by section.
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+from inventory import bind_backend
+from config import PLANNER_CONCURRENT_SEARCHES, PLANNER_MAX_WORKERS, SUB_SEARCH_TIMEOUT_SECONDS
+
+logger = logging.getLogger('travel_agent.travel_planner.fanout')
+
+# Shared, bounded pool for all planner sub-searches in this process
+_executor = ThreadPoolExecutor(max_workers=PLANNER_MAX_WORKERS, thread_name_prefix="planner-search")
+
+class SubSearchOutcome:
+    """Result of one sub-search: a value, or the reason there is none."""
+
+    __slots__ = ("name", "value", "error", "timed_out", "elapsed")
+
+    def __init__(self, name: str, value: Any = None, error: Optional[str] = None,
+                 timed_out: bool = False, elapsed: float = 0.0):
+        self.name = name
+        self.value = value
+        self.error = error
+        self.timed_out = timed_out
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def section(self) -> dict:
+        """Plan section to show in place of a sub-search that did not complete."""
+        return {
+            "status": "timeout" if self.timed_out else "error",
+            "error_message": self.error,
+        }
+
+def run_sub_searches(tasks: Mapping[str, Callable[[], Any]],
+                     timeout: float = SUB_SEARCH_TIMEOUT_SECONDS,
+                     timeouts: Optional[Mapping[str, float]] = None,
+                     concurrent: Optional[bool] = None) -> Dict[str, SubSearchOutcome]:
+    """Run independent sub-searches, each bounded by its own deadline.
+
+    Args:
+        tasks: Sub-search name -> zero-argument callable.
+        timeout: Default deadline in seconds for each sub-search.
+        timeouts: Optional per-name deadline overrides.
+        concurrent: Run on the shared thread pool (default from config) or inline, in order.
+
+    Returns:
+        dict: Sub-search name -> SubSearchOutcome, in the order the tasks were given.
+    """
+    outcomes = {outcome.name: outcome for outcome in iter_sub_searches(tasks, timeout, timeouts, concurrent)}
+    return {name: outcomes[name] for name in tasks}
+
+def iter_sub_searches(tasks: Mapping[str, Callable[[], Any]],
+                      timeout: float = SUB_SEARCH_TIMEOUT_SECONDS,
+                      timeouts: Optional[Mapping[str, float]] = None,
+                      concurrent: Optional[bool] = None) -> Iterator[SubSearchOutcome]:
+    """Run independent sub-searches like run_sub_searches, yielding each outcome as soon as it is ready.
+
+    Outcomes come in completion order (task order when run inline); a
+    sub-search that misses its deadline is yielded as timed out at the
+    deadline. Closing the iterator early cancels the sub-searches that
+    have not started.
+
+    Yields:
+        SubSearchOutcome: One per task.
+    """
+    timeouts = timeouts or {}
+    if concurrent is None:
+        concurrent = PLANNER_CONCURRENT_SEARCHES
+
+    if not concurrent:
+        for name, task in tasks.items():
+            started = time.perf_counter()
+            try:
+                outcome = SubSearchOutcome(name, value=task(), elapsed=time.perf_counter() - started)
+            except Exception as e:
+                logger.error("Sub-search %s failed: %s", name, e, exc_info=True)
+                outcome = SubSearchOutcome(name, error=f"{name} search failed: {str(e)}",
+                                           elapsed=time.perf_counter() - started)
+            yield outcome
+        return
+
+    started = time.perf_counter()
+    # Pool threads do not inherit the caller's pinned backend, so bind each task to it
+    futures = {_executor.submit(bind_backend(task)): name for name, task in tasks.items()}
+    deadlines = {future: started + timeouts.get(name, timeout) for future, name in futures.items()}
+    pending = set(futures)
+    try:
+        while pending:
+            wait_for = max(0.0, min(deadlines[future] for future in pending) - time.perf_counter())
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            # Task order among those that finished together
+            for future in [future for future in futures if future in done]:
+                pending.discard(future)
+                name = futures[future]
+                try:
+                    outcome = SubSearchOutcome(name, value=future.result(), elapsed=time.perf_counter() - started)
+                except Exception as e:
+                    logger.error("Sub-search %s failed: %s", name, e, exc_info=True)
+                    outcome = SubSearchOutcome(name, error=f"{name} search failed: {str(e)}",
+                                               elapsed=time.perf_counter() - started)
+                yield outcome
+            now = time.perf_counter()
+            for future in [future for future in futures if future in pending and deadlines[future] <= now]:
+                pending.discard(future)
+                future.cancel()
+                name = futures[future]
+                limit = timeouts.get(name, timeout)
+                logger.warning("Sub-search %s missed its %.1fs deadline; continuing with a partial plan", name, limit)
+                yield SubSearchOutcome(
+                    name, error=f"{name.replace('_', ' ').capitalize()} search timed out after {limit:.1f}s.",
+                    timed_out=True, elapsed=now - started)
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,259 @@
+"""
+Budget-constrained whole-trip optimizer.
+
+A trip is one outbound option, one return option, one hotel and a set of up
+to N activities. Every option has an integer cost in paise (already scaled by
+travelers or nights) and an integer quality score; the optimizer maximizes
+total quality subject to the budget and also returns the Pareto frontier of
+cost versus quality, so the caller can show what each extra rupee buys.
+
+The search never enumerates the cartesian product:
+
+1. Each category is reduced to its own Pareto frontier. Scores are small
+   integers, so this is a DP over score (cheapest cost for every reachable
+   score) rather than over rupee amounts. Activities are a cardinality-limited
+   knapsack, solved per activity count after discarding any activity beaten
+   by at least N others, which an exchange argument shows is never needed.
+2. The category frontiers are combined pairwise by Minkowski sum, pruning
+   dominated points after every step, so intermediate sets stay frontier-sized.
+
+The result is exact: every plan on the returned frontier is optimal for its cost.
+"""
+
+import bisect
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from flight_agent.connections import Itinerary
+from inventory import ActivityRecord, FlightRecord, HotelRecord, format_price
+
+# Quality score weights (integer points)
+FLIGHT_BASE_SCORE = 30
+FLIGHT_STOP_PENALTY = 10          # per connection
+FLIGHT_HOUR_PENALTY = 1           # per hour door to door
+HOTEL_STAR_SCORE = 4              # per star per night
+LUXURY_HOTEL_MULTIPLIER = 2
+ACTIVITY_RATING_SCORE = 10        # per rating point (4.5 stars -> 45)
+PREFERRED_CATEGORY_BONUS = 15
+
+class TripOption:
+    """One choice within a trip category, with its cost and quality score."""
+
+    __slots__ = ("category", "label", "cost_paise", "score", "record")
+
+    def __init__(self, category: str, label: str, cost_paise: int, score: int, record):
+        self.category = category
+        self.label = label
+        self.cost_paise = cost_paise
+        self.score = score
+        self.record = record
+
+    def __repr__(self) -> str:
+        return f"TripOption({self.category}: {self.label}, {self.cost_paise}, {self.score})"
+
+class TripPlan:
+    """A complete combination of options: one point on the cost/quality frontier."""
+
+    __slots__ = ("cost_paise", "score", "options")
+
+    def __init__(self, cost_paise: int, score: int, options: Tuple[TripOption, ...]):
+        self.cost_paise = cost_paise
+        self.score = score
+        self.options = options
+
+    def chosen(self, category: str) -> List[TripOption]:
+        return [option for option in self.options if option.category == category]
+
+    def cost_of(self, category: str) -> int:
+        return sum(option.cost_paise for option in self.chosen(category))
+
+    def to_dict(self) -> dict:
+        outbound, inbound, hotel = (self.chosen(c) for c in ("outbound", "return", "hotel"))
+        return {
+            "total_cost": format_price(self.cost_paise),
+            "quality_score": self.score,
+            "outbound": outbound[0].label if outbound else None,
+            "return": inbound[0].label if inbound else None,
+            "hotel": hotel[0].label if hotel else None,
+            "activities": [option.label for option in self.chosen("activity")],
+        }
+
+# ---------------------------------------------------------------------------
+# Candidate options
+# ---------------------------------------------------------------------------
+
+def _flight_score(stops: int, elapsed_minutes: int) -> int:
+    return FLIGHT_BASE_SCORE - FLIGHT_STOP_PENALTY * stops - FLIGHT_HOUR_PENALTY * (elapsed_minutes // 60)
+
+def flight_options(category: str, flights: Optional[Sequence[FlightRecord]],
+                   connections: Optional[Sequence[Itinerary]], travelers: int) -> List[TripOption]:
+    """Direct flights, or connecting itineraries when there are none, priced for all travelers."""
+    if flights:
+        return [
+            TripOption(category, f"{f.airline} {f.flight_number}", f.price_paise * travelers,
+                       _flight_score(0, f.duration_minutes), f)
+            for f in flights
+        ]
+    return [
+        TripOption(category,
+                   " + ".join(f"{leg.airline} {leg.flight_number}" for leg in itinerary.legs),
+                   itinerary.total_price_paise * travelers,
+                   _flight_score(itinerary.stops, itinerary.elapsed_minutes), itinerary)
+        for itinerary in connections or ()
+    ]
+
+def hotel_options(hotels: Optional[Sequence[HotelRecord]], nights: int,
+                  preferences: Optional[str] = None) -> List[TripOption]:
+    """Hotels priced for the whole stay; stars count double for luxury trips."""
+    nights = max(1, nights)
+    star_score = HOTEL_STAR_SCORE * nights
+    if preferences and "luxury" in preferences.lower():
+        star_score *= LUXURY_HOTEL_MULTIPLIER
+    return [
+        TripOption("hotel", f"{h.name} ({h.rating}★)", h.price_paise * nights, h.rating * star_score, h)
+        for h in hotels or ()
+    ]
+
+def activity_options(activities: Optional[Sequence[ActivityRecord]], travelers: int,
+                     preferred_category: Optional[str] = None) -> List[TripOption]:
+    """Activities priced for all travelers, with a bonus for the preferred category."""
+    preferred = preferred_category.lower() if preferred_category else None
+    return [
+        TripOption("activity", a.name, a.price_paise * travelers,
+                   round(a.rating * ACTIVITY_RATING_SCORE)
+                   + (PREFERRED_CATEGORY_BONUS if a.category.lower() == preferred else 0), a)
+        for a in activities or ()
+    ]
+
+# ---------------------------------------------------------------------------
+# Frontier algebra. Scores are small integers, so every category is solved as
+# a DP over score: a table maps each reachable score to the cheapest way to
+# reach it, as (cost_paise, choice). A choice is a TripOption, a tuple of
+# choices, or None, and is only flattened into a plan at the end.
+# ---------------------------------------------------------------------------
+
+Point = Tuple[int, int, object]  # (cost_paise, score, choice)
+
+def _flatten(choice, out: List[TripOption]) -> List[TripOption]:
+    if isinstance(choice, TripOption):
+        out.append(choice)
+    elif choice is not None:
+        for part in choice:
+            _flatten(part, out)
+    return out
+
+def _keep_cheapest(table: Dict[int, tuple], score: int, cost: int, choice) -> None:
+    current = table.get(score)
+    if current is None or cost < current[0]:
+        table[score] = (cost, choice)
+
+def pareto_frontier(table: Dict[int, tuple]) -> List[Point]:
+    """Points of a score table not beaten by a cheaper-or-equal, higher-scoring one, by increasing cost."""
+    frontier: List[Point] = []
+    cheapest = None
+    for score in sorted(table, reverse=True):
+        cost, choice = table[score]
+        if cheapest is None or cost < cheapest:
+            frontier.append((cost, score, choice))
+            cheapest = cost
+    frontier.reverse()
+    return frontier
+
+def combine_frontiers(first: List[Point], second: List[Point],
+                      max_cost: Optional[int] = None) -> List[Point]:
+    """Frontier of every pairing of a point from each frontier (Minkowski sum)."""
+    table: Dict[int, tuple] = {}
+    for cost_a, score_a, choice_a in first:
+        for cost_b, score_b, choice_b in second:
+            cost = cost_a + cost_b
+            if max_cost is not None and cost > max_cost:
+                break  # second is sorted by cost
+            _keep_cheapest(table, score_a + score_b, cost, (choice_a, choice_b))
+    return pareto_frontier(table)
+
+def single_choice_frontier(options: Sequence[TripOption]) -> List[Point]:
+    """Frontier for a category where exactly one option is chosen."""
+    table: Dict[int, tuple] = {}
+    for option in options:
+        _keep_cheapest(table, option.score, option.cost_paise, option)
+    return pareto_frontier(table)
+
+def activity_frontier(options: Sequence[TripOption], max_activities: int,
+                      max_cost: Optional[int] = None) -> List[Point]:
+    """Frontier over subsets of at most max_activities activities (including none)."""
+    if max_activities <= 0 or not options:
+        return [(0, 0, None)]
+
+    # An activity beaten (cost <= and score >=) by max_activities others is never
+    # needed: any plan using it leaves one of them free to swap in at no loss.
+    candidates = []
+    kept_costs: List[int] = []
+    for option in sorted(options, key=lambda o: (-o.score, o.cost_paise)):
+        if max_cost is not None and option.cost_paise > max_cost:
+            continue
+        if bisect.bisect_right(kept_costs, option.cost_paise) >= max_activities:
+            continue
+        bisect.insort(kept_costs, option.cost_paise)
+        candidates.append(option)
+
+    # by_count[k]: score -> cheapest (cost, choice) using exactly k activities
+    by_count: List[Dict[int, tuple]] = [{0: (0, None)}] + [{} for _ in range(max_activities)]
+    for option in candidates:
+        price, points = option.cost_paise, option.score
+        for k in range(max_activities - 1, -1, -1):
+            target = by_count[k + 1]
+            for score, (cost, choice) in by_count[k].items():
+                cost += price
+                if max_cost is not None and cost > max_cost:
+                    continue
+                current = target.get(score + points)
+                if current is None or cost < current[0]:
+                    target[score + points] = (cost, (choice, option))
+
+    table: Dict[int, tuple] = {}
+    for counted in by_count:
+        for score, (cost, choice) in counted.items():
+            _keep_cheapest(table, score, cost, choice)
+    return pareto_frontier(table)
+
+def optimize_trip(outbound: Sequence[TripOption], inbound: Sequence[TripOption],
+                  hotels: Sequence[TripOption], activities: Sequence[TripOption],
+                  max_activities: int, budget_paise: Optional[int] = None) -> Tuple[Optional[TripPlan], List[TripPlan]]:
+    """
+    Find the best trip within budget and the cost/quality frontier.
+
+    Categories with no options are left out of the plan rather than making
+    the trip infeasible, so a partial plan can still be optimized.
+
+    Args:
+        outbound: Outbound flight options.
+        inbound: Return flight options.
+        hotels: Hotel options.
+        activities: Activity options; any subset of up to max_activities may be chosen.
+        max_activities: Maximum number of activities in the trip.
+        budget_paise: Total budget, or None for no limit.
+
+    Returns:
+        tuple: (best plan within budget or None if nothing fits, frontier plans
+            within budget by increasing cost). Without a budget the best plan
+            is the highest-quality one.
+    """
+    frontier: List[Point] = [(0, 0, None)]
+    for options in (outbound, inbound, hotels):
+        if options:
+            frontier = combine_frontiers(frontier, single_choice_frontier(options), budget_paise)
+    if frontier:
+        # Activities can use at most what the cheapest fixed part leaves over
+        room = None if budget_paise is None else budget_paise - frontier[0][0]
+        frontier = combine_frontiers(frontier, activity_frontier(activities, max_activities, room), budget_paise)
+
+    plans = [TripPlan(cost, score, tuple(_flatten(choice, []))) for cost, score, choice in frontier]
+    return (plans[-1] if plans else None), plans
+
+def thin_frontier(plans: Sequence[TripPlan], limit: int) -> List[TripPlan]:
+    """At most limit plans spread evenly along the frontier, always keeping both ends."""
+    if len(plans) <= limit:
+        return list(plans)
+    if limit <= 1:
+        return list(plans[-1:])
+    step = (len(plans) - 1) / (limit - 1)
+    return [plans[round(i * step)] for i in range(limit)]
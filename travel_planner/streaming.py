@@ -0,0 +1,170 @@
+"""
+Streaming travel plans: sections as soon as they are ready.
+
+stream_travel_plan() runs the same sub-searches as
+create_comprehensive_travel_plan but yields each flight, hotel and activity
+section the moment its sub-search finishes, so a UI can show flights while
+hotels are still loading. A "summary" section (optimized plan, cost
+estimate, recommendations) computed from whatever arrived follows, and
+last comes the complete plan, identical to create_comprehensive_travel_plan
+for the same arguments.
+
+stream_plan_tool is the ADK form, an async generator tool. Each section
+is emitted as a runner event with the section under custom_metadata
+"travel_plan_section", and the complete plan is the tool's response, so
+the model sees exactly what the non-streaming tool returns. The travel
+planner registers it in place of create_comprehensive_travel_plan when
+config.STREAM_TRAVEL_PLANS is set.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from typing import AsyncGenerator, Iterator, Optional
+
+from inventory import GeneratorPin
+from logging_utils import LATENCY_BUCKETS_NS, METRICS, NS_PER_SECOND, metric_label, record_tool_call, sampled
+from .agent import (
+    PlanRequest, build_travel_plan, create_comprehensive_travel_plan, options_logger, plan_error, plan_section,
+    run_sub_query,
+)
+from .fanout import iter_sub_searches
+
+logger = logging.getLogger('travel_agent.travel_planner.streaming')
+
+FIRST_SECTION_LATENCY = METRICS.histogram(
+    "travel_agent_plan_first_section_seconds", "Time from a streamed plan's start to its first section.",
+    (), LATENCY_BUCKETS_NS, divisor=NS_PER_SECOND)
+
+# Plan fields repeated in the "summary" section, when present
+SUMMARY_FIELDS = ("trip_overview", "optimized_plan", "cost_quality_frontier", "cost_estimate", "recommendations",
+                  "incomplete_sections", "inventory_version")
+
+class PlanSection:
+    """One part of a streamed travel plan.
+
+    name is "outbound_flights", "return_flights", "hotels" or "activities"
+    (content as in the plan, in the order the sub-searches finish), then
+    "summary", then "plan" (content is the complete plan).
+    """
+
+    __slots__ = ("name", "content")
+
+    def __init__(self, name: str, content: dict):
+        self.name = name
+        self.content = content
+
+    def to_dict(self) -> dict:
+        return {"section": self.name, "content": self.content}
+
+def stream_travel_plan(
+    source: str,
+    destination: str,
+    travel_date: Optional[str] = None,
+    return_date: Optional[str] = None,
+    budget: Optional[int] = None,
+    travelers: int = 1,
+    preferences: Optional[str] = None,
+    compact: Optional[bool] = None,
+    top_k: Optional[int] = None
+) -> Iterator[PlanSection]:
+    """Creates a travel plan like create_comprehensive_travel_plan, section by section.
+
+    Args:
+        Same as create_comprehensive_travel_plan. Sections are always in
+        full; compact applies to the complete plan.
+
+    Yields:
+        PlanSection: Each sub-search section as it finishes, then "summary"
+            (unless the plan failed), then "plan".
+    """
+    started_ns = time.perf_counter_ns()
+    logger.info("Starting streamed travel plan: %s -> %s, %s travelers, budget: %s", source, destination, travelers, budget)
+    request = PlanRequest(source, destination, travel_date, return_date, budget, travelers, preferences, compact, top_k)
+    pin = GeneratorPin()
+    searches = pin.run(iter_sub_searches, {
+        name: functools.partial(run_sub_query, key) for name, key in request.sub_queries.items()
+    })
+    outcomes, sections = {}, {}
+    try:
+        # Per-option lines are logged for a sample of plans (LOG_SAMPLE_EVERY)
+        log_options = sampled(options_logger)
+        try:
+            for outcome in iter(functools.partial(pin.run, next, searches, None), None):
+                outcomes[outcome.name] = outcome
+                sections[outcome.name] = pin.run(plan_section, request, outcome.name, outcome, log_options)
+                if len(sections) == 1:
+                    FIRST_SECTION_LATENCY.observe(time.perf_counter_ns() - started_ns)
+                yield PlanSection(outcome.name, sections[outcome.name])
+        except Exception as e:
+            plan = plan_error(e)
+        else:
+            plan = pin.run(build_travel_plan, request, {name: outcomes[name] for name in request.sub_queries}, sections)
+        plan["inventory_version"] = pin.backend.catalog_version
+    finally:
+        pin.run(searches.close)
+        pin.release()
+
+    record_tool_call("stream_travel_plan", metric_label(request.destination), plan.get("status", "unknown"),
+                     time.perf_counter_ns() - started_ns)
+    if plan.get("status") == "success":
+        yield PlanSection("summary", {key: plan[key] for key in SUMMARY_FIELDS if key in plan})
+    yield PlanSection("plan", plan)
+
+class _SectionSteps:
+    """Steps a streamed plan on worker threads, closing it after the step its consumer abandoned.
+
+    A consumer cancelled while a step runs cannot close the generator (it
+    is still executing on the worker thread), so close() leaves that to
+    the step, which closes it, releasing its pin, as soon as it returns.
+    """
+
+    def __init__(self, sections: Iterator[PlanSection]):
+        self._sections = sections
+        self._lock = threading.Lock()
+        self._running = self._closed = False
+
+    def next(self) -> PlanSection:
+        with self._lock:
+            self._running = True
+        try:
+            return next(self._sections)
+        finally:
+            with self._lock:
+                self._running = False
+                if self._closed:
+                    self._sections.close()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._running:
+                return
+        self._sections.close()
+
+async def stream_plan_tool(source: str, destination: str, travel_date: Optional[str] = None,
+                           return_date: Optional[str] = None, budget: Optional[int] = None, travelers: int = 1,
+                           preferences: Optional[str] = None, compact: Optional[bool] = None,
+                           top_k: Optional[int] = None) -> AsyncGenerator[dict, None]:
+    # Imported here: google.adk is only loaded when an agent is built (see agent_utils.lazy_agent)
+    from google.adk.events import Event
+
+    steps = _SectionSteps(stream_travel_plan(source, destination, travel_date, return_date, budget, travelers,
+                                             preferences, compact, top_k))
+    try:
+        while True:
+            # Each step waits on sub-searches, so it runs off the event loop
+            section = await asyncio.to_thread(steps.next)
+            if section.name == "plan":
+                yield section.content
+                return
+            yield Event(custom_metadata={"travel_plan_section": section.to_dict()}, partial=True)
+    finally:
+        steps.close()
+
+# Registered under the plan tool's name and description, so the model, the
+# prompts and the LLM response cache see the same tool either way
+stream_plan_tool.__name__ = stream_plan_tool.__qualname__ = create_comprehensive_travel_plan.__name__
+stream_plan_tool.__doc__ = create_comprehensive_travel_plan.__doc__